@@ -22,9 +22,68 @@ import re
 import threading
 import signal
 import importlib
+import importlib.util
 
 sys.path.insert(1, os.path.join(os.path.dirname(__file__), 'lib'))
 
+LAUNCHED = time.time()
+
+class ImportTimer(object):
+    # --startup-report: times every module as it's imported (self / cumulative, the same as
+    # python -X importtime) so what's slowing down the boot can be picked out of the log.
+
+    def __init__(self):
+        self.local = threading.local()
+        self.times = []
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if hasattr(spec.loader, 'exec_module'):
+                    spec.loader = TimedLoader(spec.loader, self, fullname)
+                return spec
+        return None
+
+    def report(self, top=25):
+        lines = ['[STARTUP] %10s | %10s | imported module (slowest %s of %s)' % ('self [ms]', 'cumulative', top, len(self.times))]
+        for name, own, total in sorted(self.times, key=lambda x: x[2], reverse=True)[:top]:
+            lines.append('[STARTUP] %10.1f | %10.1f | %s' % (own * 1000, total * 1000, name))
+        return lines
+
+class TimedLoader(object):
+
+    def __init__(self, loader, timer, name):
+        self.loader = loader
+        self.timer = timer
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(self.loader, attr)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        stack = self.timer.local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += total
+            self.timer.times.append((self.name, total - children, total))
+
+IMPORT_TIMER = None
+if '--startup-report' in sys.argv:
+    IMPORT_TIMER = ImportTimer()
+    sys.meta_path.insert(0, IMPORT_TIMER)
+
 class test_the_requires(object):
 
     def __init__(self):
@@ -101,11 +160,11 @@ class test_the_requires(object):
                 module = key
                 if key in self.mappings:
                     module = self.mappings[key]
-                try:
-                    importlib.import_module(module, package=None)
-                except Exception:
-                    importlib.import_module(module.lower(), package=None)
-            except (ModuleNotFoundError) as e:
+                #only locate the module - actually importing every requirement here would load them all
+                #up front whether they end up being used or not.
+                if all([importlib.util.find_spec(module) is None, importlib.util.find_spec(module.lower()) is None]):
+                    failures[key] = value
+            except (ModuleNotFoundError, ValueError) as e:
                 failures[key] = value
 
         if failures:
@@ -136,6 +195,8 @@ from mylar import (
     webstart,
 )
 
+IMPORTED = time.time()
+
 import argparse
 
 
@@ -226,6 +287,7 @@ def main():
     parser.add_argument('--nolaunch', action='store_true', default=False, help='Prevent browser from launching on startup')
     parser.add_argument('--pidfile', default=None, help='Create a pid file (only relevant when running as a daemon)')
     parser.add_argument('--safe', action='store_true', default=False, help='redirect the startup page to point to the Manage Comics screen on startup')
+    parser.add_argument('--startup-report', action='store_true', default=False, help='Log how long each stage of startup (and each module import) took')
 
     parser_maintenance = subparsers.add_parser('maintenance', help='Enter maintenance mode (no GUI). Additional commands are available (maintenance --help)')
     parser_maintenance.add_argument('-xj', '--exportjson', default=None, action='store', help='Export existing mylar.db to json file') #, default=argparse.SUPPRESS)
@@ -375,7 +437,9 @@ def main():
         print('Initializing startup sequence....')
 
     #try:
+    init_start = time.time()
     mylar.initialize(mylar.CONFIG_FILE)
+    initialized = time.time()
     #except Exception as e:
     #    print e
     #    raise SystemExit('FATAL ERROR')
@@ -552,6 +616,13 @@ def main():
     # Try to start the server.
     webstart.initialize(web_config)
 
+    started = time.time()
+    logger.info('[STARTUP] Web interface accepting requests %.2fs after launch (imports: %.2fs / initialize: %.2fs / web server: %.2fs)' % (started - LAUNCHED, IMPORTED - LAUNCHED, initialized - init_start, started - initialized))
+    if IMPORT_TIMER is not None:
+        sys.meta_path.remove(IMPORT_TIMER)
+        for line in IMPORT_TIMER.report():
+            logger.info(line)
+
     #check for version here after web server initialized so it doesn't try to repeatidly hit github
     #for version info if it's already running
     versioncheck.versionload()
@@ -573,13 +644,13 @@ def main():
             try:
                 time.sleep(1)
             except KeyboardInterrupt:
-                mylar.GLOBAL_MESSAGES = {'status': 'success', 'event': 'shutdown', 'message': 'Now shutting down system.'}
+                mylar.events.publish({'status': 'success', 'event': 'shutdown', 'message': 'Now shutting down system.'})
                 time.sleep(1)
                 mylar.SIGNAL = 'shutdown'
         else:
             logger.info('Received signal: ' + mylar.SIGNAL)
             if mylar.SIGNAL == 'shutdown':
-                mylar.GLOBAL_MESSAGES = {'status': 'success', 'event': 'shutdown', 'message': 'Now shutting down system.'}
+                mylar.events.publish({'status': 'success', 'event': 'shutdown', 'message': 'Now shutting down system.'})
                 time.sleep(2)
                 mylar.shutdown()
             elif mylar.SIGNAL == 'restart':
@@ -0,0 +1,102 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# micro-benchmark for cv.GetIssuesInfo against a CV issues payload the size of a
+# long running series (ie. Detective Comics). Run from the root of the mylar directory:
+#     python benchmarks/cv_parse.py [issue_count] [rounds]
+
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mylar
+from mylar import cv
+
+class BenchConfig(object):
+    CV_ONLY = True
+
+def cv_issue_pages(issue_count, comicid='18058'):
+    """
+    Mirrors the json returned by /issues/?filter=volume:<id> - 100 results per page, carrying the
+    field_list mylar asks for. Synthetic rather than recorded, but shaped like the real thing where
+    GetIssuesInfo's cost / branches depend on it: full-length html descriptions (only the last 90
+    characters are checked for release dates), decimal / alpha / 'Issue #' numbering, the odd record
+    with no issue number (skipped), no store date, no cover date or no image.
+    """
+    filler = '<p><em>%s</em> faces a new threat as the city burns.</p>' + '<p>Written by Someone. Art by Someone Else.</p>' * 12
+    pages = []
+    for offset in range(0, issue_count, 100):
+        results = []
+        for n in range(offset, min(offset + 100, issue_count)):
+            description = filler % ('Issue Name %s' % n)
+            #only the odd issue carries digital/print release dates within the description.
+            if n % 10 == 0:
+                description += '<p>Digital release date: 2021-01-01 / Print release 2021-01-06</p>'
+            elif n % 17 == 0:
+                description = None
+            issue_number = str(n + 1)
+            if n % 50 == 7:
+                issue_number = '%s.1' % n
+            elif n % 50 == 13:
+                issue_number = '%sAU' % n
+            elif n % 50 == 21:
+                issue_number = 'Issue #%s' % (n + 1)
+            elif n % 250 == 99:
+                issue_number = None
+            image = {'icon_url': 'https://comicvine.gamespot.com/a/uploads/square_avatar/%s.jpg' % n,
+                     'small_url': 'https://comicvine.gamespot.com/a/uploads/scale_small/%s.jpg' % n,
+                     'medium_url': 'https://comicvine.gamespot.com/a/uploads/scale_medium/%s.jpg' % n,
+                     'original_url': 'https://comicvine.gamespot.com/a/uploads/original/%s.jpg' % n}
+            if n % 40 == 3:
+                image = None
+            results.append({'cover_date':        None if n % 60 == 5 else '19%02d-%02d-01' % (37 + n // 12 % 60, n % 12 + 1),
+                            'date_last_updated': '2021-01-01 00:00:00',
+                            'description':       description,
+                            'id':                100000 + n,
+                            'image':             image,
+                            'issue_number':      issue_number,
+                            'name':              'Issue Name %s' % n if n % 3 else None,
+                            'store_date':        '20%02d-%02d-15' % (n // 12 % 20, n % 12 + 1) if n % 2 else None,
+                            'volume':            {'api_detail_url': 'https://comicvine.gamespot.com/api/volume/4050-%s/' % comicid,
+                                                  'id': int(comicid), 'name': 'Detective Comics',
+                                                  'site_detail_url': 'https://comicvine.gamespot.com/detective-comics/4050-%s/' % comicid}})
+        pages.append(json.dumps({'error': 'OK', 'limit': 100, 'offset': offset, 'number_of_page_results': len(results),
+                                 'number_of_total_results': issue_count, 'status_code': 1, 'results': results, 'version': '1.0'}))
+    return pages
+
+def run(issue_count=1100, rounds=5):
+    mylar.CONFIG = BenchConfig()
+    pages = cv_issue_pages(issue_count)
+    timings = []
+    for r in range(rounds):
+        start = time.perf_counter()
+        total = 0
+        for page in pages:
+            issues, firstdate = cv.GetIssuesInfo('18058', json.loads(page))
+            total += len(issues)
+        timings.append(time.perf_counter() - start)
+    return {'benchmark': 'cv.GetIssuesInfo',
+            'issues': total,
+            'rounds': rounds,
+            'best_s': round(min(timings), 5),
+            'mean_s': round(sum(timings) / len(timings), 5)}
+
+if __name__ == '__main__':
+    args = [int(x) for x in sys.argv[1:3]]
+    print(json.dumps(run(*args)))
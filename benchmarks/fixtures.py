@@ -0,0 +1,171 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# generated, offline fixtures for the benchmark suite (see run.py). Everything is derived from a
+# fixed seed so two runs (or two commits) are timed against exactly the same data.
+
+import os
+import sys
+import random
+import sqlite3
+
+PROG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROG_DIR, 'lib'))
+sys.path.insert(0, PROG_DIR)
+
+import mylar
+from mylar import config
+
+SEED = 1938
+
+WORDS = ('Amazing', 'Astonishing', 'Batman', 'Black', 'Captain', 'Cosmic', 'Dark', 'Detective', 'Doom',
+         'Fantastic', 'Flash', 'Green', 'Hulk', 'Invincible', 'Iron', 'Justice', 'Knights', 'Legion',
+         'Lantern', 'Man', 'Marvel', 'Moon', 'Night', 'Patrol', 'Planet', 'Saga', 'Savage', 'Shadow',
+         'Spider', 'Squad', 'Strange', 'Suicide', 'Superman', 'Swamp', 'Tales', 'Thing', 'Thor',
+         'Titans', 'Uncanny', 'Venom', 'Wonder', 'Woman', 'X-Men', 'Young')
+PUBLISHERS = ('DC Comics', 'Marvel', 'Image', 'Dark Horse', 'IDW Publishing', 'Boom! Studios')
+GROUPS = ('(Digital) (Zone-Empire)', '(digital) (Son of Ultron-Empire)', '(Webrip) (The Last Kryptonian-DCP)', '(2 covers) (digital) (Minutemen-Faessla)', '')
+
+def setup(workdir):
+    # points mylar at a throwaway data dir with a default config and an empty (but complete) db.
+    mylar.PROG_DIR = PROG_DIR
+    mylar.DATA_DIR = workdir
+    mylar.DB_FILE = os.path.join(workdir, 'mylar.db')
+    mylar.QUIET = True
+    mylar.LOG_LEVEL = 0
+    cfgfile = os.path.join(workdir, 'config.ini')
+    with open(cfgfile, 'w') as f:
+        f.write('[General]\n')
+    mylar.CONFIG = config.Config(cfgfile).read(startup=True)
+    mylar.dbcheck()
+
+def series_list(count):
+    rnd = random.Random(SEED)
+    series = []
+    names = set()
+    while len(series) < count:
+        name = ' '.join(rnd.sample(WORDS, rnd.choice((1, 2, 2, 3))))
+        year = rnd.randint(1960, 2022)
+        if (name, year) in names:
+            continue
+        names.add((name, year))
+        series.append({'comicid':   str(100000 + len(series)),
+                       'name':      name,
+                       'year':      str(year),
+                       'publisher': rnd.choice(PUBLISHERS)})
+    return series
+
+def issue_filename(series, number, rnd):
+    group = rnd.choice(GROUPS)
+    return ('%s %03d (%s) %s.cbz' % (series['name'], number, series['year'], group)).replace('  ', ' ').replace(' .cbz', '.cbz')
+
+def library_tree(root, files, per_series=50):
+    # writes stub cbz files as <root>/<Series (Year)>/<Series ### (Year) (tags)>.cbz (not 0-byte, as
+    # the filechecker skips those as placeholders).
+    rnd = random.Random(SEED)
+    series = series_list(max(1, files // per_series))
+    created = 0
+    for s in series:
+        folder = os.path.join(root, '%s (%s)' % (s['name'], s['year']))
+        os.makedirs(folder, exist_ok=True)
+        s['location'] = folder
+        for n in range(1, per_series + 1):
+            if created >= files:
+                break
+            with open(os.path.join(folder, issue_filename(s, n, rnd)), 'wb') as f:
+                f.write(b'PK\x05\x06' + b'\x00' * 18)
+            created += 1
+    return series
+
+def filenames(count):
+    rnd = random.Random(SEED)
+    series = series_list(max(1, count // 20))
+    return [issue_filename(rnd.choice(series), rnd.randint(1, 900), rnd) for _ in range(count)]
+
+def populate_db(series_count, issue_count, locations=None):
+    # bulk loads comics / issues straight through sqlite3 - this is fixture setup, not what's being timed.
+    rnd = random.Random(SEED)
+    series = series_list(series_count)
+    per_series = max(1, issue_count // series_count)
+    conn = sqlite3.connect(mylar.DB_FILE)
+    comics = []
+    issues = []
+    for s in series:
+        location = (locations or {}).get(s['comicid'], os.path.join(mylar.DATA_DIR, 'library', '%s (%s)' % (s['name'], s['year'])))
+        comics.append((s['comicid'], s['name'], s['name'].lower(), s['year'], 'Active', 0, per_series, s['publisher'],
+                       location, str(per_series), per_series * 1000, '2022-01-01', 'Print', s['name'].lower(), s['name']))
+        for n in range(1, per_series + 1):
+            status = rnd.choice(('Skipped', 'Skipped', 'Wanted', 'Downloaded', 'Archived'))
+            issues.append(('%s%04d' % (s['comicid'], n), s['name'], 'Issue %s' % n, str(n), '2021-06-01', status, s['comicid'],
+                           '%s-%02d-15' % (int(s['year']) + n // 12, n % 12 + 1), '%s-%02d-01' % (int(s['year']) + n // 12, n % 12 + 1), n * 1000))
+    conn.executemany('INSERT INTO comics (ComicID, ComicName, ComicSortName, ComicYear, Status, Have, Total, ComicPublisher, ComicLocation, LatestIssue, intLatestIssue, LatestDate, Type, DynamicComicName, ComicName_Filesafe) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)', comics)
+    conn.executemany('INSERT INTO issues (IssueID, ComicName, IssueName, Issue_Number, DateAdded, Status, ComicID, ReleaseDate, IssueDate, Int_IssueNumber) VALUES (?,?,?,?,?,?,?,?,?,?)', issues)
+    conn.commit()
+    conn.close()
+    return series
+
+def populate_rssdb(rows, series):
+    rnd = random.Random(SEED)
+    entries = []
+    for n in range(rows):
+        s = rnd.choice(series)
+        issue = rnd.randint(1, 120)
+        title = '%s %03d (%s) (digital) (Zone-Empire).cbz' % (s['name'], issue, s['year'])
+        entries.append((title, 'https://indexer.example/getnzb/%08d.nzb' % n, 'Tue, 01 Jun 2021 12:%02d:00 +0000' % (n % 60),
+                        rnd.choice(('DDL(GetComics)', 'experimental', 'Bench (newznab)')), str(rnd.randint(20, 90) * 1024 * 1024), str(issue), s['name']))
+    conn = sqlite3.connect(mylar.DB_FILE)
+    conn.executemany('INSERT OR IGNORE INTO rssdb (Title, Link, Pubdate, Site, Size, Issue_Number, ComicName) VALUES (?,?,?,?,?,?,?)', entries)
+    conn.commit()
+    conn.close()
+
+def rss_wanted(series, count):
+    # rows in the shape of the rss_queue search.py hands to rsscheck.nzbdbsearch (its VariableTable columns).
+    rnd = random.Random(SEED)
+    rsslist = []
+    for n in range(count):
+        s = rnd.choice(series)
+        issue = str(rnd.randint(1, 120))
+        rsslist.append((s['name'], s['name'], issue, s['year'], s['year'], s['publisher'], '2021-06-01', '2021-06-01',
+                        'W%s-%s' % (s['comicid'], n), None, None, None, None, None, 'want', 'yes', s['comicid'], s['name'],
+                        0, 0, None, None, 'Print', 0))
+    return rsslist
+
+def search_results(series, count):
+    # provider results for one wanted issue - a few genuine hits mixed in with near misses.
+    rnd = random.Random(SEED)
+    entries = []
+    for n in range(count):
+        if n % 5 == 0:
+            title = '%s %03d (%s) (digital) (Zone-Empire).cbz' % (series['name'], 7, series['year'])
+        else:
+            title = '%s %s %03d (%s) (digital) (Zone-Empire).cbz' % (series['name'], rnd.choice(WORDS), rnd.randint(1, 60), rnd.randint(1990, 2022))
+        entries.append({'title':   title,
+                        'link':    'https://indexer.example/getnzb/%08d.nzb' % n,
+                        'pubdate': 'Tue, 01 Jun 2021 12:00:00 +0000',
+                        'length':  str(rnd.randint(20, 90) * 1024 * 1024),
+                        'site':    'Bench',
+                        'pack':    False})
+    return entries
+
+def search_info(series):
+    # rss mode, so the size comes from the entry itself rather than a feedparser enclosure.
+    return {'ComicName': series['name'], 'nzbprov': 'newznab', 'RSS': 'yes', 'UseFuzzy': None,
+            'StoreDate': '2021-05-26', 'IssueDate': '2021-07-01', 'digitaldate': None, 'booktype': 'Print',
+            'ignore_booktype': False, 'SeriesYear': series['year'], 'ComicVersion': None, 'IssDateFix': 'no',
+            'ComicYear': series['year'], 'IssueID': '%s0007' % series['comicid'], 'ComicID': series['comicid'],
+            'IssueNumber': '7', 'manual': False, 'newznab_host': ('Bench', 'https://indexer.example', None, 'key', None, '1'),
+            'torznab_host': None, 'oneoff': False, 'tmpprov': 'Bench (newznab)', 'SARC': None, 'IssueArcID': None,
+            'cmloopit': 1, 'findcomiciss': '7', 'intIss': 7000, 'chktpb': 0, 'smode': None,
+            'provider_stat': {'type': 'newznab', 'id': 1, 'name': 'Bench'}, 'foundc': {'status': False}}
@@ -0,0 +1,201 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# offline benchmark suite for the parsing, matching and db hot paths. Run from the root of the mylar directory:
+#     python benchmarks/run.py [--scale 1.0] [--only name,name] [--output results.json] [--compare old.json]
+#
+# At --scale 1.0 the fixtures are a 50k file library tree, a 3k series / 200k issue mylar.db, a 20k row
+# rssdb and a 1,100 issue CV payload. Results are written as json (with the commit they were taken
+# against) so runs from two commits can be compared with --compare.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import traceback
+
+import fixtures
+import cv_parse
+
+import mylar
+from mylar import filechecker, search_filer, rsscheck, helpers, updater, cv
+
+BENCHMARKS = []
+
+def benchmark(name, rounds=5):
+    def wrap(func):
+        BENCHMARKS.append({'name': name, 'func': func, 'rounds': rounds})
+        return func
+    return wrap
+
+class Fixtures(object):
+    # built once per run and shared by every benchmark.
+
+    def __init__(self, workdir, scale):
+        self.workdir = workdir
+        self.scale = scale
+        start = time.perf_counter()
+        fixtures.setup(workdir)
+        self.library_root = os.path.join(workdir, 'library')
+        self.library = fixtures.library_tree(self.library_root, max(50, int(50000 * scale)))
+        self.filenames = fixtures.filenames(max(100, int(5000 * scale)))
+        locations = dict((s['comicid'], s['location']) for s in self.library)
+        self.series = fixtures.populate_db(max(10, int(3000 * scale)), max(100, int(200000 * scale)), locations)
+        fixtures.populate_rssdb(max(100, int(20000 * scale)), self.series)
+        self.rsslist = fixtures.rss_wanted(self.series, max(10, int(200 * scale)))
+        self.results = fixtures.search_results(self.series[0], max(50, int(500 * scale)))
+        self.cv_pages = cv_parse.cv_issue_pages(1100)
+        self.setup_s = round(time.perf_counter() - start, 3)
+
+
+@benchmark('filechecker.parseit')
+def bench_parseit(fx):
+    fc = filechecker.FileChecker(justparse=True)
+    for filename in fx.filenames:
+        fc.parseit(fx.library_root, filename)
+    return len(fx.filenames)
+
+@benchmark('filechecker.listFiles', rounds=1)
+def bench_listfiles(fx):
+    # an import-style scan of the entire library tree.
+    fc = filechecker.FileChecker(dir=fx.library_root, justparse=True)
+    results = fc.listFiles()
+    return results['comiccount']
+
+@benchmark('filechecker.listFiles[series]')
+def bench_listfiles_series(fx):
+    # the per-series scan that a rescan does.
+    s = fx.library[0]
+    fc = filechecker.FileChecker(dir=s['location'], watchcomic=s['name'], Publisher=s['publisher'])
+    results = fc.listFiles()
+    return results['comiccount']
+
+@benchmark('search_filer.search_check')
+def bench_search_check(fx):
+    #every round is the same batch of results - time the matching, not the verdict cache.
+    mylar.CONFIG.SEARCH_VERDICT_CACHE = False
+    sfs = search_filer.search_check()
+    sfs.checker(fx.results, fixtures.search_info(fx.series[0]))
+    return len(fx.results)
+
+@benchmark('rsscheck.nzbdbsearch', rounds=3)
+def bench_nzbdbsearch(fx):
+    results = rsscheck.nzbdbsearch(None, None, rsslist=fx.rsslist)
+    return len(fx.rsslist)
+
+@benchmark('helpers.havetotals', rounds=3)
+def bench_havetotals(fx):
+    return len(helpers.havetotals())
+
+@benchmark('updater.forceRescan', rounds=3)
+def bench_forcerescan(fx):
+    updater.forceRescan(fx.library[0]['comicid'])
+    return 1
+
+@benchmark('cv.GetIssuesInfo')
+def bench_getissuesinfo(fx):
+    total = 0
+    for page in fx.cv_pages:
+        issues, firstdate = cv.GetIssuesInfo('18058', json.loads(page))
+        total += len(issues)
+    return total
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=fixtures.PROG_DIR, stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    except Exception:
+        return None
+
+def run(scale=1.0, only=None):
+    workdir = tempfile.mkdtemp(prefix='mylar_bench_')
+    try:
+        fx = Fixtures(workdir, scale)
+        results = []
+        for bench in BENCHMARKS:
+            if only and bench['name'] not in only:
+                continue
+            timings = []
+            entry = {'name': bench['name'], 'rounds': bench['rounds']}
+            try:
+                for r in range(bench['rounds']):
+                    start = time.perf_counter()
+                    ops = bench['func'](fx)
+                    timings.append(time.perf_counter() - start)
+            except Exception as e:
+                entry['error'] = '%s: %s' % (type(e).__name__, e)
+                entry['traceback'] = traceback.format_exc()
+            if timings:
+                entry.update({'ops':      ops,
+                              'best_s':   round(min(timings), 5),
+                              'median_s': round(statistics.median(timings), 5),
+                              'mean_s':   round(statistics.mean(timings), 5)})
+            results.append(entry)
+            sys.stderr.write('%-32s %s\n' % (bench['name'], entry.get('error', '%ss' % entry.get('median_s'))))
+        return {'commit':    git_commit(),
+                'python':    platform.python_version(),
+                'platform':  platform.platform(),
+                'scale':     scale,
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'setup_s':   fx.setup_s,
+                'results':   results}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def compare(old, new):
+    # median against median - anything more than 10% either way is flagged.
+    before = dict((r['name'], r) for r in old['results'])
+    lines = ['%-32s %12s %12s %8s' % ('benchmark', old.get('commit') or 'old', new.get('commit') or 'new', 'change')]
+    for r in new['results']:
+        o = before.get(r['name'])
+        if o is None or 'median_s' not in o or 'median_s' not in r:
+            lines.append('%-32s %12s %12s' % (r['name'], o.get('median_s', '-') if o else '-', r.get('median_s', '-')))
+            continue
+        change = (r['median_s'] - o['median_s']) / o['median_s'] * 100 if o['median_s'] else 0
+        flag = ''
+        if change > 10:
+            flag = ' SLOWER'
+        elif change < -10:
+            flag = ' faster'
+        lines.append('%-32s %12.5f %12.5f %+7.1f%%%s' % (r['name'], o['median_s'], r['median_s'], change, flag))
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mylar benchmark suite')
+    parser.add_argument('--scale', type=float, default=1.0, help='fixture size multiplier (1.0 = 50k files / 200k issues)')
+    parser.add_argument('--only', help='comma separated list of benchmark names to run')
+    parser.add_argument('--output', help='write the results json to this file (default is stdout)')
+    parser.add_argument('--compare', help='previous results json to compare against')
+    args = parser.parse_args()
+
+    only = None
+    if args.only:
+        only = [x.strip() for x in args.only.split(',')]
+    results = run(args.scale, only)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            sys.stderr.write(compare(json.load(f), results) + '\n')
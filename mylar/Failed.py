@@ -222,7 +222,7 @@ class FailedProcessor(object):
         if mylar.CONFIG.FAILED_AUTO:
             failed_msg = '%s (%s) #%s failed to download. Retrying the search but ignoring the bad result.' % (issuenzb['ComicName'], issuenzb['ComicYear'], issuenzb['Issue_Number'])
             logger.info(module + ' Sending back to search to see if we can find something that will not fail.')
-            mylar.GLOBAL_MESSAGES = {'status': 'failure', 'comicname': issuenzb['ComicName'], 'seriesyear': issuenzb['ComicYear'], 'comicid': comicid, 'tables': 'tables', 'message': failed_msg}
+            mylar.events.publish({'status': 'failure', 'comicname': issuenzb['ComicName'], 'seriesyear': issuenzb['ComicYear'], 'comicid': comicid, 'tables': 'tables', 'message': failed_msg})
             self._log('Sending back to search to see if we can find something better that will not fail.')
             self.valreturn.append({"self.log":    self.log,
                                    "mode":        'retry',
@@ -235,7 +235,7 @@ class FailedProcessor(object):
             return self.queue.put(self.valreturn)
         else:
             failed_msg = '%s (%s) #%s failed to download.' % (issuenzb['ComicName'], issuenzb['ComicYear'], issuenzb['Issue_Number'])
-            mylar.GLOBAL_MESSAGES = {'status': 'failure', 'comicname': issuenzb['ComicName'], 'seriesyear': issuenzb['ComicYear'], 'comicid': comicid, 'tables': 'tables', 'message': failed_msg}
+            mylar.events.publish({'status': 'failure', 'comicname': issuenzb['ComicName'], 'seriesyear': issuenzb['ComicYear'], 'comicid': comicid, 'tables': 'tables', 'message': failed_msg})
             logger.info(module + ' Stopping search here as automatic handling of failed downloads is not enabled *hint*')
             self._log('Stopping search here as automatic handling of failed downloads is not enabled *hint*')
             self.valreturn.append({"self.log": self.log,
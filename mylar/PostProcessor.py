@@ -28,7 +28,7 @@ import pathlib
 from xml.dom.minidom import parseString
 import mylar
 
-from mylar import logger, db, helpers, updater, notifiers, filechecker, weeklypull, getimage
+from mylar import logger, db, helpers, updater, notifiers, filechecker, weeklypull, getimage, metrics
 
 class PostProcessor(object):
     """
@@ -110,6 +110,7 @@ class PostProcessor(object):
 #        logger.log(message, level)
         self.log += message + '\n'
 
+    @metrics.timed('postprocess', stage='pre_scripts')
     def _run_pre_scripts(self, nzb_name, nzb_folder, seriesmetadata, filename, file_path):
         """
         Executes any pre scripts defined in the config.
@@ -157,6 +158,7 @@ class PostProcessor(object):
            logger.warn('Unable to run pre_script: %s' % (script_cmd,))
            self._log('Unable to run pre_script: %s' % (script_cmd,))
 
+    @metrics.timed('postprocess', stage='extra_scripts')
     def _run_extra_scripts(self, nzb_name, nzb_folder, filen, folderp, seriesmetadata):
         """
         Executes any extra scripts defined in the config.
@@ -368,6 +370,7 @@ class PostProcessor(object):
             self._log('Failed to remove temporary directory')
 
 
+    @metrics.timed('postprocess', stage='process')
     def Process(self):
             module = self.module
             self._log('nzb name: %s' % self.nzb_name)
@@ -465,6 +468,9 @@ class PostProcessor(object):
                         filelist = {}
                         filelist['comiclist'] =  []
                         filelist['comiccount'] = 0
+                #resolve the series / issueid lookups for the entire filelist up front.
+                planner = MatchPlanner(filelist['comiclist'])
+
                 #preload the entire ALT list in here.
                 alt_list = []
                 alt_db = myDB.select("SELECT * FROM Comics WHERE AlternateSearch != 'None'")
@@ -530,7 +536,7 @@ class PostProcessor(object):
                             tmp_manual_list = {}
                             tmp_oneoff = {}
                             logger.info('issueid detected in filename: %s' % fl['issueid'])
-                            ssi = myDB.selectone('SELECT ComicID, IssueID, IssueArcID, IssueNumber, ComicName, SeriesYear, StoryArc, StoryArcID, Publisher, Volume, ReadingOrder FROM storyarcs WHERE IssueID=?', [fl['issueid']]).fetchone()
+                            ssi = planner.storyarc(fl['issueid'])
                             if ssi is not None:
                                 annualtype = None
                                 annualseries = None
@@ -555,15 +561,13 @@ class PostProcessor(object):
                                               "Volume":          ssi['Volume'],
                                               "ComicName":       ssi['ComicName']}
 
-                            csi = myDB.selectone('SELECT i.ComicID, i.IssueID, i.Issue_Number, c.ComicName, c.ComicYear, c.AgeRating FROM comics as c JOIN issues as i ON c.ComicID = i.ComicID WHERE i.IssueID=?', [fl['issueid']]).fetchone()
-                            if csi is None:
-                                csi = myDB.selectone('SELECT a.ComicID as comicid, a.IssueID, a.Issue_Number, a.ReleaseComicName, c.ComicName, c.ComicYear, c.AgeRating FROM comics as c JOIN annuals as a ON c.ComicID = a.ComicID WHERE a.IssueID=? AND NOT a.Deleted', [fl['issueid']]).fetchone()
-                                if csi is not None:
-                                    annchk = 'yes'
+                            csi, csi_annual = planner.comic_issue(fl['issueid'])
+                            if csi_annual is True:
+                                annchk = 'yes'
 
                             osi = None
                             if all([csi is None, ssi is None]):
-                                osi = myDB.selectone('select s.Issue_Number, s.ComicName, s.IssueID, s.ComicID, w.seriesyear FROM snatched AS s INNER JOIN nzblog AS n ON s.IssueID = n.IssueID INNER JOIN weekly AS w ON s.IssueID = w.IssueID WHERE s.IssueID = ? AND n.OneOff = 1 AND s.ComicName IS NOT NULL', [fl['issueid']]).fetchone()
+                                osi = planner.oneoff(fl['issueid'])
                                 if osi is not None:
                                     tmp_oneoff = {"ComicID":         osi['ComicID'],
                                                   "IssueID":         osi['IssueID'],
@@ -740,15 +744,13 @@ class PostProcessor(object):
                                 oneoff_issuelist.append(tmp_oneoff)
                             continue
 
-                        tmpsql = "SELECT * FROM comics WHERE DynamicComicName IN ({seq}) COLLATE NOCASE".format(seq=','.join('?' * len(loopchk)))
-                        comicseries = myDB.select(tmpsql, tuple(loopchk))
+                        comicseries = planner.series(loopchk)
 
                     if not comicseries or orig_seriesname != mod_seriesname:
                         if any(['special' in orig_seriesname.lower(), 'annual' in orig_seriesname.lower()]) and all([mylar.CONFIG.ANNUALS_ON, orig_seriesname != mod_seriesname]):
                             if not any(re.sub('[\|\s]', '', orig_seriesname).lower() == x for x in loopchk):
                                 loopchk.append(re.sub('[\|\s]', '', orig_seriesname.lower()))
-                                tmpsql = "SELECT * FROM comics WHERE DynamicComicName IN ({seq}) COLLATE NOCASE".format(seq=','.join('?' * len(loopchk)))
-                                comicseries = myDB.select(tmpsql, tuple(loopchk))
+                                comicseries = planner.series(loopchk)
                                 #if not comicseries:
                                 #    logger.error('[%s][%s] No Series named %s - checking against Story Arcs (just in case). If I do not find anything, maybe you should be running Import?' % (module, fl['comicfilename'], fl['series_name']))
                                 #    continue
@@ -779,14 +781,14 @@ class PostProcessor(object):
                                 ]
                             )
                         ):
-                            dbcheck = myDB.selectone('SELECT Status FROM issues WHERE ComicID=? and Int_IssueNumber=?', [wv['ComicID'], tmp_iss]).fetchone()
+                            dbcheck = planner.issues(wv['ComicID'], tmp_iss)
                             if not dbcheck and mylar.CONFIG.ANNUALS_ON:
-                                dbcheck = myDB.selectone('SELECT Status FROM annuals WHERE ComicID=? and Int_IssueNumber=?', [wv['ComicID'], tmp_iss]).fetchone()
+                                dbcheck = planner.issues(wv['ComicID'], tmp_iss, annual=True)
                             if dbcheck:
-                                if any([dbcheck[0] == 'Wanted', dbcheck[0] == 'Snatched']):
-                                    logger.fdebug('Series is 100%s complete, but specific issue %s matched up to a %s status. Let\'s Go!' % ('%', tmp_iss, dbcheck[0]))
+                                if any([dbcheck[0]['Status'] == 'Wanted', dbcheck[0]['Status'] == 'Snatched']):
+                                    logger.fdebug('Series is 100%s complete, but specific issue %s matched up to a %s status. Let\'s Go!' % ('%', tmp_iss, dbcheck[0]['Status']))
                                 else:
-                                    logger.fdebug('Series is 100%s complete, however status is not Wanted (or Snatched), but %s. Set to Wanted for this to post-process on the next run.' % ('%', dbcheck[0]))
+                                    logger.fdebug('Series is 100%s complete, however status is not Wanted (or Snatched), but %s. Set to Wanted for this to post-process on the next run.' % ('%', dbcheck[0]['Status']))
                                     continue
                             else:
                                 logger.warn('%s [%s] is either Paused or in an Ended status with 100%s completion. Ignoring for match.' % (wv['ComicName'], wv['ComicYear'], '%'))
@@ -973,15 +975,15 @@ class PostProcessor(object):
                                         fcdigit = helpers.issuedigits(re.sub('special', '', str(temploc.lower())).strip())
                                     logger.fdebug('%s Annual/Special detected [%s]. ComicID assigned as %s' % (module, fcdigit, cs['ComicID']))
                                 annchk = "yes"
-                                issuechk = myDB.select("SELECT * from annuals WHERE ComicID=? AND Int_IssueNumber=? AND NOT Deleted", [cs['ComicID'], fcdigit])
+                                issuechk = planner.issues(cs['ComicID'], fcdigit, annual=True)
                             else:
                                 annchk = "no"
                                 if temploc is not None:
                                     fcdigit = helpers.issuedigits(temploc)
-                                    issuechk = myDB.select("SELECT * from issues WHERE ComicID=? AND Int_IssueNumber=?", [cs['ComicID'], fcdigit])
+                                    issuechk = planner.issues(cs['ComicID'], fcdigit)
                                 else:
                                     fcdigit = None
-                                    issuechk = myDB.select("SELECT * from issues WHERE ComicID=?", [cs['ComicID']])
+                                    issuechk = planner.issues(cs['ComicID'])
 
                             if not issuechk:
                                 try:
@@ -1008,16 +1010,17 @@ class PostProcessor(object):
                                     logger.error('%s %s failed to update comic.' % (module, cs['ComicName']))
                                     continue
 
+                                planner.invalidate(cs['ComicID'])
                                 if annchk == 'yes':
-                                    issuechk = myDB.select("SELECT * from annuals WHERE ComicID=? AND Int_IssueNumber=? AND NOT Deleted", [cs['ComicID'], fcdigit])
+                                    issuechk = planner.issues(cs['ComicID'], fcdigit, annual=True)
                                 else:
-                                    issuechk = myDB.select("SELECT * from issues WHERE ComicID=? AND Int_IssueNumber=?", [cs['ComicID'], fcdigit])
+                                    issuechk = planner.issues(cs['ComicID'], fcdigit)
                                 if not issuechk:
                                     logger.fdebug('%s No corresponding issue #%s found for %s even after refreshing. It might not have the information available as of yet...' % (module, temploc, cs['ComicID']))
                                     continue
 
                             for isc in issuechk:
-                                if any([temploc is not None, temploc != 999999999999999]) and all([annchk =='no', helpers.issuedigits(temploc) != helpers.issuedigits(isc['Issue_Number'])]) or all([annchk == 'yes', helpers.issuedigits(re.sub('annual', '', temploc.lower()).strip()) != helpers.issuedigits(isc['Issue_Number'])]):
+                                if any([temploc is not None, temploc != 999999999999999]) and all([annchk =='no', helpers.issuedigits(temploc) != isc['Int_IssueNumber']]) or all([annchk == 'yes', helpers.issuedigits(re.sub('annual', '', temploc.lower()).strip()) != isc['Int_IssueNumber']]):
                                     logger.fdebug('issues dont match. Skipping')
                                     continue
 
@@ -2291,7 +2294,7 @@ class PostProcessor(object):
                 if m_event is not None:
                     d_line['event'] = m_event
 
-                mylar.GLOBAL_MESSAGES = d_line
+                mylar.events.publish(d_line)
 
                 if mylar.APILOCK is True:
                     mylar.APILOCK = False
@@ -2301,6 +2304,7 @@ class PostProcessor(object):
             else:
                 pass
 
+    @metrics.timed('postprocess', stage='nzb_or_oneoff')
     def nzb_or_oneoff_pp(self, tinfo=None, manual=None):
         module = self.module
         myDB = db.DBConnection()
@@ -2737,6 +2741,7 @@ class PostProcessor(object):
                 return self.queue.put(self.valreturn)
 
 
+    @metrics.timed('postprocess', stage='process_next')
     def Process_next(self, comicid, issueid, issuenumOG, ml=None, stat=None):
             if stat is None: stat = ' [1/1]'
             module = self.module
@@ -3069,9 +3074,9 @@ class PostProcessor(object):
 
                     from . import cmtagmylar
                     if ml is None:
-                        pcheck = cmtagmylar.run(self.nzb_folder, issueid=issueid, comversion=vol_label, filename=os.path.join(odir, ofilename), readingorder=readingorder, agerating=agerating)
+                        pcheck = cmtagmylar.run(self.nzb_folder, issueid=issueid, comversion=vol_label, filename=os.path.join(odir, ofilename), readingorder=readingorder, agerating=agerating, destination=comlocation)
                     else:
-                        pcheck = cmtagmylar.run(self.nzb_folder, issueid=issueid, comversion=vol_label, manual="yes", filename=ml['ComicLocation'], readingorder=readingorder, agerating=agerating)
+                        pcheck = cmtagmylar.run(self.nzb_folder, issueid=issueid, comversion=vol_label, manual="yes", filename=ml['ComicLocation'], readingorder=readingorder, agerating=agerating, destination=comlocation)
 
                 except ImportError:
                     logger.fdebug('%s comictaggerlib not found on system. Ensure the ENTIRE lib directory is located within mylar/lib/comictaggerlib/' % module)
@@ -3238,7 +3243,7 @@ class PostProcessor(object):
                         if all([pcheck is not None, pcheck != 'fail']):  # meta was done
                             self.tidyup(odir, True, cacheonly=True)
                         raise OSError
-                    fileoperation = helpers.file_ops(src, dst)
+                    fileoperation = helpers.file_ops(src, dst, staged=all([pcheck is not None, pcheck != 'fail']))
                     if not fileoperation:
                         raise OSError
                 except Exception as e:
@@ -3273,7 +3278,7 @@ class PostProcessor(object):
                         if all([pcheck != 'fail', pcheck is not None]):  # meta was done
                             self.tidyup(odir, True, cacheonly=True)
                         raise OSError
-                    fileoperation = helpers.file_ops(src, dst)
+                    fileoperation = helpers.file_ops(src, dst, staged=all([pcheck is not None, pcheck != 'fail']))
                     if not fileoperation:
                         raise OSError
                 except Exception as e:
@@ -3480,6 +3485,7 @@ class PostProcessor(object):
             return self.queue.put(self.valreturn)
 
 
+    @metrics.timed('postprocess', stage='notify')
     def sendnotify(self, series, issueyear, issuenumOG, annchk, module, imageFile, issueid=None):
 
         if issuenumOG is not None:
@@ -3547,6 +3553,99 @@ class PostProcessor(object):
 
         return
 
+class MatchPlanner(object):
+    """
+    Resolves a parsed manual-run filelist against the watchlist with a handful of
+    set-based queries, so that each parsed file is matched via in-memory lookups
+    instead of running its own series / issue SELECTs.
+    """
+
+    #sqlite's default SQLITE_MAX_VARIABLE_NUMBER is 999 - stay under it.
+    CHUNK = 900
+
+    def __init__(self, filelist=None):
+        self.myDB = db.DBConnection()
+        self.series_index = {}
+        self.issue_cache = {}
+        self.storyarcs = {}
+        self.comic_issues = {}
+        self.oneoffs = {}
+
+        for cs in self.myDB.select('SELECT * FROM comics WHERE DynamicComicName IS NOT NULL'):
+            self.series_index.setdefault(cs['DynamicComicName'].lower(), []).append(cs)
+
+        issueids = set()
+        if filelist:
+            for fl in filelist:
+                if fl.get('issueid') is not None:
+                    issueids.add(str(fl['issueid']))
+        if issueids:
+            self._load_issueids(list(issueids))
+
+    def _chunks(self, values):
+        for i in range(0, len(values), self.CHUNK):
+            yield values[i:i+self.CHUNK]
+
+    def _load_issueids(self, issueids):
+        for chunk in self._chunks(issueids):
+            seq = ','.join('?' * len(chunk))
+            for ssi in self.myDB.select('SELECT ComicID, IssueID, IssueArcID, IssueNumber, ComicName, SeriesYear, StoryArc, StoryArcID, Publisher, Volume, ReadingOrder FROM storyarcs WHERE IssueID IN ({seq})'.format(seq=seq), chunk):
+                self.storyarcs.setdefault(ssi['IssueID'], ssi)
+            for csi in self.myDB.select('SELECT i.ComicID, i.IssueID, i.Issue_Number, c.ComicName, c.ComicYear, c.AgeRating FROM comics as c JOIN issues as i ON c.ComicID = i.ComicID WHERE i.IssueID IN ({seq})'.format(seq=seq), chunk):
+                self.comic_issues.setdefault(csi['IssueID'], (csi, False))
+            for csi in self.myDB.select('SELECT a.ComicID as comicid, a.IssueID, a.Issue_Number, a.ReleaseComicName, c.ComicName, c.ComicYear, c.AgeRating FROM comics as c JOIN annuals as a ON c.ComicID = a.ComicID WHERE a.IssueID IN ({seq}) AND NOT a.Deleted'.format(seq=seq), chunk):
+                self.comic_issues.setdefault(csi['IssueID'], (csi, True))
+            for osi in self.myDB.select('select s.Issue_Number, s.ComicName, s.IssueID, s.ComicID, w.seriesyear FROM snatched AS s INNER JOIN nzblog AS n ON s.IssueID = n.IssueID INNER JOIN weekly AS w ON s.IssueID = w.IssueID WHERE s.IssueID IN ({seq}) AND n.OneOff = 1 AND s.ComicName IS NOT NULL'.format(seq=seq), chunk):
+                self.oneoffs.setdefault(osi['IssueID'], osi)
+
+    def storyarc(self, issueid):
+        return self.storyarcs.get(str(issueid))
+
+    def comic_issue(self, issueid):
+        #returns (row, is_annual) or (None, False)
+        return self.comic_issues.get(str(issueid), (None, False))
+
+    def oneoff(self, issueid):
+        return self.oneoffs.get(str(issueid))
+
+    def series(self, names):
+        results = []
+        seen = set()
+        for name in names:
+            for cs in self.series_index.get(name.lower(), []):
+                if cs['ComicID'] not in seen:
+                    seen.add(cs['ComicID'])
+                    results.append(cs)
+        return results
+
+    def _intkey(self, value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return value
+
+    def issues(self, comicid, int_issuenumber=None, annual=False):
+        #all the issues (or annuals) for a given series are loaded once and then indexed by Int_IssueNumber.
+        key = (comicid, annual)
+        if key not in self.issue_cache:
+            if annual is True:
+                rows = self.myDB.select('SELECT * from annuals WHERE ComicID=? AND NOT Deleted', [comicid])
+            else:
+                rows = self.myDB.select('SELECT * from issues WHERE ComicID=?', [comicid])
+            index = {}
+            for row in rows:
+                index.setdefault(self._intkey(row['Int_IssueNumber']), []).append(row)
+            self.issue_cache[key] = (rows, index)
+        rows, index = self.issue_cache[key]
+        if int_issuenumber is None:
+            return list(rows)
+        return list(index.get(self._intkey(int_issuenumber), []))
+
+    def invalidate(self, comicid):
+        #called after a series refresh so the next lookup re-reads the updated issue data.
+        self.issue_cache.pop((comicid, False), None)
+        self.issue_cache.pop((comicid, True), None)
+
 class FolderCheck():
 
     def __init__(self):
@@ -40,7 +40,7 @@ from apscheduler.triggers.interval import IntervalTrigger
 
 import cherrypy
 
-from mylar import logger, versioncheckit, rsscheckit, searchit, weeklypullit, PostProcessor, updater, helpers, sabnzbd
+from mylar import logger, versioncheckit, rsscheckit, searchit, weeklypullit, PostProcessor, updater, helpers, sabnzbd, changelog, events, metrics
 
 import mylar.config
 
@@ -149,12 +149,14 @@ RETURN_THE_NZBQUEUE = queue.Queue()
 MASS_ADD = None
 ADD_LIST = queue.Queue()
 MASS_REFRESH = None
+MASS_STATS = {}
 REFRESH_QUEUE = queue.Queue()
 DDL_QUEUED = []
 PACK_ISSUEIDS_DONT_QUEUE = {}
 EXT_SERVER = False
 SEARCH_TIER_DATE = None
 COMICSORT = None
+STARTUP_TASKS = []
 PULLBYFILE = False
 CFG = None
 PUBLISHER_IMPRINTS = None
@@ -171,7 +173,6 @@ LOCAL_IP = None
 DOWNLOAD_APIKEY = None
 APILOCK = False
 SEARCHLOCK = False
-DDL_LOCK = False
 CMTAGGER_PATH = None
 STATIC_COMICRN_VERSION = "1.01"
 STATIC_APC_VERSION = "2.04"
@@ -235,6 +236,7 @@ SCHED = BackgroundScheduler({
 BACKENDSTATUS_WS = 'up'
 BACKENDSTATUS_CV = 'up'
 PROVIDER_STATUS = {}
+BACKUP_STATS = {}
 
 
 def initialize(config_file):
@@ -243,10 +245,10 @@ def initialize(config_file):
         global CONFIG, _INITIALIZED, QUIET, CONFIG_FILE, MINIMUM_PY_VERSION, OS_DETECT, MAINTENANCE, CURRENT_VERSION, LATEST_VERSION, COMMITS_BEHIND, INSTALL_TYPE, IMPORTLOCK, PULLBYFILE, INKDROPS_32P, \
                DONATEBUTTON, CURRENT_WEEKNUMBER, CURRENT_YEAR, UMASK, USER_AGENT, SNATCHED_QUEUE, NZB_QUEUE, PP_QUEUE, SEARCH_QUEUE, DDL_QUEUE, PULLNEW, COMICSORT, WANTED_TAB_OFF, CV_HEADERS, \
                IMPORTBUTTON, IMPORT_FILES, IMPORT_TOTALFILES, IMPORT_CID_COUNT, IMPORT_PARSED_COUNT, IMPORT_FAILURE_COUNT, CHECKENABLED, CVURL, DEMURL, EXPURL, WWTURL, WWT_CF_COOKIEVALUE, \
-               DDLPOOL, NZBPOOL, SNPOOL, PPPOOL, SEARCHPOOL, RETURN_THE_NZBQUEUE, MASS_ADD, ADD_LIST, MASS_REFRESH, REFRESH_QUEUE, SSE_KEY, \
+               DDLPOOL, NZBPOOL, SNPOOL, PPPOOL, SEARCHPOOL, RETURN_THE_NZBQUEUE, MASS_ADD, ADD_LIST, MASS_REFRESH, REFRESH_QUEUE, MASS_STATS, SSE_KEY, \
                USE_SABNZBD, USE_NZBGET, USE_BLACKHOLE, USE_RTORRENT, USE_UTORRENT, USE_QBITTORRENT, USE_DELUGE, USE_TRANSMISSION, USE_WATCHDIR, SAB_PARAMS, PUBLISHER_IMPRINTS, \
                PROG_DIR, DATA_DIR, CMTAGGER_PATH, DOWNLOAD_APIKEY, LOCAL_IP, STATIC_COMICRN_VERSION, STATIC_APC_VERSION, KEYS_32P, AUTHKEY_32P, FEED_32P, FEEDINFO_32P, \
-               MONITOR_STATUS, SEARCH_STATUS, RSS_STATUS, WEEKLY_STATUS, VERSION_STATUS, UPDATER_STATUS, FORCE_STATUS, DBUPDATE_INTERVAL, DB_BACKFILL, LOG_LANG, LOG_CHARSET, APILOCK, SEARCHLOCK, DDL_LOCK, LOG_LEVEL, \
+               MONITOR_STATUS, SEARCH_STATUS, RSS_STATUS, WEEKLY_STATUS, VERSION_STATUS, UPDATER_STATUS, FORCE_STATUS, DBUPDATE_INTERVAL, DB_BACKFILL, LOG_LANG, LOG_CHARSET, APILOCK, SEARCHLOCK, LOG_LEVEL, \
                MONITOR_SCHEDULER, SEARCH_SCHEDULER, RSS_SCHEDULER, WEEKLY_SCHEDULER, VERSION_SCHEDULER, UPDATER_SCHEDULER, START_UP, \
                SCHED_RSS_LAST, SCHED_WEEKLY_LAST, SCHED_MONITOR_LAST, SCHED_SEARCH_LAST, SCHED_VERSION_LAST, SCHED_DBUPDATE_LAST, COMICINFO, SEARCH_TIER_DATE, \
                BACKENDSTATUS_CV, BACKENDSTATUS_WS, PROVIDER_STATUS, EXT_IP, ISSUE_EXCEPTIONS, PROVIDER_START_ID, GLOBAL_MESSAGES, CHECK_FOLDER_CACHE, FOLDER_CACHE, SESSION_ID, \
@@ -363,56 +365,45 @@ def initialize(config_file):
         #set the default URL for nzbindex
         EXPURL = 'https://nzbindex.nl/'
 
-        #load in the imprint json here.
-        try:
-            pub_path = os.path.join(mylar.CONFIG.CACHE_DIR, 'imprints.json')
-            update_imprints = True
-            if os.path.exists(pub_path):
-                filetime = max(os.path.getctime(pub_path), os.path.getmtime(pub_path))
-                pub_diff = ((time.time() - filetime) / 3600)
-                if pub_diff > 24:
-                    logger.info('[IMPRINT_LOADS] Publisher imprint listing found, but possibly stale ( > 24hrs). Retrieving up-to-date listing')
-                else:
-                    update_imprints = False
-                    logger.info('[IMPRINT_LOADS] Loading Publisher imprints data from local file.')
-                    with open(pub_path) as json_file:
-                        PUBLISHER_IMPRINTS = json.load(json_file)
+        #load in the imprint json here - a stale / missing listing is refreshed once the web interface is up.
+        PUBLISHER_IMPRINTS = None
+        pub_path = os.path.join(mylar.CONFIG.CACHE_DIR, 'imprints.json')
+        if os.path.exists(pub_path):
+            try:
+                with open(pub_path) as json_file:
+                    PUBLISHER_IMPRINTS = json.load(json_file)
+            except Exception as e:
+                logger.warn('[IMPRINT_LOADS] Unable to load publisher -> imprint file. Error: %s' % e)
             else:
-                logger.info('[IMPRINT_LOADS] No data for publisher imprints locally. Retrieving up-to-date listing')
-
-            if update_imprints is True:
-                req_pub = requests.get('https://mylar3.github.io/publisher_imprints/imprints.json', verify=True)
-                try:
-                    json_pub = req_pub.json()
-                    with open(pub_path, 'w', encoding='utf-8') as outfile:
-                        json.dump(json_pub, outfile, indent=4, ensure_ascii=False)
-                except Exception as e:
-                    logger.error('Unable to write imprints.json to %s. Error returned: %s' % (pub_path, e))
-                else:
-                    logger.fdebug('Successfully written imprints.json file to %s' % pub_path)
-                    PUBLISHER_IMPRINTS = json_pub
-
-        except requests.exceptions.RequestException as e:
-            logger.warn('[IMPRINT_LOADS] Unable to retrieve publisher imprints listing at this time. Error: %s' % e)
-            PUBLISHER_IMPRINTS = None
-        except Exception as e:
-            logger.warn('[IMPRINT_LOADS] Unable to load publisher -> imprint file. Error: %s' % e)
-            PUBLISHER_IMPRINTS = None
+                logger.info('[IMPRINT_LOADS] Loading Publisher imprints data from local file.')
+            filetime = max(os.path.getctime(pub_path), os.path.getmtime(pub_path))
+            if ((time.time() - filetime) / 3600) > 24:
+                logger.info('[IMPRINT_LOADS] Publisher imprint listing found, but possibly stale ( > 24hrs). Retrieving up-to-date listing')
+                startup_task('imprints', update_imprints, pub_path)
         else:
-            if PUBLISHER_IMPRINTS is not None:
-                logger.info('[IMPRINT_LOADS] Successfully loaded imprints for %s publishers' % (len(PUBLISHER_IMPRINTS['publishers'])))
+            logger.info('[IMPRINT_LOADS] No data for publisher imprints locally. Retrieving up-to-date listing')
+            startup_task('imprints', update_imprints, pub_path)
+
+        if PUBLISHER_IMPRINTS is not None:
+            logger.info('[IMPRINT_LOADS] Successfully loaded imprints for %s publishers' % (len(PUBLISHER_IMPRINTS['publishers'])))
 
-            logger.info('Remapping the sorting to allow for new additions.')
-            COMICSORT = helpers.ComicSort(sequence='startup')
+        logger.info('Remapping the sorting to allow for new additions.')
+        COMICSORT = helpers.ComicSort(sequence='startup')
 
         if CONFIG.LOCMOVE:
             helpers.updateComicLocation()
 
         # startup check(s) here so that the config values are already loaded against.
         if all([mylar.USE_SABNZBD is True, mylar.CONFIG.SAB_HOST is not None]):
-            s_to_the_ab = sabnzbd.SABnzbd(params=None)
-            s_to_the_ab.sab_versioncheck()
-            logger.info('[SAB-VERSION-CHECK] SABnzbd version detected as: %s' % mylar.CONFIG.SAB_VERSION)
+            startup_task('sab version check', sab_versioncheck)
+
+        # stat'ing every cached fingerprint path can take a while on a large / network library - do it in the background.
+        from mylar import fingerprint
+        startup_task('fingerprint pruning', fingerprint.prune)
+
+        # clear out staging folders a crash left behind in the destination roots (before anything can be tagged).
+        from mylar import placement
+        placement.sweep_staging()
 
         # make sure the intLatestIssue field is populated with values...
         # ??helpers.latestissue_update()
@@ -424,6 +415,50 @@ def initialize(config_file):
         _INITIALIZED = True
         return True
 
+def startup_task(name, func, *args):
+    # anything that isn't needed to serve the web interface (network lookups, version checks) is queued
+    # up here during initialize and run in the background by start() once the web server is up.
+    STARTUP_TASKS.append((name, func, args))
+
+def warm_up():
+    while STARTUP_TASKS:
+        name, func, args = STARTUP_TASKS.pop(0)
+        start = time.time()
+        try:
+            func(*args)
+        except Exception as e:
+            logger.warn('[STARTUP] %s failed: %s' % (name, e))
+        else:
+            logger.fdebug('[STARTUP] %s completed in %.2fs' % (name, time.time() - start))
+
+def update_imprints(pub_path):
+    global PUBLISHER_IMPRINTS
+    try:
+        req_pub = requests.get('https://mylar3.github.io/publisher_imprints/imprints.json', verify=True, timeout=30)
+        json_pub = req_pub.json()
+    except requests.exceptions.RequestException as e:
+        logger.warn('[IMPRINT_LOADS] Unable to retrieve publisher imprints listing at this time. Error: %s' % e)
+        return
+    except Exception as e:
+        logger.warn('[IMPRINT_LOADS] Unable to load publisher -> imprint file. Error: %s' % e)
+        return
+
+    try:
+        with open(pub_path, 'w', encoding='utf-8') as outfile:
+            json.dump(json_pub, outfile, indent=4, ensure_ascii=False)
+    except Exception as e:
+        logger.error('Unable to write imprints.json to %s. Error returned: %s' % (pub_path, e))
+    else:
+        logger.fdebug('Successfully written imprints.json file to %s' % pub_path)
+
+    PUBLISHER_IMPRINTS = json_pub
+    logger.info('[IMPRINT_LOADS] Successfully loaded imprints for %s publishers' % (len(PUBLISHER_IMPRINTS['publishers'])))
+
+def sab_versioncheck():
+    s_to_the_ab = sabnzbd.SABnzbd(params=None)
+    s_to_the_ab.sab_versioncheck()
+    logger.info('[SAB-VERSION-CHECK] SABnzbd version detected as: %s' % mylar.CONFIG.SAB_VERSION)
+
 def daemonize():
 
     if threading.active_count() != 1:
@@ -496,6 +531,13 @@ def start():
 
         if _INITIALIZED:
 
+            #time every scheduled run (see mylar.metrics)
+            metrics.watch_scheduler(SCHED)
+
+            #deferred startup work (imprint refresh, version checks) runs alongside everything else from here.
+            if STARTUP_TASKS:
+                threading.Thread(target=warm_up, name='STARTUP-WARMUP', daemon=True).start()
+
             #scheduler jobs - add them all in a paused state initially
             UPDATER_SCHEDULER = SCHED.add_job(func=updater.watchlist_updater, id='dbupdater', next_run_time=datetime.datetime.utcnow(), name='DB Updater', args=[None,True], trigger=IntervalTrigger(hours=0, minutes=DBUPDATE_INTERVAL, timezone='UTC'))
             UPDATER_SCHEDULER.pause()
@@ -819,18 +861,40 @@ def dbcheck():
     c.execute('CREATE TABLE IF NOT EXISTS jobhistory (JobName TEXT, prev_run_datetime timestamp, prev_run_timestamp REAL, next_run_datetime timestamp, next_run_timestamp REAL, last_run_completed TEXT, successful_completions TEXT, failed_completions TEXT, status TEXT, last_date timestamp)')
     c.execute('CREATE TABLE IF NOT EXISTS manualresults (provider TEXT, id TEXT, kind TEXT, comicname TEXT, volume TEXT, oneoff TEXT, fullprov TEXT, issuenumber TEXT, modcomicname TEXT, name TEXT, link TEXT, size TEXT, pack_numbers TEXT, pack_issuelist TEXT, comicyear TEXT, issuedate TEXT, tmpprov TEXT, pack TEXT, issueid TEXT, comicid TEXT, sarc TEXT, issuearcid TEXT)')
     c.execute('CREATE TABLE IF NOT EXISTS storyarcs(StoryArcID TEXT, ComicName TEXT, IssueNumber TEXT, SeriesYear TEXT, IssueYEAR TEXT, StoryArc TEXT, TotalIssues TEXT, Status TEXT, inCacheDir TEXT, Location TEXT, IssueArcID TEXT, ReadingOrder INT, IssueID TEXT, ComicID TEXT, ReleaseDate TEXT, IssueDate TEXT, Publisher TEXT, IssuePublisher TEXT, IssueName TEXT, CV_ArcID TEXT, Int_IssueNumber INT, DynamicComicName TEXT, Volume TEXT, Manual TEXT, DateAdded TEXT, DigitalDate TEXT, Type TEXT, Aliases TEXT, ArcImage TEXT)')
-    c.execute('CREATE TABLE IF NOT EXISTS ddl_info (ID TEXT UNIQUE, series TEXT, year TEXT, filename TEXT, size TEXT, issueid TEXT, comicid TEXT, link TEXT, status TEXT, remote_filesize TEXT, updated_date TEXT, mainlink TEXT, issues TEXT, site TEXT, submit_date TEXT, pack INTEGER, link_type TEXT, tmp_filename TEXT)')
+    c.execute('CREATE TABLE IF NOT EXISTS ddl_info (ID TEXT UNIQUE, series TEXT, year TEXT, filename TEXT, size TEXT, issueid TEXT, comicid TEXT, link TEXT, status TEXT, remote_filesize TEXT, updated_date TEXT, mainlink TEXT, issues TEXT, site TEXT, submit_date TEXT, pack INTEGER, link_type TEXT, tmp_filename TEXT, segments TEXT)')
     c.execute('CREATE TABLE IF NOT EXISTS exceptions_log(date TEXT UNIQUE, comicname TEXT, issuenumber TEXT, seriesyear TEXT, issueid TEXT, comicid TEXT, booktype TEXT, searchmode TEXT, error TEXT, error_text TEXT, filename TEXT, line_num TEXT, func_name TEXT, traceback TEXT)')
     c.execute('CREATE TABLE IF NOT EXISTS tmp_searches (query_id INTEGER, comicid INTEGER, comicname TEXT, publisher TEXT, publisherimprint TEXT, comicyear TEXT, issues TEXT, volume TEXT, deck TEXT, url TEXT, type TEXT, cvarcid TEXT, arclist TEXT, description TEXT, haveit TEXT, mode TEXT, searchtype TEXT, comicimage TEXT, thumbimage TEXT, PRIMARY KEY (query_id, comicid))')
     c.execute('CREATE TABLE IF NOT EXISTS notifs(session_id INT, date TEXT, event TEXT, comicid TEXT, comicname TEXT, issuenumber TEXT, seriesyear TEXT, status TEXT, message TEXT, PRIMARY KEY (session_id, date))')
     c.execute('CREATE TABLE IF NOT EXISTS provider_searches(id INTEGER UNIQUE, provider TEXT UNIQUE, type TEXT, lastrun INTEGER, active TEXT, hits INTEGER DEFAULT 0)')
     c.execute('CREATE TABLE IF NOT EXISTS mylar_info(DatabaseVersion INTEGER PRIMARY KEY)')
+    c.execute('CREATE TABLE IF NOT EXISTS fingerprints(Device INTEGER, Inode INTEGER, Path TEXT, Size INTEGER, Mtime REAL, Partial TEXT, Full TEXT, PRIMARY KEY (Device, Inode))')
+    c.execute('CREATE TABLE IF NOT EXISTS changelog(Seq INTEGER PRIMARY KEY AUTOINCREMENT, TableName TEXT, RowKey TEXT, ComicID TEXT, Op TEXT, Stamp INTEGER)')
+    c.execute('CREATE TABLE IF NOT EXISTS changelog_info(Horizon INTEGER)')
+    c.execute('CREATE TABLE IF NOT EXISTS search_verdicts(Provider TEXT, LinkHash TEXT, IssueID TEXT, Signature TEXT, ConfigSig TEXT, Verdict TEXT, Title TEXT, Stamp INTEGER, PRIMARY KEY (Provider, LinkHash, IssueID, Signature))')
     conn.commit
     c.close
 
     #create some indexes
     c.execute('CREATE INDEX IF NOT EXISTS issues_id on issues(IssueID)')
     c.execute('CREATE INDEX IF NOT EXISTS comics_id on comics(ComicID)')
+    c.execute('CREATE INDEX IF NOT EXISTS issues_comicid on issues(ComicID)')
+    c.execute('CREATE INDEX IF NOT EXISTS annuals_comicid on annuals(ComicID)')
+    c.execute('CREATE INDEX IF NOT EXISTS storyarcs_issueid on storyarcs(IssueID)')
+    c.execute('CREATE INDEX IF NOT EXISTS changelog_row on changelog(TableName, RowKey)')
+    #the Int_IssueNumber backfill (further down) is a one-time migration, done when these indexes first get created.
+    int_backfill = c.execute("SELECT name FROM sqlite_master WHERE type='index' AND name='issues_comicid_int'").fetchone() is None
+    c.execute('CREATE INDEX IF NOT EXISTS issues_comicid_int on issues(ComicID, Int_IssueNumber)')
+    c.execute('CREATE INDEX IF NOT EXISTS annuals_comicid_int on annuals(ComicID, Int_IssueNumber)')
+    c.execute('CREATE INDEX IF NOT EXISTS storyarcs_comicid_int on storyarcs(ComicID, Int_IssueNumber)')
+    c.execute('CREATE INDEX IF NOT EXISTS search_verdicts_stamp on search_verdicts(Stamp)')
+    #backing the server-side paging/sorting of the upcoming, history and ddl queue tables (see mylar.datatables)
+    c.execute('CREATE INDEX IF NOT EXISTS issues_status on issues(Status)')
+    c.execute('CREATE INDEX IF NOT EXISTS annuals_status on annuals(Status)')
+    c.execute('CREATE INDEX IF NOT EXISTS storyarcs_status on storyarcs(Status)')
+    c.execute('CREATE INDEX IF NOT EXISTS snatched_issueid on snatched(IssueID)')
+    c.execute('CREATE INDEX IF NOT EXISTS snatched_dateadded on snatched(DateAdded)')
+    c.execute('CREATE INDEX IF NOT EXISTS oneoffhistory_issueid on oneoffhistory(IssueID)')
+    c.execute('CREATE INDEX IF NOT EXISTS ddl_info_issueid on ddl_info(IssueID)')
 
     #might enable these at a later date.
     #c.execute('''PRAGMA synchronous = EXTRA''')
@@ -1551,6 +1615,11 @@ def dbcheck():
     except sqlite3.OperationalError:
         c.execute('ALTER TABLE ddl_info ADD COLUMN tmp_filename TEXT')
 
+    try:
+        c.execute('SELECT segments from ddl_info')
+    except sqlite3.OperationalError:
+        c.execute('ALTER TABLE ddl_info ADD COLUMN segments TEXT')
+
     ## -- provider_searches Table --
     try:
         c.execute('SELECT id from provider_searches')
@@ -1599,12 +1668,43 @@ def dbcheck():
     logger.info('Correcting Null entries that make the main page break on startup.')
     c.execute("UPDATE Comics SET LatestDate='Unknown' WHERE LatestDate='None' or LatestDate is NULL")
 
+    #anything written before Int_IssueNumber was kept in step on write gets one now, so the ComicID / Int_IssueNumber
+    #lookups never miss a row just because its number was only ever stored as a string. Only done the once - numbers
+    #that can't be converted stay NULL, and there's no sense re-trying them every startup.
+    for table, column in (('issues', 'Issue_Number'), ('annuals', 'Issue_Number'), ('storyarcs', 'IssueNumber')):
+        if int_backfill is False:
+            break
+        missing = c.execute('SELECT rowid, %s FROM %s WHERE Int_IssueNumber is NULL AND %s is not NULL' % (column, table, column)).fetchall()
+        if missing:
+            logger.info('Populating the integer issue number for %s %s entries.' % (len(missing), table))
+            int_issues = helpers.issuedigits_list([x[1] for x in missing])
+            c.executemany('UPDATE %s SET Int_IssueNumber=? WHERE rowid=?' % table, [(i, x[0]) for i, x in zip(int_issues, missing)])
+
     try:
         c.execute("DELETE FROM weekly WHERE Publisher is NULL AND COMIC IS NOT NULL")
     except Exception:
         pass
 
 
+    #change-feed triggers - every insert / delete on these tables is recorded in the changelog (see mylar.changelog),
+    #and every update that actually changes a value. A series refresh rewrites each of its issue rows whether anything
+    #differs or not, so updates are guarded column by column - which means the triggers are rebuilt here (after the
+    #column migrations above) whenever a table's columns have changed.
+    for cl_table, cl_key in changelog.TABLES.items():
+        cl_cols = [x[1] for x in c.execute('PRAGMA table_info(%s)' % cl_table).fetchall()]
+        for cl_op, cl_ref in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            cl_name = 'changelog_%s_%s' % (cl_table, cl_op.lower())
+            cl_when = ''
+            if cl_op == 'UPDATE':
+                cl_when = ' WHEN %s' % ' OR '.join(['OLD."%s" IS NOT NEW."%s"' % (x, x) for x in cl_cols])
+            cl_sql = ("CREATE TRIGGER {name} AFTER {op} ON {table}{when} BEGIN "
+                      "INSERT INTO changelog (TableName, RowKey, ComicID, Op, Stamp) VALUES ('{table}', {ref}.{key}, {ref}.ComicID, '{opname}', CAST(strftime('%s', 'now') AS INTEGER)); "
+                      "END".format(name=cl_name, table=cl_table, key=cl_key, op=cl_op, opname=cl_op.lower(), ref=cl_ref, when=cl_when))
+            cl_existing = c.execute("SELECT sql FROM sqlite_master WHERE type='trigger' AND name=?", [cl_name]).fetchone()
+            if cl_existing is None or cl_existing[0] != cl_sql:
+                c.execute('DROP TRIGGER IF EXISTS %s' % cl_name)
+                c.execute(cl_sql)
+
     #update tables here as necessary based on current version of mylar.
     #this won't be written to the ini until a save of the config after load, but it should be oldconfig_version+1 on load
     logger.info('[%s]oldconfig_version: %s' % (type(mylar.CONFIG.OLDCONFIG_VERSION), mylar.CONFIG.OLDCONFIG_VERSION))
@@ -1619,6 +1719,10 @@ def dbcheck():
     conn.commit()
     c.close()
 
+    #the writes above go straight through the cursor (not db.DBConnection), so the library index won't see them otherwise.
+    from mylar import library
+    library.LIBRARY.invalidate()
+
     if dynamic_upgrade is True:
         logger.info('Updating db to include some important changes.')
         helpers.upgrade_dynamic()
@@ -15,7 +15,7 @@
 #  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
 
 import mylar
-from mylar import db, mb, importer, search, process, versioncheck, logger, webserve, helpers, encrypted, series_metadata
+from mylar import db, mb, importer, search, process, versioncheck, logger, webserve, helpers, encrypted, series_metadata, changelog, events
 import threading
 import json
 import cherrypy
@@ -26,6 +26,10 @@ import re
 import shutil
 import queue
 import urllib.request, urllib.error, urllib.parse
+import base64
+import binascii
+import hashlib
+import types
 from PIL import Image
 from . import cache
 from operator import itemgetter
@@ -40,7 +44,11 @@ cmd_list = ['getIndex', 'getComic', 'getUpcoming', 'getWanted', 'getHistory',
             'getComicInfo', 'getIssueInfo', 'getArt', 'downloadIssue', 'regenerateCovers',
             'refreshSeriesjson', 'seriesjsonListing', 'checkGlobalMessages',
             'listProviders', 'changeProvider', 'addProvider', 'delProvider',
-            'downloadNZB', 'getReadList', 'getStoryArc', 'addStoryArc', 'listAnnualSeries']
+            'downloadNZB', 'getReadList', 'getStoryArc', 'addStoryArc', 'listAnnualSeries',
+            'getChanges']
+
+#changes on every restart so etags handed out by a previous process are never honoured.
+API_EPOCH = str(time.time())
 
 class Api(object):
 
@@ -71,59 +79,6 @@ class Api(object):
         cherrypy.response.headers['Content-Type'] = self.headers
         return json.dumps(response)
 
-    def _eventStreamResponse(self, results):
-        #data = 'retry: 200\ndata: ' + str( self.prog_output) + '\n\n'
-        #response = {
-        #    'success': True,
-        #    'data': results
-        #}
-        #{'status': mylar.GLOBAL_MESSAGES['status'], 'comicid': mylar.GLOBAL_MESSAGES['comicid'], 'tables': mylar.GLOBAL_MESSAGES['tables'], 'message': mylar.GLOBAL_MESSAGES['message']}
-        #logger.info('global_message: %s' % (results,))
-        if results['status'] is not None:
-            if results['event'] == 'addbyid':
-                try:
-                    if results['seriesyear']:
-                        data = '\nevent: addbyid\ndata: {\ndata: "status": "' + results['status'] + '",\ndata: "comicid": "' + results['comicid']+ '",\ndata: "message": "' + results['message'] + '",\ndata: "tables": "' + results['tables'] + '",\ndata: "comicname": "' + results['comicname'] + '",\ndata: "seriesyear": "' + results['seriesyear'] + '"\ndata: }\n\n'
-                    else:
-                        data = '\nevent: addbyid\ndata: {\ndata: "status": "' + results['status'] + '",\ndata: "comicid": "' + results['comicid']+ '",\ndata: "message": "' + results['message'] + '",\ndata: "tables": "' + results['tables'] + '",\ndata: "comicname": "' + results['comicname'] + '",\ndata: "seriesyear": "' + results['seriesyear'] + '"\ndata: }\n\n'
-                except Exception as e:
-                    #logger.warn('error: %s' % e)
-                    data = '\nevent: addbyid\ndata: {\ndata: "status": "' + results['status'] + '",\ndata: "comicid": "' + results['comicid']+ '",\ndata: "message": "' + results['message'] + '",\ndata: "tables": "' + results['tables'] + '"\ndata: }\n\n'
-            elif results['event'] == 'scheduler_message':
-                try:
-                    data = '\nevent: scheduler_message\ndata: {\ndata: "status": "' + results['status'] + '",\ndata: "message": "' + results['message'] + '"\ndata: }\n\n'
-                except Exception:
-                    data = '\nevent: scheduler_message\ndata: {\ndata: "status": "' + results['status'] + '",\ndata: "message": "' + results['message'] + '"\ndata: }\n\n'
-            elif results['event'] == 'config_check':
-                try:
-                    data = '\nevent: config_check\ndata: {\ndata: "status": "' + results['status'] + '",\ndata: "message": "' + results['message'] + '"\ndata: }\n\n'
-                except Exception:
-                    data = '\nevent: config_check\ndata: {\ndata: "status": "' + results['status'] + '",\ndata: "message": "' + results['message'] + '"\ndata: }\n\n'
-            elif results['event'] == 'shutdown':
-                try:
-                    data = '\nevent: shutdown\ndata: {\ndata: "status": "' + results['status'] + '",\ndata: "message": "' + results['message'] + '"\ndata: }\n\n'
-                except Exception:
-                    data = '\nevent: shutdown\ndata: {\ndata: "status": "' + results['status'] + '",\ndata: "message": "' + results['message'] + '"\ndata: }\n\n'
-            elif results['event'] == 'check_update':
-                try:
-                    data = '\nevent: check_update\ndata: {\ndata: "status": "' + results['status'] + '",\ndata: "current_version": "' + results['current_version'] + '",\ndata: "latest_version": "' + results['latest_version'] + '",\ndata: "commits_behind": "' + results['commits_behind'] + '",\ndata: "docker": "' + results['docker'] + '",\ndata: "message": "' + results['message'] + '"\ndata: }\n\n'
-                except Exception as e:
-                    data = '\nevent: check_update\ndata: {\ndata: "status": "' + results['status'] + '",\ndata: "message": "' + results['message'] + '"\ndata: }\n\n'
-            else:
-                try:
-                    data = '\ndata: {\ndata: "status": "' + results['status'] + '",\ndata: "comicid": "' + results['comicid']+ '",\ndata: "message": "' + results['message'] + '",\ndata: "tables": "' + results['tables'] + '",\ndata: "comicname": "' + results['comicname'] + '",\ndata: "seriesyear": "' + results['seriesyear'] + '"\ndata: }\n\n'
-                except Exception as e:
-                    #logger.warn('data_error: %s' % e)
-                    data = '\ndata: {\ndata: "status": "' + results['status'] + '",\ndata: "comicid": "' + results['comicid']+ '",\ndata: "message": "' + results['message'] + '",\ndata: "tables": "' + results['tables'] + '"\ndata: }\n\n'
-
-            #data = 'retry: 5000\ndata: '+str(results['message'])+'\n\n' # + str(results['message']) + '\n\n'
-        else:
-            data = '\ndata: \n\n' #'data: END-OF-STREAM\n\n'
-        cherrypy.response.headers['Content-Type'] = 'text/event-stream'
-        cherrypy.response.headers['Cache-Control'] = 'no-cache'
-        cherrypy.response.headers['Connection'] = 'keep-alive'
-        return data
-
     def _successResponse(self, results):
         response = {
             'success': True,
@@ -136,12 +91,100 @@ class Api(object):
         myDB = db.DBConnection()
         rows = myDB.select(query)
 
-        results = []
+        if not rows:
+            return []
 
-        for row in rows:
-            results.append(dict(list(zip(list(row.keys()), row))))
+        keys = list(rows[0].keys())
+        return [dict(zip(keys, row)) for row in rows]
 
-        return results
+    def _pageArgs(self, **kwargs):
+        # limit / offset / cursor (the opaque value handed back in X-Next-Cursor) and fields (comma-separated
+        # column projection). Returns None if any of them are invalid.
+        paging = {'limit': None, 'offset': 0, 'fields': None}
+        try:
+            if kwargs.get('cursor'):
+                paging['offset'] = max(0, int(base64.urlsafe_b64decode(kwargs['cursor'].encode('utf-8')).decode('utf-8')))
+            elif kwargs.get('offset'):
+                paging['offset'] = max(0, int(kwargs['offset']))
+            if kwargs.get('limit'):
+                paging['limit'] = max(1, int(kwargs['limit']))
+        except (TypeError, ValueError, UnicodeDecodeError, binascii.Error):
+            return None
+        if kwargs.get('fields'):
+            paging['fields'] = set([x.strip() for x in kwargs['fields'].split(',') if x.strip()])
+        return paging
+
+    def _notModified(self, tables, extra=None, **kwargs):
+        # the etag covers the command, its parameters and the write counters of every table it reads from, so
+        # revalidating costs nothing - if it matches, a 304 goes back without the query ever being run.
+        params = sorted([(k, str(v)) for k, v in kwargs.items() if k not in ('callback', '_')])
+        tag = hashlib.md5(json.dumps([API_EPOCH, self.cmd, params, db.generation(*tables), extra]).encode('utf-8')).hexdigest()
+        etag = '"%s"' % tag
+        cherrypy.response.headers['ETag'] = etag
+        cherrypy.response.headers['Cache-Control'] = 'no-cache'
+        inm = cherrypy.request.headers.get('If-None-Match')
+        if inm is not None and etag in [x.strip() for x in inm.split(',')]:
+            cherrypy.response.status = 304
+            self.data = ''
+            return True
+        return False
+
+    def _encodeRows(self, keys, rows, fields=None):
+        # encodes rows a chunk at a time so the response never exists as one big list of dicts / json string.
+        idx = [i for i, k in enumerate(keys) if fields is None or k in fields]
+        pkeys = [keys[i] for i in idx]
+        for x in range(0, len(rows), 500):
+            chunk = ','.join([json.dumps(dict(zip(pkeys, [row[i] for i in idx]))) for row in rows[x:x+500]])
+            if x > 0:
+                chunk = ',' + chunk
+            yield chunk
+
+    def _streamQuery(self, sections, paging, envelope=None):
+        # sections = [(name, query)] - a name of None returns a bare list, otherwise a dict keyed by name.
+        # envelope='success' wraps it the same way _successResponse does, so unpaged responses keep their shape.
+        # Paging info goes in the headers (X-Total-Count / X-Next-Cursor) for the same reason.
+        # Rows are read off the cursor in one go so sqlite's read lock isn't held while a slow client drains the response.
+        myDB = db.DBConnection()
+        results = []
+        total = 0
+        more = False
+        for name, query in sections:
+            if paging['limit'] is not None:
+                count = myDB.selectone('SELECT COUNT(*) FROM (%s)' % query).fetchone()[0]
+                total += count
+                if paging['offset'] + paging['limit'] < count:
+                    more = True
+                query = '%s LIMIT %d OFFSET %d' % (query, paging['limit'], paging['offset'])
+            cursor = myDB.fetch(query)
+            keys = [d[0] for d in cursor.description]
+            results.append((name, keys, cursor.fetchall()))
+
+        if paging['limit'] is not None:
+            cherrypy.response.headers['X-Total-Count'] = str(total)
+            if more is True:
+                cherrypy.response.headers['X-Next-Cursor'] = base64.urlsafe_b64encode(str(paging['offset'] + paging['limit']).encode('utf-8')).decode('utf-8')
+
+        def stream():
+            if envelope == 'success':
+                yield '{"success": true, "data": '
+            if sections[0][0] is not None:
+                yield '{'
+            for n, (name, keys, rows) in enumerate(results):
+                if name is not None:
+                    yield '%s%s: ' % (', ' if n > 0 else '', json.dumps(name))
+                yield '['
+                for chunk in self._encodeRows(keys, rows, paging['fields']):
+                    yield chunk
+                yield ']'
+            if sections[0][0] is not None:
+                yield '}'
+            if envelope == 'success':
+                yield '}'
+
+        #set here as fetchData hands generators straight back without adding its usual json headers.
+        cherrypy.response.headers['Content-Type'] = self.headers
+        cherrypy.response.headers['Access-Control-Allow-Origin'] = '*'
+        self.data = stream()
 
     def checkParams(self, *args, **kwargs):
 
@@ -212,7 +255,7 @@ class Api(object):
                     return serve_file(path=self.img, content_type='image/jpeg')
                 if self.file and self.filename:
                     return serve_download(path=self.file, name=self.filename)
-                if isinstance(self.data, str):
+                if isinstance(self.data, (str, types.GeneratorType)):
                     return self.data
                 else:
                     if self.comicrn is True:
@@ -223,7 +266,11 @@ class Api(object):
                         return json.dumps(self.data)
             else:
                 self.callback = self.kwargs['callback']
-                self.data = json.dumps(self.data)
+                if isinstance(self.data, types.GeneratorType):
+                    #a streamed response is already json - wrapping it again would hand back a string.
+                    self.data = ''.join(self.data)
+                else:
+                    self.data = json.dumps(self.data)
                 self.data = self.callback + '(' + self.data + ');'
                 cherrypy.response.headers['Content-Type'] = "application/javascript"
                 return self.data
@@ -311,26 +358,36 @@ class Api(object):
                 self.data = self._failureResponse('Incorrect username or password.')
 
     def _getIndex(self, **kwargs):
+        paging = self._pageArgs(**kwargs)
+        if paging is None:
+            self.data = self._failureResponse('Invalid paging parameters')
+            return
+
+        if self._notModified(['comics'], **kwargs):
+            return
 
         query = '{select} ORDER BY ComicSortName COLLATE NOCASE'.format(
             select = self._selectForComics()
         )
 
-        self.data = self._successResponse(
-            self._resultsFromQuery(query)
-        )
+        self._streamQuery([(None, query)], paging, envelope='success')
 
         return
 
     def _getReadList(self, **kwargs):
+        paging = self._pageArgs(**kwargs)
+        if paging is None:
+            self.data = self._failureResponse('Invalid paging parameters')
+            return
+
+        if self._notModified(['readlist'], **kwargs):
+            return
 
         readListQuery = '{select} ORDER BY IssueDate ASC'.format(
             select = self._selectForReadList()
         )
 
-        self.data = self._successResponse(
-            self._resultsFromQuery(readListQuery)
-        )
+        self._streamQuery([(None, readListQuery)], paging, envelope='success')
 
         return
 
@@ -371,13 +428,49 @@ class Api(object):
 
         return
 
-    def _getHistory(self, **kwargs):
+    def _changeArgs(self, **kwargs):
+        # since / limit / tables for the change feed. Returns None if any of them are invalid.
+        try:
+            since = int(kwargs.get('since', 0))
+            limit = min(5000, max(1, int(kwargs.get('limit', 500))))
+        except (TypeError, ValueError):
+            return None
+        tables = None
+        if kwargs.get('tables'):
+            tables = [x.strip().lower() for x in kwargs['tables'].split(',') if x.strip()]
+            if any([x not in changelog.TABLES for x in tables]):
+                return None
+        return {'since': since, 'limit': limit, 'tables': tables}
+
+    def _getChanges(self, **kwargs):
+        args = self._changeArgs(**kwargs)
+        if args is None:
+            self.data = self._failureResponse('Invalid parameters - since & limit must be numeric, tables one or more of: %s' % ', '.join(changelog.TABLES))
+            return
+
         self.data = self._successResponse(
-            self._resultsFromQuery('SELECT * from snatched order by DateAdded DESC')
+            changelog.changes(args['since'], args['limit'], args['tables'])
         )
         return
 
+    def _getHistory(self, **kwargs):
+        paging = self._pageArgs(**kwargs)
+        if paging is None:
+            self.data = self._failureResponse('Invalid paging parameters')
+            return
+
+        if self._notModified(['snatched'], **kwargs):
+            return
+
+        self._streamQuery([(None, 'SELECT * from snatched order by DateAdded DESC')], paging, envelope='success')
+        return
+
     def _getUpcoming(self, **kwargs):
+        paging = self._pageArgs(**kwargs)
+        if paging is None:
+            self.data = self._failureResponse('Invalid paging parameters')
+            return
+
         if 'include_downloaded_issues' in kwargs and kwargs['include_downloaded_issues'].upper() == 'Y':
             select_status_clause = "w.STATUS IN ('Wanted', 'Snatched', 'Downloaded')"
         else:
@@ -394,30 +487,37 @@ class Api(object):
             week = today.strftime('%U')
             year = today.strftime('%Y')
 
-        self.data = self._resultsFromQuery(
+        if self._notModified(['weekly', 'comics'], extra=[week, year], **kwargs):
+            return
+
+        self._streamQuery([(None,
             "SELECT w.COMIC AS ComicName, w.ISSUE AS IssueNumber, w.ComicID, w.IssueID, w.SHIPDATE AS IssueDate, w.STATUS AS Status, c.ComicName AS DisplayComicName \
             FROM weekly w JOIN comics c ON w.ComicID = c.ComicID WHERE w.COMIC IS NOT NULL AND w.ISSUE IS NOT NULL AND \
-            SUBSTR('0' || w.weeknumber, -2) = '" + week + "' AND w.year = '" + year + "' AND " + select_status_clause + " ORDER BY c.ComicSortName")
+            SUBSTR('0' || w.weeknumber, -2) = '" + week + "' AND w.year = '" + year + "' AND " + select_status_clause + " ORDER BY c.ComicSortName")], paging)
         return
 
     def _getWanted(self, **kwargs):
+        paging = self._pageArgs(**kwargs)
+        if paging is None:
+            self.data = self._failureResponse('Invalid paging parameters')
+            return
+
+        if self._notModified(['comics', 'issues', 'storyarcs', 'annuals'], extra=[mylar.CONFIG.UPCOMING_STORYARCS, mylar.CONFIG.ANNUALS_ON], **kwargs):
+            return
+
         iss_query = "SELECT a.ComicName, a.ComicYear, a.ComicVersion, a.Type as BookType, a.ComicPublisher, a.publisherImprint, b.Issue_Number, b.IssueName, b.ReleaseDate, b.IssueDate, b.DigitalDate, b.Status, b.ComicID, b.IssueID, b.DateAdded from comics as a INNER JOIN issues as b ON a.ComicID = b.ComicID WHERE b.Status='Wanted'"
-        issues = self._resultsFromQuery(iss_query)
-        tmp_data = {'issues': issues}
+        sections = [('issues', iss_query)]
         if 'story_arcs' in kwargs and kwargs['story_arcs'] == 'true':
             if mylar.CONFIG.UPCOMING_STORYARCS is True:
                 arcs_query = "SELECT Storyarc, StoryArcID, IssueArcID, ComicName, IssueNumber, IssueName, ReleaseDate, IssueDate, DigitalDate, Status, ComicID, IssueID, DateAdded from storyarcs WHERE Status='Wanted'"
-                arclist = self._resultsFromQuery(arcs_query)
-                tmp_data2 = {**tmp_data, **{'story_arcs': arclist}}
-                tmp_data = tmp_data2
+                sections.append(('story_arcs', arcs_query))
 
         if mylar.CONFIG.ANNUALS_ON:
             annuals_query = "SELECT b.ReleaseComicName as ComicName, a.ComicYear, a.ComicVersion, a.Type as BookType, a.ComicPublisher, a.publisherImprint, a.ComicName as SeriesName, b.Issue_Number as Issue_Number, b.IssueName, b.ReleaseDate, b.IssueDate, b.DigitalDate, b.Status, b.ComicID, b.IssueID, b.ReleaseComicID as SeriesComicID, b.DateAdded FROM comics as a INNER JOIN annuals as b ON a.ComicID = b.ComicID WHERE NOT b.Deleted and b.Status='Wanted'"
-            annuals_list = self._resultsFromQuery(annuals_query)
-            tmp_data2 = {**tmp_data, **{'annuals': annuals_list}}
-            tmp_data = tmp_data2
+            sections.append(('annuals', annuals_query))
 
-        self.data = tmp_data
+        # with paging, each section is paged with the same limit / offset.
+        self._streamQuery(sections, paging)
         return
 
     def _getLogs(self, **kwargs):
@@ -719,10 +819,15 @@ class Api(object):
                 if type(self.id) is list:
                     bulk = True
 
+        #optional narrowing of the selection: IssueDate range (YYYY-MM-DD) and/or publisher.
+        date_from = kwargs.get('date_from')
+        date_to = kwargs.get('date_to')
+        publisher = kwargs.get('publisher')
+
         logger.info('[BULK:%s] [%s --> %s] ComicIDs to Change Status: %s' % (bulk, self.status_from, self.status_to, self.id))
 
         try:
-            le_data = helpers.statusChange(self.status_from, self.status_to, self.id, bulk=bulk, api=True)
+            le_data = helpers.statusChange(self.status_from, self.status_to, self.id, bulk=bulk, api=True, date_from=date_from, date_to=date_to, publisher=publisher)
         except Exception as e:
             logger.error('[ERROR] %s' % e)
             self.data = e
@@ -1277,45 +1382,42 @@ class Api(object):
         return
 
     def _checkGlobalMessages(self, **kwargs):
-        the_message = {'status': None, 'event': None, 'comicname': None, 'seriesyear': None, 'comicid': None, 'tables': None, 'message': None}
-        if mylar.GLOBAL_MESSAGES is not None:
-            try:
-                event = mylar.GLOBAL_MESSAGES['event']
-            except Exception:
-                event = None
+        # long-lived SSE stream off of the event bus. Browsers send Last-Event-ID when they reconnect,
+        # so anything published in between is replayed from the bus backlog.
+        last_id = cherrypy.request.headers.get('Last-Event-ID', kwargs.get('last_event_id'))
+        try:
+            last_id = int(last_id) if last_id is not None else None
+        except ValueError:
+            last_id = None
 
-            if event is not None and any([event == 'shutdown', event == 'config_check']):
-                the_message = {'status': mylar.GLOBAL_MESSAGES['status'], 'event': event, 'message': mylar.GLOBAL_MESSAGES['message']}
-            elif event is not None and event == 'check_update':
-                the_message = {'status': mylar.GLOBAL_MESSAGES['status'], 'event': event, 'current_version': mylar.GLOBAL_MESSAGES['current_version'], 'latest_version': mylar.GLOBAL_MESSAGES['latest_version'], 'commits_behind': str(mylar.GLOBAL_MESSAGES['commits_behind']), 'docker': mylar.GLOBAL_MESSAGES['docker'], 'message': mylar.GLOBAL_MESSAGES['message']}
-            else:
-                the_message = {'status': mylar.GLOBAL_MESSAGES['status'], 'event': event, 'comicid': mylar.GLOBAL_MESSAGES['comicid'], 'tables': mylar.GLOBAL_MESSAGES['tables'], 'message': mylar.GLOBAL_MESSAGES['message']}
-                try:
-                    the_fields = {'comicname': mylar.GLOBAL_MESSAGES['comicname'], 'seriesyear': mylar.GLOBAL_MESSAGES['seriesyear']}
-                    the_message = dict(the_message, **the_fields)
-                except Exception as e:
-                    logger.warn('error: %s' % e)
-            #logger.fdebug('the_message added: %s' % (the_message,))
-            if mylar.GLOBAL_MESSAGES['status'] != 'mid-message-event':
-                myDB = db.DBConnection()
-                tmp_message = dict(the_message, **{'session_id': mylar.SESSION_ID})
-                if event != 'check_update':
+        cherrypy.response.headers['Content-Type'] = 'text/event-stream'
+        cherrypy.response.headers['Cache-Control'] = 'no-cache'
+        cherrypy.response.headers['X-Accel-Buffering'] = 'no'
+
+        def stream():
+            # the subscription lives and dies with the generator - cherrypy closes it (GeneratorExit)
+            # when the client goes away, which is what frees the slot.
+            sub = events.BUS.subscribe(last_id)
+            if sub is None:
+                logger.fdebug('[API] %s event streams already open - asking the browser to retry shortly.' % events.MAX_STREAMS)
+                yield 'retry: %s\n\n' % events.BUSY_RETRY
+                return
+            try:
+                yield 'retry: 3000\n\n'
+                end_time = time.time() + events.STREAM_LIFETIME
+                while time.time() < end_time:
                     try:
-                        tmp_message.pop('tables')
-                    except Exception:
-                        pass
-                else:
-                    tmp_message.pop('current_version')
-                    tmp_message.pop('latest_version')
-                    tmp_message.pop('commits_behind')
-                    tmp_message.pop('docker')
-                the_tmp_message = tmp_message.pop('message')
-                the_real_message = re.sub(r'\r\n|\n|</br>', '', the_tmp_message)
-                tmp_message = dict(tmp_message, **{'message': the_real_message})
-                #logger.fdebug('the_message re-added: %s' % (tmp_message,))
-                myDB.upsert( "notifs", tmp_message, {'date': helpers.now()} )
-            mylar.GLOBAL_MESSAGES = None
-        self.data = self._eventStreamResponse(the_message)
+                        item = sub.get(True, events.KEEPALIVE)
+                    except queue.Empty:
+                        yield ': keepalive\n\n'
+                        continue
+                    yield events.format_sse(item)
+                    if item[1] == 'shutdown':
+                        break
+            finally:
+                events.BUS.unsubscribe(sub)
+
+        self.data = stream()
 
     def _listProviders(self, **kwargs):
         try:
@@ -1841,7 +1943,7 @@ class REST(object):
         def __init__(self):
             pass
 
-        def GET(self):
+        def GET(self, **kwargs):
             va = REST.verify_api()
             vchk = va.validate()
             if vchk is not True:
@@ -1853,9 +1955,38 @@ class REST(object):
             #    rows_as_dic.append(row_as_dic)
 
             #return rows_as_dic
-            some = helpers.havetotals()
+            api = Api()
+            api.cmd = 'rest_watchlist'
+            paging = api._pageArgs(**kwargs)
+            if paging is None:
+                return api._failureResponse('Invalid paging parameters')
+            if api._notModified(['comics', 'annuals'], extra=mylar.CONFIG.ANNUALS_ON, **kwargs):
+                return api.data
+
+            some = helpers.havetotals(limit=paging['limit'], offset=paging['offset'])
+            if paging['limit'] is not None and len(some) == paging['limit']:
+                cherrypy.response.headers['X-Next-Cursor'] = base64.urlsafe_b64encode(str(paging['offset'] + paging['limit']).encode('utf-8')).decode('utf-8')
+            if paging['fields'] is not None:
+                some = [dict((k, v) for k, v in x.items() if k in paging['fields']) for x in some]
             return json.dumps(some)
 
+    class Changes(object):
+        exposed = True
+        def __init__(self):
+            pass
+
+        def GET(self, **kwargs):
+            va = REST.verify_api()
+            vchk = va.validate()
+            if vchk is not True:
+                return('api-key provided was either not present in auth header, or was incorrect.')
+
+            args = Api()._changeArgs(**kwargs)
+            if args is None:
+                return json.dumps({'error': 'since & limit must be numeric, tables one or more of: %s' % ', '.join(changelog.TABLES)})
+            cherrypy.response.headers['Content-Type'] = 'application/json'
+            return json.dumps(changelog.changes(args['since'], args['limit'], args['tables']))
+
     class Comics(object):
         exposed = True
         def __init__(self):
@@ -0,0 +1,100 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+
+import mylar
+from mylar import db, logger
+
+#tables recorded in the changelog (via the triggers created in dbcheck) and the key reported for each row.
+TABLES = {'comics':   'ComicID',
+          'issues':   'IssueID',
+          'annuals':  'IssueID',
+          'snatched': 'IssueID',
+          'readlist': 'IssueID'}
+
+#compaction runs at most this often (seconds).
+COMPACT_INTERVAL = 3600
+LAST_COMPACT = 0
+
+def horizon(myDB=None):
+    # the highest seq that has been pruned by retention - anyone asking for changes since before
+    # this point has missed entries and needs a full resync instead.
+    if myDB is None:
+        myDB = db.DBConnection()
+    row = myDB.selectone('SELECT MAX(Horizon) AS Horizon FROM changelog_info').fetchone()
+    if row is None or row['Horizon'] is None:
+        return 0
+    return row['Horizon']
+
+def changes(since=0, limit=500, tables=None):
+    """
+    Returns the rows changed after the given seq, one entry per row (the latest change wins),
+    in seq order. The 'next' value is the cursor to pass as since on the following call; 'more'
+    flags that the limit cut the result short and 'reset' that since is older than the retention
+    window, so the caller has to resync in full.
+    """
+    myDB = db.DBConnection()
+    pruned = horizon(myDB)
+    latest = myDB.selectone('SELECT MAX(Seq) AS Seq FROM changelog').fetchone()['Seq'] or pruned
+
+    if since < pruned:
+        return {'reset': True, 'since': since, 'next': latest, 'more': False, 'changes': []}
+
+    tableline = ''
+    args = [since]
+    if tables:
+        tableline = ' AND TableName IN (%s)' % ','.join('?' * len(tables))
+        args.extend(tables)
+    args.append(limit + 1)
+
+    rows = myDB.select('SELECT MAX(Seq) AS Seq, TableName, RowKey, ComicID, Op, Stamp FROM changelog WHERE Seq > ?%s GROUP BY TableName, RowKey ORDER BY Seq LIMIT ?' % tableline, args)
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    results = [{'seq':     row['Seq'],
+                'table':   row['TableName'],
+                'id':      row['RowKey'],
+                'comicid': row['ComicID'],
+                'op':      row['Op'],
+                'stamp':   row['Stamp']} for row in rows]
+
+    if more is True:
+        nextseq = results[-1]['seq']
+    else:
+        nextseq = max(latest, since)
+
+    return {'reset': False, 'since': since, 'next': nextseq, 'more': more, 'changes': results}
+
+def compact(force=False):
+    # folds superseded entries for the same row down to the latest one, then drops anything older
+    # than CHANGELOG_RETENTION days (recording the highest pruned seq as the new horizon).
+    global LAST_COMPACT
+    now = time.time()
+    if force is False and now - LAST_COMPACT < COMPACT_INTERVAL:
+        return
+    LAST_COMPACT = now
+
+    myDB = db.DBConnection()
+    cutoff = int(now) - (max(1, mylar.CONFIG.CHANGELOG_RETENTION) * 86400)
+    pruned = myDB.selectone('SELECT MAX(Seq) AS Seq FROM changelog WHERE Stamp < ?', [cutoff]).fetchone()['Seq']
+
+    querylist = [('DELETE FROM changelog WHERE Seq NOT IN (SELECT MAX(Seq) FROM changelog GROUP BY TableName, RowKey)', None)]
+    if pruned is not None:
+        querylist.append(('DELETE FROM changelog WHERE Seq <= ?', [pruned]))
+        querylist.append(('DELETE FROM changelog_info', None))
+        querylist.append(('INSERT INTO changelog_info (Horizon) VALUES (?)', [pruned]))
+    myDB.mass_action(querylist)
+    logger.fdebug('[CHANGELOG] Compacted change log%s' % ('' if pruned is None else ' - pruned up to seq %s' % pruned))
@@ -16,10 +16,11 @@ from packaging.version import parse as parse_version
 from subprocess import CalledProcessError, check_output
 import mylar
 
-from mylar import logger, notifiers
+from mylar import logger, notifiers, placement, metrics
 
 
-def run(dirName, nzbName=None, issueid=None, comversion=None, manual=None, filename=None, module=None, manualmeta=False, readingorder=None, agerating=None):
+@metrics.timed('postprocess', stage='metatag')
+def run(dirName, nzbName=None, issueid=None, comversion=None, manual=None, filename=None, module=None, manualmeta=False, readingorder=None, agerating=None, destination=None):
     if module is None:
         module = ''
     module += '[META-TAGGER]'
@@ -51,15 +52,14 @@ def run(dirName, nzbName=None, issueid=None, comversion=None, manual=None, filen
         import tempfile
         logger.fdebug('Filepath: %s' %filepath)
         logger.fdebug('Filename: %s' %filename)
-        new_folder = tempfile.mkdtemp(prefix='mylar_', dir=mylar.CONFIG.CACHE_DIR) #prefix, suffix, dir
+        #stage on the destination's filesystem (if known) so the tagged file can be renamed into place.
+        new_folder = placement.staging_dir(destination)
         os.chmod(new_folder, 0o777)
         logger.fdebug('New_Folder: %s' % new_folder)
         new_filepath = os.path.join(new_folder, filename)
         logger.fdebug('New_Filepath: %s' % new_filepath)
-        if mylar.CONFIG.FILE_OPTS == 'copy' and manualmeta == False:
-            shutil.copy(filepath, new_filepath)
-        else:
-            shutil.copy(filepath, new_filepath)
+        strategy = placement.copy(filepath, new_filepath)
+        logger.fdebug('%s Staged %s for tagging [%s]' % (module, filepath, strategy))
         filepath = new_filepath
     except Exception as e:
         logger.warn('%s Unexpected Error: %s [%s]' % (module, sys.exc_info()[0], e))
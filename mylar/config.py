@@ -37,6 +37,7 @@ _CONFIG_DEFINITIONS = OrderedDict({
     'MINIMAL_INI': (bool, 'General', False),
     'AUTO_UPDATE': (bool, 'General', False),
     'CACHE_DIR': (str, 'General', None),
+    'STAGE_ON_DESTINATION': (bool, 'General', True),
     'DYNAMIC_UPDATE': (int, 'General', 0),
     'REFRESH_CACHE': (int, 'General', 7),
     'ANNUALS_ON': (bool, 'General', False),
@@ -103,8 +104,11 @@ _CONFIG_DEFINITIONS = OrderedDict({
     'BACKUP_ON_START': (bool, 'General', False),
     'BACKUP_LOCATION': (str, 'General', None),
     'BACKUP_RETENTION': (int, 'General', 4),
+    'BACKUP_COMPRESSION': (str, 'General', None),   # None, gzip or zstd
+    'BACKUP_PAGE_STEP': (int, 'General', 1024),   # db pages copied per backup step (-1 = all at once)
     'BACKFILL_LENGTH': (int, 'General', 8),  # weeks
     'BACKFILL_TIMESPAN': (int, 'General', 10),   # minutes
+    'DB_UPDATER_DELTA': (bool, 'General', True),
     'PROBLEM_DATES': (str, 'General', []),
     'PROBLEM_DATES_SECONDS': (int, 'General', 60),
     'DEFAULT_DATES': (str, 'General', 'store_date'),
@@ -112,6 +116,8 @@ _CONFIG_DEFINITIONS = OrderedDict({
     'SCAN_ON_SERIES_CHANGES': (bool, 'General', True),
     'CLEAR_PROVIDER_TABLE': (bool, 'General', False),
     'SEARCH_TIER_CUTOFF': (int, 'General', 14), # days
+    'SEARCH_VERDICT_CACHE': (bool, 'General', True),
+    'SEARCH_VERDICT_TTL': (int, 'General', 24), # hours
 
     'RSS_CHECKINTERVAL': (int, 'Scheduler', 20),
     'SEARCH_INTERVAL': (int, 'Scheduler', 1440),
@@ -146,11 +152,14 @@ _CONFIG_DEFINITIONS = OrderedDict({
     'LOGIN_TIMEOUT': (int, 'Interface', 43800),
     'ALPHAINDEX': (bool, 'Interface', True),
     'CHERRYPY_LOGGING': (bool, 'Interface', False),
+    'METRICS_PROFILER': (bool, 'Interface', False),
 
     'API_ENABLED' : (bool, 'API', False),
     'API_KEY' : (str, 'API', None),
+    'CHANGELOG_RETENTION' : (int, 'API', 14),   # days
 
     'CVAPI_RATE' : (int, 'CV', 2),
+    'MASS_WORKERS' : (int, 'CV', 3),
     'COMICVINE_API': (str, 'CV', None),
     'IGNORED_PUBLISHERS' : (str, 'CV', ""),
     'CV_VERIFY': (bool, 'CV', True),
@@ -190,6 +199,7 @@ _CONFIG_DEFINITIONS = OrderedDict({
     'DDUMP': (bool, 'Duplicates', False),
     'DUPLICATE_DUMP': (str, 'Duplicates', None),
     'DUPLICATE_DATED_FOLDERS': (bool, 'Duplicates', False),
+    'FINGERPRINT_FULL_HASH': (bool, 'Duplicates', False),
 
     'PROWL_ENABLED': (bool, 'Prowl', False),
     'PROWL_PRIORITY': (int, 'Prowl', 0),
@@ -368,6 +378,9 @@ _CONFIG_DEFINITIONS = OrderedDict({
     'DDL_AUTORESUME': (bool, 'DDL', True),
     'DDL_PREFER_UPSCALED': (bool, 'DDL', True),
     'DDL_PRIORITY_ORDER': (str, 'DDL', []),
+    'DDL_CONCURRENCY': (int, 'DDL', 3),
+    'DDL_HOST_CONCURRENCY': (int, 'DDL', 2),
+    'DDL_SEGMENTS': (int, 'DDL', 4),
     'ENABLE_FLARESOLVERR': (bool, 'DDL', False),
     'FLARESOLVERR_URL': (str, 'DDL', None),
     'ENABLE_PROXY': (bool, 'DDL', False),
@@ -14,8 +14,9 @@
 
 import re
 import time
+import threading
 import pytz
-from mylar import db, logger, helpers
+from mylar import db, logger, helpers, metrics
 import mylar
 from bs4 import BeautifulSoup as Soup
 from xml.parsers.expat import ExpatError
@@ -23,6 +24,36 @@ import requests
 import datetime
 from operator import itemgetter
 
+class RateBudget(object):
+    """
+    A single CV request budget shared by every thread. Callers block in wait() until their
+    slot comes up, so any number of workers together still only hit CV once every CVAPI_RATE
+    seconds - and time spent doing local work between calls counts towards the wait.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.next_slot = 0
+
+    def interval(self):
+        if mylar.CONFIG.CVAPI_RATE is None or mylar.CONFIG.CVAPI_RATE < 2:
+            return 2
+        return mylar.CONFIG.CVAPI_RATE
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval()
+        metrics.observe('cv_budget_wait', max(0, slot - now))
+        if slot > now:
+            time.sleep(slot - now)
+
+CV_BUDGET = RateBudget()
+
+#what CV serves up instead of results once it's banned the ip for going over the rate limit.
+CV_BANNED = '<title>Abnormal Traffic Detected'
+
 def pulldetails(comicid, rtype, issueid=None, offset=1, arclist=None, comicidlist=None, dateinfo=None):
     #import easy to use xml parser called minidom:
     from xml.dom.minidom import parseString
@@ -46,7 +77,7 @@ def pulldetails(comicid, rtype, issueid=None, offset=1, arclist=None, comicidlis
         else:
             cv_rtype = 'volume/' + str(comicid)
             searchset = 'name,count_of_issues,issues,start_year,site_detail_url,image,publisher,description,store_date'
-        PULLURL = mylar.CVURL + str(cv_rtype) + '/?api_key=' + str(comicapi) + '&format=xml&' + str(searchset) + '&offset=' + str(offset)
+        PULLURL = mylar.CVURL + str(cv_rtype) + '/?api_key=' + str(comicapi) + '&format=json&' + str(searchset) + '&offset=' + str(offset)
     elif any([rtype == 'image', rtype == 'firstissue', rtype == 'imprints_first']):
         #this is used ONLY for CV_ONLY
         if issueid:
@@ -63,16 +94,14 @@ def pulldetails(comicid, rtype, issueid=None, offset=1, arclist=None, comicidlis
         #this is used for retrieving single issue metadata for use when displaying metadata information for a selected issue.
         PULLURL = mylar.CVURL + 'issue/4000-' + str(issueid) + '?api_key=' + str(comicapi) + '&format=json'
     elif rtype == 'db_updater':
-        PULLURL = mylar.CVURL + 'issues/?api_key=' + str(comicapi) + '&format=json&filter=date_last_updated:'+dateinfo['start_date']+'|'+dateinfo['end_date']+'&field_list=date_last_updated,id,volume,issue_number&sort=date_last_updated:asc&offset=' + str(offset)
+        PULLURL = mylar.CVURL + 'issues/?api_key=' + str(comicapi) + '&format=json&filter=date_last_updated:'+dateinfo['start_date']+'|'+dateinfo['end_date']+'&field_list=date_last_updated,id,volume,issue_number,name,cover_date,store_date&sort=date_last_updated:asc&offset=' + str(offset)
     #logger.info('CV.PULLURL: ' + PULLURL)
     #new CV API restriction - one api request / second.
-    if mylar.CONFIG.CVAPI_RATE is None or mylar.CONFIG.CVAPI_RATE < 2:
-        time.sleep(2)
-    else:
-        time.sleep(mylar.CONFIG.CVAPI_RATE)
+    CV_BUDGET.wait()
 
     try:
-        r = requests.get(PULLURL, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
+        with metrics.timed('http_request', host=metrics.host(PULLURL)):
+            r = requests.get(PULLURL, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
     except Exception as e:
         logger.warn('Error fetching data from ComicVine: %s' % (e))
         if all(['Expecting value: line 1 column 1' not in str(e), rtype != 'db_updater']):
@@ -85,13 +114,19 @@ def pulldetails(comicid, rtype, issueid=None, offset=1, arclist=None, comicidlis
     #logger.fdebug('cv status code : ' + str(r.status_code))
     #logger.fdebug('rtype: %s' % rtype)
     try:
-        if any([rtype == 'single_issue', rtype == 'db_updater']):
+        if any([rtype == 'single_issue', rtype == 'db_updater', rtype == 'issue']):
+            #the ban page is html, so look for it before the json decode turns it into a generic error.
+            if CV_BANNED in r.content.decode('utf-8', 'replace'):
+                logger.error('ComicVine has banned this server\'s IP address because it exceeded the API rate limit.')
+                if rtype == 'db_updater':
+                    return False
+                return
             dom = r.json()
             #logger.info('cv_data returned: %s' % dom)
         else:
             dom = parseString(r.content)
     except ExpatError:
-        if '<title>Abnormal Traffic Detected' in r.content.decode('utf-8'):
+        if CV_BANNED in r.content.decode('utf-8'):
             logger.error('ComicVine has banned this server\'s IP address because it exceeded the API rate limit.')
         else:
             logger.warn('[WARNING] ComicVine is not responding correctly at the moment. This is usually due to some problems on their end. If you re-try things again in a few moments, things might work')
@@ -132,9 +167,9 @@ def getComic(comicid, rtype, issueid=None, arc=None, arcid=None, arclist=None, c
             id = comicid
             islist = None
         searched = pulldetails(id, 'issue', None, 0, islist)
-        if searched is None:
+        if not searched:
             return False
-        totalResults = searched.getElementsByTagName('number_of_total_results')[0].firstChild.wholeText
+        totalResults = searched.get('number_of_total_results')
         logger.fdebug("there are " + str(totalResults) + " search results...")
         if not totalResults:
             return False
@@ -331,25 +366,24 @@ def GetComicInfo(comicid, dom, safechk=None, series=False):
     # where [0] denotes the number of the name field(s)
     # where nodeName denotes the parentNode : ComicName = results, publisher = publisher, issues = issue
     try:
-        names = len(dom.getElementsByTagName('name'))
-        n = 0
+        #grab the node list once - re-running getElementsByTagName per index rescans the whole document each time.
+        name_nodes = dom.getElementsByTagName('name')
         comic['ComicPublisher'] = 'Unknown'   #set this to a default value here so that it will carry through properly
-        while (n < names):
-            if dom.getElementsByTagName('name')[n].parentNode.nodeName == 'results':
+        for name_node in name_nodes:
+            if name_node.parentNode.nodeName == 'results':
                 try:
-                    comic['ComicName'] = dom.getElementsByTagName('name')[n].firstChild.wholeText
+                    comic['ComicName'] = name_node.firstChild.wholeText
                     comic['ComicName'] = comic['ComicName'].strip()
                 except:
                     logger.error('There was a problem retrieving the given data from ComicVine. Ensure that www.comicvine.com is accessible AND that you have provided your OWN ComicVine API key.')
                     return
 
-            elif dom.getElementsByTagName('name')[n].parentNode.nodeName == 'publisher':
+            elif name_node.parentNode.nodeName == 'publisher':
                 try:
-                    comic['ComicPublisher'] = dom.getElementsByTagName('name')[n].firstChild.wholeText
+                    comic['ComicPublisher'] = name_node.firstChild.wholeText
                 except Exception as e:
                     logger.error('error encountered: %s' % e)
                     comic['ComicPublisher'] = "Unknown"
-            n += 1
     except:
         logger.warn('Something went wrong retrieving from ComicVine. Ensure your API is up-to-date and that comicvine is accessible')
         return
@@ -528,137 +562,87 @@ def GetComicInfo(comicid, dom, safechk=None, series=False):
     return comic
 
 def GetIssuesInfo(comicid, dom, arcid=None):
-    subtracks = dom.getElementsByTagName('issue')
-    if not mylar.CONFIG.CV_ONLY:
-        cntiss = dom.getElementsByTagName('count_of_issues')[0].firstChild.wholeText
-        logger.fdebug("issues I've counted: " + str(len(subtracks)))
-        logger.fdebug("issues CV says it has: " + str(int(cntiss)))
-
-        if int(len(subtracks)) != int(cntiss):
-            logger.fdebug("CV's count is wrong, I counted different...going with my count for physicals" + str(len(subtracks)))
-            cntiss = len(subtracks) # assume count of issues is wrong, go with ACTUAL physical api count
-        cntiss = int(cntiss)
-        n = cntiss -1
+    #dom is the decoded json response. Each issue record is walked exactly once, rather than
+    #re-scanning the entire document for every issue as the old xml dom approach did.
+    results = dom.get('results')
+    if isinstance(results, dict):
+        #volume/<id> response (non-CV_ONLY) - the issue list hangs off of the volume itself.
+        subtracks = results.get('issues') or []
+        if not mylar.CONFIG.CV_ONLY:
+            logger.fdebug("issues I've counted: " + str(len(subtracks)))
+            logger.fdebug("issues CV says it has: " + str(results.get('count_of_issues')))
     else:
-        n = int(len(subtracks))
-    tempissue = {}
+        subtracks = results or []
     issuech = []
     firstdate = '2099-00-00'
+    mff = None
     for subtrack in subtracks:
-        if not mylar.CONFIG.CV_ONLY:
-            if (dom.getElementsByTagName('name')[n].firstChild) is not None:
-                issue['Issue_Name'] = dom.getElementsByTagName('name')[n].firstChild.wholeText
-            else:
-                issue['Issue_Name'] = 'None'
-
-            issue['Issue_ID'] = dom.getElementsByTagName('id')[n].firstChild.wholeText
-            issue['Issue_Number'] = dom.getElementsByTagName('issue_number')[n].firstChild.wholeText
+        if subtrack.get('issue_number') is None:
+            logger.fdebug('No Issue Number available - Trade Paperbacks, Graphic Novels and Compendiums are not supported as of yet.')
+            continue
+        issue_number = str(subtrack['issue_number']).strip()
+        if 'Issue #' in issue_number:
+            issue_number = re.sub('Issue #', '', issue_number).strip()
 
+        if not mylar.CONFIG.CV_ONLY:
             issuech.append({
-                'Issue_ID':                issue['Issue_ID'],
-                'Issue_Number':            issue['Issue_Number'],
-                'Issue_Name':              issue['Issue_Name']
+                'Issue_ID':                str(subtrack['id']),
+                'Issue_Number':            issue_number,
+                'Issue_Name':              subtrack.get('name') or 'None'
                 })
-        else:
-            try:
-                totnames = len(subtrack.getElementsByTagName('name'))
-                tot = 0
-                while (tot < totnames):
-                    if subtrack.getElementsByTagName('name')[tot].parentNode.nodeName == 'volume':
-                        tempissue['ComicName'] = subtrack.getElementsByTagName('name')[tot].firstChild.wholeText
-                        tempissue['ComicName'] = tempissue['ComicName'].strip()
-                    elif subtrack.getElementsByTagName('name')[tot].parentNode.nodeName == 'issue':
-                        try:
-                            tempissue['Issue_Name'] = subtrack.getElementsByTagName('name')[tot].firstChild.wholeText
-                        except:
-                            tempissue['Issue_Name'] = None
-                    tot += 1
-            except:
-                tempissue['ComicName'] = 'None'
-
-            try:
-                totids = len(subtrack.getElementsByTagName('id'))
-                idt = 0
-                while (idt < totids):
-                    if subtrack.getElementsByTagName('id')[idt].parentNode.nodeName == 'volume':
-                        tempissue['Comic_ID'] = subtrack.getElementsByTagName('id')[idt].firstChild.wholeText
-                    elif subtrack.getElementsByTagName('id')[idt].parentNode.nodeName == 'issue':
-                        tempissue['Issue_ID'] = subtrack.getElementsByTagName('id')[idt].firstChild.wholeText
-                    idt += 1
-            except:
-                tempissue['Issue_Name'] = 'None'
-
-            try:
-                tempissue['CoverDate'] = subtrack.getElementsByTagName('cover_date')[0].firstChild.wholeText
-            except:
-                tempissue['CoverDate'] = '0000-00-00'
-            try:
-                tempissue['StoreDate'] = subtrack.getElementsByTagName('store_date')[0].firstChild.wholeText
-            except:
-                tempissue['StoreDate'] = '0000-00-00'
-            try:
-                digital_desc = subtrack.getElementsByTagName('description')[0].firstChild.wholeText
-            except:
-                tempissue['DigitalDate'] = '0000-00-00'
-            else:
-                tempissue['DigitalDate'] = '0000-00-00'
-                if all(['digital' in digital_desc.lower()[-90:], 'print' in digital_desc.lower()[-90:]]):
-                    #get the digital date of issue here...
+            continue
+
+        volume = subtrack.get('volume') or {}
+        image = subtrack.get('image') or {}
+        coverdate = subtrack.get('cover_date') or '0000-00-00'
+        storedate = subtrack.get('store_date') or '0000-00-00'
+
+        digitaldate = '0000-00-00'
+        digital_desc = subtrack.get('description')
+        if digital_desc:
+            if all(['digital' in digital_desc.lower()[-90:], 'print' in digital_desc.lower()[-90:]]):
+                #get the digital date of issue here...
+                if mff is None:
                     mff = mylar.filechecker.FileChecker()
-                    vlddate = mff.checkthedate(digital_desc[-90:], fulldate=True)
-                    #logger.fdebug('vlddate: %s' % vlddate)
-                    if vlddate:
-                        tempissue['DigitalDate'] = vlddate
-            try:
-                tempissue['Issue_Number'] = subtrack.getElementsByTagName('issue_number')[0].firstChild.wholeText
-            except:
-                logger.fdebug('No Issue Number available - Trade Paperbacks, Graphic Novels and Compendiums are not supported as of yet.')
-            else:
-                tempissue['Issue_Number'] = tempissue['Issue_Number'].strip()
-                if 'Issue #' in tempissue['Issue_Number']:
-                    tempissue['Issue_Number'] = re.sub('Issue #', '', tempissue['Issue_Number']).strip()
-            try:
-                tempissue['ComicImage'] = subtrack.getElementsByTagName('small_url')[0].firstChild.wholeText
-            except:
-                tempissue['ComicImage'] = 'None'
+                vlddate = mff.checkthedate(digital_desc[-90:], fulldate=True)
+                #logger.fdebug('vlddate: %s' % vlddate)
+                if vlddate:
+                    digitaldate = vlddate
 
-            try:
-                tempissue['ComicImageALT'] = subtrack.getElementsByTagName('medium_url')[0].firstChild.wholeText
-            except:
-                tempissue['ComicImageALT'] = 'None'
-
-            if arcid is None:
-                issuech.append({
-                    'Comic_ID':                comicid,
-                    'Issue_ID':                tempissue['Issue_ID'],
-                    'Issue_Number':            tempissue['Issue_Number'],
-                    'Issue_Date':              tempissue['CoverDate'],
-                    'Store_Date':              tempissue['StoreDate'],
-                    'Digital_Date':            tempissue['DigitalDate'],
-                    'Issue_Name':              tempissue['Issue_Name'],
-                    'Image':                   tempissue['ComicImage'],
-                    'ImageALT':                tempissue['ComicImageALT']
-                    })
+        if arcid is None:
+            issuech.append({
+                'Comic_ID':                comicid,
+                'Issue_ID':                str(subtrack['id']),
+                'Issue_Number':            issue_number,
+                'Issue_Date':              coverdate,
+                'Store_Date':              storedate,
+                'Digital_Date':            digitaldate,
+                'Issue_Name':              subtrack.get('name'),
+                'Image':                   image.get('small_url') or 'None',
+                'ImageALT':                image.get('medium_url') or 'None'
+                })
 
+        else:
+            if volume.get('name') is not None:
+                comicname = volume['name'].strip()
             else:
-                issuech.append({
-                    'ArcID':                   arcid,
-                    'ComicName':               tempissue['ComicName'],
-                    'ComicID':                 tempissue['Comic_ID'],
-                    'IssueID':                 tempissue['Issue_ID'],
-                    'Issue_Number':            tempissue['Issue_Number'],
-                    'Issue_Date':              tempissue['CoverDate'],
-                    'Store_Date':              tempissue['StoreDate'],
-                    'Digital_Date':            tempissue['DigitalDate'],
-                    'Issue_Name':              tempissue['Issue_Name']
-                    })
-
-            if tempissue['CoverDate'] < firstdate and tempissue['CoverDate'] != '0000-00-00':
-                firstdate = tempissue['CoverDate']
-        n-= 1
+                comicname = 'None'
+            issuech.append({
+                'ArcID':                   arcid,
+                'ComicName':               comicname,
+                'ComicID':                 str(volume['id']) if volume.get('id') is not None else None,
+                'IssueID':                 str(subtrack['id']),
+                'Issue_Number':            issue_number,
+                'Issue_Date':              coverdate,
+                'Store_Date':              storedate,
+                'Digital_Date':            digitaldate,
+                'Issue_Name':              subtrack.get('name')
+                })
+
+        if coverdate < firstdate and coverdate != '0000-00-00':
+            firstdate = coverdate
 
     #logger.fdebug('issue_info: %s' % issuech)
-    #issue['firstdate'] = firstdate
     return issuech, firstdate
 
 def Getissue(issueid, dom, rtype):
@@ -1107,6 +1091,9 @@ def db_updates(results, rtype='issueid'):
                                'issueid': x['id'],
                                'last_updated': x['date_last_updated'],
                                'issue_number': x['issue_number'],
+                               'issue_name': x.get('name'),
+                               'cover_date': x.get('cover_date'),
+                               'store_date': x.get('store_date'),
                           })
     return dataset
 
@@ -0,0 +1,135 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import threading
+import collections
+
+from mylar import db
+
+#cached row counts - keyed on the query & its arguments, and only valid for as long as the
+#write generation of the tables behind it stays the same (see db.generation).
+COUNT_CACHE = collections.OrderedDict()
+COUNT_CACHE_SIZE = 64
+COUNT_LOCK = threading.Lock()
+
+#punctuation/whitespace treated as a wildcard by a loose search (same set the series search strips out).
+LOOSE_SPLIT = re.compile(r'[\s\:\-\%\$\#\@\!\.\,\;\/\(\)\+\=\?]+')
+
+def like_escape(term):
+    return term.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+
+def like_pattern(term, loose=False):
+    if loose is True:
+        parts = [like_escape(p) for p in LOOSE_SPLIT.split(term) if p != '']
+        if parts:
+            return '%%%s%%' % '%'.join(parts)
+    return '%%%s%%' % like_escape(term)
+
+
+class DataTable(object):
+    """
+    Builds the server-side query for a DataTables endpoint. The source query is wrapped as a
+    subquery, so filters, search and sorting all refer to its output column names. Paging is done
+    with LIMIT/OFFSET and the two totals DataTables wants are cached against the table generation,
+    so turning a page costs one bounded query however long the list is.
+    """
+
+    def __init__(self, source, args=None, tables=()):
+        self.source = source
+        self.args = list(args or [])
+        self.tables = tables
+        self.where = []
+        self.where_args = []
+        self.search_where = None
+        self.search_args = []
+        self.orderby = None
+
+    def filter(self, clause, args=None):
+        self.where.append('(%s)' % clause)
+        self.where_args.extend(args or [])
+        return self
+
+    def search(self, term, columns, loose=False):
+        # case-insensitive substring match of the DataTables search box across the given columns.
+        # A loose search lets any punctuation/spaces in the term match anything in between.
+        if term is None or term.strip() == '' or not columns:
+            return self
+        pattern = like_pattern(term.strip(), loose)
+        self.search_where = '(%s)' % ' OR '.join(["%s LIKE ? ESCAPE '!'" % c for c in columns])
+        self.search_args = [pattern] * len(columns)
+        return self
+
+    def order(self, sortcols, column, direction, default=None):
+        # sortcols maps the DataTables column index (as a string) to a sort expression - anything
+        # not in the map falls back to the default, so the client can't inject an ORDER BY.
+        expr = sortcols.get(str(column), default)
+        if expr is None:
+            return self
+        if str(direction).lower() == 'asc':
+            direction = 'ASC'
+        else:
+            direction = 'DESC'
+        self.orderby = ', '.join(['%s %s' % (e, direction) for e in expr.split(',')])
+        return self
+
+    def _whereline(self, searching):
+        clauses = list(self.where)
+        args = list(self.where_args)
+        if searching and self.search_where is not None:
+            clauses.append(self.search_where)
+            args.extend(self.search_args)
+        if not clauses:
+            return '', args
+        return ' WHERE %s' % ' AND '.join(clauses), args
+
+    def _count(self, myDB, searching):
+        whereline, args = self._whereline(searching)
+        query = 'SELECT COUNT(*) AS Total FROM (%s) AS dt%s' % (self.source, whereline)
+        args = self.args + args
+        key = (query, tuple(args))
+        generation = db.generation(*self.tables)
+        with COUNT_LOCK:
+            cached = COUNT_CACHE.get(key)
+            if cached is not None and cached[0] == generation:
+                COUNT_CACHE.move_to_end(key)
+                return cached[1]
+        total = myDB.selectone(query, args).fetchone()['Total']
+        with COUNT_LOCK:
+            COUNT_CACHE[key] = (generation, total)
+            COUNT_CACHE.move_to_end(key)
+            while len(COUNT_CACHE) > COUNT_CACHE_SIZE:
+                COUNT_CACHE.popitem(last=False)
+        return total
+
+    def fetch(self, start=0, length=100):
+        # returns (total rows, rows left after searching, the rows for the requested page).
+        start = max(0, int(start))
+        length = int(length)
+        myDB = db.DBConnection()
+        total = self._count(myDB, False)
+        if self.search_where is not None:
+            display_total = self._count(myDB, True)
+        else:
+            display_total = total
+
+        whereline, args = self._whereline(True)
+        query = 'SELECT * FROM (%s) AS dt%s' % (self.source, whereline)
+        if self.orderby is not None:
+            query += ' ORDER BY %s' % self.orderby
+        if length != -1:
+            query += ' LIMIT %d OFFSET %d' % (length, start)
+        rows = myDB.select(query, self.args + args)
+        return total, display_total, rows
@@ -20,17 +20,42 @@
 
 
 import os
+import re
 import sqlite3
 import threading
 import time
 import queue
 
 import mylar
-from . import logger
+from . import logger, metrics
 
 db_lock = threading.Lock()
 mylarQueue = queue.Queue()
 
+#per-table write counters - used for cheap cache revalidation (api etags) without touching the db.
+TABLE_GENERATION = {}
+WRITE_TABLE = re.compile(r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+["`\[]?(\w+)', re.IGNORECASE)
+
+#bumped on any write to the tables backing the in-memory library index (mylar.library).
+LIBRARY_GENERATION = 0
+LIBRARY_TABLES = ('comics', 'annuals', 'storyarcs')
+
+#tables carrying an Int_IssueNumber, and the issue number column it's derived from.
+INT_ISSUE_COLUMNS = {'issues': 'Issue_Number', 'annuals': 'Issue_Number', 'storyarcs': 'IssueNumber'}
+
+def table_write(query):
+    global LIBRARY_GENERATION
+    match = WRITE_TABLE.match(query)
+    if match is None:
+        return
+    table = match.group(1).lower()
+    TABLE_GENERATION[table] = TABLE_GENERATION.get(table, 0) + 1
+    if table in LIBRARY_TABLES:
+        LIBRARY_GENERATION += 1
+
+def generation(*tables):
+    return tuple(TABLE_GENERATION.get(t.lower(), 0) for t in tables)
+
 def dbFilename(filename="mylar.db"):
 
     return os.path.join(mylar.DATA_DIR, filename)
@@ -80,6 +105,7 @@ class DBConnection:
 
             sqlResult = None
             attempt = 0
+            start = time.perf_counter()
 
             while attempt < 5:
                 try:
@@ -105,6 +131,7 @@ class DBConnection:
                     logger.error('Fatal error executing query: %s' % e)
                     raise
 
+            metrics.observe('db_query', time.perf_counter() - start, statement=metrics.fingerprint(query))
             return sqlResult
 
 
@@ -117,6 +144,7 @@ class DBConnection:
 
             sqlResult = None
             attempt = 0
+            start = time.perf_counter()
 
             while attempt < 5:
                 try:
@@ -131,6 +159,7 @@ class DBConnection:
                         else:
                             sqlResult = self.connection.executemany(query, args)
                     self.connection.commit()
+                    table_write(query)
                     break
                 except sqlite3.OperationalError as e:
                     if any(['unable to open database file' in e.args[0], 'database is locked' in e.args[0]]):
@@ -141,8 +170,44 @@ class DBConnection:
                     else:
                         logger.error('Database error executing %s :: %s' % (query, e))
                         raise
+            metrics.observe('db_query', time.perf_counter() - start, statement=metrics.fingerprint(query))
             return sqlResult
 
+    def mass_action(self, querylist):
+        #runs a list of (query, args) tuples within a single transaction / commit.
+        with db_lock:
+            if not querylist:
+                return
+
+            attempt = 0
+            start = time.perf_counter()
+
+            while attempt < 5:
+                try:
+                    for qu in querylist:
+                        if len(qu) == 1 or qu[1] is None:
+                            self.connection.execute(qu[0])
+                        else:
+                            self.connection.execute(qu[0], qu[1])
+                    self.connection.commit()
+                    for qu in querylist:
+                        table_write(qu[0])
+                    metrics.observe('db_query', time.perf_counter() - start, statement='mass_action')
+                    break
+                except sqlite3.OperationalError as e:
+                    self.connection.rollback()
+                    if any(['unable to open database file' in e.args[0], 'database is locked' in e.args[0]]):
+                        logger.warn('Database Error: %s' % e)
+                        attempt += 1
+                        time.sleep(1)
+                    else:
+                        logger.error('Database error executing mass action :: %s' % e)
+                        raise
+                except sqlite3.DatabaseError as e:
+                    self.connection.rollback()
+                    logger.error('Fatal error executing mass action: %s' % e)
+                    raise
+
     def select(self, query, args=None):
 
         sqlResults = self.fetch(query, args).fetchall()
@@ -166,6 +231,12 @@ class DBConnection:
 
         changesBefore = self.connection.total_changes
 
+        #keep Int_IssueNumber in step with any write that changes the issue number without it.
+        number_column = INT_ISSUE_COLUMNS.get(tableName.lower())
+        if all([number_column is not None, number_column in valueDict, 'Int_IssueNumber' not in valueDict]):
+            from mylar import helpers
+            valueDict = dict(valueDict, Int_IssueNumber=helpers.issuedigits(valueDict[number_column]))
+
         genParams = lambda myDict: [x + " = ?" for x in list(myDict.keys())]
 
         query = "UPDATE " + tableName + " SET " + ", ".join(genParams(valueDict)) + " WHERE " + " AND ".join(genParams(keyDict))
@@ -24,6 +24,7 @@ import sys
 import requests
 import mylar
 from mylar import db, helpers, logger, search, search_filer
+from mylar.downloaders import transfer
 
 class MediaFire(object):
 
@@ -106,20 +107,17 @@ class MediaFire(object):
         )
 
         try:
-            response = self.session.get(
-                    url,
-                    verify=True,
-                    headers=self.headers,
-                    stream=True,
-                    timeout=(30,30)
-                )
-
-            logger.fdebug('[MediaFire] now writing....')
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=4096):
-                    if chunk:
-                        f.write(chunk)
-                        f.flush()
+            with transfer.host_slot(url):
+                response = self.session.get(
+                        url,
+                        verify=True,
+                        headers=self.headers,
+                        stream=True,
+                        timeout=(30,30)
+                    )
+
+                logger.fdebug('[MediaFire] now writing....')
+                transfer.write_stream(response, filepath)
 
         except Exception as e:
             logger.fdebug('[MediaFire][ERROR] %s' % e)
@@ -23,6 +23,7 @@ import urllib
 
 import mylar
 from mylar import db, helpers, logger, search, search_filer
+from mylar.downloaders import transfer
 
 class PixelDrain(object):
 
@@ -128,20 +129,17 @@ class PixelDrain(object):
         )
 
         try:
-            response = self.session.get(
-                    'https://pixeldrain.com/api/file/'+file_id,
-                    verify=True,
-                    headers=self.headers,
-                    stream=True,
-                    timeout=(30,30)
-                )
-
-            logger.fdebug('[PixelDrain] now writing....')
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=1024):
-                    if chunk:
-                        f.write(chunk)
-                        f.flush()
+            with transfer.host_slot('https://pixeldrain.com/api/file/'+file_id):
+                response = self.session.get(
+                        'https://pixeldrain.com/api/file/'+file_id,
+                        verify=True,
+                        headers=self.headers,
+                        stream=True,
+                        timeout=(30,30)
+                    )
+
+                logger.fdebug('[PixelDrain] now writing....')
+                transfer.write_stream(response, filepath)
 
         except Exception as e:
             logger.warn('[PixelDrain][ERROR] %s' % e)
@@ -0,0 +1,280 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import math
+import shutil
+import zipfile
+import threading
+import contextlib
+import urllib.parse
+
+import requests
+
+import mylar
+from mylar import db, logger
+
+#bytes pulled off the socket per read, and the write buffer sitting in front of the file.
+CHUNK_SIZE = 1024 * 1024
+BUFFER_SIZE = 8 * 1024 * 1024
+
+#files smaller than this aren't worth splitting into ranged segments.
+SEGMENT_MIN = 16 * 1024 * 1024
+
+#how much each segment downloads between writes of the resume state back to ddl_info.
+SAVE_EVERY = 32 * 1024 * 1024
+
+#headroom left on the disk on top of whatever a pack member needs (same as helpers.get_free_space).
+FREE_SPACE_MIN = 100000000
+
+#what gets pulled out of a pack - anything else in there (nfo's, txt's, covers) is left behind.
+PACK_EXTENSIONS = ('.cbr', '.cbz', '.pdf', '.cb7')
+
+HOST_SLOTS = {}
+HOST_CONNECTIONS = {}
+HOST_LOCK = threading.Lock()
+
+def _semaphore(pool, url, limit):
+    key = (urllib.parse.urlsplit(url).hostname or '', limit)
+    with HOST_LOCK:
+        sem = pool.get(key)
+        if sem is None:
+            sem = pool[key] = threading.BoundedSemaphore(limit)
+    return sem
+
+@contextlib.contextmanager
+def host_slot(url):
+    # caps how many downloads run against any one host at a time (DDL_HOST_CONCURRENCY).
+    with _semaphore(HOST_SLOTS, url, max(1, mylar.CONFIG.DDL_HOST_CONCURRENCY)):
+        yield
+
+@contextlib.contextmanager
+def host_connection(url):
+    # caps the ranged connections open against any one host (DDL_SEGMENTS) - segmented downloads
+    # running side-by-side share them rather than opening DDL_SEGMENTS each.
+    with _semaphore(HOST_CONNECTIONS, url, max(1, mylar.CONFIG.DDL_SEGMENTS)):
+        yield
+
+def write_stream(response, dst_path, mode='wb'):
+    written = 0
+    with open(dst_path, mode, buffering=BUFFER_SIZE) as f:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            if chunk:
+                f.write(chunk)
+                written += len(chunk)
+    return written
+
+def can_segment(response, size):
+    return all([mylar.CONFIG.DDL_SEGMENTS > 1,
+                int(size or 0) >= SEGMENT_MIN,
+                response.headers.get('Accept-Ranges', '').lower() == 'bytes',
+                response.headers.get('Content-Encoding', 'identity').lower() == 'identity'])
+
+def load_segments(ddl_id):
+    myDB = db.DBConnection()
+    row = myDB.selectone('SELECT segments FROM ddl_info WHERE id=?', [ddl_id]).fetchone()
+    if row is None or row['segments'] is None:
+        return None
+    try:
+        return json.loads(row['segments'])
+    except Exception:
+        return None
+
+def _trim_pack(zf, offset):
+    # cuts the zip back to offset and writes a central directory for whatever's left in front of it, so
+    # the file is still a valid zip of the members that haven't been extracted yet. Closing an append-mode
+    # ZipFile writes its directory at start_dir & truncates there - the comment assignment marks it as
+    # modified so that happens even though nothing was written.
+    for info in [x for x in zf.filelist if x.header_offset >= offset]:
+        zf.filelist.remove(info)
+        if zf.NameToInfo.get(info.filename) is info:
+            del zf.NameToInfo[info.filename]
+    zf.start_dir = offset
+    zf.comment = zf.comment
+
+def extract_pack(zip_path, dst_dir):
+    # pulls the issues out of a pack zip one at a time, yielding the folder each one lands in as soon as
+    # it's written. Members are taken from the end of the archive backwards and the zip is trimmed
+    # behind each one, so the disk only ever holds about one copy of the pack plus the member in hand.
+    # After every member the zip is a valid archive of exactly the issues still to come - if anything
+    # goes wrong part way (out of space, a corrupt member) running this again picks up from there.
+    used = set()
+    while True:
+        with zipfile.ZipFile(zip_path, 'a') as zf:
+            members = [x for x in zf.infolist() if all([not x.is_dir(), x.filename.lower().endswith(PACK_EXTENSIONS)])]
+            if not members:
+                break
+            member = max(members, key=lambda x: x.header_offset)
+
+            os.makedirs(dst_dir, exist_ok=True)
+            needed = member.file_size + FREE_SPACE_MIN
+            free = shutil.disk_usage(dst_dir).free
+            if free < needed:
+                raise OSError('not enough free space in %s to extract %s (%s free, %s needed)' % (dst_dir, member.filename, free, needed))
+
+            filename = os.path.basename(member.filename)
+            stem, ext = os.path.splitext(filename)
+            cnt = 1
+            #packs with the same filename in different sub-folders would otherwise overwrite each other
+            #(including one already pulled out by an earlier, interrupted run).
+            while any([filename.lower() in used, os.path.exists(os.path.join(dst_dir, os.path.splitext(filename)[0].strip(), filename))]):
+                cnt += 1
+                filename = '%s (%s)%s' % (stem.strip(), cnt, ext)
+            used.add(filename.lower())
+
+            member_dir = os.path.join(dst_dir, os.path.splitext(filename)[0].strip())
+            member_path = os.path.join(member_dir, filename)
+            os.makedirs(member_dir, exist_ok=True)
+            #written under a temporary name so a member cut short never looks like a finished one.
+            try:
+                with zf.open(member) as src, open(member_path + '.part', 'wb', buffering=BUFFER_SIZE) as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            except Exception:
+                try:
+                    os.remove(member_path + '.part')
+                except OSError:
+                    pass
+                raise
+            os.replace(member_path + '.part', member_path)
+
+            _trim_pack(zf, member.header_offset)
+
+        yield member_dir
+
+    try:
+        os.remove(zip_path)
+    except OSError as e:
+        logger.warn('[ERROR: %s] Unable to remove zip file from %s after extraction.' % (e, zip_path))
+
+
+class SegmentedDownload(object):
+    """
+    Fetches one file as several HTTP Range requests in parallel, each writing at its own offset of
+    a preallocated file. Per-segment progress is kept in ddl_info.segments so a resumed download
+    carries on each segment from where it stopped - only what's been flushed to disk is saved.
+    """
+
+    def __init__(self, session, url, dst_path, size, headers, ddl_id):
+        self.session = session
+        self.url = url
+        self.dst_path = dst_path
+        self.size = int(size)
+        self.headers = dict((k, v) for k, v in headers.items() if k.lower() != 'range')
+        self.ddl_id = ddl_id
+        self.lock = threading.Lock()
+        self.segments = None
+        self.flushed = None
+        self.errors = []
+        self.unsupported = False
+
+    def plan(self, resume=False):
+        if resume is True:
+            state = load_segments(self.ddl_id)
+            try:
+                if all([state is not None, state['size'] == self.size, os.path.getsize(self.dst_path) == self.size]):
+                    self.segments = state['segments']
+                    self.flushed = [x[2] for x in self.segments]
+                    logger.info('[DDL-RESUME] Resuming %s segments (%s of %s bytes already retrieved)' % (len(self.segments), sum(s[2] for s in self.segments), self.size))
+                    return
+            except OSError:
+                pass
+
+        count = max(1, mylar.CONFIG.DDL_SEGMENTS)
+        step = int(math.ceil(self.size / float(count)))
+        self.segments = [[start, min(start + step, self.size) - 1, 0] for start in range(0, self.size, step)]
+        self.flushed = [0] * len(self.segments)
+        with open(self.dst_path, 'wb') as f:
+            f.truncate(self.size)
+        self.save()
+
+    def save(self, clear=False):
+        if clear is True:
+            value = None
+        else:
+            #the in-memory counts include whatever is still sitting in each thread's write buffer, so
+            #only the offsets each segment has flushed & synced are stored.
+            with self.lock:
+                value = json.dumps({'size': self.size, 'segments': [[x[0], x[1], self.flushed[i]] for i, x in enumerate(self.segments)]})
+        myDB = db.DBConnection()
+        myDB.upsert('ddl_info', {'segments': value}, {'id': self.ddl_id})
+
+    def _sync(self, f, idx):
+        f.flush()
+        os.fsync(f.fileno())
+        with self.lock:
+            self.flushed[idx] = self.segments[idx][2]
+
+    def _fetch(self, idx):
+        segment = self.segments[idx]
+        start = segment[0] + segment[2]
+        if start > segment[1]:
+            return
+        headers = dict(self.headers)
+        headers['Range'] = 'bytes=%d-%d' % (start, segment[1])
+        #a session each, as requests sessions aren't safe to share across threads.
+        with host_connection(self.url), requests.Session() as s:
+            s.cookies.update(self.session.cookies)
+            s.proxies.update(self.session.proxies)
+            r = s.get(self.url, verify=True, headers=headers, stream=True, timeout=(30,30))
+            if r.status_code != 206:
+                self.unsupported = True
+                raise Exception('range request not honoured (status %s)' % r.status_code)
+            unsaved = 0
+            with open(self.dst_path, 'r+b', buffering=BUFFER_SIZE) as f:
+                f.seek(start)
+                for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    chunk = chunk[:segment[1] - segment[0] - segment[2] + 1]
+                    f.write(chunk)
+                    with self.lock:
+                        segment[2] += len(chunk)
+                    unsaved += len(chunk)
+                    if unsaved >= SAVE_EVERY:
+                        self._sync(f, idx)
+                        self.save()
+                        unsaved = 0
+                    if segment[0] + segment[2] > segment[1]:
+                        break
+                self._sync(f, idx)
+
+    def _worker(self, idx):
+        try:
+            self._fetch(idx)
+        except Exception as e:
+            self.errors.append(e)
+
+    def fetch(self, resume=False):
+        # True when the file is complete, False if a segment failed (state is kept for a resume) and
+        # None if the server doesn't actually honour ranges (so it can be fetched as a single stream).
+        self.plan(resume)
+        threads = [threading.Thread(target=self._worker, args=(idx,), name='DDL-SEGMENT') for idx, segment in enumerate(self.segments) if segment[0] + segment[2] <= segment[1]]
+        logger.fdebug('[DDL] Retrieving %s bytes as %s segments (%s remaining)' % (self.size, len(self.segments), len(threads)))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        if self.unsupported is True:
+            logger.fdebug('[DDL] Server did not honour the range requests - falling back to a single stream.')
+            self.save(clear=True)
+            return None
+        if self.errors:
+            logger.warn('[DDL] %s segment(s) failed: %s' % (len(self.errors), self.errors[0]))
+            self.save()
+            return False
+        self.save(clear=True)
+        return True
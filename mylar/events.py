@@ -0,0 +1,154 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import json
+import time
+import queue
+import threading
+import collections
+
+import mylar
+from mylar import db, logger, helpers
+
+#events the web interface listens for by name - anything else goes out as a plain 'message'.
+NAMED_EVENTS = ('addbyid', 'scheduler_message', 'config_check', 'shutdown', 'check_update')
+
+#events that can go out before anything is listening (startup config warnings, the initial update
+#check). If nobody gets them live, the latest of each is held for the first subscriber to come along
+#and then cleared - delivered once, the same as the old GLOBAL_MESSAGES slot.
+STICKY_EVENTS = ('config_check', 'check_update')
+
+#per-subscriber queue size & how many past events are kept around for Last-Event-ID resumes.
+QUEUE_SIZE = 100
+BACKLOG = 100
+
+#open streams allowed at once - each one holds a cherrypy worker thread for as long as it's open,
+#so webstart adds this many threads on top of the ones left for ordinary requests. Anything over
+#it is told to retry shortly (ms).
+MAX_STREAMS = 20
+BUSY_RETRY = 5000
+
+#seconds between keepalive comments (a closed tab is only noticed on the next write, so this is
+#also how long a dead stream can hold its slot), and how long a single stream is held open before
+#the browser is told to reconnect (it resumes via Last-Event-ID, so nothing is lost).
+KEEPALIVE = 5
+STREAM_LIFETIME = 300
+
+
+class EventBus(object):
+    """
+    In-process pub/sub for the SSE stream. Every subscriber (ie. open browser tab) gets its own
+    bounded queue - a slow one drops its oldest events rather than holding up the publisher.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        #start from the current time in ms so ids keep increasing across restarts.
+        self.seq = int(time.time() * 1000)
+        self.history = collections.deque(maxlen=BACKLOG)
+        self.sticky = {}
+        self.subscribers = set()
+
+    def publish(self, event, payload):
+        with self.lock:
+            self.seq += 1
+            item = (self.seq, event, payload)
+            self.history.append(item)
+            if event in STICKY_EVENTS:
+                if self.subscribers:
+                    self.sticky.pop(event, None)
+                else:
+                    self.sticky[event] = item
+            subscribers = list(self.subscribers)
+        for sub in subscribers:
+            self._offer(sub, item)
+        return item[0]
+
+    def _offer(self, sub, item):
+        while True:
+            try:
+                sub.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    sub.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def subscribe(self, last_id=None):
+        # returns None when MAX_STREAMS are already open.
+        sub = queue.Queue(maxsize=QUEUE_SIZE)
+        with self.lock:
+            if len(self.subscribers) >= MAX_STREAMS:
+                return None
+            self.subscribers.add(sub)
+            if last_id is not None:
+                replay = dict((x[0], x) for x in self.history if x[0] > last_id)
+            else:
+                replay = {}
+            for item in self.sticky.values():
+                replay[item[0]] = item
+            self.sticky = {}
+            for seq in sorted(replay):
+                self._offer(sub, replay[seq])
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            self.subscribers.discard(sub)
+
+
+BUS = EventBus()
+
+def publish(message):
+    # the replacement for assigning to mylar.GLOBAL_MESSAGES directly - every message is queued for
+    # every subscriber instead of sitting in one slot that the next message overwrites.
+    if message is None:
+        return
+
+    event = message.get('event')
+    if event is not None and any([event == 'shutdown', event == 'config_check']):
+        payload = {'status': message['status'], 'event': event, 'message': message['message']}
+    elif event is not None and event == 'check_update':
+        payload = {'status': message['status'], 'event': event, 'current_version': message['current_version'], 'latest_version': message['latest_version'], 'commits_behind': str(message['commits_behind']), 'docker': message['docker'], 'message': message['message']}
+    else:
+        payload = {'status': message['status'], 'event': event, 'comicid': message.get('comicid'), 'tables': message.get('tables'), 'message': message['message']}
+        if 'comicname' in message:
+            payload['comicname'] = message['comicname']
+            payload['seriesyear'] = message.get('seriesyear')
+
+    #kept as the most recent message for anything still looking at it.
+    mylar.GLOBAL_MESSAGES = message
+
+    if message['status'] != 'mid-message-event':
+        try:
+            notif = dict((k, v) for k, v in payload.items() if k not in ('tables', 'current_version', 'latest_version', 'commits_behind', 'docker'))
+            notif['session_id'] = mylar.SESSION_ID
+            notif['message'] = re.sub(r'\r\n|\n|</br>', '', str(notif['message']))
+            myDB = db.DBConnection()
+            myDB.upsert("notifs", notif, {'date': helpers.now()})
+        except Exception as e:
+            logger.warn('[EVENTS] Unable to record notification: %s' % e)
+
+    BUS.publish(event, payload)
+
+def format_sse(item):
+    seq, event, payload = item
+    lines = ['id: %s' % seq]
+    if event in NAMED_EVENTS:
+        lines.append('event: %s' % event)
+    lines.append('data: %s' % json.dumps(payload))
+    return '\n'.join(lines) + '\n\n'
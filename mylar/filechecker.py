@@ -34,7 +34,7 @@ import subprocess
 from subprocess import CalledProcessError, check_output
 
 import mylar
-from mylar import logger, helpers
+from mylar import logger, helpers, metrics
 
 
 if 'windows' not in platform.system().lower():
@@ -110,36 +110,21 @@ class FileChecker(object):
         self.dynamic_handlers = ['/','-',':',';','\'','"',',','&','?','!','+','*','(',')','\\u2014','\\u2013','\\u2019']
         self.dynamic_replacements = ['and','the']
         self.rippers = ['-empire','-empire-hd','minutemen-','-dcp','Glorith-HD']
+        self.mod_watchcomic = self.dynamic_watchcomic()
 
         #pre-generate the AS_Alternates now
         AS_Alternates = self.altcheck()
         self.AS_Alt = AS_Alternates['AS_Alt']
         self.AS_Tuple = AS_Alternates['AS_Tuple']
 
+    @metrics.timed('filechecker', stage='listfiles')
     def listFiles(self):
         comiclist = []
         watchmatch = {}
         dirlist = []
         comiccnt = 0
         if self.file:
-            runresults = self.parseit(self.dir, self.file)
-            return {'parse_status':        runresults['parse_status'],
-                    'sub':                 runresults['sub'],
-                    'comicfilename':       runresults['comicfilename'],
-                    'comiclocation':       runresults['comiclocation'],
-                    'series_name':         runresults['series_name'],
-                    'series_name_decoded': runresults['series_name_decoded'],
-                    'issueid':             runresults['issueid'],
-                    'dynamic_name':        runresults['dynamic_name'],
-                    'series_volume':       runresults['series_volume'],
-                    'alt_series':          runresults['alt_series'],
-                    'alt_issue':           runresults['alt_issue'],
-                    'issue_year':          runresults['issue_year'],
-                    'issue_number':        runresults['issue_number'],
-                    'scangroup':           runresults['scangroup'],
-                    'reading_order':       runresults['reading_order'],
-                    'booktype':            runresults['booktype']
-                    }
+            return self.parse(self.file)
         else:
             filelist = self.traverse_directories(self.dir)
             for files in filelist:
@@ -227,6 +212,29 @@ class FileChecker(object):
 
         return watchmatch
 
+    def parse(self, filename):
+        # parses the one filename (no directory walk) - a checker built once can be handed one
+        # filename after another this way, which is how search results are run through it.
+        runresults = self.parseit(self.dir, filename)
+        return {'parse_status':        runresults['parse_status'],
+                'sub':                 runresults['sub'],
+                'comicfilename':       runresults['comicfilename'],
+                'comiclocation':       runresults['comiclocation'],
+                'series_name':         runresults['series_name'],
+                'series_name_decoded': runresults['series_name_decoded'],
+                'issueid':             runresults['issueid'],
+                'dynamic_name':        runresults['dynamic_name'],
+                'series_volume':       runresults['series_volume'],
+                'alt_series':          runresults['alt_series'],
+                'alt_issue':           runresults['alt_issue'],
+                'issue_year':          runresults['issue_year'],
+                'issue_number':        runresults['issue_number'],
+                'scangroup':           runresults['scangroup'],
+                'reading_order':       runresults['reading_order'],
+                'booktype':            runresults['booktype']
+                }
+
+    @metrics.timed('filechecker', stage='parseit')
     def parseit(self, path, filename, subpath=None):
 
         path_list = None
@@ -1628,11 +1636,13 @@ class FileChecker(object):
         if all([mylar.CONFIG.ENABLE_TORRENTS is True, self.pp_mode is True]):
             from mylar import db
             myDB = db.DBConnection()
-            pp_crclist =[]
+            from mylar import fingerprint
             pp_crc = myDB.select("SELECT a.crc, b.IssueID FROM Snatched as a INNER JOIN issues as b ON a.IssueID=b.IssueID WHERE (a.Status='Post-Processed' or a.status='Snatched' or a.provider='32P' or a.provider='WWT' or a.provider='DEM') and a.crc is not NULL and (b.Status='Downloaded' or b.status='Archived') GROUP BY a.crc ORDER BY a.DateAdded")
-            for pp in pp_crc:
-                pp_crclist.append({'IssueID':   pp['IssueID'],
-                                   'crc':       pp['crc']})
+            pp_crcset = set([pp['crc'] for pp in pp_crc])
+            #helpers.crc stores whichever kind FINGERPRINT_FULL_HASH was set to at the time, so compare
+            #against each kind that's actually present ('p' partial / 'f' full).
+            pp_modes = [x == 'f' for x in sorted(set([str(crc)[:1] for crc in pp_crcset if str(crc)[:1] in ('p', 'f')]), reverse=True)]
+            fp = fingerprint.Fingerprinter()
 
         for dirname, subs, files in os.walk(dir):
 
@@ -1648,13 +1658,6 @@ class FileChecker(object):
                 if fname.startswith('._'):
                     continue
 
-                if all([mylar.CONFIG.ENABLE_TORRENTS is True, self.pp_mode is True]):
-                    tcrc = helpers.crc(os.path.join(dirname, fname))
-                    crcchk = [x for x in pp_crclist if tcrc == x['crc']]
-                    if crcchk:
-                        #logger.fdebug('[FILECHECKEER] Already post-processed this item %s - Ignoring' % fname)
-                        continue
-
                 filename = fname
                 comicsize = 0
                 if os.path.splitext(filename)[1].lower().endswith(comic_ext):
@@ -1670,15 +1673,27 @@ class FileChecker(object):
                         # 0-byte size file encountered - ignore it as it's a placeholder most likely
                         continue
 
+                    if all([mylar.CONFIG.ENABLE_TORRENTS is True, self.pp_mode is True]) and pp_crcset:
+                        #older snatched entries hold the filename md5, newer ones the content fingerprint.
+                        tpath = os.path.join(dirname, fname)
+                        if fingerprint.legacy_crc(tpath) in pp_crcset or any([fp.fingerprint(tpath, full=m) in pp_crcset for m in pp_modes]):
+                            #logger.fdebug('[FILECHECKEER] Already post-processed this item %s - Ignoring' % fname)
+                            continue
+
                     filelist.append({'directory':  direc,   #subdirectory if it exists
                                      'filename':   filename,
                                      'comicsize':  comicsize})
 
+        if all([mylar.CONFIG.ENABLE_TORRENTS is True, self.pp_mode is True]):
+            fp.flush()
+
         logger.info('there are %s files.' % len(filelist))
 
         return filelist
 
-    def dynamic_replace(self, series_name):
+    def dynamic_watchcomic(self):
+        #the watchcomic side of dynamic_replace - it doesn't change for the life of the checker, so it's
+        #worked out the once here rather than on every series name compared against it.
         mod_watchcomic = None
 
         if self.watchcomic:
@@ -1711,6 +1726,17 @@ class FileChecker(object):
                                 spacer+='|'
                             mod_watchcomic = mod_watchcomic[:wd] + spacer + mod_watchcomic[wd+len(wdrm):]
 
+        if mod_watchcomic:
+            mod_watchcomic = re.sub('\|+', '|', mod_watchcomic)
+            if mod_watchcomic.endswith('|'):
+                mod_watchcomic = mod_watchcomic[:-1]
+            mod_watchcomic = re.sub('[\%\$]+', '', mod_watchcomic)
+
+        return mod_watchcomic
+
+    def dynamic_replace(self, series_name):
+        mod_watchcomic = self.mod_watchcomic
+
         series_name = re.sub(r'[\u2014|\u2013|\u2e3a|\u2e3b]', ' - ', series_name)
         series_name = re.sub('\u2019', " ' ", series_name)
         seriesdynamic_handlers_match = [x for x in self.dynamic_handlers if x.lower() in series_name.lower()]
@@ -1741,12 +1767,6 @@ class FileChecker(object):
                             spacer+='|'
                         mod_seriesname = mod_seriesname[:sd] + spacer + mod_seriesname[sd+len(sdrm):]
 
-        if mod_watchcomic:
-            mod_watchcomic = re.sub('\|+', '|', mod_watchcomic)
-            if mod_watchcomic.endswith('|'):
-                mod_watchcomic = mod_watchcomic[:-1]
-            mod_watchcomic = re.sub('[\%\$]+', '', mod_watchcomic)
-
         mod_seriesname = re.sub('\|+', '|', mod_seriesname)
         if mod_seriesname.endswith('|'):
             mod_seriesname = mod_seriesname[:-1]
@@ -0,0 +1,167 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import hashlib
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+import mylar
+from mylar import db, logger
+
+#size of the head / tail blocks read for a partial fingerprint.
+BLOCK_SIZE = 65536
+READ_SIZE = 1048576
+
+def legacy_crc(filename):
+    #the original helpers.crc value - an md5 of the filename (not the contents).
+    #snatched rows written by older versions still carry this, so keep it around for lookups.
+    try:
+        filename = filename.encode(mylar.SYS_ENCODING)
+    except UnicodeEncodeError:
+        filename = "invalid"
+        filename = filename.encode(mylar.SYS_ENCODING)
+
+    return hashlib.md5(filename).hexdigest()
+
+def _new_hasher():
+    if xxhash is not None:
+        return xxhash.xxh64()
+    return hashlib.blake2b(digest_size=16)
+
+def partial_hash(path, size):
+    #size + first & last blocks of the file. Cheap enough to run over an entire download folder.
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(size).encode('utf-8'))
+    with open(path, 'rb') as f:
+        h.update(f.read(BLOCK_SIZE))
+        if size > BLOCK_SIZE * 2:
+            f.seek(-BLOCK_SIZE, os.SEEK_END)
+            h.update(f.read(BLOCK_SIZE))
+        elif size > BLOCK_SIZE:
+            h.update(f.read())
+    return 'p%s' % h.hexdigest()
+
+def full_hash(path):
+    h = _new_hasher()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_SIZE), b''):
+            h.update(chunk)
+    return 'f%s' % h.hexdigest()
+
+
+class Fingerprinter(object):
+    """
+    Content fingerprints for files, cached in the fingerprints table keyed by (device, inode)
+    and only recalculated if the size or mtime of the file has changed since it was last seen.
+    Cache writes are held until flush() so a folder walk only commits once.
+    """
+
+    def __init__(self, full=None):
+        if full is None:
+            full = mylar.CONFIG.FINGERPRINT_FULL_HASH
+        self.full = full
+        self.myDB = db.DBConnection()
+        self.pending = {}
+
+    def fingerprint(self, path, full=None):
+        # full overrides the instance mode for this one lookup (both columns share the same cache row).
+        if full is None:
+            full = self.full
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            logger.fdebug('[FINGERPRINT] Unable to stat %s [%s]' % (path, e))
+            return None
+
+        key = (st.st_dev, st.st_ino)
+        column = 'Full' if full else 'Partial'
+
+        cached = self.pending.get(key)
+        if cached is None:
+            row = self.myDB.selectone('SELECT Size, Mtime, Partial, Full FROM fingerprints WHERE Device=? AND Inode=?', [st.st_dev, st.st_ino]).fetchone()
+            if row is not None:
+                cached = {'Size': row['Size'], 'Mtime': row['Mtime'], 'Partial': row['Partial'], 'Full': row['Full']}
+
+        if cached is not None and all([cached['Size'] == st.st_size, cached['Mtime'] == st.st_mtime]):
+            if cached[column] is not None:
+                return cached[column]
+        else:
+            cached = {'Size': st.st_size, 'Mtime': st.st_mtime, 'Partial': None, 'Full': None}
+
+        try:
+            if full:
+                cached['Full'] = full_hash(path)
+            else:
+                cached['Partial'] = partial_hash(path, st.st_size)
+        except (IOError, OSError) as e:
+            logger.warn('[FINGERPRINT] Unable to read %s for fingerprinting [%s]' % (path, e))
+            return None
+
+        cached['Path'] = path
+        self.pending[key] = cached
+        return cached[column]
+
+    def same_content(self, path1, path2):
+        #size check first, then a full hash to be certain before calling two files identical.
+        try:
+            if os.path.getsize(path1) != os.path.getsize(path2):
+                return False
+        except OSError:
+            return False
+        full = self.full
+        self.full = True
+        try:
+            fp1 = self.fingerprint(path1)
+            return fp1 is not None and fp1 == self.fingerprint(path2)
+        finally:
+            self.full = full
+
+    def flush(self):
+        if not self.pending:
+            return
+        rows = [(k[0], k[1], v['Path'], v['Size'], v['Mtime'], v['Partial'], v['Full']) for k, v in self.pending.items()]
+        self.myDB.action('INSERT OR REPLACE INTO fingerprints (Device, Inode, Path, Size, Mtime, Partial, Full) VALUES (?, ?, ?, ?, ?, ?, ?)', rows, executemany=True)
+        self.pending = {}
+
+def stale(rows):
+    # the (Device, Inode) keys of cached rows whose file has been moved, deleted or replaced since.
+    keys = []
+    for row in rows:
+        try:
+            st = os.stat(row[2])
+        except (OSError, TypeError):
+            keys.append((row[0], row[1]))
+            continue
+        if (st.st_dev, st.st_ino) != (row[0], row[1]):
+            keys.append((row[0], row[1]))
+    return keys
+
+def prune():
+    # drops cached fingerprints for files that have since been moved / deleted - they're never going to be looked up again.
+    myDB = db.DBConnection()
+    keys = stale(myDB.select('SELECT Device, Inode, Path FROM fingerprints'))
+    if keys:
+        logger.info('Removing %s cached fingerprints for files that no longer exist.' % len(keys))
+        myDB.action('DELETE FROM fingerprints WHERE Device=? AND Inode=?', keys, executemany=True)
+
+def fingerprint(path, full=None):
+    fp = Fingerprinter(full=full)
+    value = fp.fingerprint(path)
+    fp.flush()
+    return value
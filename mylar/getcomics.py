@@ -26,11 +26,11 @@ import time
 import datetime
 from bs4 import BeautifulSoup
 import requests
-import zipfile
 import json
 import mylar
 from operator import itemgetter
 from mylar import db, logger, helpers, search_filer
+from mylar.downloaders import transfer
 
 class GC(object):
 
@@ -318,11 +318,7 @@ class GC(object):
            timeout=(30,30)
         )
 
-        with open(title + '.html', 'wb') as f:
-            for chunk in t.iter_content(chunk_size=1024):
-                if chunk:  # filter out keep-alive new chunks
-                    f.write(chunk)
-                    f.flush()
+        transfer.write_stream(t, title + '.html')
 
     def perform_search_queries(self, queryline):
         next_url = self.url
@@ -1124,21 +1120,12 @@ class GC(object):
                "success": False,
                "link_type": link_type}
 
-        if mylar.DDL_LOCK is True:
-            logger.fdebug(
-                '[DDL] Another item is currently downloading via DDL. Only one item can'
-                ' be downloaded at a time using DDL. Patience.'
-            )
-            return
-        else:
-            mylar.DDL_LOCK = True
-
         myDB = db.DBConnection()
         mylar.DDL_QUEUED.append(id)
         filename = None
         self.cookie_receipt()
         try:
-            with requests.Session() as s:
+            with transfer.host_slot(link):
                 if resume is not None:
                     logger.info(
                         '[DDL-RESUME] Attempting to resume from: %s bytes' % resume
@@ -1201,7 +1188,6 @@ class GC(object):
                                     ' invalid and will ignore this result.'
                                 )
                                 remote_filesize = 0
-                                mylar.DDL_LOCK = False
                                 return {
                                     "success": False,
                                     "filename": filename,
@@ -1220,7 +1206,6 @@ class GC(object):
                                 ' and will ignore this result.'
                             )
                             remote_filesize = 0
-                            mylar.DDL_LOCK = False
                             return {
                                 "success": False,
                                 "filename": filename,
@@ -1254,12 +1239,34 @@ class GC(object):
                 dst_path = os.path.join(mylar.CONFIG.DDL_LOCATION, filename)
 
                 t.headers['Accept-encoding'] = 'gzip'
-                if resume is not None:
-                    with open(dst_path, 'ab') as f:
-                        for chunk in t.iter_content(chunk_size=1024):
-                            if chunk:
-                                f.write(chunk)
-                                f.flush()
+                segmented = None
+                if any([all([resume is not None, transfer.load_segments(id) is not None]), transfer.can_segment(t, remote_filesize)]):
+                    #split it into ranged requests fetched in parallel - a resume carries on each segment.
+                    t.close()
+                    sd = transfer.SegmentedDownload(self.session, t.url, dst_path, remote_filesize, self.headers, id)
+                    segmented = sd.fetch(resume=resume is not None)
+                    if segmented is False:
+                        return {
+                           "success": False,
+                           "filename": filename,
+                           "path": None,
+                           "link_type": link_type}
+                    elif segmented is None:
+                        #ranges weren't honoured, so start over as a single stream.
+                        resume = None
+                        self.headers.pop('Range', None)
+                        t = self.session.get(
+                            link,
+                            verify=True,
+                            headers=self.headers,
+                            stream=True,
+                            timeout=(30,30)
+                        )
+
+                if segmented is True:
+                    logger.fdebug('[DDL] %s retrieved as %s segments' % (filename, len(sd.segments)))
+                elif resume is not None:
+                    transfer.write_stream(t, dst_path, 'ab')
 
                 else:
                     if os.path.exists(dst_path):
@@ -1275,15 +1282,10 @@ class GC(object):
                                 ' Creating tmp file @%s so it can download.' % (e, filename)
                             )
 
-                    with open(dst_path, 'wb') as f:
-                        for chunk in t.iter_content(chunk_size=1024):
-                            if chunk:
-                                f.write(chunk)
-                                f.flush()
+                    transfer.write_stream(t, dst_path, 'wb')
 
         except requests.exceptions.Timeout as e:
             logger.error('[ERROR] download has timed out due to inactivity...: %s', e)
-            mylar.DDL_LOCK = False
             return {
                "success": False,
                "filename": filename,
@@ -1292,14 +1294,12 @@ class GC(object):
 
         except Exception as e:
             logger.error('[ERROR] %s' % e)
-            mylar.DDL_LOCK = False
             return {
                "success": False,
                "filename": filename,
                "path": None,
                "link_type": link_type}
         else:
-            mylar.DDL_LOCK = False
             return self.zip_zip(id, dst_path, filename)
 
 
@@ -1309,33 +1309,17 @@ class GC(object):
                 new_path = os.path.join(
                     mylar.CONFIG.DDL_LOCATION, re.sub('.zip', '', filename).strip()
                 )
+                #the issues are pulled out one at a time by the ddl worker (transfer.extract_pack) so
+                #each can be post-processed as soon as it lands.
                 logger.info(
                     'Zip file detected.'
                     ' Unzipping into new modified path location: %s' % new_path
                 )
-                try:
-                    zip_f = zipfile.ZipFile(dst_path, 'r')
-                    zip_f.extractall(new_path)
-                    zip_f.close()
-                except Exception as e:
-                    logger.warn(
-                        '[ERROR: %s] Unable to extract zip file: %s' % (e, new_path)
-                    )
-                    return {"success": False, "filename": filename, "path": None}
-                else:
-                    try:
-                        os.remove(dst_path)
-                    except Exception as e:
-                        logger.warn(
-                            '[ERROR: %s] Unable to remove zip file from %s after'
-                            ' extraction.' % (e, dst_path)
-                        )
-                    filename = None
+                return {"success": True, "filename": None, "path": new_path, "archive": dst_path}
             else:
                 new_path = dst_path
             return {"success": True, "filename": filename, "path": new_path}
 
-        mylar.DDL_LOCK = False
         return {"success": False, "filename": filename, "path": None}
 
     def check_for_pack(self, title, issue_in_pack=None):
@@ -14,7 +14,6 @@
 #  You should have received a copy of the GNU General Public License
 #  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
 
-from lib.rarfile import rarfile
 import requests
 import zipfile
 from io import BytesIO
@@ -42,6 +41,7 @@ def open_archive(location):
     if location.endswith(".cbz"):
         return zipfile.ZipFile(location), 'is_dir'
     else:
+        from lib.rarfile import rarfile
         try:
             return rarfile.RarFile(location), 'isdir'
         except rarfile.BadRarFile as e:
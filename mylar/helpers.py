@@ -15,6 +15,8 @@
 #  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
 
 import time
+import threading
+import concurrent.futures
 from operator import itemgetter
 import datetime
 from datetime import timedelta, date
@@ -32,6 +34,7 @@ import itertools
 import shutil
 import hashlib
 import gzip
+import zipfile
 import os, errno
 import urllib
 from collections import namedtuple
@@ -42,8 +45,8 @@ from PIL import Image
 
 import mylar
 from . import logger
-from mylar import db, sabnzbd, nzbget, process, getcomics, getimage
-from mylar.downloaders import mega, pixeldrain, mediafire
+from mylar import db, sabnzbd, nzbget, process, getcomics, getimage, placement, library, metrics
+from mylar.downloaders import transfer
 
 def multikeysort(items, columns):
 
@@ -743,10 +746,10 @@ def ComicSort(comicorder=None, sequence=None, imported=None):
         i = 0
         #import db
         myDB = db.DBConnection()
-        comicsort = myDB.select("SELECT * FROM comics ORDER BY ComicSortName COLLATE NOCASE")
+        comicsort = myDB.select("SELECT ComicID FROM comics ORDER BY ComicSortName COLLATE NOCASE")
         comicorderlist = []
         comicorder = {}
-        comicidlist = []
+        comicidlist = set()
         if sequence == 'update':
             mylar.COMICSORT['SortOrder'] = None
             mylar.COMICSORT['LastOrderNo'] = None
@@ -766,7 +769,7 @@ def ComicSort(comicorder=None, sequence=None, imported=None):
                          'ComicOrder':           i
                          })
 
-                comicidlist.append(csort['ComicID'])
+                comicidlist.add(csort['ComicID'])
                 i+=1
         if sequence == 'startup':
             if i == 0:
@@ -975,7 +978,50 @@ def cleanhtml(raw_html):
     return flipflop
 
 
+#issue number suffixes, in the order they're checked: (suffix, characters trimmed off the end to leave the
+#number, characters trimmed when there's a decimal in there as well, number has to lead). The suffix
+#letters are added on to the number so each variant sorts right after the plain issue. 'black' just
+#has its decimal swapped out and carries on through the normal parsing.
+ISSUE_SUFFIXES = (('au', 2, 2, True),
+                  ('ai', 2, 2, True),
+                  ('inh', 3, 4, False),
+                  ('now', 3, 4, False),
+                  ('bey', 3, 4, False),
+                  ('mu', 2, 3, False),
+                  ('lr', 2, 3, False),
+                  ('hu', 2, 3, False),
+                  ('black', None, None, False),
+                  ('deaths', 6, 7, False))
+
+#issue numbers are the same few thousand strings over and over (every issue of every series gets
+#compared against every file during a rescan), so the conversions are kept once worked out.
+ISSUEDIGITS_CACHE = {}
+ISSUEDIGITS_CACHE_MAX = 50000
+
 def issuedigits(issnum):
+    if type(issnum) is not str:
+        return _issuedigits(issnum)
+    try:
+        return ISSUEDIGITS_CACHE[issnum]
+    except KeyError:
+        pass
+    int_issnum = _issuedigits(issnum)
+    if len(ISSUEDIGITS_CACHE) >= ISSUEDIGITS_CACHE_MAX:
+        ISSUEDIGITS_CACHE.clear()
+    ISSUEDIGITS_CACHE[issnum] = int_issnum
+    return int_issnum
+
+def issuedigits_list(issnums):
+    #a whole column of issue numbers at once - each distinct value is only converted the once.
+    converted = dict((x, issuedigits(x)) for x in set(x for x in issnums if type(x) is str))
+    return [converted[x] if type(x) is str else issuedigits(x) for x in issnums]
+
+def stored_issuedigits(rows, column='Issue_Number'):
+    #the persisted Int_IssueNumber of each row - only the rows without one get converted (in a single batch).
+    converted = iter(issuedigits_list([x[column] for x in rows if x['Int_IssueNumber'] is None]))
+    return [x['Int_IssueNumber'] if x['Int_IssueNumber'] is not None else next(converted) for x in rows]
+
+def _issuedigits(issnum):
     #import db
 
     int_issnum = None
@@ -1003,66 +1049,22 @@ def issuedigits(issnum):
         #    int_issnum = 999999999999999
         #    return int_issnum
         try:
-            if 'au' in issnum.lower() and issnum[:1].isdigit():
-                int_issnum = (int(issnum[:-2]) * 1000) + ord('a') + ord('u')
-            elif 'ai' in issnum.lower() and issnum[:1].isdigit():
-                int_issnum = (int(issnum[:-2]) * 1000) + ord('a') + ord('i')
-            elif 'inh' in issnum.lower():
-                remdec = issnum.find('.')  #find the decimal position.
-                if remdec == -1:
-                #if no decimal, it's all one string
-                #remove the last 3 characters from the issue # (INH)
-                    int_issnum = (int(issnum[:-3]) * 1000) + ord('i') + ord('n') + ord('h')
-                else:
-                    int_issnum = (int(issnum[:-4]) * 1000) + ord('i') + ord('n') + ord('h')
-            elif 'now' in issnum.lower():
-                if '!' in issnum: issnum = re.sub('\!', '', issnum)
-                remdec = issnum.find('.')  #find the decimal position.
-                if remdec == -1:
-                #if no decimal, it's all one string
-                #remove the last 3 characters from the issue # (NOW)
-                    int_issnum = (int(issnum[:-3]) * 1000) + ord('n') + ord('o') + ord('w')
-                else:
-                    int_issnum = (int(issnum[:-4]) * 1000) + ord('n') + ord('o') + ord('w')
-            elif 'bey' in issnum.lower():
-                remdec = issnum.find('.')  #find the decimal position.
-                if remdec == -1:
-                #if no decimal, it's all one string
-                #remove the last 3 characters from the issue # (BEY)
-                    int_issnum = (int(issnum[:-3]) * 1000) + ord('b') + ord('e') + ord('y')
-                else:
-                    int_issnum = (int(issnum[:-4]) * 1000) + ord('b') + ord('e') + ord('y')
-            elif 'mu' in issnum.lower():
-                remdec = issnum.find('.')
-                if remdec == -1:
-                    int_issnum = (int(issnum[:-2]) * 1000) + ord('m') + ord('u')
-                else:
-                    int_issnum = (int(issnum[:-3]) * 1000) + ord('m') + ord('u')
-            elif 'lr' in issnum.lower():
-                remdec = issnum.find('.')
-                if remdec == -1:
-                    int_issnum = (int(issnum[:-2]) * 1000) + ord('l') + ord('r')
-                else:
-                    int_issnum = (int(issnum[:-3]) * 1000) + ord('l') + ord('r')
-            elif 'hu' in issnum.lower():
-                remdec = issnum.find('.')  #find the decimal position.
-                if remdec == -1:
-                    int_issnum = (int(issnum[:-2]) * 1000) + ord('h') + ord('u')
-                else:
-                    int_issnum = (int(issnum[:-3]) * 1000) + ord('h') + ord('u')
-            elif 'black' in issnum.lower():
-                remdec = issnum.find('.')  #find the decimal position.
-                if remdec != -1:
-                    issnum = '%s %s' % (issnum[:remdec], issnum[remdec+1:])
-                    #int_issnum = (int(issnum[:-2]) * 1000) + ord('b') + ord('l')
-                #else:
-                #    int_issnum = (int(issnum[:-3]) * 1000) + ord('h') + ord('u')
-            elif 'deaths' in issnum.lower():
+            lowiss = issnum.lower()
+            for suffix, trim, dectrim, leading in ISSUE_SUFFIXES:
+                if suffix not in lowiss or all([leading is True, not issnum[:1].isdigit()]):
+                    continue
+                if suffix == 'now' and '!' in issnum:
+                    issnum = re.sub('\!', '', issnum)
                 remdec = issnum.find('.')  #find the decimal position.
-                if remdec == -1:
-                    int_issnum = (int(issnum[:-6]) * 1000) + ord('d') + ord('e') + ord('a') + ord('t') + ord('h') + ord('s')
+                if trim is None:
+                    if remdec != -1:
+                        issnum = '%s %s' % (issnum[:remdec], issnum[remdec+1:])
+                elif remdec == -1:
+                    #if no decimal, it's all one string - remove the suffix from the issue #
+                    int_issnum = (int(issnum[:-trim]) * 1000) + sum(ord(c) for c in suffix)
                 else:
-                    int_issnum = (int(issnum[:-7]) * 1000) + ord('d') + ord('e') + ord('a') + ord('t') + ord('h') + ord('s')
+                    int_issnum = (int(issnum[:-dectrim]) * 1000) + sum(ord(c) for c in suffix)
+                break
 
         except ValueError as e:
             logger.error('[' + issnum + '] Unable to properly determine the issue number. Error: %s', e)
@@ -1236,17 +1238,20 @@ def issuedigits(issnum):
     return int_issnum
 
 
-def checkthepub(ComicID):
-    #import db
-    myDB = db.DBConnection()
+def checkthepub(ComicID, publisher=None):
+    #publisher can be passed in if the caller already has the series row loaded (saves the lookup).
     publishers = ['marvel', 'dc', 'darkhorse']
-    pubchk = myDB.selectone("SELECT * FROM comics WHERE ComicID=?", [ComicID]).fetchone()
-    if pubchk is None:
+    if publisher is None:
+        myDB = db.DBConnection()
+        pubchk = myDB.selectone("SELECT * FROM comics WHERE ComicID=?", [ComicID]).fetchone()
+        if pubchk is not None:
+            publisher = pubchk['ComicPublisher']
+    if publisher is None:
         logger.fdebug('No publisher information found to aid in determining series..defaulting to base check of 55 days.')
         return mylar.CONFIG.BIGGIE_PUB
     else:
         for publish in publishers:
-            if publish in pubchk['ComicPublisher'].lower():
+            if publish in publisher.lower():
                 #logger.fdebug('Biggie publisher detected - ' + pubchk['ComicPublisher'])
                 return mylar.CONFIG.BIGGIE_PUB
 
@@ -1445,17 +1450,21 @@ def LoadAlternateSearchNames(seriesname_alt, comicid):
 
         return Alternate_Names
 
-def havetotals(refreshit=None):
+def havetotals(refreshit=None, limit=None, offset=0):
         #import db
 
         comics = []
         myDB = db.DBConnection()
 
         if refreshit is None:
+            #limit / offset page through the watchlist rather than totalling up the entire thing.
+            pageline = ''
+            if limit is not None:
+                pageline = ' LIMIT %d OFFSET %d' % (int(limit), int(offset))
             if mylar.CONFIG.ANNUALS_ON:
-                comiclist = myDB.select('SELECT comics.*, COUNT(totalAnnuals.IssueID) AS TotalAnnuals FROM comics LEFT JOIN annuals as totalAnnuals on totalAnnuals.ComicID = comics.ComicID GROUP BY comics.ComicID order by comics.ComicSortName COLLATE NOCASE')
+                comiclist = myDB.select('SELECT comics.*, COUNT(totalAnnuals.IssueID) AS TotalAnnuals FROM comics LEFT JOIN annuals as totalAnnuals on totalAnnuals.ComicID = comics.ComicID GROUP BY comics.ComicID order by comics.ComicSortName COLLATE NOCASE' + pageline)
             else:
-                comiclist = myDB.select('SELECT * FROM comics GROUP BY ComicID order by ComicSortName COLLATE NOCASE')
+                comiclist = myDB.select('SELECT * FROM comics GROUP BY ComicID order by ComicSortName COLLATE NOCASE' + pageline)
         else:
             comiclist = []
             comicref = myDB.selectone('SELECT comics.ComicID AS ComicID, comics.Have AS Have, comics.Total as Total, COUNT(totalAnnuals.IssueID) AS TotalAnnuals FROM comics LEFT JOIN annuals as totalAnnuals on totalAnnuals.ComicID = comics.ComicID WHERE comics.ComicID=? GROUP BY comics.ComicID', [refreshit]).fetchone()
@@ -1977,45 +1986,18 @@ def listPull(weeknumber, year):
     return library
 
 def listLibrary(comicid=None):
-    #import db
-    library = {}
-    myDB = db.DBConnection()
+    # served from the shared in-memory library index rather than a full join on every call.
+    watchlist = library.LIBRARY.watchlist()
     if comicid is None:
-        if mylar.CONFIG.ANNUALS_ON is True:
-            list = myDB.select("SELECT a.comicid, b.releasecomicid, a.status FROM Comics AS a LEFT JOIN annuals AS b on a.comicid=b.comicid group by a.comicid")
-        else:
-            list = myDB.select("SELECT comicid, status FROM Comics group by comicid")
-    else:
-        if mylar.CONFIG.ANNUALS_ON is True:
-            list = myDB.select("SELECT a.comicid, b.releasecomicid, a.status FROM Comics AS a LEFT JOIN annuals AS b on a.comicid=b.comicid WHERE a.comicid=? group by a.comicid", [re.sub('4050-', '', comicid).strip()])
-        else:
-            list = myDB.select("SELECT comicid, status FROM Comics WHERE comicid=? group by comicid", [re.sub('4050-', '', comicid).strip()])
+        return watchlist
 
-    for row in list:
-        library[row['ComicID']] = {'comicid':        row['ComicID'],
-                                   'status':         row['Status']}
-        try:
-            if row['ReleaseComicID'] is not None:
-                library[row['ReleaseComicID']] = {'comicid':   row['ComicID'],
-                                                  'status':    row['Status']}
-        except:
-            pass
-
-    return library
+    comicid = re.sub('4050-', '', comicid).strip()
+    if library.LIBRARY.status(comicid) is None:
+        return {}
+    return dict((k, v) for k, v in watchlist.items() if v['comicid'] == comicid)
 
 def listStoryArcs():
-    #import db
-    library = {}
-    myDB = db.DBConnection()
-    # Get Distinct Arc IDs
-    #list = myDB.select("SELECT DISTINCT(StoryArcID) FROM storyarcs");
-    #for row in list:
-    #    library[row['StoryArcID']] = row['StoryArcID']
-    # Get Distinct CV Arc IDs
-    list = myDB.select("SELECT DISTINCT(CV_ArcID) FROM storyarcs");
-    for row in list:
-        library[row['CV_ArcID']] = {'comicid': row['CV_ArcID']}
-    return library
+    return library.LIBRARY.storyarcs()
 
 def listoneoffs(weeknumber, year):
     #import db
@@ -2296,6 +2278,16 @@ def duplicate_filecheck(filename, ComicID=None, IssueID=None, StoryArcID=None, r
         else:
             logger.info('[DUPECHECK] Existing file within db :' + dupchk['Location'] + ' has a filesize of : ' + str(dupsize) + ' bytes.')
 
+            if int(dupsize) == filesz and series['ComicLocation'] is not None:
+                from mylar import fingerprint
+                fp = fingerprint.Fingerprinter()
+                identical = fp.same_content(filename, os.path.join(series['ComicLocation'], dupchk['Location']))
+                fp.flush()
+                if identical:
+                    logger.info('[DUPECHECK] %s has identical content to the existing file. Not writing the new file.' % filename)
+                    return {'action':  "dupe_file",
+                            'to_dupe': filename}
+
             #keywords to force keep / delete
             #this will be eventually user-controlled via the GUI once the options are enabled.
             fixed = False
@@ -2557,29 +2549,21 @@ def issue_status(IssueID):
         return False
 
 def crc(filename):
-    #memory in lieu of speed (line by line)
-    #prev = 0
-    #for eachLine in open(filename,"rb"):
-    #    prev = zlib.crc32(eachLine, prev)
-    #return "%X"%(prev & 0xFFFFFFFF)
-
-    #speed in lieu of memory (file into memory entirely)
-    #return "%X" % (zlib.crc32(open(filename, "rb").read()) & 0xFFFFFFFF)
-    try:
-       filename = filename.encode(mylar.SYS_ENCODING)
-    except UnicodeEncodeError:
-       filename = "invalid"
-       filename = filename.encode(mylar.SYS_ENCODING)
-
-    return hashlib.md5(filename).hexdigest()
+    #content fingerprint of the file (cached by inode/mtime), falling back to the
+    #old filename-based md5 if the file can't be read.
+    from mylar import fingerprint
+    value = None
+    if os.path.isfile(filename):
+        value = fingerprint.fingerprint(filename)
+    if value is None:
+        value = fingerprint.legacy_crc(filename)
+    return value
 
 def issue_find_ids(ComicName, ComicID, pack, IssueNumber, pack_id):
 
     #logger.fdebug('pack: %s' % pack)
     myDB = db.DBConnection()
 
-    issuelist = myDB.select("SELECT * FROM issues WHERE ComicID=?", [ComicID])
-
     if 'Annual' not in pack:
         if ',' not in pack:
             packlist = pack.split(' ')
@@ -2629,9 +2613,15 @@ def issue_find_ids(ComicName, ComicID, pack, IssueNumber, pack_id):
     Int_IssueNumber = issuedigits(IssueNumber)
     valid = False
 
+    #only the issues within the pack's range are needed - an integer range lookup on the (ComicID, Int_IssueNumber) index.
+    pack_ints = issuedigits_list([str(x) for x in pack_issues])
+    if pack_ints:
+        issuelist = myDB.select("SELECT IssueID, Issue_Number, Int_IssueNumber, Status FROM issues WHERE ComicID=? AND Int_IssueNumber BETWEEN ? AND ?", [ComicID, min(pack_ints), max(pack_ints)])
+    else:
+        issuelist = []
+
     ignores = []
-    for iss in pack_issues:
-       int_iss = issuedigits(str(iss))
+    for iss, int_iss in zip(pack_issues, pack_ints):
        for xb in issuelist:
            if xb['Status'] != 'Downloaded':
                if xb['Int_IssueNumber'] == int_iss:
@@ -2676,7 +2666,7 @@ def reverse_the_pack_snatch(pack_id, comicid):
         myDB.upsert("issues", {"Status": "Skipped"}, {"IssueID": x})
     if reverselist:
         logger.info('[REVERSE UNO] Reversal completed for %s issues' % len(reverselist))
-        mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicid': comicid, 'tables': 'both', 'message': 'Successfully changed status of %s issues to %s' % (len(reverselist), 'Skipped')}
+        mylar.events.publish({'status': 'success', 'comicid': comicid, 'tables': 'both', 'message': 'Successfully changed status of %s issues to %s' % (len(reverselist), 'Skipped')})
 
 
 def conversion(value):
@@ -2935,7 +2925,7 @@ def arcformat(arc, spanyears, publisher):
 
     return dstloc
 
-def torrentinfo(issueid=None, torrent_hash=None, download=False, monitor=False):
+def torrentinfo(issueid=None, torrent_hash=None, download=False, monitor=False, torrent_info=None):
     #import db
     from base64 import b16encode, b32decode
 
@@ -2957,7 +2947,10 @@ def torrentinfo(issueid=None, torrent_hash=None, download=False, monitor=False):
     if len(torrent_hash) == 32:
        torrent_hash = b16encode(b32decode(torrent_hash))
 
-    if not len(torrent_hash) == 40:
+    if torrent_info is not None:
+        #already retrieved by the caller (ie. the torrent monitor's batched status call).
+        pass
+    elif not len(torrent_hash) == 40:
        logger.error("Torrent hash is missing, or an invalid hash value has been passed")
        snatch_status = 'MONITOR ERROR'
     else:
@@ -3287,150 +3280,226 @@ def latestissue_update():
                 continue
 
 def ddl_downloader(queue):
-    myDB = db.DBConnection()
+    # hands each request to a pool of DDL_CONCURRENCY workers (each host is further limited to
+    # DDL_HOST_CONCURRENCY at a time - see mylar.downloaders.transfer). Items are only taken off the
+    # queue once a worker is free, so anything waiting still shows as queued.
     link_type_failure = {}
+    workers = max(1, mylar.CONFIG.DDL_CONCURRENCY)
+    free = threading.BoundedSemaphore(workers)
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='DDL-WORKER')
+
+    def worker(item):
+        try:
+            ddl_process(item, link_type_failure)
+        except Exception as e:
+            logger.error('[DDL] Error encountered downloading %s: %s' % (item.get('series'), e))
+        finally:
+            free.release()
+
     while True:
-        if mylar.DDL_LOCK is True:
-            time.sleep(5)
+        item = queue.get(True)
+        if item == 'exit':
+            logger.info('Cleaning up workers for shutdown')
+            break
+        free.acquire()
+        pool.submit(worker, item)
 
-        elif mylar.DDL_LOCK is False and queue.qsize() >= 1:
-            item = queue.get(True)
+    pool.shutdown(wait=False)
 
-            if item == 'exit':
-                logger.info('Cleaning up workers for shutdown')
-                break
+def ddl_process(item, link_type_failure):
+    myDB = db.DBConnection()
+    if item['id'] not in mylar.DDL_QUEUED:
+        mylar.DDL_QUEUED.append(item['id'])
 
-            if item['id'] not in mylar.DDL_QUEUED:
-                mylar.DDL_QUEUED.append(item['id'])
+    try:
+        link_type_failure[item['id']].append(item['link_type_failure'])
+    except Exception:
+        pass
 
+    #logger.info('[%s] link_type_failure: %s' % (item['id'], link_type_failure))
+
+    logger.info('Now loading request from DDL queue: %s' % item['series'])
+
+    #write this to the table so we have a record of what's going on.
+    ctrlval = {'id':      item['id']}
+    val = {'status':       'Downloading',
+           'updated_date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}
+    myDB.upsert('ddl_info', val, ctrlval)
+
+    #the optional downloaders are only loaded once there's something for them to fetch.
+    from mylar.downloaders import mega, pixeldrain, mediafire
+
+    pack_archive = None
+    if all([item.get('resume') is not None, item.get('filename') is not None]) and str(item['filename']).lower().endswith('.zip'):
+        pack_archive = os.path.join(mylar.CONFIG.DDL_LOCATION, item['filename'])
+        #a pack that was only partly extracted is still a valid zip of the issues that are left (a
+        #half-downloaded one isn't) - so a resume just carries on extracting instead of downloading.
+        if not zipfile.is_zipfile(pack_archive):
+            pack_archive = None
+
+    if pack_archive is not None:
+        logger.info('[PACK] %s is already downloaded - resuming the extraction of the remaining issues.' % item['filename'])
+        ddzstat = {'success': True,
+                   'filename': None,
+                   'path': os.path.join(mylar.CONFIG.DDL_LOCATION, re.sub('.zip', '', item['filename']).strip()),
+                   'archive': pack_archive}
+    elif item['site'] == 'DDL(GetComics)':
+        try:
+            remote_filesize = item['remote_filesize']
+        except Exception:
             try:
-                link_type_failure[item['id']].append(item['link_type_failure'])
+                remote_filesize = human2bytes(re.sub('/s', '', item['size'][:-1]).strip())
             except Exception:
-                pass
-
-            #logger.info('[%s] link_type_failure: %s' % (item['id'], link_type_failure))
-
-            logger.info('Now loading request from DDL queue: %s' % item['series'])
-
-            #write this to the table so we have a record of what's going on.
-            ctrlval = {'id':      item['id']}
-            val = {'status':       'Downloading',
-                   'updated_date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}
-            myDB.upsert('ddl_info', val, ctrlval)
+                remote_filesize = 0
+
+        if any([item['link_type'] == 'GC-Main', item['link_type'] == 'GC_Mirror']):
+            ddz = getcomics.GC()
+            ddzstat = ddz.downloadit(item['id'], item['link'], item['mainlink'], item['resume'], item['issueid'], remote_filesize)
+        elif item['link_type'] == 'GC-Mega':
+            meganz = mega.MegaNZ()
+            ddzstat = meganz.ddl_download(item['link'], None, item['id'], item['issueid'], item['link_type']) #item['filename'], item['id'])
+        elif item['link_type'] == 'GC-Media':
+            mediaf = mediafire.MediaFire()
+            ddzstat = mediaf.ddl_download(item['link'], item['id'], item['issueid']) #item['filename'], item['id'])
+        elif item['link_type'] == 'GC-Pixel':
+            pdrain = pixeldrain.PixelDrain()
+            ddzstat = pdrain.ddl_download(item['link'], item['id'], item['issueid']) #item['filename'], item['id'])
+
+    elif item['site'] == 'DDL(External)':
+        meganz = mega.MegaNZ()
+        ddzstat = meganz.ddl_download(item['link'], item['filename'], item['id'], item['issueid'], item['link_type'])
+
+    if all([ddzstat['success'] is True, ddzstat.get('archive') is not None]):
+        ddzstat = ddl_unpack(item, ddzstat)
+
+    if ddzstat['success'] is True:
+        tdnow = datetime.datetime.now()
+        nval = {'status':  'Completed',
+                'updated_date': tdnow.strftime('%Y-%m-%d %H:%M')}
+        myDB.upsert('ddl_info', nval, ctrlval)
+
+    if all([ddzstat['success'] is True, mylar.CONFIG.POST_PROCESSING is True]):
+        try:
+            if ddzstat.get('queued') is not None:
+                logger.info('%s successfully downloaded - %s issues from the pack have been sent to post-processing.' % (os.path.basename(ddzstat['path']), ddzstat['queued']))
+            elif ddzstat['filename'] is None:
+                logger.info('%s successfully downloaded - now initiating post-processing for %s.' % (os.path.basename(ddzstat['path']), ddzstat['path']))
+                mylar.PP_QUEUE.put({'nzb_name':     os.path.basename(ddzstat['path']),
+                                    'nzb_folder':   ddzstat['path'],
+                                    'failed':       False,
+                                    'issueid':      None,
+                                    'comicid':      item['comicid'],
+                                    'apicall':      True,
+                                    'ddl':          True,
+                                    'download_info': {'provider': 'DDL', 'id': item['id']}})
+            else:
+                logger.info('%s successfully downloaded - now initiating post-processing for %s' % (ddzstat['filename'], ddzstat['path']))
+                mylar.PP_QUEUE.put({'nzb_name':     ddzstat['filename'],
+                                    'nzb_folder':   ddzstat['path'],
+                                    'failed':       False,
+                                    'issueid':      item['issueid'],
+                                    'comicid':      item['comicid'],
+                                    'apicall':      True,
+                                    'ddl':          True,
+                                    'download_info': {'provider': 'DDL', 'id': item['id']}})
+        except Exception as e:
+            logger.error('process error: %s [%s]' %(e, ddzstat))
 
-            if item['site'] == 'DDL(GetComics)':
-                try:
-                    remote_filesize = item['remote_filesize']
-                except Exception:
-                    try:
-                        remote_filesize = helpers.human2bytes(re.sub('/s', '', item['size'][:-1]).strip())
-                    except Exception:
-                        remote_filesize = 0
-
-                if any([item['link_type'] == 'GC-Main', item['link_type'] == 'GC_Mirror']):
-                    ddz = getcomics.GC()
-                    ddzstat = ddz.downloadit(item['id'], item['link'], item['mainlink'], item['resume'], item['issueid'], remote_filesize)
-                elif item['link_type'] == 'GC-Mega':
-                    meganz = mega.MegaNZ()
-                    ddzstat = meganz.ddl_download(item['link'], None, item['id'], item['issueid'], item['link_type']) #item['filename'], item['id'])
-                elif item['link_type'] == 'GC-Media':
-                    mediaf = mediafire.MediaFire()
-                    ddzstat = mediaf.ddl_download(item['link'], item['id'], item['issueid']) #item['filename'], item['id'])
-                elif item['link_type'] == 'GC-Pixel':
-                    pdrain = pixeldrain.PixelDrain()
-                    ddzstat = pdrain.ddl_download(item['link'], item['id'], item['issueid']) #item['filename'], item['id'])
-
-            elif item['site'] == 'DDL(External)':
-                meganz = mega.MegaNZ()
-                ddzstat = meganz.ddl_download(item['link'], item['filename'], item['id'], item['issueid'], item['link_type'])
-
-            if ddzstat['success'] is True:
-                tdnow = datetime.datetime.now()
-                nval = {'status':  'Completed',
-                        'updated_date': tdnow.strftime('%Y-%m-%d %H:%M')}
-                myDB.upsert('ddl_info', nval, ctrlval)
+        #logger.fdebug('mylar.ddl_queued: %s' % mylar.DDL_QUEUED)
+        mylar.DDL_QUEUED.remove(item['id'])
+        try:
+            link_type_failure.pop(item['id'])
+        except KeyError:
+            pass
 
-            if all([ddzstat['success'] is True, mylar.CONFIG.POST_PROCESSING is True]):
-                try:
-                    if ddzstat['filename'] is None:
-                        logger.info('%s successfully downloaded - now initiating post-processing for %s.' % (os.path.basename(ddzstat['path']), ddzstat['path']))
-                        mylar.PP_QUEUE.put({'nzb_name':     os.path.basename(ddzstat['path']),
-                                            'nzb_folder':   ddzstat['path'],
-                                            'failed':       False,
-                                            'issueid':      None,
-                                            'comicid':      item['comicid'],
-                                            'apicall':      True,
-                                            'ddl':          True,
-                                            'download_info': {'provider': 'DDL', 'id': item['id']}})
-                    else:
-                        logger.info('%s successfully downloaded - now initiating post-processing for %s' % (ddzstat['filename'], ddzstat['path']))
-                        mylar.PP_QUEUE.put({'nzb_name':     ddzstat['filename'],
-                                            'nzb_folder':   ddzstat['path'],
-                                            'failed':       False,
-                                            'issueid':      item['issueid'],
-                                            'comicid':      item['comicid'],
-                                            'apicall':      True,
-                                            'ddl':          True,
-                                            'download_info': {'provider': 'DDL', 'id': item['id']}})
-                except Exception as e:
-                    logger.error('process error: %s [%s]' %(e, ddzstat))
+        try:
+            pck_cnt = 0
+            if item['comicinfo'][0]['pack'] is True:
+                logger.fdebug('[PACK DETECTION] Attempting to remove issueids from the pack dont-queue list')
+                for x,y in dict(mylar.PACK_ISSUEIDS_DONT_QUEUE).items():
+                    if y == item['id']:
+                        pck_cnt +=1
+                        del mylar.PACK_ISSUEIDS_DONT_QUEUE[x]
+                logger.fdebug('Successfully removed %s issueids from pack queue list as download is completed.' % pck_cnt)
+        except Exception:
+            pass
 
-                #logger.fdebug('mylar.ddl_queued: %s' % mylar.DDL_QUEUED)
-                mylar.DDL_QUEUED.remove(item['id'])
+        # remove html file from cache if it's successful
+        ddl_cleanup(item['id'])
+
+    elif all([ddzstat['success'] is True, mylar.CONFIG.POST_PROCESSING is False]):
+        path = ddzstat['path']
+        if ddzstat['filename'] is not None:
+            path = os.path.join(path, ddzstat['filename'])
+        logger.info('File successfully downloaded. Post Processing is not enabled - item retained here: %s' % (path,))
+        ddl_cleanup(item['id'])
+    elif ddzstat.get('partial') is True:
+        logger.info('[PACK] %s was only partially extracted (%s issues) - marking it as Incomplete. Resume it from the queue to extract the rest.' % (item['series'], ddzstat['queued']))
+        nval = {'status':  'Incomplete',
+                'updated_date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}
+        myDB.upsert('ddl_info', nval, ctrlval)
+        try:
+            mylar.DDL_QUEUED.remove(item['id'])
+        except ValueError:
+            pass
+    else:
+        if item['site'] == 'DDL(GetComics)':
+            try:
+                ltf = ddzstat['links_exhausted']
+            except KeyError:
+                logger.info('[Status: %s] Failed to download item from %s : %s ' % (ddzstat['success'], item['link_type'], ddzstat))
                 try:
-                    link_type_failure.pop(item['id'])
+                    link_type_failure[item['id']].append(item['link_type'])
                 except KeyError:
-                    pass
-
-                try:
-                    pck_cnt = 0
-                    if item['comicinfo'][0]['pack'] is True:
-                        logger.fdebug('[PACK DETECTION] Attempting to remove issueids from the pack dont-queue list')
-                        for x,y in dict(mylar.PACK_ISSUEIDS_DONT_QUEUE).items():
-                            if y == item['id']:
-                                pck_cnt +=1
-                                del mylar.PACK_ISSUEIDS_DONT_QUEUE[x]
-                        logger.fdebug('Successfully removed %s issueids from pack queue list as download is completed.' % pck_cnt)
-                except Exception:
-                    pass
-
-                # remove html file from cache if it's successful
-                ddl_cleanup(item['id'])
-
-            elif all([ddzstat['success'] is True, mylar.CONFIG.POST_PROCESSING is False]):
-                path = ddzstat['path']
-                if ddzstat['filename'] is not None:
-                    path = os.path.join(path, ddzstat['filename'])
-                logger.info('File successfully downloaded. Post Processing is not enabled - item retained here: %s' % (path,))
-                ddl_cleanup(item['id'])
+                    link_type_failure[item['id']] = [item['link_type']]
+                logger.fdebug('[%s] link_type_failure: %s' % (item['id'], link_type_failure))
+                ggc = getcomics.GC(comicid=item['comicid'], issueid=item['issueid'], oneoff=item['oneoff'])
+                ggc.parse_downloadresults(item['id'], item['mainlink'], item['comicinfo'], item['packinfo'], link_type_failure[item['id']])
             else:
-                if item['site'] == 'DDL(GetComics)':
-                    try:
-                        ltf = ddzstat['links_exhausted']
-                    except KeyError:
-                        logger.info('[Status: %s] Failed to download item from %s : %s ' % (ddzstat['success'], item['link_type'], ddzstat))
-                        try:
-                            link_type_failure[item['id']].append(item['link_type'])
-                        except KeyError:
-                            link_type_failure[item['id']] = [item['link_type']]
-                        logger.fdebug('[%s] link_type_failure: %s' % (item['id'], link_type_failure))
-                        ggc = getcomics.GC(comicid=item['comicid'], issueid=item['issueid'], oneoff=item['oneoff'])
-                        ggc.parse_downloadresults(item['id'], item['mainlink'], item['comicinfo'], item['packinfo'], link_type_failure[item['id']])
-                    else:
-                        logger.info('[REDO] Exhausted all available links [%s] for issueid %s and was not able to download anything' % (link_type_failure[item['id']], item['issueid']))
-                        nval = {'status':  'Failed',
-                                'updated_date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}
-                        myDB.upsert('ddl_info', nval, ctrlval)
-                        #undo all snatched items, to previous status via item['id'] - this will be set to Skipped currently regardless of previous status
-                        reverse_the_pack_snatch(item['id'], item['comicid'])
-                        link_type_failure.pop(item['id'])
-                        ddl_cleanup(item['id'])
-                else:
-                    logger.info('[Status: %s] Failed to download item from %s : %s ' % (ddzstat['success'], item['site'], ddzstat))
-                    myDB.action('DELETE FROM ddl_info where id=?', [item['id']])
-                    mylar.search.FailedMark(item['issueid'], item['comicid'], item['id'], ddzstat['filename'], item['site'])
+                logger.info('[REDO] Exhausted all available links [%s] for issueid %s and was not able to download anything' % (link_type_failure[item['id']], item['issueid']))
+                nval = {'status':  'Failed',
+                        'updated_date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}
+                myDB.upsert('ddl_info', nval, ctrlval)
+                #undo all snatched items, to previous status via item['id'] - this will be set to Skipped currently regardless of previous status
+                reverse_the_pack_snatch(item['id'], item['comicid'])
+                link_type_failure.pop(item['id'])
+                ddl_cleanup(item['id'])
         else:
-            time.sleep(5)
+            logger.info('[Status: %s] Failed to download item from %s : %s ' % (ddzstat['success'], item['site'], ddzstat))
+            myDB.action('DELETE FROM ddl_info where id=?', [item['id']])
+            mylar.search.FailedMark(item['issueid'], item['comicid'], item['id'], ddzstat['filename'], item['site'])
+
+def ddl_unpack(item, ddzstat):
+    # extracts a downloaded pack an issue at a time, sending each one to post-processing as soon as it's
+    # been written instead of waiting for the entire pack to be unzipped.
+    pack_name = os.path.basename(ddzstat['path'])
+    queued = 0
+    try:
+        for member_dir in transfer.extract_pack(ddzstat['archive'], ddzstat['path']):
+            queued += 1
+            if mylar.CONFIG.POST_PROCESSING is True:
+                logger.info('[PACK] %s extracted from %s - now initiating post-processing for it.' % (os.path.basename(member_dir), pack_name))
+                mylar.PP_QUEUE.put({'nzb_name':     pack_name,
+                                    'nzb_folder':   member_dir,
+                                    'failed':       False,
+                                    'issueid':      None,
+                                    'comicid':      item['comicid'],
+                                    'apicall':      True,
+                                    'ddl':          True,
+                                    'download_info': {'provider': 'DDL', 'id': item['id']}})
+    except Exception as e:
+        logger.warn('[ERROR: %s] Unable to extract zip file: %s' % (e, ddzstat['path']))
+        if queued > 0:
+            #the rest of the pack is still sitting in the (trimmed) zip - it's not complete.
+            logger.warn('[PACK] Only %s issues were extracted from %s before it failed - the remainder have been left in %s' % (queued, pack_name, ddzstat['archive']))
+            return {'success': False, 'partial': True, 'filename': None, 'path': ddzstat['path'], 'queued': queued}
+
+    if queued == 0:
+        logger.warn('[PACK] No issues were extracted from %s' % ddzstat['archive'])
+        return {'success': False, 'filename': None, 'path': None}
+
+    logger.fdebug('[PACK] %s issues extracted from %s' % (queued, pack_name))
+    return {'success': True, 'filename': None, 'path': ddzstat['path'], 'queued': queued}
 
 def ddl_cleanup(id):
    # remove html file from cache if it's successful
@@ -3533,86 +3602,14 @@ def search_queue(queue):
 
 
 def worker_main(queue):
-    while True:
-        if queue.qsize() >= 1:
-            item = queue.get(True)
-            logger.info('Now loading from queue: %s' % item)
-            if item == 'exit':
-                logger.info('Cleaning up workers for shutdown')
-                break
-            snstat = torrentinfo(torrent_hash=item['hash'], download=True)
-            if snstat['snatch_status'] == 'IN PROGRESS':
-                logger.info('Still downloading in client....let us try again momentarily.')
-                time.sleep(30)
-                mylar.SNATCHED_QUEUE.put(item)
-            elif any([snstat['snatch_status'] == 'MONITOR FAIL', snstat['snatch_status'] == 'MONITOR COMPLETE']):
-                logger.info('File copied for post-processing - submitting as a direct pp.')
-                mylar.PP_QUEUE.put({'nzb_name':     os.path.basename(snstat['copied_filepath']),
-                                    'nzb_folder':   snstat['copied_filepath'], #os.path.abspath(os.path.join(snstat['copied_filepath'], os.pardir)),
-                                    'failed':       False,
-                                    'issueid':      item['issueid'],
-                                    'comicid':      item['comicid'],
-                                    'apicall':      True,
-                                    'ddl':          False,
-                                    'download_info': None})
-                #threading.Thread(target=self.checkFolder, args=[os.path.abspath(os.path.join(snstat['copied_filepath'], os.pardir))]).start()
-        else:
-            time.sleep(15)
+    # every torrent waiting on auto-snatch is monitored together (see mylar.torrentmonitor).
+    from mylar import torrentmonitor
+    torrentmonitor.TorrentMonitor(queue).run()
 
 def nzb_monitor(queue):
-    while True:
-        if mylar.RETURN_THE_NZBQUEUE.qsize() >= 1:
-            if mylar.USE_SABNZBD is True:
-                # this checks the sabnzbd queue to see if it's paused / unpaused.
-                sab_params = {
-                    'apikey': mylar.CONFIG.SAB_APIKEY,
-                    'mode': 'queue',
-                    'start': 0,
-                    'limit': 5,
-                    'search': None,
-                    'output': 'json',
-                }
-                s = sabnzbd.SABnzbd(params=sab_params)
-                sabresponse = s.sender(chkstatus=True)
-                # response will be: Paused = True, UnPaused = False
-                if sabresponse['status'] is False:
-                    while True:
-                        if mylar.RETURN_THE_NZBQUEUE.qsize() >= 1:
-                            qu_retrieve = mylar.RETURN_THE_NZBQUEUE.get(True)
-                            try:
-                                nzstat = s.historycheck(qu_retrieve)
-                                cdh_monitor(queue, qu_retrieve, nzstat, readd=True)
-                            except Exception as e:
-                                logger.error('Exception occured trying to re-add %s to queue: %s' % (qu_retrieve, e))
-                            time.sleep(5)
-                        else:
-                            break
-
-        if queue.qsize() >= 1:
-            item = queue.get(True)
-            if item == 'exit':
-                logger.info('Cleaning up workers for shutdown')
-                break
-            try:
-                tmp_apikey = item['queue'].pop('apikey')
-                logger.info('Now loading from queue: %s' % item)
-            except Exception:
-                #nzbget doesn't pass the queue field. So just let it fly.
-                logger.info('Now loading from queue: %s' % item)
-            else:
-                item['queue']['apikey'] = tmp_apikey
-            if all([mylar.USE_SABNZBD is True, mylar.CONFIG.SAB_CLIENT_POST_PROCESSING is True]):
-                nz = sabnzbd.SABnzbd(item)
-                nzstat = nz.processor()
-            elif all([mylar.USE_NZBGET is True, mylar.CONFIG.NZBGET_CLIENT_POST_PROCESSING is True]):
-                nz = nzbget.NZBGet()
-                nzstat = nz.processor(item)
-            else:
-                logger.warn('There are no NZB Completed Download handlers enabled. Not sending item to completed download handling...')
-                break
-            cdh_monitor(queue, item, nzstat)
-        else:
-            time.sleep(5)
+    # every nzb sent to SABnzbd / NZBGet is monitored together (see mylar.nzbmonitor).
+    from mylar import nzbmonitor
+    nzbmonitor.NZBMonitor(queue).run()
 
 
 def cdh_monitor(queue, item, nzstat, readd=False):
@@ -3637,7 +3634,6 @@ def cdh_monitor(queue, item, nzstat, readd=False):
             mylar.RETURN_THE_NZBQUEUE.put(item)
     elif nzstat['status'] is False:
         logger.info('Download %s failed. Requeue NZB to check later...' % known_nzb_id)
-        time.sleep(5)
         if item not in queue.queue:
             mylar.NZB_QUEUE.put(item)
     elif nzstat['status'] is True:
@@ -4306,15 +4302,13 @@ def getImage(comicid, url, issueid=None, thumbnail_path=None, apicall=False, ove
     #if cover has '+' in url it's malformed, we need to replace '+' with '%20' to retrieve properly.
 
     #new CV API restriction - one api request / second.(probably unecessary here, but it doesn't hurt)
-    if mylar.CONFIG.CVAPI_RATE is None or mylar.CONFIG.CVAPI_RATE < 2:
-        time.sleep(2)
-    else:
-        time.sleep(mylar.CONFIG.CVAPI_RATE)
+    mylar.cv.CV_BUDGET.wait()
 
     if apicall is False:
         logger.info('Attempting to retrieve the comic image for series')
     try:
-        r = requests.get(url, params=None, stream=True, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
+        with metrics.timed('http_request', host=metrics.host(url)):
+            r = requests.get(url, params=None, stream=True, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
     except Exception as e:
         if apicall is False:
             logger.warn('[ERROR: %s] Unable to download image from CV URL link: %s' % (e, url))
@@ -4624,7 +4618,6 @@ def publisherImages(publisher):
 def lookupthebitches(filelist, folder, nzbname, nzbid, prov, hash, pulldate):
     #import db
     myDB = db.DBConnection()
-    watchlist = listLibrary()
     matchlist = []
     #get the weeknumber/year for the pulldate
     dt = datetime.datetime.strptime(pulldate, '%Y-%m-%d')
@@ -4649,10 +4642,11 @@ def lookupthebitches(filelist, folder, nzbname, nzbid, prov, hash, pulldate):
 
     if len(matchlist) > 0:
         for x in matchlist:
-            if all([x['comicid'] not in watchlist, mylar.CONFIG.PACK_0DAY_WATCHLIST_ONLY is False]):
+            watched = library.LIBRARY.status(x['comicid']) is not None
+            if all([not watched, mylar.CONFIG.PACK_0DAY_WATCHLIST_ONLY is False]):
                 oneoff = True
                 mode = 'pullwant'
-            elif all([x['comicid'] not in watchlist, mylar.CONFIG.PACK_0DAY_WATCHLIST_ONLY is True]):
+            elif all([not watched, mylar.CONFIG.PACK_0DAY_WATCHLIST_ONLY is True]):
                 continue
             else:
                 oneoff = False
@@ -4689,64 +4683,20 @@ def DateAddedFix():
         myDB.upsert("annuals", {'DateAdded': DateAdded}, {'IssueID': an[0]})
 
 
-def statusChange(status_from, status_to, comicid=None, bulk=False, api=True):
-    myDB = db.DBConnection()
-    the_list = []
-    if bulk is False: #type(comicid) != list:
-        sc = myDB.select("SELECT IssueID FROM issues WHERE ComicID=? AND Status=?", [comicid, status_from])
-        for s in sc:
-            the_list.append({'table': 'issues', 'issueid': s['IssueID']})
-        if mylar.CONFIG.ANNUALS_ON:
-            ac = myDB.select("SELECT IssueID FROM annuals WHERE ComicID=? AND Status=?", [comicid, status_from])
-            for s in ac:
-                the_list.append({'table': 'annuals', 'issueid': s['IssueID']})
-    else:
-        if comicid == 'All':
-            sc = myDB.select("SELECT IssueID FROM issues WHERE Status=?", [status_from])
-            for s in sc:
-                the_list.append({'table': 'issues', 'issueid': s['IssueID']})
-            if mylar.CONFIG.ANNUALS_ON:
-                ac = myDB.select("SELECT IssueID FROM annuals WHERE Status=?", [status_from])
-                for s in ac:
-                   the_list.append({'table': 'annuals', 'issueid': s['IssueID']})
-
-        else:
-            for x in comicid:
-                sc = myDB.select("SELECT IssueID FROM issues WHERE ComicID=? AND Status=?", [x, status_from])
-                for s in sc:
-                    the_list.append({'table': 'issues', 'issueid': s['IssueID']})
-                if mylar.CONFIG.ANNUALS_ON:
-                    ac = myDB.select("SELECT IssueID FROM annuals WHERE ComicID=? AND Status=?", [x, status_from])
-                    for s in ac:
-                        the_list.append({'table': 'annuals', 'issueid': s['IssueID']})
-
-    #logger.info('the_list: %s' % the_list)
-    #for genlist in chunker(the_list, 200):
-    #    tmpsql = "SELECT IssueID FROM issues WHERE Status=? AND ComicID in ({seq})".format(status_from, seq=','.join(['?'] *(len(genlist) -1)))
-    #    chkthis = myDB.upsert("issues", {'Status': status_to}, dict(myDB.select(tmpsql, genlist))) #select(tmpsql, genlist)
-    #    logger.info('succeeded')
-
-    #this probably won't scale well, but atm it's the best that can be done
-    cnt=0
-    dlist = []
-    for x in the_list:
-        try:
-            myDB.upsert(x['table'], {'Status': status_to}, {'IssueID': x['issueid'], 'Status': status_from})
-        except Exception as e:
-            pass
-        else:
-            cnt+=1
-
-    rtnline = 'Updated %s Issues from a status of %s to %s' % (cnt, status_from, status_to)
-    logger.info(rtnline)
-
-    return rtnline
+def statusChange(status_from, status_to, comicid=None, bulk=False, api=True, date_from=None, date_to=None, publisher=None):
+    #set-based - every matching issue is changed in the one transaction (see mylar.statuschange).
+    from mylar import statuschange
+    if bulk is False:
+        comicid = [comicid]
+    result = statuschange.change_status(status_to, status_from=status_from, comicids=comicid, date_from=date_from, date_to=date_to, publisher=publisher)
+    return result['message']
 
-def file_ops(path,dst,arc=False,one_off=False,multiple=False):
+def file_ops(path,dst,arc=False,one_off=False,multiple=False,staged=False):
 #    # path = source path + filename
 #    # dst = destination path + filename
 #    # arc = to denote if the file_operation is being performed as part of a story arc or not where the series exists on the watchlist already
 #    # one-off = if the file_operation is being performed where it is either going into the grabbab_dst or story arc folder
+#    # staged = path is a throwaway copy (ie. in the meta-tagging temp folder), so a copy can be done as a move instead
 
 #    #get the crc of the file prior to the operation and then compare after to ensure it's complete.
 #    crc_check = mylar.filechecker.crc(path)
@@ -4763,23 +4713,27 @@ def file_ops(path,dst,arc=False,one_off=False,multiple=False):
             softlink_type = 'relative'
     else:
         action_op = mylar.CONFIG.FILE_OPTS
+        if all([action_op == 'copy', staged is True, placement.is_staged(path)]):
+            action_op = 'move'
 
     if action_op == 'copy' or (arc is True and any([action_op == 'copy', action_op == 'move'])):
         try:
-            shutil.copy( path , dst )
+            strategy = placement.copy( path , dst )
 #        if crc_check == mylar.filechecker.crc(dst):
         except Exception as e:
             logger.error('[%s] error : %s' % (action_op, e))
             return False
+        logger.fdebug('[%s][%s] %s -> %s' % (action_op.upper(), strategy, path, dst))
         return True
 
     elif action_op == 'move':
         try:
-            shutil.move( path , dst )
+            strategy = placement.move( path , dst )
 #        if crc_check == mylar.filechecker.crc(dst):
         except Exception as e:
             logger.error('[MOVE] error : %s' % e)
             return False
+        logger.fdebug('[MOVE][%s] %s -> %s' % (strategy, path, dst))
         return True
 
     elif any([action_op == 'hardlink', action_op == 'softlink']):
@@ -4800,8 +4754,8 @@ def file_ops(path,dst,arc=False,one_off=False,multiple=False):
                     if e.errno == errno.EXDEV:
                         logger.warn('[' + str(e) + '] Hardlinking failure. Could not create hardlink - dropping down to copy mode so that this operation can complete. Intervention is required if you wish to continue using hardlinks.')
                         try:
-                            shutil.copy( path, dst )
-                            logger.fdebug('Successfully copied file to : ' + dst)
+                            strategy = placement.copy( path, dst )
+                            logger.fdebug('Successfully copied file to : %s [%s]' % (dst, strategy))
                             return True
                         except Exception as e:
                             logger.error('[COPY] error : %s' % e)
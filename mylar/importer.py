@@ -34,6 +34,12 @@ import threading
 import mylar
 from mylar import logger, filers, helpers, db, mb, cv, parseit, filechecker, search, updater, moveit, comicbookdb, series_metadata
 
+MASS_LOCK = threading.Lock()
+#guards the mass-add / mass-refresh worker pools and the ComicIDs they currently have in hand.
+WORKER_LOCK = threading.Lock()
+MASS_POOLS = {}
+MASS_INFLIGHT = {}
+
 
 def is_exists(comicid):
 
@@ -49,28 +55,108 @@ def is_exists(comicid):
         return False
 
 def addvialist(queue):
+    # one of MASS_WORKERS threads working through the mass-add queue. CV calls are paced by the
+    # shared cv.CV_BUDGET, so local work (covers, file scans, db writes) overlaps other workers' fetches.
     while True:
-        if queue.qsize() >= 1:
-            time.sleep(3)
-            item = queue.get(True)
-            if item == 'exit':
-                break
-            if item['comicname'] is not None:
-                if item['seriesyear'] is not None:
-                    logger.info('[MASS-ADD][1/%s] Now adding %s (%s) [%s] ' % (queue.qsize()+1, item['comicname'], item['seriesyear'], item['comicid']))
-                    mylar.GLOBAL_MESSAGES = {'status': 'success', 'event': 'addbyid', 'comicname': item['comicname'], 'seriesyear': item['seriesyear'], 'comicid': item['comicid'], 'tables': 'None', 'message': 'Now adding %s (%s)' % (urllib.parse.unquote_plus(item['comicname']), item['seriesyear'])}
-                else:
-                    logger.info('[MASS-ADD][1/%s] Now adding %s [%s] ' % (queue.qsize()+1, item['comicname'], item['comicid']))
-                    mylar.GLOBAL_MESSAGES = {'status': 'success', 'event': 'addbyid', 'comicname': item['comicname'], 'seriesyear': item['seriesyear'], 'comicid': item['comicid'], 'tables': 'None', 'message': 'Now adding %s' % (urllib.parse.unquote_plus(item['comicname']))}
+        item = mass_next(queue, 'mass-add')
+        if item is None:
+            break
+        progress = mass_progress('mass-add')
+        if item['comicname'] is not None:
+            if item['seriesyear'] is not None:
+                logger.info('[MASS-ADD][%s] Now adding %s (%s) [%s] ' % (progress, item['comicname'], item['seriesyear'], item['comicid']))
+                mylar.events.publish({'status': 'success', 'event': 'addbyid', 'comicname': item['comicname'], 'seriesyear': item['seriesyear'], 'comicid': item['comicid'], 'tables': 'None', 'message': '[%s] Now adding %s (%s)' % (progress, urllib.parse.unquote_plus(item['comicname']), item['seriesyear'])})
             else:
-                logger.info('[MASS-ADD][1/%s] Now adding ComicID: %s ' % (queue.qsize()+1, item['comicid']))
-                mylar.GLOBAL_MESSAGES = {'status': 'success', 'event': 'addbyid', 'comicname': item['comicname'], 'seriesyear': item['seriesyear'], 'comicid': item['comicid'], 'tables': 'None', 'message': 'Now adding via ComicID %s' % (item['comicid'])}
+                logger.info('[MASS-ADD][%s] Now adding %s [%s] ' % (progress, item['comicname'], item['comicid']))
+                mylar.events.publish({'status': 'success', 'event': 'addbyid', 'comicname': item['comicname'], 'seriesyear': item['seriesyear'], 'comicid': item['comicid'], 'tables': 'None', 'message': '[%s] Now adding %s' % (progress, urllib.parse.unquote_plus(item['comicname']))})
+        else:
+            logger.info('[MASS-ADD][%s] Now adding ComicID: %s ' % (progress, item['comicid']))
+            mylar.events.publish({'status': 'success', 'event': 'addbyid', 'comicname': item['comicname'], 'seriesyear': item['seriesyear'], 'comicid': item['comicid'], 'tables': 'None', 'message': '[%s] Now adding via ComicID %s' % (progress, item['comicid'])})
 
+        try:
             addComictoDB(item['comicid'])
-        else:
-            mylar.ADD_LIST.put('exit')
+        except Exception as e:
+            logger.error('[MASS-ADD] Unable to add ComicID %s: %s' % (item['comicid'], e))
+        finally:
+            mass_done(item, 'mass-add')
+            mass_progress('mass-add', done=1)
     return False
 
+def mass_progress(name, queued=0, done=0):
+    # running tally for a mass-add / mass-refresh batch ('done/queued'). Cleared once the batch completes.
+    with MASS_LOCK:
+        stats = mylar.MASS_STATS.setdefault(name, {'queued': 0, 'done': 0})
+        stats['queued'] += queued
+        stats['done'] += done
+        progress = '%s/%s' % (stats['done'], stats['queued'])
+        if all([done > 0, stats['done'] >= stats['queued']]):
+            mylar.MASS_STATS.pop(name, None)
+    return progress
+
+def mass_workers(workers, queue, target, name):
+    # tops up the worker pool for the given queue - never more than MASS_WORKERS, or more than there are items.
+    # Call it after the items are queued: a worker only leaves the pool (under WORKER_LOCK) once the queue is
+    # empty, so anything queued before this either gets picked up by a worker still in the pool or gets a new one.
+    with WORKER_LOCK:
+        pool = MASS_POOLS.setdefault(name, [])
+        pool[:] = [w for w in pool if w.is_alive()]
+        wanted = min(max(1, mylar.CONFIG.MASS_WORKERS), queue.qsize())
+        if len(pool) >= wanted:
+            logger.info('[%s] %s worker(s) already running. Adding to the existing queue of %s items' % (name.upper(), len(pool), queue.qsize()))
+        for x in range(len(pool), wanted):
+            worker = threading.Thread(target=target, args=(queue,), name='%s-%s' % (name, x+1))
+            worker.daemon = True
+            pool.append(worker)
+            worker.start()
+        return pool
+
+def mass_next(queue, name):
+    # next item for a mass-add / mass-refresh worker, or None once the worker should exit (it's already out of the pool by then).
+    # Items for a ComicID another worker has in hand are dropped as duplicates.
+    while True:
+        try:
+            item = queue.get(True, 5)
+        except Exception:
+            with WORKER_LOCK:
+                if queue.qsize() == 0:
+                    mass_leave(name)
+                    return None
+            continue
+        if item == 'exit':
+            with WORKER_LOCK:
+                mass_leave(name)
+            return None
+        try:
+            comicid = item['comicid']
+        except Exception:
+            return item
+        with WORKER_LOCK:
+            inflight = MASS_INFLIGHT.setdefault(name, set())
+            if comicid in inflight:
+                duplicate = True
+            else:
+                inflight.add(comicid)
+                duplicate = False
+        if duplicate is False:
+            return item
+        logger.fdebug('[%s] ComicID %s is already being worked on - dropping the duplicate request.' % (name.upper(), comicid))
+        mass_progress(name, done=1)
+
+def mass_done(item, name):
+    try:
+        comicid = item['comicid']
+    except Exception:
+        return
+    with WORKER_LOCK:
+        MASS_INFLIGHT.get(name, set()).discard(comicid)
+
+def mass_leave(name):
+    # caller holds WORKER_LOCK.
+    pool = MASS_POOLS.get(name, [])
+    me = threading.current_thread()
+    if me in pool:
+        pool.remove(me)
+
 def addComictoDB(comicid, mismatch=None, pullupd=None, imported=None, ogcname=None, calledfrom=None, annload=None, chkwant=None, issuechk=None, issuetype=None, latestissueinfo=None, csyear=None, fixed_type=None):
     myDB = db.DBConnection()
 
@@ -492,7 +578,7 @@ def addComictoDB(comicid, mismatch=None, pullupd=None, imported=None, ogcname=No
 
     myDB.upsert("comics", newValueDict, controlValueDict)
 
-    mylar.GLOBAL_MESSAGES = {'status': 'mid-message-event', 'event': 'addbyid', 'comicname': comic['ComicName'], 'seriesyear': SeriesYear, 'comicid': comicid, 'tables': 'None', 'message': 'mid-message-event'}
+    mylar.events.publish({'status': 'mid-message-event', 'event': 'addbyid', 'comicname': comic['ComicName'], 'seriesyear': SeriesYear, 'comicid': comicid, 'tables': 'None', 'message': 'mid-message-event'})
 
     #comicsort here...
     #run the re-sortorder here in order to properly display the page
@@ -685,7 +771,7 @@ def addComictoDB(comicid, mismatch=None, pullupd=None, imported=None, ogcname=No
         return
 
     if calledfrom == 'addbyid':
-        mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': comic['ComicName'], 'seriesyear': SeriesYear, 'comicid': comicid, 'tables': 'both', 'message': 'Successfully added %s (%s)!' % (comic['ComicName'], SeriesYear)}
+        mylar.events.publish({'status': 'success', 'comicname': comic['ComicName'], 'seriesyear': SeriesYear, 'comicid': comicid, 'tables': 'both', 'message': 'Successfully added %s (%s)!' % (comic['ComicName'], SeriesYear)})
         logger.info('Sucessfully added %s (%s) to the watchlist by directly using the ComicVine ID' % (comic['ComicName'], SeriesYear))
         return {'status': 'complete'}
     elif calledfrom == 'maintenance':
@@ -694,7 +780,7 @@ def addComictoDB(comicid, mismatch=None, pullupd=None, imported=None, ogcname=No
                 'comicname': comic['ComicName'],
                 'year':      SeriesYear}
     else:
-        mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': comic['ComicName'], 'seriesyear': SeriesYear, 'comicid': comicid, 'tables': 'both', 'message': 'Successfully added %s (%s)!' % (comic['ComicName'], SeriesYear)}
+        mylar.events.publish({'status': 'success', 'comicname': comic['ComicName'], 'seriesyear': SeriesYear, 'comicid': comicid, 'tables': 'both', 'message': 'Successfully added %s (%s)!' % (comic['ComicName'], SeriesYear)})
         logger.info('Sucessfully added %s (%s) to the watchlist' % (comic['ComicName'], SeriesYear))
         return {'status': 'complete'}
 
@@ -853,10 +939,7 @@ def GCDimport(gcomicid, pullupd=None, imported=None, ogcname=None):
     coverfile = os.path.join(mylar.CONFIG.CACHE_DIR, str(gcomicid) + ".jpg")
 
     #new CV API restriction - one api request / second.
-    if mylar.CONFIG.CVAPI_RATE is None or mylar.CONFIG.CVAPI_RATE < 2:
-        time.sleep(2)
-    else:
-        time.sleep(mylar.CONFIG.CVAPI_RATE)
+    cv.CV_BUDGET.wait()
 
     urllib.request.urlretrieve(str(ComicImage), str(coverfile))
     try:
@@ -1965,23 +2048,10 @@ def importer_thread(serieslist):
     if type(serieslist) != list:
         serieslist  = [(serieslist)]
 
-    threaded_call = True
-
     list(map(mylar.ADD_LIST.put, serieslist))
+    mass_progress('mass-add', queued=len(serieslist))
 
-    try:
-        if mylar.MASS_ADD.is_alive():
-            logger.info('[MASS-ADD] MASS_ADD thread already running. Adding an additional %s items to existing queue' % len(serieslist))
-            threaded_call = False
-    except Exception:
-        pass
-
-    if threaded_call is True:
-        logger.info('[MASS-ADD] MASS_ADD thread not started. Started & submitting.')
-        mylar.MASS_ADD = threading.Thread(target=addvialist, args=(mylar.ADD_LIST,), name="mass-add")
-        mylar.MASS_ADD.start()
-        if not mylar.MASS_ADD:
-            mylar.MASS_ADD.join(5)
+    mylar.MASS_ADD = mass_workers(mylar.MASS_ADD, mylar.ADD_LIST, addvialist, 'mass-add')
 
 
 def refresh_thread(serieslist):
@@ -1991,21 +2061,8 @@ def refresh_thread(serieslist):
     if type(serieslist) != list:
         serieslist  = [(serieslist)]
 
-    threaded_call = True
-
     list(map(mylar.REFRESH_QUEUE.put, serieslist))
+    mass_progress('mass-refresh', queued=len(serieslist))
 
-    try:
-        if mylar.MASS_REFRESH.is_alive():
-            logger.info('[MASS-REFRESH] MASS_REFRESH thread already running. Adding an additional %s items to existing queue' % len(serieslist))
-            threaded_call = False
-    except Exception:
-        pass
-
-    if threaded_call is True:
-        logger.info('[MASS-REFRESH] MASS_REFRESH thread not started. Started & submitting.')
-        mylar.MASS_REFRESH = threading.Thread(target=updater.addvialist, args=(mylar.REFRESH_QUEUE,), name="mass-refresh")
-        mylar.MASS_REFRESH.start()
-        if not mylar.MASS_REFRESH:
-            mylar.MASS_REFRESH.join(5)
+    mylar.MASS_REFRESH = mass_workers(mylar.MASS_REFRESH, mylar.REFRESH_QUEUE, updater.addvialist, 'mass-refresh')
 
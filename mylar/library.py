@@ -0,0 +1,127 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import threading
+
+import mylar
+from mylar import db, logger
+
+
+class LibraryIndex(object):
+    """
+    Process-wide, in-memory index of the watchlist shared by search, import, weekly pull and
+    RSS matching. It's rebuilt lazily on the next lookup after anything writes to the comics,
+    annuals or storyarcs tables (see db.LIBRARY_GENERATION), so lookups never hit the db otherwise.
+    Writes made outside of db.DBConnection (ie. dbcheck) need to call invalidate().
+    The returned dicts are shared - treat them as read-only.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None
+        self.series = {}        # ComicID -> {'comicid', 'status'}
+        self.annuals = {}       # ReleaseComicID -> {'comicid' (parent), 'status'}
+        self.combined = {}      # series + annuals (what listLibrary returns with annuals on)
+        self.names = {}         # name_key(DynamicComicName) -> set of ComicIDs
+        self.annual_names = {}  # name_key(DynamicComicName, annuals=True) -> set of ComicIDs
+        self.arcs = {}          # CV_ArcID -> {'comicid': CV_ArcID}
+
+    def _load(self):
+        if self.generation == db.LIBRARY_GENERATION:
+            return
+        with self.lock:
+            generation = db.LIBRARY_GENERATION
+            if self.generation == generation:
+                return
+            myDB = db.DBConnection()
+            series = {}
+            names = {}
+            annual_names = {}
+            for row in myDB.select('SELECT ComicID, Status, DynamicComicName FROM comics'):
+                series[row['ComicID']] = {'comicid': row['ComicID'],
+                                          'status':  row['Status']}
+                if row['DynamicComicName'] is not None:
+                    names.setdefault(name_key(row['DynamicComicName']), set()).add(row['ComicID'])
+                    annual_names.setdefault(name_key(row['DynamicComicName'], annuals=True), set()).add(row['ComicID'])
+
+            annuals = {}
+            for row in myDB.select('SELECT DISTINCT ReleaseComicID, ComicID FROM annuals WHERE ReleaseComicID IS NOT NULL'):
+                if row['ComicID'] in series and row['ReleaseComicID'] not in annuals:
+                    annuals[row['ReleaseComicID']] = {'comicid': row['ComicID'],
+                                                      'status':  series[row['ComicID']]['status']}
+
+            arcs = {}
+            for row in myDB.select('SELECT DISTINCT(CV_ArcID) FROM storyarcs'):
+                arcs[row['CV_ArcID']] = {'comicid': row['CV_ArcID']}
+
+            self.series = series
+            self.annuals = annuals
+            self.combined = dict(series, **annuals)
+            self.names = names
+            self.annual_names = annual_names
+            self.arcs = arcs
+            self.generation = generation
+            logger.fdebug('[LIBRARY-INDEX] Indexed %s series, %s annuals and %s story arcs' % (len(series), len(annuals), len(arcs)))
+
+    def watchlist(self):
+        # ComicID (and ReleaseComicID if annuals are enabled) -> {'comicid', 'status'}
+        self._load()
+        if mylar.CONFIG.ANNUALS_ON is True:
+            return self.combined
+        return self.series
+
+    def invalidate(self):
+        self.generation = None
+
+    def status(self, comicid):
+        # Status of a watched series (or of the series an annual belongs to) - None if not watched.
+        entry = self.watchlist().get(comicid)
+        if entry is None:
+            return None
+        return entry['status']
+
+    def parent(self, comicid):
+        # the watchlist ComicID a series / annual volume belongs to (or None).
+        entry = self.watchlist().get(comicid)
+        if entry is None:
+            return None
+        return entry['comicid']
+
+    def ids_for_name(self, dynamicname, annuals=False):
+        # ComicIDs of every watched series whose DynamicComicName matches once normalized (see name_key).
+        if dynamicname is None:
+            return set()
+        self._load()
+        if annuals is True:
+            return self.annual_names.get(name_key(dynamicname, annuals=True), set())
+        return self.names.get(name_key(dynamicname), set())
+
+    def storyarcs(self):
+        self._load()
+        return self.arcs
+
+
+def name_key(dynamicname, annuals=False):
+    # the comparison form of a DynamicComicName - lowercase, pipes & whitespace dropped and
+    # (for annual matching) the annual designation removed.
+    key = re.sub(r'[\|\s]', '', dynamicname.lower()).strip()
+    if annuals is True:
+        key = re.sub('2021annual', '', key)
+        key = re.sub('annual', '', key).strip()
+    return key
+
+
+LIBRARY = LibraryIndex()
@@ -111,9 +111,9 @@ def locg(pulldate=None,weeknumber=None,year=None):
                 logger.warn('[PULL-LIST] Weekly pull for week %s, %s has no data. This is probably a back-end related error of some kind.' % (weeknumber, year))
                 return {'status': 'failure'}
 
-            logger.info('Re-creating pullist to ensure everything\'s fresh.')
-            myDB.action('DELETE FROM weekly WHERE weeknumber=? AND year=?',[int(weeknumber), int(year)])
+            logger.info('Refreshing pullist to ensure everything\'s fresh.')
 
+            weeklyrows = []
             for x in pull:
                 comicid = None
                 issueid = None
@@ -129,22 +129,23 @@ def locg(pulldate=None,weeknumber=None,year=None):
                 cl_dyninfo = cl_d.dynamic_replace(comicname)
                 dynamic_name = re.sub('[\|\s]','', cl_dyninfo['mod_seriesname'].lower()).strip()
 
-                controlValueDict = {'DYNAMICNAME':   dynamic_name,
-                                    'ISSUE':   re.sub('#', '', x['issue']).strip()}
-
-                newValueDict = {'SHIPDATE':    x['shipdate'],
-                                'PUBLISHER':   x['publisher'],
-                                'STATUS':      'Skipped',
-                                'COMIC':       comicname,
-                                'COMICID':     comicid,
-                                'ISSUEID':     issueid,
-                                'WEEKNUMBER':  x['weeknumber'],
-                                'ANNUALLINK':  x['annuallink'],
-                                'YEAR':        x['year'],
-                                'VOLUME':      x['volume'],
-                                'SERIESYEAR':  x['seriesyear'],
-                                'FORMAT':      x['format']}
-                myDB.upsert("weekly", newValueDict, controlValueDict)
+                weeklyrows.append({'DYNAMICNAME': dynamic_name,
+                                   'ISSUE':       re.sub('#', '', x['issue']).strip(),
+                                   'SHIPDATE':    x['shipdate'],
+                                   'PUBLISHER':   x['publisher'],
+                                   'STATUS':      'Skipped',
+                                   'COMIC':       comicname,
+                                   'COMICID':     comicid,
+                                   'ISSUEID':     issueid,
+                                   'WEEKNUMBER':  x['weeknumber'],
+                                   'ANNUALLINK':  x['annuallink'],
+                                   'YEAR':        x['year'],
+                                   'VOLUME':      x['volume'],
+                                   'SERIESYEAR':  x['seriesyear'],
+                                   'FORMAT':      x['format']})
+
+            changes = load_week(weeklyrows, weeknumber, year)
+            logger.fdebug('[PULL-LIST] week %s of %s: %s added, %s updated, %s removed, %s unchanged.' % (weeknumber, year, changes['added'], changes['updated'], changes['removed'], changes['unchanged']))
 
             logger.info('[PULL-LIST] Successfully populated pull-list into Mylar for week %s of %s' % (weeknumber, year))
             #set the last poll date/time here so that we don't start overwriting stuff too much...
@@ -164,3 +165,48 @@ def locg(pulldate=None,weeknumber=None,year=None):
                 logger.warn('[%s] The error returned is: %s' % (r.status_code, r.headers))
                 return {'status': 'failure'}
 
+def load_week(weeklyrows, weeknumber, year):
+    #diff the incoming pull-list against what's already stored for the given week, and apply
+    #only the changes (within a single transaction) instead of deleting & re-adding every row.
+    #rows are matched on DynamicName + Issue; the status is reset to what's passed in for any changed row.
+    myDB = db.DBConnection()
+    columns = ['SHIPDATE', 'PUBLISHER', 'ISSUE', 'COMIC', 'STATUS', 'COMICID', 'ISSUEID', 'DYNAMICNAME', 'WEEKNUMBER', 'YEAR', 'VOLUME', 'SERIESYEAR', 'ANNUALLINK', 'FORMAT']
+
+    def norm(value):
+        if value is None:
+            return None
+        return str(value)
+
+    stored = {}
+    dupes = []
+    for row in myDB.select('SELECT rowid, %s FROM weekly WHERE CAST(weeknumber AS INTEGER)=? AND CAST(year AS INTEGER)=?' % ', '.join(columns), [int(weeknumber), int(year)]):
+        key = (row['DYNAMICNAME'], row['ISSUE'])
+        if key in stored:
+            dupes.append(row)
+        else:
+            stored[key] = row
+
+    incoming = {}
+    for wr in weeklyrows:
+        incoming[(wr['DYNAMICNAME'], wr['ISSUE'])] = wr
+
+    querylist = []
+    changes = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+    for key, wr in incoming.items():
+        values = [wr.get(c) for c in columns]
+        existing = stored.pop(key, None)
+        if existing is None:
+            querylist.append(('INSERT INTO weekly (%s) VALUES (%s)' % (', '.join(columns), ', '.join(['?'] * len(columns))), values))
+            changes['added'] += 1
+        elif any([norm(existing[c]) != norm(v) for c, v in zip(columns, values)]):
+            querylist.append(('UPDATE weekly SET %s WHERE rowid=?' % ', '.join(['%s=?' % c for c in columns]), values + [existing['rowid']]))
+            changes['updated'] += 1
+        else:
+            changes['unchanged'] += 1
+
+    for existing in list(stored.values()) + dupes:
+        querylist.append(('DELETE FROM weekly WHERE rowid=?', [existing['rowid']]))
+        changes['removed'] += 1
+
+    myDB.mass_action(querylist)
+    return changes
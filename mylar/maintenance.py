@@ -21,6 +21,13 @@ import sqlite3
 import json
 import shutil
 import glob
+import gzip
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 import mylar
 from mylar import logger, importer, filechecker, helpers
@@ -378,59 +385,129 @@ class Maintenance(object):
 
         for cf in cfgloop:
             logger.info('Attempting to backup %s...' % cf)
+            if location is None:
+                root_path = mylar.DATA_DIR
+            else:
+                root_path = location
             if cf == 'mylar database':
-                if location is None:
-                    cback_path = os.path.join(mylar.DATA_DIR, 'mylar.db.backup')
-                    root_path = mylar.DATA_DIR
-                else:
-                    cback_path = os.path.join(location, 'mylar.db.backup')
-                    root_path = location
-                cf_val = 'mylar.db.backup.???'
+                compression = self.backup_compression()
+                cback_path = os.path.join(root_path, 'mylar.db.backup%s' % compression)
                 source_file = self.dbfile
             else:
-                if location is None:
-                    cback_path = os.path.join(mylar.DATA_DIR, 'config.ini-v%s.backup' % (config_version))
-                    root_path = mylar.DATA_DIR
-                else:
-                    cback_path = os.path.join(location, 'config.ini-v%s.backup' % (config_version))
-                    root_path = location
-                cf_val = 'config.ini-v%s.backup.???' % config_version
+                compression = ''
+                cback_path = os.path.join(root_path, 'config.ini-v%s.backup' % (config_version))
                 source_file = mylar.CONFIG_FILE
+            tmp_path = cback_path + '.tmp'
+            db_backed = None
+            start_time = time.time()
             try:
+                #write the new backup to a temporary file first, so a failed backup never rotates out a good one.
+                if cf == 'mylar database':
+                    self.backup_db(source_file, tmp_path, compression)
+                else:
+                    shutil.copy2(source_file, tmp_path)
+
                 #start naming backup files as mylar.db.backup.xxx or config.ini-vXX.backup.xxx
+                #rotation is done by renaming, so nothing but the new backup gets written.
                 if os.path.exists(cback_path):
-                    max_value = None
-                    for f in sorted(glob.glob(os.path.join(root_path, cf_val)), reverse=True):
-                        backup_num = f[-3:]
-                        if backup_num.isdigit():
-                            if backup_retention > int(backup_num):
-                                bpath = cback_path + '.{:03d}'.format(int(backup_num)+1)
-                                #logger.fdebug('[Rolling_Versioning %s-%s] copying %s to %s' % (int(backup_num), int(backup_num)+1, f, bpath))
-                                shutil.copy2(f, bpath)
-
-                    #logger.fdebug('[Rolling_Versioning %s-%s] copying %s to %s' % (int(backup_num), '0', cback_path, cback_path + '.000'))
-                    shutil.copy2(cback_path, cback_path + '.000')
-
-                    #logger.fdebug('[Rolling_Versioning %s-%s] copying %s to %s' % ('original', '.backup', source_file, cback_path))
-                    shutil.copy2(source_file, cback_path)
-                    db_backed = cback_path
-                else:
-                    #logger.fdebug('Backing up existing %s as %s' % (cf, cback_path))
-                    shutil.copy2(source_file, cback_path)
-                    db_backed = cback_path
+                    for backup_num in range(backup_retention - 1, -1, -1):
+                        bpath = cback_path + '.{:03d}'.format(backup_num)
+                        if os.path.exists(bpath):
+                            #logger.fdebug('[Rolling_Versioning %s-%s] renaming %s' % (backup_num, backup_num+1, bpath))
+                            os.replace(bpath, cback_path + '.{:03d}'.format(backup_num+1))
+                    os.replace(cback_path, cback_path + '.000')
+
+                os.replace(tmp_path, cback_path)
+                db_backed = cback_path
+                if cf == 'mylar database':
+                    self.prune_backups(root_path, backup_retention)
             except Exception as e:
                 logger.warn('[%s] Unable to make proper backup of %s in %s' % (e, cf, source_file))
                 rtn_message.append({'status': 'failure', 'file': cf})
+                if os.path.exists(tmp_path):
+                    try:
+                        os.remove(tmp_path)
+                    except OSError:
+                        pass
             else:
+                duration = round(time.time() - start_time, 2)
                 if os.path.exists(db_backed):
-                    logger.info('Successfully backed up %s to %s.' % (cf, db_backed))
-                    rtn_message.append({'status': 'success', 'file': cf})
+                    logger.info('Successfully backed up %s to %s [%ss].' % (cf, db_backed, duration))
+                    rtn_message.append({'status': 'success', 'file': cf, 'duration': duration})
+                    mylar.BACKUP_STATS[cf] = {'last_run': helpers.now(),
+                                              'timestamp': int(time.time()),
+                                              'duration': duration,
+                                              'size': os.path.getsize(db_backed)}
                 else:
                     logger.warn('Unable to verify backup location of %s - backup of %s might not have been successful.' % (db_backed, cf))
                     rtn_message.append({'status': 'failure', 'file': cf})
 
         return rtn_message
 
+    def prune_backups(self, root_path, backup_retention):
+        #rotation only walks the chain for the current compression suffix - so retention is applied across every
+        #suffix here, otherwise the old chain is left behind forever once the compression setting changes.
+        #A single chain holds the backup itself plus .000 - .<retention>, so keep that many of the newest.
+        bk_pattern = re.compile(r'^mylar\.db\.backup(\.gz|\.zst)?(\.\d{3})?$')
+        backups = [os.path.join(root_path, f) for f in os.listdir(root_path) if bk_pattern.match(f)]
+        backups.sort(key=os.path.getmtime, reverse=True)
+        for bk in backups[backup_retention + 2:]:
+            try:
+                os.remove(bk)
+            except OSError as e:
+                logger.warn('[BACKUP] Unable to remove old backup %s: %s' % (bk, e))
+            else:
+                logger.fdebug('[BACKUP] Removed old backup %s (over the retention limit of %s)' % (bk, backup_retention))
+
+    def backup_compression(self):
+        compression = mylar.CONFIG.BACKUP_COMPRESSION
+        if compression is None or compression.lower() in ('none', ''):
+            return ''
+        compression = compression.lower()
+        if compression == 'zstd':
+            if zstandard is None:
+                logger.warn('[BACKUP] zstd compression requested but the zstandard module is not installed. Using gzip instead.')
+                return '.gz'
+            return '.zst'
+        return '.gz'
+
+    def backup_db(self, source_file, backup_path, compression=''):
+        #online backup via the sqlite backup api - consistent even with writes happening, and copied a chunk
+        #of pages at a time (with a breather in between) so that writers aren't stalled for the duration.
+        if compression == '':
+            raw_path = backup_path
+        else:
+            raw_path = backup_path + '.raw'
+
+        page_step = mylar.CONFIG.BACKUP_PAGE_STEP
+        if page_step is None or page_step <= 0:
+            page_step = -1
+
+        def progress(status, remaining, total):
+            if remaining > 0:
+                time.sleep(0.01)
+
+        src = sqlite3.connect(source_file, timeout=20)
+        dst = sqlite3.connect(raw_path)
+        try:
+            src.backup(dst, pages=page_step, progress=progress)
+        finally:
+            dst.close()
+            src.close()
+
+        if compression == '':
+            return
+
+        try:
+            with open(raw_path, 'rb') as fin, open(backup_path, 'wb') as fout:
+                if compression == '.zst':
+                    zstandard.ZstdCompressor().copy_stream(fin, fout)
+                else:
+                    with gzip.GzipFile(filename=os.path.basename(source_file), mode='wb', fileobj=fout, compresslevel=6) as gz:
+                        shutil.copyfileobj(fin, gz, 1048576)
+        finally:
+            os.remove(raw_path)
+
     def update_db(self):
 
         # mylar.MAINTENANCE_UPDATE will indicate what's being updated in the db
@@ -26,7 +26,7 @@ from xml.parsers.expat import ExpatError
 import requests
 
 import mylar
-from mylar import logger, db, cv
+from mylar import logger, db, cv, metrics
 from mylar.helpers import (
   multikeysort,
   replace_all,
@@ -69,16 +69,14 @@ def pullsearch(comicapi, comicquery, offset, search_type):
     #logger.info('MB.PULLURL:' + PULLURL)
 
     #new CV API restriction - one api request / second.
-    if mylar.CONFIG.CVAPI_RATE is None or mylar.CONFIG.CVAPI_RATE < 2:
-        time.sleep(2)
-    else:
-        time.sleep(mylar.CONFIG.CVAPI_RATE)
+    cv.CV_BUDGET.wait()
 
     #download the file:
     payload = None
 
     try:
-        r = requests.get(PULLURL, params=payload, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
+        with metrics.timed('http_request', host=metrics.host(PULLURL)):
+            r = requests.get(PULLURL, params=payload, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
     except Exception as e:
         logger.warn('Error fetching data from ComicVine: %s' % e)
         return
@@ -528,16 +526,14 @@ def storyarcinfo(xmlid):
     #logger.fdebug('arcpull_url:' + str(ARCPULL_URL))
 
     #new CV API restriction - one api request / second.
-    if mylar.CONFIG.CVAPI_RATE is None or mylar.CONFIG.CVAPI_RATE < 2:
-        time.sleep(2)
-    else:
-        time.sleep(mylar.CONFIG.CVAPI_RATE)
+    cv.CV_BUDGET.wait()
 
     #download the file:
     payload = None
 
     try:
-        r = requests.get(ARCPULL_URL, params=payload, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
+        with metrics.timed('http_request', host=metrics.host(ARCPULL_URL)):
+            r = requests.get(ARCPULL_URL, params=payload, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
     except Exception as e:
         logger.warn('While parsing data from ComicVine, got exception: %s' % e)
         return
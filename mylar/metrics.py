@@ -0,0 +1,227 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import sys
+import time
+import threading
+import contextlib
+import collections
+import urllib.parse
+
+import mylar
+
+#every timer keeps a count / total / max per label set, and a handful of buckets so latency
+#percentiles can be worked out from the prometheus side.
+BUCKETS = (0.001, 0.005, 0.025, 0.1, 0.5, 2.5, 10, 60)
+
+#cap on distinct label sets per metric (ie. db statement fingerprints) - anything past it is lumped together.
+MAX_SERIES = 500
+
+LOCK = threading.Lock()
+TIMERS = {}
+COUNTERS = {}
+STARTED = time.time()
+
+FINGERPRINTS = {}
+FP_STRINGS = re.compile(r"'(?:[^']|'')*'")
+FP_NUMBERS = re.compile(r'\b\d+\b')
+FP_INLIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+FP_SPACE = re.compile(r'\s+')
+
+def _key(name, labels, store):
+    key = tuple(sorted(labels.items()))
+    series = store.setdefault(name, {})
+    if key not in series and len(series) >= MAX_SERIES:
+        key = (('overflow', 'true'),)
+    return series, key
+
+def observe(name, seconds, **labels):
+    with LOCK:
+        series, key = _key(name, labels, TIMERS)
+        entry = series.get(key)
+        if entry is None:
+            entry = series[key] = {'count': 0, 'sum': 0.0, 'max': 0.0, 'buckets': [0] * len(BUCKETS)}
+        entry['count'] += 1
+        entry['sum'] += seconds
+        if seconds > entry['max']:
+            entry['max'] = seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                entry['buckets'][i] += 1
+                break
+
+def incr(name, value=1, **labels):
+    with LOCK:
+        series, key = _key(name, labels, COUNTERS)
+        series[key] = series.get(key, 0) + value
+
+@contextlib.contextmanager
+def timed(name, **labels):
+    # usable as a context manager or a decorator - the elapsed time is recorded even if the
+    # wrapped block raises (with error="true" added to the labels).
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        observe(name, time.perf_counter() - start, error='true', **labels)
+        raise
+    observe(name, time.perf_counter() - start, **labels)
+
+def fingerprint(query):
+    # normalises a statement down to its shape (literals / IN lists collapsed) so every execution of
+    # the same query lands in the same series regardless of its arguments.
+    fp = FINGERPRINTS.get(query)
+    if fp is None:
+        fp = FP_STRINGS.sub('?', query)
+        fp = FP_NUMBERS.sub('?', fp)
+        fp = FP_INLIST.sub('(?)', fp)
+        fp = FP_SPACE.sub(' ', fp).strip()[:160]
+        if len(FINGERPRINTS) > 4096:
+            FINGERPRINTS.clear()
+        FINGERPRINTS[query] = fp
+    return fp
+
+def host(url):
+    try:
+        return urllib.parse.urlsplit(url).hostname or 'unknown'
+    except Exception:
+        return 'unknown'
+
+def watch_scheduler(scheduler):
+    # times every scheduled job run (submission to completion) by job id.
+    from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
+    running = {}
+
+    def listener(event):
+        if event.code == EVENT_JOB_SUBMITTED:
+            running[event.job_id] = time.perf_counter()
+            return
+        start = running.pop(event.job_id, None)
+        if start is None:
+            return
+        if event.code == EVENT_JOB_ERROR:
+            observe('scheduler_job', time.perf_counter() - start, job=event.job_id, error='true')
+        else:
+            observe('scheduler_job', time.perf_counter() - start, job=event.job_id)
+
+    scheduler.add_listener(listener, EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+
+def gauges():
+    # point-in-time values, gathered when scraped rather than tracked as they change.
+    from mylar import helpers, events
+    results = {'queue_size': {}, 'queue_alive': {}, 'queue_started': {}}
+    for q in helpers.queue_info():
+        name = q.name.replace('-', '_')
+        results['queue_size'][(('queue', name),)] = q.size
+        results['queue_started'][(('queue', name),)] = 1 if q.is_alive is not None else 0
+        results['queue_alive'][(('queue', name),)] = 1 if q.is_alive else 0
+    results['event_subscribers'] = {(): len(events.BUS.subscribers)}
+    results['threads'] = {(): threading.active_count()}
+    results['uptime_seconds'] = {(): int(time.time() - STARTED)}
+    results['backup_duration_seconds'] = {}
+    results['backup_size_bytes'] = {}
+    results['backup_last_run_timestamp'] = {}
+    for name, stats in list(mylar.BACKUP_STATS.items()):
+        key = (('backup', name),)
+        results['backup_duration_seconds'][key] = stats['duration']
+        results['backup_size_bytes'][key] = stats['size']
+        results['backup_last_run_timestamp'][key] = stats['timestamp']
+    return results
+
+def _labelline(key):
+    if not key:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')) for k, v in key)
+
+def prometheus():
+    # everything in the prometheus text exposition format.
+    lines = []
+    for name, series in sorted(gauges().items()):
+        lines.append('# TYPE mylar_%s gauge' % name)
+        for key, value in series.items():
+            lines.append('mylar_%s%s %s' % (name, _labelline(key), value))
+
+    with LOCK:
+        counters = dict((name, dict(series)) for name, series in COUNTERS.items())
+        timers = dict((name, dict((k, dict(v, buckets=list(v['buckets']))) for k, v in series.items())) for name, series in TIMERS.items())
+
+    for name, series in sorted(counters.items()):
+        lines.append('# TYPE mylar_%s_total counter' % name)
+        for key, value in series.items():
+            lines.append('mylar_%s_total%s %s' % (name, _labelline(key), value))
+
+    for name, series in sorted(timers.items()):
+        metric = 'mylar_%s_seconds' % name
+        lines.append('# TYPE %s histogram' % metric)
+        for key, entry in series.items():
+            running = 0
+            for bound, hits in zip(BUCKETS, entry['buckets']):
+                running += hits
+                lines.append('%s_bucket%s %s' % (metric, _labelline(key + (('le', bound),)), running))
+            lines.append('%s_bucket%s %s' % (metric, _labelline(key + (('le', '+Inf'),)), entry['count']))
+            lines.append('%s_sum%s %.6f' % (metric, _labelline(key), entry['sum']))
+            lines.append('%s_count%s %s' % (metric, _labelline(key), entry['count']))
+        lines.append('# TYPE %s_max gauge' % metric)
+        for key, entry in series.items():
+            lines.append('%s_max%s %.6f' % (metric, _labelline(key), entry['max']))
+
+    return '\n'.join(lines) + '\n'
+
+def summary(top=10):
+    # condensed view for the web interface - the slowest label sets (by total time) per timer.
+    results = {'uptime': int(time.time() - STARTED), 'timers': {}, 'counters': {}, 'gauges': {}, 'backups': dict(mylar.BACKUP_STATS)}
+    for name, series in gauges().items():
+        results['gauges'][name] = dict((','.join(str(v) for k, v in key) or name, value) for key, value in series.items())
+    with LOCK:
+        for name, series in TIMERS.items():
+            ranked = sorted(series.items(), key=lambda x: x[1]['sum'], reverse=True)[:top]
+            results['timers'][name] = [{'labels': dict(key),
+                                        'count':  entry['count'],
+                                        'total':  round(entry['sum'], 4),
+                                        'avg':    round(entry['sum'] / entry['count'], 4),
+                                        'max':    round(entry['max'], 4)} for key, entry in ranked]
+        for name, series in COUNTERS.items():
+            results['counters'][name] = [{'labels': dict(key), 'value': value} for key, value in series.items()]
+    return results
+
+def reset():
+    with LOCK:
+        TIMERS.clear()
+        COUNTERS.clear()
+
+def profile(seconds=10, interval=0.01):
+    """
+    Opt-in (METRICS_PROFILER) sampling profiler - walks the stack of every other thread each
+    interval for the given number of seconds and returns the samples in collapsed-stack form
+    (one 'thread;frame;frame count' line per distinct stack), ready for flamegraph.pl / speedscope.
+    """
+    me = threading.get_ident()
+    stacks = collections.Counter()
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        names = dict((t.ident, t.name) for t in threading.enumerate())
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('%s (%s)' % (code.co_name, code.co_filename.replace(mylar.PROG_DIR or '', '').lstrip('/\\')))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            stacks[';'.join(reversed(stack))] += 1
+        time.sleep(interval)
+    return '\n'.join('%s %s' % (stack, count) for stack, count in stacks.most_common()) + '\n'
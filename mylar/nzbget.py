@@ -146,8 +146,6 @@ class NZBGet(object):
                 return self.historycheck(nzbinfo)
 
             stat = False
-            double_pp = False
-            double_type = None
             while stat is False:
                 time.sleep(10)
                 queueinfo = self.server.listgroups()
@@ -156,37 +154,8 @@ class NZBGet(object):
                     logger.fdebug('Item is no longer in active queue. It should be finished by my calculations')
                     stat = True
                 else:
-                    if 'comicrn' in queuedl[0]['PostInfoText'].lower():
-                        double_pp = True
-                        double_type = 'ComicRN'
-                    elif 'nzbtomylar' in queuedl[0]['PostInfoText'].lower():
-                        double_pp = True
-                        double_type = 'nzbToMylar'
-
-                    if all([len(queuedl[0]['ScriptStatuses']) > 0, double_pp is False]):
-                        for x in queuedl[0]['ScriptStatuses']:
-                            if 'comicrn' in x['Name'].lower():
-                                double_pp = True
-                                double_type = 'ComicRN'
-                                break
-                            elif 'nzbtomylar' in x['Name'].lower():
-                                double_pp = True
-                                double_type = 'nzbToMylar'
-                                break
-
-                    if all([len(queuedl[0]['Parameters']) > 0, double_pp is False]):
-                        for x in queuedl[0]['Parameters']:
-                            if all(['comicrn' in x['Name'].lower(), x['Value'] == 'yes']):
-                                double_pp = True
-                                double_type = 'ComicRN'
-                                break
-                            elif all(['nzbtomylar' in x['Name'].lower(), x['Value'] == 'yes']):
-                                double_pp = True
-                                double_type = 'nzbToMylar'
-                                break
-
-
-                    if double_pp is True:
+                    double_type = self.double_pp(queuedl[0])
+                    if double_type is not None:
                         logger.warn('%s has been detected as being active for this category & download. Completed Download Handling will NOT be performed due to this.' % double_type)
                         logger.warn('Either disable Completed Download Handling for NZBGet within Mylar, or remove %s from your category script in NZBGet.' % double_type)
                         return {'status': 'double-pp', 'failed': False}
@@ -202,9 +171,82 @@ class NZBGet(object):
             time.sleep(5)  #wait some seconds so shit can get written to history properly
             return self.historycheck(nzbinfo)
 
-    def historycheck(self, nzbinfo):
+    def double_pp(self, group):
+        # returns the name of the other post-processing script (if any) that's set to run on this download.
+        if 'comicrn' in group['PostInfoText'].lower():
+            return 'ComicRN'
+        elif 'nzbtomylar' in group['PostInfoText'].lower():
+            return 'nzbToMylar'
+
+        for x in group['ScriptStatuses']:
+            if 'comicrn' in x['Name'].lower():
+                return 'ComicRN'
+            elif 'nzbtomylar' in x['Name'].lower():
+                return 'nzbToMylar'
+
+        for x in group['Parameters']:
+            if all(['comicrn' in x['Name'].lower(), x['Value'] == 'yes']):
+                return 'ComicRN'
+            elif all(['nzbtomylar' in x['Name'].lower(), x['Value'] == 'yes']):
+                return 'nzbToMylar'
+
+        return None
+
+    def poll(self, tracked):
+        """
+        One pass over every download being monitored (tracked is keyed by NZBID): a single listgroups
+        call covers all of them, and a single history call the ones that have left the queue. Returns
+        the nzstat of each download that's finished, and whether anything moved on since the last pass.
+        """
+        done = {}
+        progress = False
+        try:
+            queueinfo = self.server.listgroups()
+        except Exception as e:
+            logger.warn('[NZBGET-MONITOR] Error attempting to retrieve active queue listing: %s' % e)
+            return done, progress
+
+        groups = dict((qu['NZBID'], qu) for qu in queueinfo)
+        finished = []
+        for nzbid, state in tracked.items():
+            group = groups.get(nzbid)
+            if group is None:
+                finished.append(nzbid)
+                continue
+            double_type = self.double_pp(group)
+            if double_type is not None:
+                logger.warn('%s has been detected as being active for this category & download. Completed Download Handling will NOT be performed due to this.' % double_type)
+                logger.warn('Either disable Completed Download Handling for NZBGet within Mylar, or remove %s from your category script in NZBGet.' % double_type)
+                done[nzbid] = {'status': 'double-pp', 'failed': False}
+                continue
+            logger.fdebug('[NZBGET-MONITOR] %s -- status: %s -- Download Left: %sMB -- health: %s' % (group['NZBName'], group['Status'], group['RemainingSizeMB'], group['Health']/10))
+            if group['RemainingSizeMB'] != state['remaining']:
+                state['remaining'] = group['RemainingSizeMB']
+                progress = True
+
+        if finished:
+            try:
+                history = self.server.history(True)
+            except Exception as e:
+                logger.warn('[NZBGET-MONITOR] Error attempting to retrieve history listing: %s' % e)
+                return done, progress
+            for nzbid in finished:
+                state = tracked[nzbid]
+                nzstat = self.historycheck(state['item'], history=history)
+                if nzstat is None:
+                    nzstat = {'status': False}
+                if all([nzstat['status'] is False, state['missing'] < 2]):
+                    #it can take nzbget a moment to write a finished item to its history.
+                    state['missing'] += 1
+                    continue
+                done[nzbid] = nzstat
+
+        return done, progress
+
+    def historycheck(self, nzbinfo, history=None):
         nzbid = nzbinfo['NZBID']
-        history = self.server.history(True)
+        if history is None:
+            history = self.server.history(True)
         found = False
         destdir = None
         double_pp = False
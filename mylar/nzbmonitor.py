@@ -0,0 +1,129 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+import queue
+
+import mylar
+from mylar import logger, helpers, sabnzbd, nzbget
+
+#seconds between polls of the download client - drops to the minimum whenever something is added or
+#moves on, and backs off towards the maximum while nothing is changing.
+MIN_INTERVAL = 5
+MAX_INTERVAL = 30
+
+
+class NZBMonitor(object):
+    """
+    Completed download handling for SABnzbd / NZBGet. Every nzb sent to the client is tracked in one
+    registry and the client is polled once per pass for all of them, so each download is handed to
+    post-processing as soon as it finishes instead of waiting behind the ones grabbed before it.
+    """
+
+    def __init__(self, nzb_queue):
+        self.queue = nzb_queue
+        self.tracked = {}
+        self.interval = MIN_INTERVAL
+        self.next_poll = time.time() + MIN_INTERVAL
+
+    def client(self):
+        if all([mylar.USE_SABNZBD is True, mylar.CONFIG.SAB_CLIENT_POST_PROCESSING is True]):
+            return sabnzbd.SABnzbd(params=None)
+        elif all([mylar.USE_NZBGET is True, mylar.CONFIG.NZBGET_CLIENT_POST_PROCESSING is True]):
+            return nzbget.NZBGet()
+        return None
+
+    def track(self, item, readd=False):
+        try:
+            tmp_apikey = item['queue'].pop('apikey')
+            logger.info('Now loading from queue: %s' % item)
+        except Exception:
+            #nzbget doesn't pass the queue field. So just let it fly.
+            logger.info('Now loading from queue: %s' % item)
+        else:
+            item['queue']['apikey'] = tmp_apikey
+
+        known_nzb_id = item['nzo_id'] if (mylar.USE_SABNZBD is True) else item['NZBID']
+        self.tracked[known_nzb_id] = {'item':          item,
+                                      'readd':         readd,
+                                      'mbleft':        None,
+                                      'remaining':     None,
+                                      'missing':       0,
+                                      'missing_since': None,
+                                      'settle':        None}
+        #give it a moment to hit the client's queue, but no longer than that.
+        self.interval = MIN_INTERVAL
+        self.next_poll = min(self.next_poll, time.time() + MIN_INTERVAL)
+
+    def resume_paused(self):
+        # anything parked while the SABnzbd queue was paused goes back to being monitored once it's resumed.
+        if any([mylar.USE_SABNZBD is not True, mylar.RETURN_THE_NZBQUEUE.qsize() == 0]):
+            return
+        sab_params = {
+            'apikey': mylar.CONFIG.SAB_APIKEY,
+            'mode': 'queue',
+            'start': 0,
+            'limit': 5,
+            'search': None,
+            'output': 'json',
+        }
+        s = sabnzbd.SABnzbd(params=sab_params)
+        sabresponse = s.sender(chkstatus=True)
+        # response will be: Paused = True, UnPaused = False
+        if sabresponse['status'] is False:
+            while mylar.RETURN_THE_NZBQUEUE.qsize() >= 1:
+                self.track(mylar.RETURN_THE_NZBQUEUE.get(True), readd=True)
+
+    def poll(self, client):
+        done, progress = client.poll(self.tracked)
+        for known_nzb_id, nzstat in done.items():
+            state = self.tracked.pop(known_nzb_id)
+            try:
+                helpers.cdh_monitor(self.queue, state['item'], nzstat, readd=state['readd'])
+            except Exception as e:
+                logger.error('Exception occured trying to hand off %s to post-processing: %s' % (known_nzb_id, e))
+        return any([progress, len(done) > 0])
+
+    def run(self):
+        while True:
+            try:
+                item = self.queue.get(True, max(0, self.next_poll - time.time()))
+            except queue.Empty:
+                item = None
+
+            if item == 'exit':
+                logger.info('Cleaning up workers for shutdown')
+                break
+
+            if item is not None:
+                if self.client() is None:
+                    logger.warn('There are no NZB Completed Download handlers enabled. Not sending item to completed download handling...')
+                    break
+                self.track(item)
+                #pick up anything else that's been grabbed before polling.
+                continue
+
+            self.resume_paused()
+
+            moved = False
+            client = self.client()
+            if all([self.tracked, client is not None]):
+                moved = self.poll(client)
+
+            if moved:
+                self.interval = MIN_INTERVAL
+            else:
+                self.interval = min(MAX_INTERVAL, self.interval * 2)
+            self.next_poll = time.time() + self.interval
@@ -0,0 +1,185 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import errno
+import shutil
+import tempfile
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import mylar
+from mylar import logger
+
+#ioctl number for FICLONE (linux/fs.h) - clones the extents of one file into another on btrfs/XFS/etc.
+FICLONE = 0x40049409
+
+#prefix used for the temporary meta-tagging folders - tidyup keys off of 'mylar_' being in the path.
+STAGING_PREFIX = 'mylar_'
+
+#hidden folder (within each destination root) that on-destination staging happens in - swept at startup.
+STAGING_DIR = '.mylar_staging'
+
+def _existing_parent(path):
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+def same_filesystem(src, dst):
+    #dst doesn't have to exist yet - the nearest existing parent directory is checked instead.
+    try:
+        return os.stat(_existing_parent(src)).st_dev == os.stat(_existing_parent(dst)).st_dev
+    except OSError:
+        return False
+
+def is_staged(path):
+    #True if the path lives within a temporary meta-tagging folder (which is thrown away afterwards).
+    return os.path.basename(os.path.dirname(os.path.abspath(path))).lstrip('.').startswith(STAGING_PREFIX)
+
+def _reflink(src, dst):
+    if fcntl is None:
+        return False
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except (IOError, OSError):
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        return False
+    return True
+
+def _copy_range(src, dst):
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        if remaining > 0:
+            raise OSError(errno.EIO, 'copy_file_range stopped short')
+    except (IOError, OSError):
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        return False
+    return True
+
+def copy(src, dst):
+    """
+    Copies src to dst (same semantics as shutil.copy), using the cheapest mechanism available:
+    a reflink clone, then an in-kernel copy_file_range, then a regular copy.
+    Returns the strategy that was used.
+    """
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+
+    if _reflink(src, dst):
+        strategy = 'reflink'
+    elif _copy_range(src, dst):
+        strategy = 'copy_file_range'
+    else:
+        shutil.copyfile(src, dst)
+        strategy = 'copy'
+    shutil.copymode(src, dst)
+    return strategy
+
+def move(src, dst):
+    """
+    Moves src to dst. Within the same filesystem this is a plain rename, otherwise the file is
+    copied across (see copy) and the original removed. Returns the strategy that was used.
+    """
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+
+    if same_filesystem(src, dst):
+        try:
+            os.rename(src, dst)
+            return 'rename'
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+
+    strategy = copy(src, dst)
+    os.remove(src)
+    return '%s+unlink' % strategy
+
+def destination_roots():
+    roots = []
+    for root in (mylar.CONFIG.DESTINATION_DIR, mylar.CONFIG.MULTIPLE_DEST_DIRS, mylar.CONFIG.STORYARC_LOCATION, mylar.CONFIG.GRABBAG_DIR):
+        if root is None or root == 'None' or root == '':
+            continue
+        root = os.path.abspath(root)
+        if root not in roots:
+            roots.append(root)
+    return roots
+
+def _staging_root(target):
+    #the (deepest) configured destination root the target lives under, or None.
+    target = os.path.abspath(target)
+    roots = [x for x in destination_roots() if target == x or target.startswith(x.rstrip(os.sep) + os.sep)]
+    if not roots:
+        return None
+    return max(roots, key=len)
+
+def staging_dir(target):
+    """
+    Returns a directory to stage meta-tagging in. The cache directory is used, unless it sits on a
+    different filesystem than the target - in which case the staging is done within the hidden
+    .mylar_staging folder of the target's destination root, so the tagged file can be renamed into
+    place instead of copied twice (and anything a crash leaves behind is swept up at startup).
+    """
+    cache_dir = mylar.CONFIG.CACHE_DIR
+    if target is None or mylar.CONFIG.STAGE_ON_DESTINATION is False:
+        return tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=cache_dir)
+
+    root = _staging_root(target)
+    if root is not None and os.path.isdir(root) and not same_filesystem(cache_dir, root) and os.access(root, os.W_OK):
+        try:
+            stage_root = os.path.join(root, STAGING_DIR)
+            os.makedirs(stage_root, exist_ok=True)
+            return tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=stage_root)
+        except OSError as e:
+            logger.fdebug('[PLACEMENT] Unable to stage within %s [%s] - using the cache directory instead.' % (root, e))
+    return tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=cache_dir)
+
+def sweep_staging():
+    #nothing is being tagged yet at startup, so anything left in a destination root's staging folder was orphaned by a crash.
+    for root in destination_roots():
+        stage_root = os.path.join(root, STAGING_DIR)
+        if not os.path.isdir(stage_root):
+            continue
+        for leftover in os.listdir(stage_root):
+            if not leftover.startswith(STAGING_PREFIX):
+                continue
+            try:
+                shutil.rmtree(os.path.join(stage_root, leftover))
+            except OSError as e:
+                logger.warn('[PLACEMENT] Unable to remove stale staging folder %s: %s' % (os.path.join(stage_root, leftover), e))
+            else:
+                logger.info('[PLACEMENT] Removed stale staging folder %s' % os.path.join(stage_root, leftover))
@@ -30,9 +30,6 @@ from packaging.version import parse as parse_version
 
 import mylar
 from mylar import db, logger, ftpsshup, helpers, auth32p, utorrent, helpers, filechecker
-from mylar.torrent.clients import transmission
-from mylar.torrent.clients import  deluge as deluge
-from mylar.torrent.clients import qbittorrent as qbittorrent
 
 REDIRECT_STATUS_CODES = (301, 302, 303, 307, 308)
 
@@ -1386,6 +1383,7 @@ def torsend2client(seriesname, issue, seriesyear, linkit, site, pubhash=None):
         else:
             return 'fail'
     elif mylar.USE_TRANSMISSION:
+        from mylar.torrent.clients import transmission
         try:
             rpc = transmission.TorrentClient()
             if not rpc.connect(mylar.CONFIG.TRANSMISSION_HOST, mylar.CONFIG.TRANSMISSION_USERNAME, mylar.CONFIG.TRANSMISSION_PASSWORD):
@@ -1402,6 +1400,7 @@ def torsend2client(seriesname, issue, seriesyear, linkit, site, pubhash=None):
             return "fail"
 
     elif mylar.USE_DELUGE:
+        from mylar.torrent.clients import deluge
         try:
             dc = deluge.TorrentClient()
             if not dc.connect(mylar.CONFIG.DELUGE_HOST, mylar.CONFIG.DELUGE_USERNAME, mylar.CONFIG.DELUGE_PASSWORD):
@@ -1423,6 +1422,7 @@ def torsend2client(seriesname, issue, seriesyear, linkit, site, pubhash=None):
             return "fail"
 
     elif mylar.USE_QBITTORRENT:
+        from mylar.torrent.clients import qbittorrent
         try:
             qc = qbittorrent.TorrentClient()
             if not qc.connect(mylar.CONFIG.QBITTORRENT_HOST, mylar.CONFIG.QBITTORRENT_USERNAME, mylar.CONFIG.QBITTORRENT_PASSWORD):
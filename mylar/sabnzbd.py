@@ -145,8 +145,100 @@ class SABnzbd(object):
             logger.info('File has now downloaded!')
             return self.historycheck(self.params)
 
-    def historycheck(self, nzbinfo, roundtwo=False, extract_counter=1):
-        sendresponse = nzbinfo['nzo_id']
+    def poll(self, tracked):
+        """
+        One pass over every download being monitored (tracked is keyed by nzo_id): a single queue call
+        covers all of them, and a single history call the ones that have left the queue. Returns the
+        nzstat of each download that's finished, and whether anything moved on since the last pass.
+        """
+        done = {}
+        progress = False
+        queue_params = {'mode':    'queue',
+                        'nzo_ids': ','.join(tracked),
+                        'output':  'json',
+                        'apikey':  mylar.CONFIG.SAB_APIKEY}
+        if mylar.CONFIG.SAB_CATEGORY is not None:
+            queue_params['category'] = mylar.CONFIG.SAB_CATEGORY
+        try:
+            h = requests.get(self.sab_url, params=queue_params, verify=False)
+            queueresponse = h.json()['queue']
+        except Exception as e:
+            logger.warn('[SAB-MONITOR] Unable to retrieve the active queue: %s' % e)
+            return done, progress
+
+        queue_paused = str(queueresponse.get('status')).lower() == 'paused'
+        slots = dict((slot['nzo_id'], slot) for slot in queueresponse.get('slots', []))
+        finished = []
+        for nzo_id, state in tracked.items():
+            slot = slots.get(nzo_id)
+            if slot is None:
+                finished.append(nzo_id)
+                continue
+            if any([str(slot['status']) == 'Paused', queue_paused]):
+                logger.warn('[WARNING] SABnzbd has the active queue Paused. CDH will not work in this state.')
+                done[nzo_id] = {'status': 'queue_paused', 'failed': False}
+            elif float(slot['mbleft']) > 0:
+                logger.fdebug('[SAB-MONITOR] %s -- status: %s -- mb_left: %s -- time_left: %s' % (slot['filename'], slot['status'], slot['mbleft'], slot['timeleft']))
+                if slot['mbleft'] != state['mbleft']:
+                    state['mbleft'] = slot['mbleft']
+                    progress = True
+            else:
+                finished.append(nzo_id)
+
+        if not finished:
+            return done, progress
+
+        try:
+            hist = requests.get(self.sab_url, params=self.history_params(finished), verify=False)
+            history = dict((hq['nzo_id'], hq) for hq in hist.json()['history']['slots'])
+        except Exception as e:
+            logger.warn('[SAB-MONITOR] Unable to retrieve the history: %s' % e)
+            return done, progress
+
+        now = time.time()
+        for nzo_id in finished:
+            state = tracked[nzo_id]
+            hq = history.get(nzo_id)
+            if hq is None:
+                #in neither the queue or the history - give it SAB_MOVING_DELAY to turn up before writing it off.
+                if state['missing_since'] is None:
+                    state['missing_since'] = now
+                elif now - state['missing_since'] >= mylar.CONFIG.SAB_MOVING_DELAY:
+                    logger.error('Cannot find nzb %s in the queue.  Was it removed?' % nzo_id)
+                    done[nzo_id] = {'status': 'nzb removed', 'failed': False}
+                continue
+
+            state['missing_since'] = None
+            try:
+                nzstat = self.evaluate(hq, state['item'])
+            except Exception as e:
+                logger.warn('error %s' % (e,))
+                self.remove_history(hq['nzo_id'], hq['status'])
+                done[nzo_id] = {'status': False, 'failed': False}
+                continue
+
+            if nzstat is not None:
+                done[nzo_id] = nzstat
+                continue
+
+            if any([hq['status'] == 'Queued', hq['status'] == 'Moving', hq['status'] == 'Extracting']):
+                #still being worked on by SABnzbd - wait SAB_MOVING_DELAY for it (longer for big extracts).
+                if state['settle'] is None:
+                    state['settle'] = now
+                rounds = 1
+                if hq['status'] == 'Extracting':
+                    rounds = self.extract_rounds(hq)
+                if now - state['settle'] <= mylar.CONFIG.SAB_MOVING_DELAY * (rounds + 1):
+                    logger.fdebug('[SAB-MONITOR] %s is %s - checking again shortly' % (nzo_id, hq['status']))
+                    continue
+
+            logger.fdebug('nzo_id: %s found while processing queue in an unhandled status: %s' % (hq['nzo_id'], hq['status']))
+            self.remove_history(hq['nzo_id'], hq['status'])
+            done[nzo_id] = {'failed': False, 'status': 'unhandled status of: %s' %( hq['status'])}
+
+        return done, progress
+
+    def history_params(self, nzo_ids):
         hist_params = {'mode':      'history',
                        'failed':    0,
                        'output':    'json',
@@ -168,7 +260,7 @@ class SABnzbd(object):
                 sab_vers = mylar.CONFIG.SAB_VERSION
                 if parse_version(sab_vers) >= parse_version(min_sab):
                     logger.fdebug('SABnzbd version is higher than 3.2.0. Querying history based on nzo_id directly.')
-                    hist_params['nzo_ids'] = sendresponse
+                    hist_params['nzo_ids'] = ','.join(nzo_ids)
                 else:
                     logger.fdebug('SABnzbd version is less than 3.2.0. Querying history based on history size of 200.')
                     hist_params['limit'] = 200
@@ -176,6 +268,12 @@ class SABnzbd(object):
                 logger.warn('[SABNZBD-VERSION-CHECK] Exception encountered trying to compare installed version [%s] to [%s]. Setting history length to last 200 items. (error: %s)' % (mylar.CONFIG.SAB_VERSION, min_sab ,e))
                 hist_params['limit'] = 200
 
+        return hist_params
+
+    def historycheck(self, nzbinfo, roundtwo=False, extract_counter=1):
+        sendresponse = nzbinfo['nzo_id']
+        hist_params = self.history_params([sendresponse])
+
         hist = requests.get(self.sab_url, params=hist_params, verify=False)
         historyresponse = hist.json()
         #logger.info(historyresponse)
@@ -186,112 +284,25 @@ class SABnzbd(object):
         try:
             for hq in histqueue['slots']:
                 logger.fdebug('nzo_id: %s --- %s [%s]' % (hq['nzo_id'], sendresponse, hq['status']))
-                if hq['nzo_id'] == sendresponse and any([hq['status'] == 'Completed', hq['status'] == 'Running', 'comicrn' in hq['script'].lower()]):
-                    nzo_exists = True
-                    logger.info('found matching completed item in history. Job has a status of %s' % hq['status'])
-                    if 'comicrn' in hq['script'].lower():
-                        logger.warn('ComicRN has been detected as being active for this category & download. Completed Download Handling will NOT be performed due to this.')
-                        logger.warn('Either disable Completed Download Handling for SABnzbd within Mylar, or remove ComicRN from your category script in SABnzbd.')
-                        self.remove_history(hq['nzo_id'], hq['status'])
-                        return {'status': 'double-pp', 'failed': False}
-
-                    if os.path.isfile(hq['storage']):
-                        logger.fdebug('location found @ %s' % hq['storage'])
-                        found = {'status':   True,
-                                 'name':     ntpath.basename(hq['storage']), #os.pathre.sub('.nzb', '', hq['nzb_name']).strip(),
-                                 'location': os.path.abspath(os.path.join(hq['storage'], os.pardir)),
-                                 'failed':   False,
-                                 'issueid':  nzbinfo['issueid'],
-                                 'comicid':  nzbinfo['comicid'],
-                                 'apicall':  True,
-                                 'ddl':      False,
-                                 'download_info': nzbinfo['download_info']}
-                        self.remove_history(hq['nzo_id'], hq['status'])
-                        break
+                if hq['nzo_id'] != sendresponse:
+                    continue
+                nzo_exists = True
+                found = self.evaluate(hq, nzbinfo)
+                if found is not None:
+                    return found
 
-                    elif all([mylar.CONFIG.SAB_TO_MYLAR, mylar.CONFIG.SAB_DIRECTORY is not None, mylar.CONFIG.SAB_DIRECTORY != 'None']):
-                        try:
-                            np = cdh_mapping.CDH_MAP(hq['storage'], sab=True)
-                            new_path = np.the_sequence()
-                        except Exception as e:
-                            logger.warn('[ERROR] error returned during attempt to map [%s] --> root dir:[%s]. Error: %s' % (hq['storage'], mylar.CONFIG.SAB_DIRECTORY, e))
-                            self.remove_history(hq['nzo_id'], hq['status'])
-                            return {'status': 'file not found', 'failed': False}
-                        else:
-                            if new_path is None:
-                                logger.warn('[ERROR] Unable to remap the directory from SAB to Mylar\'s configuration.')
-                                self.remove_history(hq['nzo_id'], hq['status'])
-                                return {'status': 'file not found', 'failed': False}
-                            elif not os.path.isfile(new_path):
-                                logger.fdebug('[ERROR] Unable to locate path (%s) on the machine that is running Mylar. If Mylar and sabnzbd are on separate machines, you need to set a directory location that is accessible to both' % (new_path))
-                                self.remove_history(hq['nzo_id'], hq['status'])
-                                return {'status': 'file not found', 'failed': False}
-
-                        logger.fdebug('location found @ %s' % new_path)
-                        found = {'status':   True,
-                                 'name':     ntpath.basename(new_path),
-                                 'location': os.path.abspath(os.path.join(new_path, os.pardir)),
-                                 'failed':   False,
-                                 'issueid':  nzbinfo['issueid'],
-                                 'comicid':  nzbinfo['comicid'],
-                                 'apicall':  True,
-                                 'ddl':      False,
-                                 'download_info': nzbinfo['download_info']}
-                        self.remove_history(hq['nzo_id'], hq['status'])
-                        break
-
-                    else:
-                        logger.error('no file found where it should be @ %s - is there another script that moves things after completion ?' % hq['storage'])
-                        self.remove_history(hq['nzo_id'], hq['status'])
-                        return {'status': 'file not found', 'failed': False}
-
-                elif hq['nzo_id'] == sendresponse and hq['status'] == 'Failed':
-                    nzo_exists = True
-                    #get the stage / error message and see what we can do
-                    stage = hq['stage_log']
-                    logger.fdebug('stage: %s' % (stage,))
-                    for x in stage:
-                        if 'Failed' in x['actions'] and any([x['name'] == 'Unpack', x['name'] == 'Repair']):
-                            if 'moving' in x['actions']:
-                                logger.warn('There was a failure in SABnzbd during the unpack/repair phase that caused a failure: %s' % x['actions'])
-                            else:
-                                logger.warn('Failure occured during the Unpack/Repair phase of SABnzbd. This is probably a bad file: %s' % x['actions'])
-                                if mylar.FAILED_DOWNLOAD_HANDLING is True:
-                                    found = {'status':   True,
-                                             'name':     re.sub('.nzb', '', hq['nzb_name']).strip(),
-                                             'location': os.path.abspath(os.path.join(hq['storage'], os.pardir)),
-                                             'failed':   True,
-                                             'issueid':  nzbinfo['issueid'],
-                                             'comicid':  nzbinfo['comicid'],
-                                             'apicall':  True,
-                                             'ddl':      False,
-                                             'download_info': nzbinfo['download_info']}
-                            self.remove_history(hq['nzo_id'], hq['status'])
-                            break
-                    if found['status'] is False:
-                        self.remove_history(hq['nzo_id'], hq['status'])
-                        return {'status': 'failed_in_sab', 'failed': False}
-                    else:
-                        break
-                elif hq['nzo_id'] == sendresponse:
-                    nzo_exists = True
-                    logger.fdebug('nzo_id: %s found while processing queue in an unhandled status: %s' % (hq['nzo_id'], hq['status']))
-                    if any([hq['status'] == 'Queued', hq['status'] == 'Moving', hq['status'] == 'Extracting']) and roundtwo is False:
-                        logger.fdebug('[%s(%s)] sleeping for %ss to allow the process to finish before trying again..' % (hq['status'], extract_counter, mylar.CONFIG.SAB_MOVING_DELAY))
-                        time.sleep(mylar.CONFIG.SAB_MOVING_DELAY)
-                        if hq['status'] == 'Extracting':
-                            try:
-                                to_delay = int(int(hq['bytes']) / 25000000) + 2  #for every 25mb add another retry pause as a precaution
-                            except Exception:
-                                to_delay = 4
-
-                            if extract_counter < to_delay:
-                                extract_counter +=1
-                                return self.historycheck(nzbinfo, roundtwo=False, extract_counter=extract_counter)
-                        return self.historycheck(nzbinfo, roundtwo=True)
-                    else:
-                        self.remove_history(hq['nzo_id'], hq['status'])
-                        return {'failed': False, 'status': 'unhandled status of: %s' %( hq['status'])}
+                logger.fdebug('nzo_id: %s found while processing queue in an unhandled status: %s' % (hq['nzo_id'], hq['status']))
+                if any([hq['status'] == 'Queued', hq['status'] == 'Moving', hq['status'] == 'Extracting']) and roundtwo is False:
+                    logger.fdebug('[%s(%s)] sleeping for %ss to allow the process to finish before trying again..' % (hq['status'], extract_counter, mylar.CONFIG.SAB_MOVING_DELAY))
+                    time.sleep(mylar.CONFIG.SAB_MOVING_DELAY)
+                    if hq['status'] == 'Extracting':
+                        if extract_counter < self.extract_rounds(hq):
+                            extract_counter +=1
+                            return self.historycheck(nzbinfo, roundtwo=False, extract_counter=extract_counter)
+                    return self.historycheck(nzbinfo, roundtwo=True)
+                else:
+                    self.remove_history(hq['nzo_id'], hq['status'])
+                    return {'failed': False, 'status': 'unhandled status of: %s' %( hq['status'])}
 
             if not nzo_exists:
                 logger.error('Cannot find nzb %s in the queue.  Was it removed?' % sendresponse)
@@ -306,7 +317,104 @@ class SABnzbd(object):
             self.remove_history(hq['nzo_id'], hq['status'])
             return {'status': False, 'failed': False}
 
-        return found
+        return {'status': False}
+
+    def extract_rounds(self, hq):
+        try:
+            return int(int(hq['bytes']) / 25000000) + 2  #for every 25mb add another retry pause as a precaution
+        except Exception:
+            return 4
+
+    def evaluate(self, hq, nzbinfo):
+        # the outcome for a history slot that SABnzbd has finished with (completed or failed) - None
+        # if it's still being worked on (queued / moving / extracting etc).
+        if any([hq['status'] == 'Completed', hq['status'] == 'Running', 'comicrn' in hq['script'].lower()]):
+            logger.info('found matching completed item in history. Job has a status of %s' % hq['status'])
+            if 'comicrn' in hq['script'].lower():
+                logger.warn('ComicRN has been detected as being active for this category & download. Completed Download Handling will NOT be performed due to this.')
+                logger.warn('Either disable Completed Download Handling for SABnzbd within Mylar, or remove ComicRN from your category script in SABnzbd.')
+                self.remove_history(hq['nzo_id'], hq['status'])
+                return {'status': 'double-pp', 'failed': False}
+
+            if os.path.isfile(hq['storage']):
+                logger.fdebug('location found @ %s' % hq['storage'])
+                found = {'status':   True,
+                         'name':     ntpath.basename(hq['storage']), #os.pathre.sub('.nzb', '', hq['nzb_name']).strip(),
+                         'location': os.path.abspath(os.path.join(hq['storage'], os.pardir)),
+                         'failed':   False,
+                         'issueid':  nzbinfo['issueid'],
+                         'comicid':  nzbinfo['comicid'],
+                         'apicall':  True,
+                         'ddl':      False,
+                         'download_info': nzbinfo['download_info']}
+                self.remove_history(hq['nzo_id'], hq['status'])
+                return found
+
+            elif all([mylar.CONFIG.SAB_TO_MYLAR, mylar.CONFIG.SAB_DIRECTORY is not None, mylar.CONFIG.SAB_DIRECTORY != 'None']):
+                try:
+                    np = cdh_mapping.CDH_MAP(hq['storage'], sab=True)
+                    new_path = np.the_sequence()
+                except Exception as e:
+                    logger.warn('[ERROR] error returned during attempt to map [%s] --> root dir:[%s]. Error: %s' % (hq['storage'], mylar.CONFIG.SAB_DIRECTORY, e))
+                    self.remove_history(hq['nzo_id'], hq['status'])
+                    return {'status': 'file not found', 'failed': False}
+                else:
+                    if new_path is None:
+                        logger.warn('[ERROR] Unable to remap the directory from SAB to Mylar\'s configuration.')
+                        self.remove_history(hq['nzo_id'], hq['status'])
+                        return {'status': 'file not found', 'failed': False}
+                    elif not os.path.isfile(new_path):
+                        logger.fdebug('[ERROR] Unable to locate path (%s) on the machine that is running Mylar. If Mylar and sabnzbd are on separate machines, you need to set a directory location that is accessible to both' % (new_path))
+                        self.remove_history(hq['nzo_id'], hq['status'])
+                        return {'status': 'file not found', 'failed': False}
+
+                logger.fdebug('location found @ %s' % new_path)
+                found = {'status':   True,
+                         'name':     ntpath.basename(new_path),
+                         'location': os.path.abspath(os.path.join(new_path, os.pardir)),
+                         'failed':   False,
+                         'issueid':  nzbinfo['issueid'],
+                         'comicid':  nzbinfo['comicid'],
+                         'apicall':  True,
+                         'ddl':      False,
+                         'download_info': nzbinfo['download_info']}
+                self.remove_history(hq['nzo_id'], hq['status'])
+                return found
+
+            else:
+                logger.error('no file found where it should be @ %s - is there another script that moves things after completion ?' % hq['storage'])
+                self.remove_history(hq['nzo_id'], hq['status'])
+                return {'status': 'file not found', 'failed': False}
+
+        elif hq['status'] == 'Failed':
+            found = {'status': False}
+            #get the stage / error message and see what we can do
+            stage = hq['stage_log']
+            logger.fdebug('stage: %s' % (stage,))
+            for x in stage:
+                if 'Failed' in x['actions'] and any([x['name'] == 'Unpack', x['name'] == 'Repair']):
+                    if 'moving' in x['actions']:
+                        logger.warn('There was a failure in SABnzbd during the unpack/repair phase that caused a failure: %s' % x['actions'])
+                    else:
+                        logger.warn('Failure occured during the Unpack/Repair phase of SABnzbd. This is probably a bad file: %s' % x['actions'])
+                        if mylar.FAILED_DOWNLOAD_HANDLING is True:
+                            found = {'status':   True,
+                                     'name':     re.sub('.nzb', '', hq['nzb_name']).strip(),
+                                     'location': os.path.abspath(os.path.join(hq['storage'], os.pardir)),
+                                     'failed':   True,
+                                     'issueid':  nzbinfo['issueid'],
+                                     'comicid':  nzbinfo['comicid'],
+                                     'apicall':  True,
+                                     'ddl':      False,
+                                     'download_info': nzbinfo['download_info']}
+                    self.remove_history(hq['nzo_id'], hq['status'])
+                    break
+            if found['status'] is False:
+                self.remove_history(hq['nzo_id'], hq['status'])
+                return {'status': 'failed_in_sab', 'failed': False}
+            return found
+
+        return None
 
     def remove_history(self, nzo_id, status):
         logger.info('[Sabnzbd Completed History Removal] Download is complete - removing item from history..')
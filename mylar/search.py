@@ -31,6 +31,7 @@ from mylar import (
     search_filer,
     getcomics,
     downloaders,
+    metrics,
 )
 from mylar.downloaders import external_server as exs
 
@@ -1134,9 +1135,10 @@ def NZB_SEARCH(
                             logger.fdebug('[PROVIDER-SEARCH-DELAY][%s] Last search took place %s seconds ago. We\'re clear...' % (nzbprov, int(diff)))
 
                     try:
-                        r = requests.get(
-                            findurl, params=payload, verify=verify, headers=headers
-                        )
+                        with metrics.timed('http_request', host=metrics.host(findurl)):
+                            r = requests.get(
+                                findurl, params=payload, verify=verify, headers=headers
+                            )
                         r.raise_for_status()
                     except requests.exceptions.Timeout as e:
                         logger.warn(
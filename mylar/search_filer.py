@@ -21,80 +21,214 @@ import time
 from wsgiref.handlers import format_date_time
 
 import mylar
-from mylar import logger, filechecker, helpers, search
+from mylar import logger, filechecker, helpers, search, verdicts
 
+#bump whenever a change to the matching below would turn a cached accept/reject the other way.
+MATCHER_VERSION = 1
 
-class search_check(object):
 
-    def __init__(self):
-        pass
 
-    def _process_entry(self, entry, is_info):
-        if is_info:
-            ComicName = is_info['ComicName']
-            nzbprov = is_info['nzbprov']
-            RSS = is_info['RSS']
-            UseFuzzy = is_info['UseFuzzy']
-            StoreDate = is_info['StoreDate']
-            IssueDate = is_info['IssueDate']
-            digitaldate = is_info['digitaldate']
-            booktype = is_info['booktype']
-            ignore_booktype = is_info['ignore_booktype']
-            SeriesYear = is_info['SeriesYear']
-            ComicVersion = is_info['ComicVersion']
-            IssDateFix = is_info['IssDateFix']
-            ComicYear = comyear = is_info['ComicYear']
-            IssueID = is_info['IssueID']
-            ComicID = is_info['ComicID']
-            IssueNumber = is_info['IssueNumber']
-            manual = is_info['manual']
-            newznab_host = is_info['newznab_host']
-            torznab_host = is_info['torznab_host']
-            oneoff = is_info['oneoff']
-            tmpprov = is_info['tmpprov']
-            SARC = is_info['SARC']
-            IssueArcID = is_info['IssueArcID']
-            cmloopit = is_info['cmloopit']
-            findcomiciss = is_info['findcomiciss']
-            intIss = is_info['intIss']
-            chktpb = is_info['chktpb']
-            provider_stat = is_info['provider_stat']
+class search_matcher(object):
+    """
+    Everything about the issue being searched for that stays the same from one search result to the
+    next - the is_info fields, size limits, ignored words, the store / digital dates to compare
+    against and the parsers for the series name. Built once per batch of results (see
+    search_check.checker) instead of being worked out again for every entry.
+    """
 
-        try:
-            pack = entry['pack']
-        except Exception:
-            pack = False
+    def __init__(self, is_info):
+        self.ComicName = is_info['ComicName']
+        self.nzbprov = is_info['nzbprov']
+        self.RSS = is_info['RSS']
+        self.UseFuzzy = is_info['UseFuzzy']
+        self.StoreDate = is_info['StoreDate']
+        self.IssueDate = is_info['IssueDate']
+        self.digitaldate = is_info['digitaldate']
+        self.booktype = is_info['booktype']
+        self.ignore_booktype = is_info['ignore_booktype']
+        self.SeriesYear = is_info['SeriesYear']
+        self.ComicVersion = is_info['ComicVersion']
+        self.IssDateFix = is_info['IssDateFix']
+        self.ComicYear = is_info['ComicYear']
+        self.IssueID = is_info['IssueID']
+        self.ComicID = is_info['ComicID']
+        self.IssueNumber = is_info['IssueNumber']
+        self.manual = is_info['manual']
+        self.newznab_host = is_info['newznab_host']
+        self.torznab_host = is_info['torznab_host']
+        self.oneoff = is_info['oneoff']
+        self.tmpprov = is_info['tmpprov']
+        self.SARC = is_info['SARC']
+        self.IssueArcID = is_info['IssueArcID']
+        self.cmloopit = is_info['cmloopit']
+        self.findcomiciss = is_info['findcomiciss']
+        self.intIss = is_info['intIss']
+        self.chktpb = is_info['chktpb']
+        self.provider_stat = is_info['provider_stat']
 
-        alt_match = False
-        #logger.fdebug('entry: %s' % (entry,))
-
-        logger.fdebug("checking search result: %s" % entry['title'])
         # some nzbsites feel that comics don't deserve a nice regex to strip
         # the crap from the header, the end result is that we're dealing with
         # the actual raw header which causes incorrect matches below. This is a
         # temporary cut from the experimental search option (findcomicfeed) as
         # it does this part well usually.
-        except_list = [
+        self.except_list = [
             'releases',
             'gold line',
             'distribution',
             '0-day',
             '0 day',
         ]
+        self.digits = re.compile(r'\d')
+        self.coverchk = re.compile(r'[\s\s+\_\.]')
+        self.ignored_words = [(x, x.lower()) for x in mylar.CONFIG.IGNORE_SEARCH_WORDS]
+
+        self.minsize = None
+        if mylar.CONFIG.USE_MINSIZE:
+            self.minsize = int(helpers.human2bytes(mylar.CONFIG.MINSIZE + "M"))
+        self.maxsize = None
+        if mylar.CONFIG.USE_MAXSIZE:
+            self.maxsize = int(helpers.human2bytes(mylar.CONFIG.MAXSIZE + "M"))
+
+        if self.ComicVersion:
+            self.ComVersChk = re.sub("[^0-9]", "", self.ComicVersion)
+            if self.ComVersChk == '' or self.ComVersChk == '1':
+                self.ComVersChk = 0
+        else:
+            self.ComVersChk = 0
+
+        self.annualize = False
+        if 'annual' in self.ComicName.lower():
+            logger.fdebug(
+                "IssueID of : %s This is an annual...let's adjust." % self.IssueID
+            )
+            self.annualize = True
+
+        #one parser for the result titles and one checker to match them against the series.
+        self.parser = filechecker.FileChecker(watchcomic=self.ComicName, justparse=True)
+        self.fcomic = filechecker.FileChecker(watchcomic=self.ComicName)
+
+        self.stdate = None
+        self.issuedate_int = None
+        self.digitaldate_int = None
+        self.issconv2 = None
+        self.digconv2 = None
+        self.dates_valid = True
+        if self.UseFuzzy != "1":
+            self.dates_valid = self.store_dates()
+
+    def store_dates(self):
+        # the store (and digital) date every result's posting date is compared against.
+        # use store date instead of publication date for comparisons since
+        # publication date is usually +2 months
+        if self.StoreDate is None or self.StoreDate == '0000-00-00':
+            if self.IssueDate is None or self.IssueDate == '0000-00-00':
+                return False
+            else:
+                self.stdate = self.IssueDate
+            logger.fdebug('issue date used is : %s' % self.stdate)
+        else:
+            self.stdate = self.StoreDate
+            logger.fdebug('store date used is : %s' % self.stdate)
+        logger.fdebug('date used is : %s' % self.stdate)
+
+        if all([self.digitaldate != '0000-00-00', self.digitaldate is not None]):
+            i = 0
+        else:
+            self.digitaldate_int = '00000000'
+            i = 1
+
+        while i <= 1:
+            if i == 0:
+                usedate = self.digitaldate
+            else:
+                usedate = self.stdate
+            logger.fdebug('usedate: %s' % usedate)
+            # convert it to a Thu, 06 Feb 2014 00:00:00 format
+            issue_converted = datetime.datetime.strptime(
+                usedate.rstrip(), '%Y-%m-%d'
+            )
+            issue_convert = issue_converted + datetime.timedelta(days=-1)
+            # to get past different locale's os-dependent dates, let's
+            # convert it to a generic datetime format
+            try:
+                stamp = time.mktime(issue_convert.timetuple())
+                issconv = format_date_time(stamp)
+            except OverflowError as e:
+                logger.fdebug(
+                    'Error converting the timestamp into a generic format:'
+                    ' %s' % e
+                )
+                issconv = issue_convert.strftime('%a, %d %b %Y %H:%M:%S')
+            # convert it to a tuple
+            econv = email.utils.parsedate_tz(issconv)
+            econv2 = datetime.datetime(*econv[:6])
+            # convert it to a numeric and drop the GMT/Timezone
+            try:
+                usedate_int = time.mktime(econv[: len(econv) - 1])
+            except OverflowError:
+                logger.fdebug(
+                    'Unable to convert timestamp to integer format.'
+                    ' Forcing things through.'
+                )
+                isyear = econv[1]
+                epochyr = '1970'
+                if int(isyear) <= int(epochyr):
+                    tm = datetime.datetime(1970, 1, 1)
+                    try:
+                        usedate_int = int(time.mktime(tm.timetuple()))
+                    except Exception as e:
+                        logger.warn(
+                            '[%s] Failed to convert tm of [%s]' % (e,tm)
+                        )
+                        logger.fdebug('issconv: %s' % issconv)
+                        diff = issue_convert - tm
+                        logger.fdebug('diff: %s' % diff)
+                        usedate_int = diff.total_seconds()
+                else:
+                    continue
+            if i == 0:
+                self.digitaldate_int = usedate_int
+                self.digconv2 = econv2
+            else:
+                self.issuedate_int = usedate_int
+                self.issconv2 = econv2
+            i += 1
+        return True
+
+
+class search_check(object):
+
+    def __init__(self):
+        self.deduped = False
+
+    def _prefilter(self, entry, m):
+        # the cheap checks (ignored words, size, covers, posting date) - anything that fails these
+        # never gets as far as having its title parsed.
+
+        nzbprov = m.nzbprov
+        RSS = m.RSS
+        digitaldate = m.digitaldate
+        stdate = m.stdate
+
+        try:
+            pack = entry['pack']
+        except Exception:
+            pack = False
+
+        logger.fdebug("checking search result: %s" % entry['title'])
         splitTitle = entry['title'].split("\"")
-        _digits = re.compile(r'\d')
 
         ComicTitle = entry['title']
         for subs in splitTitle:
             logger.fdebug('sub: %s' % subs)
             try:
                 if (
-                    len(subs) >= len(ComicName)
-                    and not any(d in subs.lower() for d in except_list)
-                    and bool(_digits.search(subs)) is True
+                    len(subs) >= len(m.ComicName)
+                    and not any(d in subs.lower() for d in m.except_list)
+                    and bool(m.digits.search(subs)) is True
                 ):
                     if subs.lower().startswith('for'):
-                        if ComicName.lower().startswith('for'):
+                        if m.ComicName.lower().startswith('for'):
                             pass
                         else:
                             # this is the crap we ignore. Continue
@@ -109,10 +243,8 @@ class search_check(object):
             except Exception:
                 break
 
-        ignored = []
-        for x in mylar.CONFIG.IGNORE_SEARCH_WORDS:
-            if x.lower() in ComicTitle.lower():
-                ignored.append(x)
+        lowertitle = ComicTitle.lower()
+        ignored = [x for x, lx in m.ignored_words if lx in lowertitle]
 
         if ignored:
             logger.fdebug('[IGNORE_SEARCH_WORDS] %s exists within the search result (%s). Ignoring this result.' % (ignored, ComicTitle))
@@ -165,29 +297,23 @@ class search_check(object):
                     logger.fdebug('size given as: %s' % comsize_m)
                     # ----size constraints.
                     # if it's not within size constaints - dump it now.
-                    if mylar.CONFIG.USE_MINSIZE:
-                        conv_minsize = helpers.human2bytes(
-                            mylar.CONFIG.MINSIZE + "M"
-                        )
+                    if m.minsize is not None:
                         logger.fdebug(
                             'comparing Min threshold %s .. to .. nzb %s'
-                            % (conv_minsize, comsize_b)
+                            % (m.minsize, comsize_b)
                         )
-                        if int(conv_minsize) > int(comsize_b):
+                        if m.minsize > int(comsize_b):
                             logger.fdebug(
                                 'Failure to meet the Minimum size threshold'
                                 ' - skipping'
                             )
                             return None
-                    if mylar.CONFIG.USE_MAXSIZE:
-                        conv_maxsize = helpers.human2bytes(
-                            mylar.CONFIG.MAXSIZE + "M"
-                        )
+                    if m.maxsize is not None:
                         logger.fdebug(
                             'comparing Max threshold %s .. to .. nzb %s'
-                            % (conv_maxsize, comsize_b)
+                            % (m.maxsize, comsize_b)
                         )
-                        if int(comsize_b) > int(conv_maxsize):
+                        if int(comsize_b) > m.maxsize:
                             logger.fdebug(
                                 'Failure to meet the Maximium size threshold'
                                 ' - skipping'
@@ -195,7 +321,7 @@ class search_check(object):
                             return None
 
         if mylar.CONFIG.IGNORE_COVERS is True:
-            cvrchk = re.sub(r'[\s\s+\_\.]', '', entry['title']).lower()
+            cvrchk = m.coverchk.sub('', entry['title']).lower()
             if any(['coversonly' in cvrchk, 'coveronly' in cvrchk]):
                 logger.fdebug('Cover(s) only detected. Ignoring result.')
                 return None
@@ -219,32 +345,21 @@ class search_check(object):
                     )
                     return None
 
-        if UseFuzzy == "1":
+        if m.UseFuzzy == "1":
             logger.fdebug(
                 'Year has been fuzzied for this series,'
                 ' ignoring store date comparison entirely.'
             )
-            postdate_int = None
-            issuedate_int = None
         else:
-            # use store date instead of publication date for comparisons since
-            # publication date is usually +2 months
-            if StoreDate is None or StoreDate == '0000-00-00':
-                if IssueDate is None or IssueDate == '0000-00-00':
-                    logger.fdebug(
-                        'Invalid store date & issue date detected - you'
-                        ' probably should refresh the series or wait for CV'
-                        ' to correct the data'
-                    )
-                    return None
-                else:
-                    stdate = IssueDate
-                logger.fdebug('issue date used is : %s' % stdate)
-            else:
-                stdate = StoreDate
-                logger.fdebug('store date used is : %s' % stdate)
-            logger.fdebug('date used is : %s' % stdate)
+            if m.dates_valid is False:
+                logger.fdebug(
+                    'Invalid store date & issue date detected - you'
+                    ' probably should refresh the series or wait for CV'
+                    ' to correct the data'
+                )
+                return None
 
+            dateconv2 = None
             postdate_int = None
             if all(['DDL' in nzbprov, len(pubdate) == 10]):
                 postdate_int = pubdate
@@ -284,69 +399,6 @@ class search_check(object):
                     )
                     return None
 
-            if all([digitaldate != '0000-00-00', digitaldate is not None]):
-                i = 0
-            else:
-                digitaldate_int = '00000000'
-                i = 1
-
-            while i <= 1:
-                if i == 0:
-                    usedate = digitaldate
-                else:
-                    usedate = stdate
-                logger.fdebug('usedate: %s' % usedate)
-                # convert it to a Thu, 06 Feb 2014 00:00:00 format
-                issue_converted = datetime.datetime.strptime(
-                    usedate.rstrip(), '%Y-%m-%d'
-                )
-                issue_convert = issue_converted + datetime.timedelta(days=-1)
-                # to get past different locale's os-dependent dates, let's
-                # convert it to a generic datetime format
-                try:
-                    stamp = time.mktime(issue_convert.timetuple())
-                    issconv = format_date_time(stamp)
-                except OverflowError as e:
-                    logger.fdebug(
-                        'Error converting the timestamp into a generic format:'
-                        ' %s' % e
-                    )
-                    issconv = issue_convert.strftime('%a, %d %b %Y %H:%M:%S')
-                # convert it to a tuple
-                econv = email.utils.parsedate_tz(issconv)
-                econv2 = datetime.datetime(*econv[:6])
-                # convert it to a numeric and drop the GMT/Timezone
-                try:
-                    usedate_int = time.mktime(econv[: len(econv) - 1])
-                except OverflowError:
-                    logger.fdebug(
-                        'Unable to convert timestamp to integer format.'
-                        ' Forcing things through.'
-                    )
-                    isyear = econv[1]
-                    epochyr = '1970'
-                    if int(isyear) <= int(epochyr):
-                        tm = datetime.datetime(1970, 1, 1)
-                        try:
-                            usedate_int = int(time.mktime(tm.timetuple()))
-                        except Exception as e:
-                            logger.warn(
-                                '[%s] Failed to convert tm of [%s]' % (e,tm)
-                            )
-                            logger.fdebug('issconv: %s' % issconv)
-                            diff = issue_convert - tm
-                            logger.fdebug('diff: %s' % diff)
-                            usedate_int = diff.total_seconds()
-                    else:
-                        continue
-                if i == 0:
-                    digitaldate_int = usedate_int
-                    digconv2 = econv2
-                else:
-                    issuedate_int = usedate_int
-                    issconv2 = econv2
-                i += 1
-
             try:
                 # try new method to get around issues populating in a diff
                 # timezone thereby putting them in a different day.
@@ -355,16 +407,16 @@ class search_check(object):
                 # logger.info('digconv2: %s' % digconv2.date())
                 if (
                     digitaldate != '0000-00-00'
-                    and dateconv2.date() >= digconv2.date()
+                    and dateconv2.date() >= m.digconv2.date()
                 ):
                     logger.fdebug(
                         '%s is after DIGITAL store date of %s'
                         % (pubdate, digitaldate)
                     )
-                elif dateconv2.date() < issconv2.date():
+                elif dateconv2.date() < m.issconv2.date():
                     logger.fdebug(
                         '[CONV] pubdate: %s  < storedate: %s'
-                        % (dateconv2.date(), issconv2.date())
+                        % (dateconv2.date(), m.issconv2.date())
                     )
                     logger.fdebug(
                         '%s is before store date of %s. Ignoring search result'
@@ -383,17 +435,17 @@ class search_check(object):
                 if digitaldate is not None and all(
                     [
                         digitaldate != '0000-00-00',
-                        postdate_int >= digitaldate_int
+                        postdate_int >= m.digitaldate_int
                     ]
                 ):
                     logger.fdebug(
                         '%s is after DIGITAL store date of %s'
                         % (pubdate, digitaldate)
                     )
-                elif postdate_int < issuedate_int:
+                elif postdate_int < m.issuedate_int:
                     logger.fdebug(
                         '[INT]pubdate: %s  < storedate: %s'
-                        % (postdate_int, issuedate_int)
+                        % (postdate_int, m.issuedate_int)
                     )
                     logger.fdebug(
                         '%s is before store date of %s. Ignoring search result'
@@ -405,6 +457,62 @@ class search_check(object):
                     logger.fdebug(
                         '[INT] %s is after store date of %s' % (pubdate, stdate)
                     )
+
+        return {'pack':       pack,
+                'ComicTitle': ComicTitle,
+                'comsize_m':  comsize_m,
+                'pubdate':    pubdate}
+
+    def _process_entry(self, entry, is_info, pre=None):
+        #set when the entry matched but was dropped as a duplicate of one already taken this search.
+        self.deduped = False
+        if is_info:
+            if isinstance(is_info, search_matcher):
+                m = is_info
+            else:
+                m = search_matcher(is_info)
+            ComicName = m.ComicName
+            nzbprov = m.nzbprov
+            RSS = m.RSS
+            UseFuzzy = m.UseFuzzy
+            StoreDate = m.StoreDate
+            IssueDate = m.IssueDate
+            digitaldate = m.digitaldate
+            booktype = m.booktype
+            ignore_booktype = m.ignore_booktype
+            SeriesYear = m.SeriesYear
+            ComicVersion = m.ComicVersion
+            IssDateFix = m.IssDateFix
+            ComicYear = comyear = m.ComicYear
+            IssueID = m.IssueID
+            ComicID = m.ComicID
+            IssueNumber = m.IssueNumber
+            manual = m.manual
+            newznab_host = m.newznab_host
+            torznab_host = m.torznab_host
+            oneoff = m.oneoff
+            tmpprov = m.tmpprov
+            SARC = m.SARC
+            IssueArcID = m.IssueArcID
+            cmloopit = m.cmloopit
+            findcomiciss = m.findcomiciss
+            intIss = m.intIss
+            chktpb = m.chktpb
+            provider_stat = m.provider_stat
+            ComVersChk = m.ComVersChk
+            annualize = m.annualize
+
+        alt_match = False
+
+        if pre is None:
+            pre = self._prefilter(entry, m)
+            if pre is None:
+                return None
+        pack = pre['pack']
+        ComicTitle = pre['ComicTitle']
+        comsize_m = pre['comsize_m']
+        pubdate = pre['pubdate']
+
         # -- end size constaints.
         if '(digital first)' in ComicTitle.lower():
             dig_moving = re.sub(
@@ -451,8 +559,7 @@ class search_check(object):
 
         # send it to the parser here.
         else:
-            p_comic = filechecker.FileChecker(file=ComicTitle, watchcomic=ComicName)
-            parsed_comic = p_comic.listFiles()
+            parsed_comic = m.parser.parse(ComicTitle)
 
         logger.fdebug('parsed_info: %s' % parsed_comic)
         logger.fdebug(
@@ -476,8 +583,7 @@ class search_check(object):
             or re.sub('None', 'issue', str(booktype)) in parsed_comic['booktype']
         ):
             try:
-                fcomic = filechecker.FileChecker(watchcomic=ComicName)
-                filecomic = fcomic.matchIT(parsed_comic)
+                filecomic = m.fcomic.matchIT(parsed_comic)
             except Exception as e:
                 logger.error('[PARSE-ERROR]: %s' % e)
                 return None
@@ -521,13 +627,6 @@ class search_check(object):
         vers4vol = "no"
         versionfound = "no"
 
-        if ComicVersion:
-            ComVersChk = re.sub("[^0-9]", "", ComicVersion)
-            if ComVersChk == '' or ComVersChk == '1':
-                ComVersChk = 0
-        else:
-            ComVersChk = 0
-
         fndcomicversion = None
 
         if parsed_comic['series_volume'] is not None:
@@ -679,13 +778,6 @@ class search_check(object):
         if yearmatch is False and pack is False:
             return None
 
-        annualize = False
-        if 'annual' in ComicName.lower():
-            logger.fdebug(
-                "IssueID of : %s This is an annual...let's adjust." % IssueID
-            )
-            annualize = True
-
         D_ComicVersion = 1
         F_ComicVersion = None
 
@@ -864,6 +956,7 @@ class search_check(object):
                         )
                     ):
                         nowrite = True
+                        self.deduped = True
                         break
 
             if nowrite is False:
@@ -1054,6 +1147,7 @@ class search_check(object):
                                 )
                             ):
                                 nowrite = True
+                                self.deduped = True
                                 break
 
                     # modify the name for annualization to be displayed properly
@@ -1127,29 +1221,57 @@ class search_check(object):
         mylar.COMICINFO = []
         hold_the_matches = []
 
-        #logger.fdebug('entries: %s' % (entries,))
+        m = search_matcher(is_info)
+        cache = verdicts.VerdictCache(m, MATCHER_VERSION)
+        #the cheap checks go over the whole batch first, so only what's left gets parsed & matched.
+        survivors = []
+        checked = 0
         for entry in entries:
-            maybe_value = self._process_entry(entry, is_info)
+            checked += 1
+            if cache.rejected(entry):
+                continue
+            pre = self._prefilter(entry, m)
+            if pre is not None:
+                survivors.append((entry, pre))
+            else:
+                cache.record(entry, False)
+        logger.fdebug('%s of %s results passed the size/date/ignore checks.' % (len(survivors), checked))
+
+        #logger.fdebug('entries: %s' % (entries,))
+        for entry, pre in survivors:
+            maybe_value = self._process_entry(entry, m, pre)
+            if self.deduped is False:
+                cache.record(entry, maybe_value is not None)
             if maybe_value is not None:
                 mylar.COMICINFO.append(maybe_value)
                 hold_the_matches.append(maybe_value)
+        cache.flush()
 
         #logger.fdebug('returning hold_the_matches: %s' % (hold_the_matches,))
         return hold_the_matches
 
     def check_for_first_result(self, entries, is_info, prefer_pack=False):
         candidate = None
-        for entry in entries:
-            maybe_value = self._process_entry(entry, is_info)
-            #logger.fdebug('maybe_value: %s' % maybe_value)
-            if maybe_value is not None:
-                # If we have a value which matches our pack/not-pack
-                # preference, return it: otherwise, store it for return if we
-                # don't find a better candidate
-                is_pack = maybe_value["pack"]
-                if (prefer_pack and is_pack) or (not prefer_pack and not is_pack):
-                    # (This reduces to prefer_pack == is_pack, but that's harder to grok)
-                    return maybe_value
-                candidate = maybe_value
+        m = search_matcher(is_info)
+        cache = verdicts.VerdictCache(m, MATCHER_VERSION)
+        try:
+            for entry in entries:
+                if cache.rejected(entry):
+                    continue
+                maybe_value = self._process_entry(entry, m)
+                if self.deduped is False:
+                    cache.record(entry, maybe_value is not None)
+                #logger.fdebug('maybe_value: %s' % maybe_value)
+                if maybe_value is not None:
+                    # If we have a value which matches our pack/not-pack
+                    # preference, return it: otherwise, store it for return if we
+                    # don't find a better candidate
+                    is_pack = maybe_value["pack"]
+                    if (prefer_pack and is_pack) or (not prefer_pack and not is_pack):
+                        # (This reduces to prefer_pack == is_pack, but that's harder to grok)
+                        return maybe_value
+                    candidate = maybe_value
+        finally:
+            cache.flush()
         #logger.fdebug('candidate: %s' % candidate)
         return candidate
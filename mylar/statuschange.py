@@ -0,0 +1,134 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import mylar
+from mylar import db, logger, helpers
+
+#ids per IN (...) list - keeps every statement well under sqlite's bound-variable limit.
+CHUNK_SIZE = 500
+
+def _filters(table, comicids=None, issueids=None, status_from=None, date_from=None, date_to=None, publisher=None):
+    # the WHERE clauses (and their args) for one chunk of the selection, minus the status_to check.
+    clauses = []
+    args = []
+    if table == 'annuals':
+        clauses.append('NOT Deleted')
+    if comicids is not None:
+        clauses.append('ComicID IN (%s)' % ','.join(['?'] * len(comicids)))
+        args.extend(comicids)
+    if issueids is not None:
+        clauses.append('IssueID IN (%s)' % ','.join(['?'] * len(issueids)))
+        args.extend(issueids)
+    if status_from is not None:
+        clauses.append('Status IN (%s)' % ','.join(['?'] * len(status_from)))
+        args.extend(status_from)
+    if date_from is not None:
+        clauses.append('IssueDate >= ?')
+        args.append(date_from)
+    if date_to is not None:
+        clauses.append('IssueDate <= ?')
+        args.append(date_to)
+    if publisher is not None:
+        clauses.append('ComicID IN (SELECT ComicID FROM comics WHERE ComicPublisher=? COLLATE NOCASE)')
+        args.append(publisher)
+    return clauses, args
+
+def _chunks(values):
+    if values is None:
+        return [None]
+    return helpers.chunker(list(values), CHUNK_SIZE) or [[]]
+
+def totals_queries(comicids):
+    # Have / Total for each series worked out from the issue statuses in the db (the same tallies
+    # forceRescan ends up with, without walking the series folder), as one UPDATE per chunk.
+    have = ['Downloaded', 'Archived']
+    if mylar.CONFIG.IGNORE_HAVETOTAL:
+        have.append('Ignored')
+    have_sql = "(SELECT COUNT(*) FROM issues i WHERE i.ComicID=comics.ComicID AND i.Status IN (%s))" % ','.join(["'%s'" % x for x in have])
+    total_sql = "(SELECT COUNT(*) FROM issues i WHERE i.ComicID=comics.ComicID)"
+    if mylar.CONFIG.SNATCHED_HAVETOTAL:
+        have_sql += " + (SELECT COUNT(*) FROM issues i WHERE i.ComicID=comics.ComicID AND i.Status='Snatched')"
+    if mylar.CONFIG.ANNUALS_ON:
+        have_sql += " + (SELECT COUNT(*) FROM annuals a WHERE a.ComicID=comics.ComicID AND NOT a.Deleted AND a.Status IN (%s))" % ','.join(["'%s'" % x for x in have])
+        total_sql += " + (SELECT COUNT(*) FROM annuals a WHERE a.ComicID=comics.ComicID AND NOT a.Deleted)"
+    if mylar.CONFIG.IGNORE_TOTAL:
+        total_sql += " - (SELECT COUNT(*) FROM issues i WHERE i.ComicID=comics.ComicID AND i.Status='Ignored')"
+        total_sql += " - (SELECT COUNT(*) FROM annuals a WHERE a.ComicID=comics.ComicID AND NOT a.Deleted AND a.Status='Ignored')"
+
+    queries = []
+    for chunk in helpers.chunker(list(comicids), CHUNK_SIZE):
+        queries.append(('UPDATE comics SET Have=%s, Total=%s, FilesUpdated=? WHERE ComicID IN (%s)' % (have_sql, total_sql, ','.join(['?'] * len(chunk))), [helpers.now()] + chunk))
+    return queries
+
+def change_status(status_to, status_from=None, comicids=None, issueids=None, date_from=None, date_to=None, publisher=None, notify=True):
+    """
+    Moves every issue (and annual, if enabled) matching the selection to status_to in a single
+    transaction, then recalculates Have / Total once for each series that was touched.
+
+    comicids / issueids narrow it to those series / issues ('All' or None for everything), status_from
+    to issues currently in that status (or list of statuses), date_from / date_to to an IssueDate range
+    (YYYY-MM-DD) and publisher to series from that publisher. Returns the matched & changed IssueIDs,
+    the affected ComicIDs and a summary line.
+    """
+    if comicids == 'All':
+        comicids = None
+    elif comicids is not None and type(comicids) != list:
+        comicids = [comicids]
+    if issueids is not None and type(issueids) != list:
+        issueids = [issueids]
+    if status_from is not None and type(status_from) != list:
+        status_from = [status_from]
+
+    tables = ['issues']
+    if mylar.CONFIG.ANNUALS_ON:
+        tables.append('annuals')
+
+    myDB = db.DBConnection()
+    matched = []
+    changed = []
+    series = {}
+    queries = []
+    for table in tables:
+        for cchunk in _chunks(comicids):
+            for ichunk in _chunks(issueids):
+                clauses, args = _filters(table, cchunk, ichunk, status_from, date_from, date_to, publisher)
+                where = ' AND '.join(clauses) or '1'
+                for row in myDB.select('SELECT IssueID, ComicID, Status FROM %s WHERE %s' % (table, where), args):
+                    matched.append(row['IssueID'])
+                    if row['Status'] != status_to:
+                        changed.append(row['IssueID'])
+                        series[row['ComicID']] = series.get(row['ComicID'], 0) + 1
+                queries.append(('UPDATE %s SET Status=? WHERE %s AND Status IS NOT ?' % (table, where), [status_to] + args + [status_to]))
+
+    if changed:
+        queries.extend(totals_queries(series))
+        myDB.mass_action(queries)
+
+    rtnline = 'Updated %s Issues from a status of %s to %s' % (len(changed), '/'.join(status_from) if status_from else 'Any', status_to)
+    if len(series) > 1:
+        rtnline += ' across %s series' % len(series)
+    logger.info(rtnline)
+
+    if all([notify is True, len(changed) > 0]):
+        if len(series) == 1:
+            comicid = list(series)[0]
+        else:
+            comicid = None
+        mylar.events.publish({'status': 'success', 'comicid': comicid, 'tables': 'both', 'message': rtnline})
+
+    return {'matched':  matched,
+            'changed':  changed,
+            'series':   list(series),
+            'message':  rtnline}
@@ -66,6 +66,32 @@ class TorrentClient(object):
             return torrent_info
 
 
+    def get_torrents_status(self, hashes):
+        # the status of every given hash in a single call - keyed on the upper-cased hash, and anything
+        # the client doesn't know about is simply left out.
+        keys = ['hash', 'name', 'is_finished', 'num_files', 'save_path', 'files', 'total_size', 'total_uploaded',
+                'total_payload_download', 'time_added', 'label', 'ratio', 'progress']
+        try:
+            torrents = self.client.call('core.get_torrents_status', {'id': [h.lower() for h in hashes]}, keys)
+        except Exception as e:
+            logger.error('Could not get torrent status for %s torrents: %s' % (len(hashes), e))
+            return False
+
+        results = {}
+        for t_hash, info in torrents.items():
+            results[self._decode(t_hash).upper()] = self._decode(info)
+        return results
+
+    def _decode(self, value):
+        # without decode_utf8 the rpc client hands back bytes for every key / string value.
+        if isinstance(value, bytes):
+            return value.decode('utf-8')
+        elif isinstance(value, dict):
+            return dict((self._decode(k), self._decode(v)) for k, v in value.items())
+        elif isinstance(value, (list, tuple)):
+            return [self._decode(v) for v in value]
+        return value
+
     def start_torrent(self, hash):
         try:
             self.find_torrent(hash)
@@ -129,6 +129,30 @@ class TorrentClient(object):
 
         return torrent_info if torrent_info else False
 
+    def get_torrents_status(self, hashes):
+        # every torrent in the client comes back from the one multicall (which is all find_torrent does
+        # anyway), so look up all of the given hashes against it - the file listing is only pulled for
+        # the ones that have completed.
+        wanted = set(h.upper() for h in hashes)
+        results = {}
+        try:
+            torrents = self.conn.get_torrents()
+        except Exception as e:
+            logger.error('Could not get torrent status for %s torrents: %s' % (len(hashes), e))
+            return False
+
+        for torrent in torrents:
+            t_hash = torrent.info_hash.upper()
+            if t_hash not in wanted:
+                continue
+            if torrent.complete:
+                results[t_hash] = self.get_torrent(torrent)
+            else:
+                results[t_hash] = {'hash':      torrent.info_hash,
+                                   'name':      torrent.name,
+                                   'completed': False}
+        return results
+
     def load_torrent(self, filepath):
         start = bool(mylar.CONFIG.RTORRENT_STARTONLOAD)
 
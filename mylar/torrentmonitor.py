@@ -0,0 +1,152 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+import queue
+from base64 import b16encode, b32decode
+
+import mylar
+from mylar import logger, helpers
+
+#seconds between status checks of the torrent client, and how soon after being added a torrent is
+#first looked at.
+POLL_INTERVAL = 30
+FIRST_CHECK = 5
+
+
+class TorrentMonitor(object):
+    """
+    Auto-snatch for rTorrent / Deluge. One connection to the client is kept open for as long as the
+    monitor runs, and every torrent being waited on is checked with a single status call per pass -
+    the seedbox retrieval / post-processing only fires for the ones that have completed.
+    """
+
+    def __init__(self, snatched_queue):
+        self.queue = snatched_queue
+        self.tracked = {}
+        self.client = None
+        self.next_poll = time.time() + POLL_INTERVAL
+
+    def connect(self):
+        if self.client is not None:
+            return self.client
+
+        if mylar.USE_RTORRENT:
+            from mylar.torrent.clients import rtorrent as TorClient
+            client = TorClient.TorrentClient()
+            conn = client.connect(mylar.CONFIG.RTORRENT_HOST,
+                                  mylar.CONFIG.RTORRENT_USERNAME,
+                                  mylar.CONFIG.RTORRENT_PASSWORD,
+                                  mylar.CONFIG.RTORRENT_AUTHENTICATION,
+                                  mylar.CONFIG.RTORRENT_VERIFY,
+                                  mylar.CONFIG.RTORRENT_RPC_URL,
+                                  mylar.CONFIG.RTORRENT_CA_BUNDLE)
+        elif mylar.USE_DELUGE:
+            from mylar.torrent.clients import deluge as TorClient
+            client = TorClient.TorrentClient()
+            conn = client.connect(mylar.CONFIG.DELUGE_HOST, mylar.CONFIG.DELUGE_USERNAME, mylar.CONFIG.DELUGE_PASSWORD)
+        else:
+            return None
+
+        if any([not conn, isinstance(conn, dict)]):
+            logger.warn('[AUTO-SNATCHER] Unable to connect to the torrent client - will try again in %ss' % POLL_INTERVAL)
+            return None
+
+        self.client = client
+        return self.client
+
+    def track(self, item):
+        logger.info('Now loading from queue: %s' % item)
+        if not isinstance(item, dict):
+            #retries from the web interface only pass along the hash.
+            item = {'hash': item, 'issueid': None, 'comicid': None}
+
+        torrent_hash = item['hash']
+        if len(torrent_hash) == 32:
+            torrent_hash = b16encode(b32decode(torrent_hash)).decode('utf-8')
+        if not len(torrent_hash) == 40:
+            logger.error('Torrent hash is missing, or an invalid hash value has been passed: %s' % item)
+            return
+
+        self.tracked[torrent_hash.upper()] = item
+        self.next_poll = min(self.next_poll, time.time() + FIRST_CHECK)
+
+    def poll(self):
+        client = self.connect()
+        if client is None:
+            return
+
+        statuses = client.get_torrents_status(list(self.tracked))
+        if statuses is False:
+            #drop the connection so it's re-established on the next pass.
+            self.client = None
+            return
+
+        for torrent_hash, item in list(self.tracked.items()):
+            torrent_info = statuses.get(torrent_hash)
+            if not torrent_info:
+                logger.warn('[AUTO-SNATCHER] %s is no longer in the torrent client - no longer monitoring it.' % torrent_hash)
+                self.tracked.pop(torrent_hash)
+                continue
+
+            if mylar.USE_DELUGE:
+                completed = torrent_info['is_finished']
+            else:
+                completed = torrent_info['completed']
+            if completed is not True:
+                continue
+
+            snstat = helpers.torrentinfo(torrent_hash=torrent_hash, download=True, torrent_info=torrent_info)
+            status = snstat.get('snatch_status')
+            if status == 'IN PROGRESS':
+                logger.info('Still downloading in client....let us try again momentarily.')
+            elif any([status == 'MONITOR FAIL', status == 'MONITOR COMPLETE']):
+                logger.info('File copied for post-processing - submitting as a direct pp.')
+                mylar.PP_QUEUE.put({'nzb_name':     os.path.basename(snstat['copied_filepath']),
+                                    'nzb_folder':   snstat['copied_filepath'],
+                                    'failed':       False,
+                                    'issueid':      item['issueid'],
+                                    'comicid':      item['comicid'],
+                                    'apicall':      True,
+                                    'ddl':          False,
+                                    'download_info': None})
+                self.tracked.pop(torrent_hash)
+            else:
+                logger.warn('[AUTO-SNATCHER] Unable to retrieve %s [%s] - no longer monitoring it.' % (torrent_hash, status))
+                self.tracked.pop(torrent_hash)
+
+    def run(self):
+        while True:
+            try:
+                item = self.queue.get(True, max(0, self.next_poll - time.time()))
+            except queue.Empty:
+                item = None
+
+            if item == 'exit':
+                logger.info('Cleaning up workers for shutdown')
+                break
+
+            if item is not None:
+                self.track(item)
+                continue
+
+            if self.tracked:
+                try:
+                    self.poll()
+                except Exception as e:
+                    logger.error('[AUTO-SNATCHER] Error encountered checking torrent status: %s' % e)
+                    self.client = None
+            self.next_poll = time.time() + POLL_INTERVAL
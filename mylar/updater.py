@@ -24,35 +24,39 @@ import sys
 import calendar
 
 import mylar
-from mylar import db, logger, helpers, filechecker
+from mylar import db, logger, helpers, filechecker, changelog
 
 def addvialist(queue):
+    # one of MASS_WORKERS threads working through the mass-refresh queue (see importer.mass_workers).
     while True:
-        if queue.qsize() >= 1:
-            time.sleep(3)
-            item = queue.get(True)
-            #logger.fdebug('addvialist - item: %s' % (item,))
-            if item == 'exit':
-                break
-            try:
-                r_mode = item['r_mode']
-            except Exception:
-                r_mode = None
+        item = mylar.importer.mass_next(queue, 'mass-refresh')
+        if item is None:
+            break
+        #logger.fdebug('addvialist - item: %s' % (item,))
+        try:
+            r_mode = item['r_mode']
+        except Exception:
+            r_mode = None
 
+        progress = mylar.importer.mass_progress('mass-refresh')
+        try:
             if r_mode == 'updateissuedata':
                 logger.info('[MASS-REFRESH][WEEKLY-UPDATER] Now updating series data for %s (%s) [%s] ' % (item['comicname'], item['seriesyear'], item['comicid']))
-                mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': item['comicname'], 'seriesyear': item['seriesyear'], 'comicid': item['comicid'], 'tables': 'both', 'message': 'Now refreshing %s (%s)' % (item['comicname'], item['seriesyear'])}
+                mylar.events.publish({'status': 'success', 'comicname': item['comicname'], 'seriesyear': item['seriesyear'], 'comicid': item['comicid'], 'tables': 'both', 'message': '[%s] Now refreshing %s (%s)' % (progress, item['comicname'], item['seriesyear'])})
                 mylar.importer.updateissuedata(item['comicid'], item['comicname'], calledfrom=item['calledfrom'], serieslast_updated=item['serieslast_updated'])
             elif r_mode == 'manualannual':
                 logger.info('[MASS-REFRESH][WEEKLY-UPDATER][AnnualID:%s] Now updating series data for %s (%s) [%s] ' % (item['manual_comicid'], item['comicname'], item['seriesyear'], item['comicid']))
-                mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': item['comicname'], 'seriesyear': item['seriesyear'], 'comicid': item['comicid'], 'tables': 'both', 'message': 'Now refreshing %s (%s)' % (item['comicname'], item['seriesyear'])}
+                mylar.events.publish({'status': 'success', 'comicname': item['comicname'], 'seriesyear': item['seriesyear'], 'comicid': item['comicid'], 'tables': 'both', 'message': '[%s] Now refreshing %s (%s)' % (progress, item['comicname'], item['seriesyear'])})
                 mylar.importer.manualAnnual(item['manual_comicid'], item['comicname'], comicyear=item['seriesyear'], comicid=item['comicid'], forceadd=True, serieslast_updated=item['serieslast_updated'])
             else:
-                logger.info('[MASS-REFRESH][1/%s] Now refreshing %s (%s) [%s] ' % (queue.qsize()+1, item['comicname'], item['seriesyear'], item['comicid']))
-                mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': item['comicname'], 'seriesyear': item['seriesyear'], 'comicid': item['comicid'], 'tables': 'both', 'message': 'Now refreshing %s (%s)' % (item['comicname'], item['seriesyear'])}
+                logger.info('[MASS-REFRESH][%s] Now refreshing %s (%s) [%s] ' % (progress, item['comicname'], item['seriesyear'], item['comicid']))
+                mylar.events.publish({'status': 'success', 'comicname': item['comicname'], 'seriesyear': item['seriesyear'], 'comicid': item['comicid'], 'tables': 'both', 'message': '[%s] Now refreshing %s (%s)' % (progress, item['comicname'], item['seriesyear'])})
                 dbUpdate([item['comicid']], calledfrom='refresh')
-        else:
-            mylar.REFRESH_QUEUE.put('exit')
+        except Exception as e:
+            logger.error('[MASS-REFRESH] Unable to refresh ComicID %s: %s' % (item['comicid'], e))
+        finally:
+            mylar.importer.mass_done(item, 'mass-refresh')
+            mylar.importer.mass_progress('mass-refresh', done=1)
     return False
 
 def dbUpdate(ComicIDList=None, calledfrom=None, sched=False):
@@ -242,7 +246,7 @@ def dbUpdate(ComicIDList=None, calledfrom=None, sched=False):
                             mylar.importer.manualAnnual(annchk=chkstatus['anndata'])
                     else:
                         logger.warn('There was an error when refreshing this series - Make sure directories are writable/exist, and check the logs for any errors/problems.')
-                        mylar.GLOBAL_MESSAGES = {'status': 'failure', 'comicname': ComicName, 'seriesyear': dspyear , 'comicid': ComicID, 'tables': 'both', 'message': 'Failure refreshing %s (%s)' % (ComicName, dspyear)}
+                        mylar.events.publish({'status': 'failure', 'comicname': ComicName, 'seriesyear': dspyear , 'comicid': ComicID, 'tables': 'both', 'message': 'Failure refreshing %s (%s)' % (ComicName, dspyear)})
                         return
 
                     issues_new = myDB.select('SELECT * FROM issues WHERE ComicID=?', [ComicID])
@@ -479,7 +483,7 @@ def dbUpdate(ComicIDList=None, calledfrom=None, sched=False):
             time.sleep(15) #pause for 15 secs so dont hammer CV and get 500 error
         else:
             if calledfrom == 'refresh':
-                mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': ComicName, 'seriesyear': dspyear , 'comicid': ComicID, 'tables': 'both', 'message': 'Successfully refreshed %s (%s)' % (ComicName, dspyear)}
+                mylar.events.publish({'status': 'success', 'comicname': ComicName, 'seriesyear': dspyear , 'comicid': ComicID, 'tables': 'both', 'message': 'Successfully refreshed %s (%s)' % (ComicName, dspyear)})
             break
 
     #helpers.job_management(write=True, job='DB Updater', last_run_completed=helpers.utctimestamp(), status='Waiting')
@@ -1050,7 +1054,7 @@ def foundsearch(ComicID, IssueID, mode=None, down=None, provider=None, SARC=None
             global_line = 'Successfully snatched %s' % (ComicName)
 
         logger.info('%s Updated the status (Snatched) complete for %s Issue: %s' % (module, ComicName, IssueNum))
-        mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': ComicName, 'seriesyear': seriesyear, 'comicid': ComicID, 'tables': 'tables', 'message': global_line}
+        mylar.events.publish({'status': 'success', 'comicname': ComicName, 'seriesyear': seriesyear, 'comicid': ComicID, 'tables': 'tables', 'message': global_line})
     else:
         if down == 'PP':
             logger.info(module + ' Setting status to Post-Processed in history.')
@@ -1292,6 +1296,7 @@ def forceRescan(ComicID, archive=None, module=None, recheck=False):
     d_issues = []
 
     reissues = myDB.select('SELECT * FROM issues WHERE ComicID=?', [ComicID])
+    reissue_ints = helpers.stored_issuedigits(reissues)
 
     a_start = datetime.datetime.now()
     while (fn < fccnt):
@@ -1341,7 +1346,7 @@ def forceRescan(ComicID, archive=None, module=None, recheck=False):
                     int_iss = None
                 except IndexError:
                     break
-                int_iss = helpers.issuedigits(reiss['Issue_Number'])
+                int_iss = reissue_ints[n]
                 issyear = reiss['IssueDate'][:4]
                 old_status = reiss['Status']
                 issname = reiss['IssueName']
@@ -1500,6 +1505,7 @@ def forceRescan(ComicID, archive=None, module=None, recheck=False):
                 #not as part of a series, that the above won't work since it's looking in the wrong table.
                 reannuals = myDB.select('SELECT * FROM issues WHERE ComicID=?', [ComicID])
                 ANNComicID = None #need to set this to None so we write to the issues table and not the annuals
+            reannual_ints = helpers.stored_issuedigits(reannuals)
 
 
             # annual inclusion here.
@@ -1513,7 +1519,7 @@ def forceRescan(ComicID, archive=None, module=None, recheck=False):
                     reann = reannuals[n]
                 except IndexError:
                     break
-                int_iss = helpers.issuedigits(reann['Issue_Number'])
+                int_iss = reannual_ints[n]
                 #logger.fdebug(module + ' int_iss:' + str(int_iss))
                 issyear = reann['IssueDate'][:4]
                 old_status = reann['Status']
@@ -2028,6 +2034,12 @@ def watchlist_updater(calledfrom=None, sched=False):
 
     myDB = db.DBConnection()
 
+    # keep the api change feed trimmed - only actually runs once an hour.
+    try:
+        changelog.compact()
+    except Exception as e:
+        logger.warn('[CHANGELOG] Unable to compact the change log: %s' % e)
+
     last_date = None
     last_run = None
 
@@ -2184,6 +2196,7 @@ def watchlist_updater(calledfrom=None, sched=False):
 
     # this is based on comicid updates atm.
     to_check = []
+    changed = {}
     loaddate_stamp = None
     cntr = int(update_list['count'])
     cntr_chk = 1
@@ -2202,11 +2215,13 @@ def watchlist_updater(calledfrom=None, sched=False):
                        library[x['comicid']['id']]['lastupdated'] < calendar.timegm(tm.utctimetuple()),
                    ]
                 ):
-                    x_check = [ yy for yy in to_check if yy['comicid'] == x['comicid']['id'] ]
-                    if not x_check:
+                    if x['comicid']['id'] not in changed:
+                        changed[x['comicid']['id']] = {}
                         to_check.append({'comicid': x['comicid']['id'],
                                          'comicname': library[x['comicid']['id']]['comicname'],
                                          'seriesyear': library[x['comicid']['id']]['seriesyear']})
+                    # results are in asc order, so the last entry for an issue is the most recent one.
+                    changed[x['comicid']['id']][str(x['issueid'])] = x
             cntr_chk += 1
         except Exception as e:
             logger.fdebug(
@@ -2215,6 +2230,11 @@ def watchlist_updater(calledfrom=None, sched=False):
             )
             pass
 
+    if all([mylar.CONFIG.DB_UPDATER_DELTA is True, len(changed) > 0]):
+        patched = delta_update(changed, truncated=set_the_bar)
+        if len(patched) > 0:
+            to_check = [ tc for tc in to_check if tc['comicid'] not in patched ]
+
     if len(to_check) > 0:
         logger.info(
             '[BACKFILL-UPDATE] [%s] series to update: %s' % (len(to_check), to_check)
@@ -2270,3 +2290,59 @@ def watchlist_updater(calledfrom=None, sched=False):
     if mylar.DB_BACKFILL is True and loaddate_stamp is None:
         mylar.DB_BACKFILL = False
     return
+
+def delta_update(changed, truncated=False):
+    # changed = {comicid: {issueid: db_updater entry}} as compiled from the CV update feed.
+    # Series whose changed issues are all already known locally get just those issue rows
+    # patched in place. Anything else (new issue ids / renumbered issues) means the issue
+    # count has diverged, so those are left for a full refresh. Returns the patched comicids.
+    # LastUpdated only moves up to the newest change that was patched, and is left alone if the
+    # feed was truncated (the rest of the series' changes are still to come in a later run).
+    myDB = db.DBConnection()
+
+    issueids = []
+    for cid in changed:
+        issueids.extend(changed[cid].keys())
+
+    local = {}
+    for i in range(0, len(issueids), 900):
+        chunk = issueids[i:i+900]
+        for row in myDB.select("SELECT IssueID, ComicID, Issue_Number, IssueName, IssueDate, ReleaseDate FROM issues WHERE IssueID IN (%s)" % ','.join('?' * len(chunk)), chunk):
+            local[row['IssueID']] = row
+
+    patched = set()
+    querylist = []
+    issue_count = 0
+    for cid, issues in changed.items():
+        delta = []
+        full_refresh = False
+        for issid, x in issues.items():
+            row = local.get(issid)
+            issnum = x['issue_number']
+            if issnum is not None and 'Issue #' in issnum:
+                issnum = re.sub('Issue #', '', issnum).strip()
+            if any([row is None, issnum is None]) or any([str(row['ComicID']) != str(cid), row['Issue_Number'] != issnum]):
+                full_refresh = True
+                break
+            newvals = {'IssueName':   x['issue_name'],
+                       'IssueDate':   x['cover_date'] or '0000-00-00',
+                       'ReleaseDate': x['store_date'] or '0000-00-00'}
+            if any([row[k] != v for k, v in newvals.items()]):
+                delta.append(("UPDATE issues SET IssueName=?, IssueDate=?, ReleaseDate=? WHERE IssueID=?",
+                             [newvals['IssueName'], newvals['IssueDate'], newvals['ReleaseDate'], issid]))
+
+        if full_refresh is True:
+            continue
+
+        querylist.extend(delta)
+        newest = max([x['last_updated'] for x in issues.values() if x.get('last_updated')] or [None])
+        if all([truncated is False, newest is not None]):
+            querylist.append(("UPDATE comics SET LastUpdated=? WHERE ComicID=? AND (LastUpdated IS NULL OR LastUpdated < ?)", [newest, str(cid), newest]))
+        issue_count += len(delta)
+        patched.add(cid)
+
+    if len(querylist) > 0:
+        myDB.mass_action(querylist)
+        logger.info('[BACKFILL-UPDATE] Patched %s issues across %s series in place - %s series still require a full refresh.' % (issue_count, len(patched), len(changed) - len(patched)))
+
+    return patched
@@ -0,0 +1,143 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import time
+import hashlib
+import threading
+
+import mylar
+from mylar import db, logger
+
+#the settings that decide whether a result gets rejected before it's even parsed - change any of
+#these and everything cached under the old values is thrown out.
+CONFIG_KEYS = ('IGNORE_SEARCH_WORDS', 'USE_MINSIZE', 'MINSIZE', 'USE_MAXSIZE', 'MAXSIZE', 'IGNORE_COVERS')
+
+#the issue details a verdict depends on (a refresh that changes the store date, the series being
+#marked as fuzzy, etc all make for a different signature) - along with the state of the search itself:
+#the loop pass (cmloopit) & tpb pass (chktpb) a single search steps through accept different things,
+#and rss / api results (and each provider type) go through different size & date checks.
+ISSUE_KEYS = ('ComicName', 'IssueNumber', 'ComicYear', 'SeriesYear', 'ComicVersion', 'booktype', 'ignore_booktype',
+              'UseFuzzy', 'StoreDate', 'IssueDate', 'digitaldate', 'IssDateFix', 'findcomiciss', 'intIss',
+              'cmloopit', 'chktpb', 'RSS', 'nzbprov', 'SARC', 'oneoff')
+
+#how often expired verdicts are cleared out of the table.
+PURGE_EVERY = 3600
+
+STATE = {'config': None, 'purged': 0}
+STATE_LOCK = threading.Lock()
+
+def _digest(value):
+    return hashlib.blake2b(json.dumps(value, sort_keys=True, default=str).encode('utf-8'), digest_size=12).hexdigest()
+
+def config_signature():
+    return _digest([getattr(mylar.CONFIG, x, None) for x in CONFIG_KEYS])
+
+def housekeeping(myDB, config_sig):
+    # drops everything cached under different settings the first time the settings are seen to have
+    # changed, and anything past its ttl every PURGE_EVERY seconds.
+    now = time.time()
+    with STATE_LOCK:
+        changed = STATE['config'] is not None and STATE['config'] != config_sig
+        first = STATE['config'] is None
+        STATE['config'] = config_sig
+        expire = now - STATE['purged'] >= PURGE_EVERY
+        if expire:
+            STATE['purged'] = now
+
+    if any([changed, first]):
+        cleared = myDB.action('DELETE FROM search_verdicts WHERE ConfigSig != ?', [config_sig])
+        if changed:
+            logger.fdebug('[VERDICT-CACHE] Search settings have changed - cleared %s cached verdicts.' % cleared.rowcount)
+    if expire:
+        myDB.action('DELETE FROM search_verdicts WHERE Stamp < ?', [int(now - mylar.CONFIG.SEARCH_VERDICT_TTL * 3600)])
+
+def clear():
+    myDB = db.DBConnection()
+    myDB.action('DELETE FROM search_verdicts')
+
+
+class VerdictCache(object):
+    """
+    Remembers which provider results were accepted / rejected for an issue, so the next scheduled or
+    rss search can skip the ones already turned down without parsing them again. Keyed by provider,
+    a hash of the result's link & title, the IssueID and a signature of the matcher version plus
+    the issue details it was judged against. Writes are held until flush().
+    """
+
+    def __init__(self, m, matcher_version):
+        self.enabled = all([mylar.CONFIG.SEARCH_VERDICT_CACHE is True, m.IssueID is not None, m.manual is not True])
+        self.pending = []
+        self.known = {}
+        self.skipped = 0
+        if self.enabled is False:
+            return
+
+        self.provider = m.tmpprov or m.nzbprov
+        self.issueid = str(m.IssueID)
+        self.config_sig = config_signature()
+        self.signature = _digest([matcher_version, self.config_sig] + [getattr(m, x, None) for x in ISSUE_KEYS])
+        self.myDB = db.DBConnection()
+        try:
+            housekeeping(self.myDB, self.config_sig)
+            expiry = int(time.time() - mylar.CONFIG.SEARCH_VERDICT_TTL * 3600)
+            for row in self.myDB.select('SELECT LinkHash, Verdict FROM search_verdicts WHERE Provider=? AND IssueID=? AND Signature=? AND Stamp >= ?', [self.provider, self.issueid, self.signature, expiry]):
+                self.known[row['LinkHash']] = row['Verdict']
+        except Exception as e:
+            logger.warn('[VERDICT-CACHE] Unable to load cached verdicts - searching without them: %s' % e)
+            self.enabled = False
+
+    def key(self, entry):
+        try:
+            link = entry['link']
+        except Exception:
+            link = None
+        return hashlib.blake2b(('%s|%s' % (link, entry['title'])).encode('utf-8'), digest_size=12).hexdigest()
+
+    def rejected(self, entry):
+        if self.enabled is False:
+            return False
+        if self.known.get(self.key(entry)) == 'rejected':
+            self.skipped += 1
+            return True
+        return False
+
+    def record(self, entry, accepted):
+        #packs are judged against pack ranges that can change underneath them, so they're never cached.
+        if any([self.enabled is False, entry.get('pack') is True]):
+            return
+        verdict = 'accepted' if accepted else 'rejected'
+        linkhash = self.key(entry)
+        if self.known.get(linkhash) == verdict:
+            return
+        #verdicts are deterministic for a given signature, so an accepted result only comes back as
+        #rejected when it's a duplicate of one already taken (search_filer's nowrite dedupe) - that's
+        #not a judgement on the result itself, and must never stop it being considered next time.
+        if all([accepted is False, self.known.get(linkhash) == 'accepted']):
+            return
+        self.known[linkhash] = verdict
+        self.pending.append((self.provider, linkhash, self.issueid, self.signature, self.config_sig, verdict, entry['title'], int(time.time())))
+
+    def flush(self):
+        if self.skipped > 0:
+            logger.fdebug('[VERDICT-CACHE] Skipped %s result(s) already rejected for IssueID %s on %s.' % (self.skipped, self.issueid, self.provider))
+            self.skipped = 0
+        if not self.pending:
+            return
+        try:
+            self.myDB.action('INSERT OR REPLACE INTO search_verdicts (Provider, LinkHash, IssueID, Signature, ConfigSig, Verdict, Title, Stamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', self.pending, executemany=True)
+        except Exception as e:
+            logger.warn('[VERDICT-CACHE] Unable to store search verdicts: %s' % e)
+        self.pending = []
@@ -344,7 +344,7 @@ def checkGithub(current_version=None):
 
     #return mylar.LATEST_VERSION
     rtnline = dict(rtnline, **{'event': 'check_update', 'docker': itype})
-    mylar.GLOBAL_MESSAGES = rtnline
+    mylar.events.publish(rtnline)
     return rtnline
 
 def update():
@@ -50,14 +50,17 @@ import mylar
 from mylar import (
     carepackage,
     config,
+    datatables,
     db,
     Failed,
     filechecker,
     helpers,
     importer,
+    library,
     librarysync,
     logger,
     mb,
+    metrics,
     moveit,
     notifiers,
     parseit,
@@ -67,6 +70,7 @@ from mylar import (
     sabparse,
     search,
     series_metadata,
+    statuschange,
     updater,
     weeklypull,
 )
@@ -75,58 +79,102 @@ from mylar.auth import (
     require,
 )
 
-def serve_template(templatename, **kwargs):
-    interface_dir = os.path.join(str(mylar.PROG_DIR), 'data/interfaces/')
+#compiled template lookups, one per interface. Mako keeps every compiled template in memory (and
+#as a .py module under the cache dir, so a restart doesn't recompile them either), and re-stats the
+#template file on use so an edited template is recompiled on its next render.
+TEMPLATE_LOOKUPS = {}
+TEMPLATE_ICONS = {}
+TEMPLATE_LOCK = threading.Lock()
+
+#icon name, file used by the default interface, file used by carbon.
+TEMPLATE_ICON_FILES = (('icon_gear', 'icon_gear.png', 'icon_gear.png'),
+                       ('icon_upcoming', 'icon_upcoming.png', 'icon_upcoming.png'),
+                       ('icon_wanted', 'icon_wanted.png', 'icon_wanted.png'),
+                       ('icon_search', 'icon_search.png', 'icon_search.png'),
+                       ('discord-icon', 'discord-icon.png', 'discord-icon-carbon.png'),
+                       ('github-icon', 'github-icon.png', 'github-icon-carbon.png'),
+                       ('forum-icon', 'forum-icon.png', 'forum-icon-carbon.png'),
+                       ('irc-icon', 'irc-icon.png', 'irc-icon-carbon.png'),
+                       ('listview_icon', 'listview_icon.png', 'listview_icon.png'),
+                       ('delete_icon', 'delete_icon.png', 'delete_icon.png'),
+                       ('deleteall_icon', 'deleteall_icon.png', 'deleteall_icon.png'),
+                       ('prowl_logo', 'prowl_logo.png', 'prowl_logo.png'),
+                       ('ReadingList-icon', 'ReadingList-icon.png', 'ReadingList-icon.png'),
+                       ('next', 'next.gif', 'next.gif'),
+                       ('prev', 'prev.gif', 'prev.gif'))
+
+def template_interface():
     if any([mylar.CONFIG.INTERFACE == 'default', mylar.CONFIG.INTERFACE is None]):
-        tmper_dir = 'default'
-    else:
-        tmper_dir = mylar.CONFIG.INTERFACE
-
-    icons = []
-    if mylar.CONFIG.INTERFACE == 'default':
-        icons = {'icon_gear': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'icon_gear.png'),
-                 'icon_upcoming': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'icon_upcoming.png'),
-                 'icon_wanted': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'icon_wanted.png'),
-                 'icon_search': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'icon_search.png'),
-                 'discord-icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'discord-icon.png'),
-                 'github-icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'github-icon.png'),
-                 'forum-icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'forum-icon.png'),
-                 'irc-icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'irc-icon.png'),
-                 'listview_icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'listview_icon.png'),
-                 'delete_icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'delete_icon.png'),
-                 'deleteall_icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'deleteall_icon.png'),
-                 'prowl_logo': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'prowl_logo.png'),
-                 'ReadingList-icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'ReadingList-icon.png'),
-                 'next': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'next.gif'),
-                 'prev': os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', 'prev.gif')}
+        interface = 'default'
     else:
-        icons = {'icon_gear': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'icon_gear.png'),
-                 'icon_upcoming': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'icon_upcoming.png'),
-                 'icon_wanted': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'icon_wanted.png'),
-                 'icon_search': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'icon_search.png'),
-                 'discord-icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'discord-icon-carbon.png'),
-                 'github-icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'github-icon-carbon.png'),
-                 'forum-icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'forum-icon-carbon.png'),
-                 'irc-icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'irc-icon-carbon.png'),
-                 'listview_icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'listview_icon.png'),
-                 'delete_icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'delete_icon.png'),
-                 'deleteall_icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'deleteall_icon.png'),
-                 'prowl_logo': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'prowl_logo.png'),
-                 'ReadingList-icon': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'ReadingList-icon.png'),
-                 'next': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'next.gif'),
-                 'prev': os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', 'prev.gif')}
-
-    template_dir = os.path.join(str(interface_dir), tmper_dir)
-    _hplookup = TemplateLookup(directories=[template_dir])
+        interface = mylar.CONFIG.INTERFACE
+    #interface has been switched - drop whatever the old one had compiled (default is kept as it's
+    #the fallback for every interface).
+    stale = [x for x in TEMPLATE_LOOKUPS if x not in (interface, 'default')]
+    if stale:
+        with TEMPLATE_LOCK:
+            for old in stale:
+                logger.fdebug('[TEMPLATES] Dropping compiled templates for the %s interface' % old)
+                TEMPLATE_LOOKUPS.pop(old, None)
+    return interface
+
+def template_lookup(interface):
+    lookup = TEMPLATE_LOOKUPS.get(interface)
+    if lookup is not None:
+        return lookup
+    with TEMPLATE_LOCK:
+        lookup = TEMPLATE_LOOKUPS.get(interface)
+        if lookup is None:
+            module_dir = None
+            if mylar.CONFIG.CACHE_DIR:
+                module_dir = os.path.join(mylar.CONFIG.CACHE_DIR, 'mako', interface)
+            lookup = TemplateLookup(directories=[os.path.join(str(mylar.PROG_DIR), 'data', 'interfaces', interface)], module_directory=module_dir, filesystem_checks=True)
+            TEMPLATE_LOOKUPS[interface] = lookup
+    return lookup
+
+def template_icons():
+    key = (mylar.CONFIG.INTERFACE, mylar.CONFIG.HTTP_ROOT)
+    icons = TEMPLATE_ICONS.get(key)
+    if icons is None:
+        if mylar.CONFIG.INTERFACE == 'default':
+            icons = dict((name, os.path.join(mylar.CONFIG.HTTP_ROOT, 'images', default)) for name, default, carbon in TEMPLATE_ICON_FILES)
+        else:
+            icons = dict((name, os.path.join(mylar.CONFIG.HTTP_ROOT, 'interfaces', 'carbon', 'images', carbon)) for name, default, carbon in TEMPLATE_ICON_FILES)
+        TEMPLATE_ICONS.clear()
+        TEMPLATE_ICONS[key] = icons
+    return icons
+
+def warm_templates():
+    # compiles every template of the current interface (and the default one it falls back to) so the
+    # first visit to each page doesn't pay for it. Run in the background once the webserver is up.
+    start = time.time()
+    count = 0
+    for interface in set([template_interface(), 'default']):
+        lookup = template_lookup(interface)
+        for template_dir in lookup.directories:
+            try:
+                templates = sorted(os.listdir(template_dir))
+            except OSError:
+                continue
+            for templatename in templates:
+                if not templatename.endswith('.html'):
+                    continue
+                try:
+                    lookup.get_template(templatename)
+                    count += 1
+                except Exception as e:
+                    logger.fdebug('[TEMPLATES] Unable to compile %s/%s: %s' % (interface, templatename, e))
+    logger.fdebug('[TEMPLATES] Compiled %s templates in %ss' % (count, round(time.time() - start, 2)))
+
+def serve_template(templatename, **kwargs):
+    icons = template_icons()
     try:
-        template = _hplookup.get_template(templatename)
+        template = template_lookup(template_interface()).get_template(templatename)
         return template.render(http_root=mylar.CONFIG.HTTP_ROOT, interface=mylar.CONFIG.INTERFACE, icons=icons, gl_messages=mylar.GLOBAL_MESSAGES, sse_key=mylar.SSE_KEY, pre_update=mylar.UPDATE_VALUE, **kwargs)
     except Exception as e:
         #default to base in case the html hasn't been changed in new interface.
-        template_dir = os.path.join(str(interface_dir), 'default')
-        _hplookup = TemplateLookup(directories=[template_dir])
         try:
-            template = _hplookup.get_template(templatename)
+            template = template_lookup('default').get_template(templatename)
             return template.render(http_root=mylar.CONFIG.HTTP_ROOT, interface=mylar.CONFIG.INTERFACE, icons=icons, gl_messages=mylar.GLOBAL_MESSAGES, sse_key=mylar.SSE_KEY, pre_update=mylar.UPDATE_VALUE, **kwargs)
         except Exception:
             return exceptions.html_error_template().render()
@@ -269,7 +317,7 @@ class WebInterface(object):
         mylar.START_UP = False
 
         if c_status == 'failure':
-            mylar.GLOBAL_MESSAGES = {'event': 'config_check', 'status': c_status, 'message': c_msg}
+            mylar.events.publish({'event': 'config_check', 'status': c_status, 'message': c_msg})
 
     def home(self, **kwargs):
         if mylar.START_UP is True:
@@ -764,24 +812,23 @@ class WebInterface(object):
         except Exception as e:
             filters = []
 
-        myDB = db.DBConnection()
-        sortcolumn = 'b.Int_IssueNumber %s' % sSortDir_0
-        if iSortCol_0 == '1':
-            sortcolumn = 'b.Int_IssueNumber %s' % sSortDir_0
-        elif iSortCol_0 == '2':
-            sortcolumn = 'b.IssueName %s' % sSortDir_0
-        elif iSortCol_0 == '3':
-            sortcolumn = 'b.ReleaseDate %s' % sSortDir_0
-        elif iSortCol_0 == '4':
-            sortcolumn = 'b.Status %s' % sSortDir_0
-
-        #logger.info('sortcolumn: %s' % sortcolumn)
-        queryline = 'SELECT a.ComicLocation as ComicLocation, b.* FROM comics a LEFT JOIN issues b ON a.ComicID = b.ComicID WHERE a.ComicID=? ORDER BY %s' % sortcolumn
-        issueslist = myDB.select(queryline, [ComicID])
-        issues = []
-
+        # catch false entries here
+        source = 'SELECT a.ComicLocation as ComicLocation, b.* FROM comics a LEFT JOIN issues b ON a.ComicID = b.ComicID WHERE a.ComicID=? AND NOT (b.Int_IssueNumber IS NULL AND b.Issue_Number IS NULL AND b.IssueID IS NULL)'
+        dt = datatables.DataTable(source, [ComicID], tables=('comics', 'issues'))
+        for filter in filters:
+            if filter['value'] is False:
+                dt.filter("IFNULL(Status, '') != ?", [filter['name']])
+        dt.search(sSearch, ['IssueName', 'Issue_Number', 'Status', 'IssueDate'])
+        sortcols = {'1': 'Int_IssueNumber',
+                    '2': 'IssueName',
+                    '3': 'ReleaseDate',
+                    '4': 'Status'}
+        dt.order(sortcols, iSortCol_0, sSortDir_0, default='Int_IssueNumber')
+        total, display_total, issueslist = dt.fetch(iDisplayStart, iDisplayLength)
+
+        #only the issues on the requested page get their file location checked.
         secondary_folders = None
-        if mylar.CONFIG.MULTIPLE_DEST_DIRS:
+        if mylar.CONFIG.MULTIPLE_DEST_DIRS and issueslist:
             try:
                 if os.path.exists(os.path.join(mylar.CONFIG.MULTIPLE_DEST_DIRS, os.path.basename(issueslist[0]['ComicLocation']))):
                     secondary_folders = os.path.join(mylar.CONFIG.MULTIPLE_DEST_DIRS, os.path.basename(issueslist[0]['ComicLocation']))
@@ -793,11 +840,8 @@ class WebInterface(object):
             except Exception:
                 pass
 
-
+        rows = []
         for x in issueslist:
-            # catch false entries here
-            if all([x['Int_IssueNumber'] is None, x['Issue_Number'] is None, x['IssueID'] is None]):
-                continue
             comicsize= '0MB'
             issue_location = x['Location']
             secondary = False
@@ -810,58 +854,11 @@ class WebInterface(object):
                                 secondary = 'secondary'
                 comicsize = helpers.human_size(x['ComicSize'])
 
-            foundfilter = False
-            for filter in filters:
-                if filter['name'] == x['Status']:
-                    if filter['value'] is False:
-                        foundfilter = True
-                        break
-            if foundfilter:
-                continue
-
-            issues.append({'IssueID': x['IssueID'],
-                           'Location': issue_location,
-                           'Secondary': secondary,
-                           'Issue_Number': x['Issue_Number'],
-                           'AltIssueNumber': x['AltIssueNumber'],
-                           'IssueDate': x['IssueDate'],
-                           'DigitalDate': x['DigitalDate'],
-                           'ReleaseDate': x['ReleaseDate'],
-                           'IssueName': x['IssueName'],
-                           'Status': x['Status'],
-                           'ComicSize': comicsize,
-                           'ComicID': x['ComicID'],
-                           'ComicName': x['ComicName']})
-
-        #logger.info('issues: %s' % (issues,))
-        iDisplayStart = int(iDisplayStart)
-        iDisplayLength = int(iDisplayLength)
-        filtered = []
-        if len(issues) > 0:
-            if sSearch == "" or sSearch is None:
-                filtered = issues[::]
-            else:
-                for row in issues:
-                    try:
-                        issname = row['IssueName']
-                        if issname is None:
-                            issname = ''
-                        if any([sSearch.lower() in issname.lower(), sSearch.lower() in row['Issue_Number'].lower(), sSearch.lower() in row['Status'], sSearch.lower() in row['IssueDate'].lower()]):
-                            filtered.append(row)
-                    except Exception as e:
-                        pass
-
-            if iDisplayLength != -1:
-                rows = filtered[iDisplayStart:(iDisplayStart + iDisplayLength)]
-            else:
-                rows = filtered
-            rows = [[row['Issue_Number'], row['IssueName'], row['IssueDate'], row['Status'], row['IssueID'], row['Location'], row['ComicSize'], row['ComicID'], row['ComicName'], row['DigitalDate'], row['ReleaseDate'], row['Secondary'], row['AltIssueNumber']] for row in rows]
-        else:
-            rows = []
+            rows.append([x['Issue_Number'], x['IssueName'], x['IssueDate'], x['Status'], x['IssueID'], issue_location, comicsize, x['ComicID'], x['ComicName'], x['DigitalDate'], x['ReleaseDate'], secondary, x['AltIssueNumber']])
 
         return json.dumps({
-            'iTotalDisplayRecords': len(filtered),
-            'iTotalRecords': len(issues),
+            'iTotalDisplayRecords': display_total,
+            'iTotalRecords': total,
             'aaData': rows,
         })
     loadIssueDetails.exposed = True
@@ -1555,10 +1552,7 @@ class WebInterface(object):
 
         coverfile = os.path.join(mylar.CONFIG.CACHE_DIR,  'storyarcs', str(cvarcid) + "-banner.jpg")
 
-        if mylar.CONFIG.CVAPI_RATE is None or mylar.CONFIG.CVAPI_RATE < 2:
-            time.sleep(2)
-        else:
-            time.sleep(mylar.CONFIG.CVAPI_RATE)
+        mylar.cv.CV_BUDGET.wait()
 
         logger.info('Attempting to retrieve the comic image for series')
         if arcrefresh:
@@ -2222,6 +2216,9 @@ class WebInterface(object):
         issuelist = []
 
         comicid = None
+        comicname = None
+        seriesyear = None
+        mi = None
         for k,v in list(args.items()):
             if k == 'issueids[]':
                 issuelist = v
@@ -2237,6 +2234,20 @@ class WebInterface(object):
         if len(issuelist) > 0:
             args = issuelist
 
+        #straight status changes are done set-based in one transaction (with Have / Total worked out
+        #once per series) - anything it doesn't find in issues / annuals (story arc entries) still
+        #goes through one at a time below.
+        if all([action in ('Wanted', 'Retry', 'Skipped', 'Archived', 'Ignored'), len(issuelist) > 0]):
+            if action == 'Retry':
+                newaction = 'Wanted'
+            bulk = statuschange.change_status(newaction, issueids=issuelist, notify=False)
+            if newaction == 'Wanted':
+                issuesToAdd.extend(bulk['changed'])
+            if len(bulk['series']) == 1:
+                comicid = bulk['series'][0]
+            matched = set(bulk['matched'])
+            args = [x for x in issuelist if x not in matched]
+
         for IssueID in args:
             if any([IssueID is None, 'issue_table' in IssueID, 'history_table' in IssueID, 'manage_issues' in IssueID, 'issue_table_length' in IssueID, 'issues' in IssueID, 'annuals' in IssueID, 'annual_table_length' in IssueID]):
                 continue
@@ -2342,9 +2353,9 @@ class WebInterface(object):
         elif len(issuesToAdd) > 0:
             logger.fdebug("Marking issues: %s as Wanted" % (issuesToAdd))
             threading.Thread(target=search.searchIssueIDList, args=[issuesToAdd]).start()
-        else:
+        elif mi is not None:
             updater.forceRescan(mi['ComicID'])
-        mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': comicname, 'seriesyear': seriesyear, 'comicid': comicid, 'tables': 'both', 'message': 'Successfully changed status of %s issues to %s' % (len(issuelist), action)}
+        mylar.events.publish({'status': 'success', 'comicname': comicname, 'seriesyear': seriesyear, 'comicid': comicid, 'tables': 'both', 'message': 'Successfully changed status of %s issues to %s' % (len(issuelist), action)})
         return json.dumps({'status': 'success'})
     markissues.exposed = True
 
@@ -2937,7 +2948,6 @@ class WebInterface(object):
             if all([w_results is None, generateonly is False]):
                 return serve_template(templatename="weeklypull.html", title="Weekly Pull", weeklyresults=weeklyresults, pullfilter=True, weekfold=weekinfo['week_folder'], wantedcount=0, weekinfo=weekinfo)
 
-            watchlibrary = helpers.listLibrary()
             issueLibrary = helpers.listIssues(weekinfo['weeknumber'], weekinfo['year'])
             oneofflist = helpers.listoneoffs(weekinfo['weeknumber'], weekinfo['year'])
             chklist = []
@@ -2945,11 +2955,12 @@ class WebInterface(object):
             for weekly in w_results:
                 xfound = False
                 tmp_status = weekly['Status']
-                if weekly['ComicID'] in watchlibrary and all([tmp_status != 'Mismatched', tmp_status != 'Incomplete']):
-                    haveit = watchlibrary[weekly['ComicID']]['comicid']
+                watch_status = library.LIBRARY.status(weekly['ComicID'])
+                if watch_status is not None and all([tmp_status != 'Mismatched', tmp_status != 'Incomplete']):
+                    haveit = library.LIBRARY.parent(weekly['ComicID'])
 
                     if weekinfo['weeknumber']:
-                        if watchlibrary[weekly['ComicID']]['status'] == 'Paused':
+                        if watch_status == 'Paused':
                             tmp_status = 'Paused'
                         elif (week is None or all([week is not None, int(week) >= int(weekinfo['weeknumber'])])) and all([mylar.CONFIG.AUTOWANT_UPCOMING, tmp_status == 'Skipped']):
                             tmp_status = 'Wanted'
@@ -3390,201 +3401,66 @@ class WebInterface(object):
             filters = []
         #logger.fdebug('filters: %s' % (filters,))
 
-        myDB = db.DBConnection()
-        if sSortDir_0 == 'desc':
-            reverse_order = True
-        else:
-            reverse_order = False
-
-        statline = "Status='Wanted'"
+        statuses = ['Wanted']
         if mylar.CONFIG.UPCOMING_SNATCHED is True:
-            statline += " OR Status='Snatched'"
+            statuses.append('Snatched')
         if mylar.CONFIG.FAILED_DOWNLOAD_HANDLING is True:
-            statline += " OR Status='Failed'"
-
-        iss_query = "SELECT ComicName, Issue_Number, Int_IssueNumber, ReleaseDate, Status, ComicID, IssueID, DateAdded from issues WHERE %s" % statline
-        issues = myDB.select(iss_query)
-        arcs = {}
-        if mylar.CONFIG.UPCOMING_STORYARCS is True:
-            arcs_query = "SELECT Storyarc, StoryArcID, IssueArcID, ComicName, IssueNumber, Int_IssueNumber, ReleaseDate, Status, ComicID, IssueID, DateAdded from storyarcs WHERE %s" % statline
-            arclist = myDB.select(arcs_query)
-            for arc in arclist:
-                arc_int_number = arc['Int_IssueNumber']
-                if arc_int_number is None:
-                    arc_int_number = 0
-                arcs[arc['IssueID']] = {'storyarc': arc['Storyarc'],
-                                        'storyarcid': arc['StoryArcID'],
-                                        'issuearcid': arc['IssueArcID'],
-                                        'comicid': arc['ComicID'],
-                                        'comicname': arc['ComicName'],
-                                        'issuenumber': arc['IssueNumber'],
-                                        'int_issuenumber': arc_int_number,
-                                        'releasedate': arc['ReleaseDate'],
-                                        'status': arc['Status'],
-                                        'dateadded': arc['DateAdded']}
-
+            statuses.append('Failed')
+        statline = 'Status IN (%s)' % ','.join('?' * len(statuses))
+
+        #watchlist issues (and annuals) that are also part of an arc carry the arc along ('both'), any arc issues
+        #that aren't on the watchlist are listed on their own as one-offs.
+        arcjoin = 'LEFT JOIN (SELECT IssueID, StoryArc, StoryArcID, IssueArcID FROM storyarcs WHERE %s GROUP BY IssueID) sa ON sa.IssueID=i.IssueID' % statline
+        arcfields = "sa.StoryArc, sa.StoryArcID, sa.IssueArcID, CASE WHEN sa.IssueID IS NULL THEN NULL ELSE 'both' END AS WatchArc"
+        if mylar.CONFIG.UPCOMING_STORYARCS is False:
+            arcjoin = ''
+            arcfields = 'NULL AS StoryArc, NULL AS StoryArcID, NULL AS IssueArcID, NULL AS WatchArc'
+        arcargs = statuses if arcjoin != '' else []
+
+        parts = ['SELECT i.ComicName, i.Issue_Number, i.Int_IssueNumber, i.ReleaseDate, i.Status, i.ComicID, i.IssueID, i.DateAdded, %s FROM issues i %s WHERE i.%s' % (arcfields, arcjoin, statline)]
+        args = arcargs + statuses
         if mylar.CONFIG.ANNUALS_ON:
-            annuals_query = "SELECT ReleaseComicName as ComicName, Issue_Number as Issue_Number, Int_IssueNumber, ReleaseDate, Status, ComicID, IssueID, DateAdded FROM annuals WHERE NOT Deleted AND %s" % statline
-            annuals_list = myDB.select(annuals_query)
-
-            issues += annuals_list
-
-        resultlist = issues
-        iDisplayStart = int(iDisplayStart)
-        iDisplayLength = int(iDisplayLength)
-        filtered = []
-        tier = None
-        dollars = []
-        bills = []
-        for row in resultlist:
-            matched = False
-            if row['Status'] == 'Wanted':
-                try:
-                    if row['DateAdded'] <= mylar.SEARCH_TIER_DATE:
-                        tier = '2nd'
-                        if sSearch.lower() in tier.lower():
-                            matched = True
-                    else:
-                        tier = '1st [%s]' % row['DateAdded']
-                        if sSearch.lower() in tier.lower():
-                            matched = True
-                except:
-                    tier = '1st [%s]' % row['DateAdded']
-                    if sSearch.lower() in tier.lower():
-                        matched = True
-            else:
-                tier = ''
-
-            foundfilter = False
-            for filter in filters:
-                if filter['name'] == 'StoryArc' or filter['name'] == row['Status'] or all(['Tier1' in filter['name'], row['Status'] == 'Wanted', '1st' in tier]) or all(['Tier2' in filter['name'], row['Status'] == 'Wanted', '2nd' in tier]):
-                    if filter['value'] is False:
-                        foundfilter = True
-                        break
-
-            if foundfilter:
-                continue
-
-            if row['ComicName'] is not None and sSearch.lower() in row['ComicName'].lower():
-                matched = True
-            elif row['Status'] is not None and sSearch.lower() in row['Status'].lower():
-                matched = True
-            elif row['DateAdded'] is not None and sSearch in row['DateAdded']:
-                matched = True
-            elif row['ReleaseDate'] is not None and sSearch in row['ReleaseDate']:
-                matched = True
-            elif tier != '' and sSearch in tier.lower():
-                matched = True
-            elif row['IssueID'] in arcs:
-                if sSearch.lower() in arcs[row['IssueID']]['storyarc'].lower():
-                    matched = True
-            else:
-                if sSearch.lower() in row['Issue_Number']:
-                    matched = True
-
-            if matched is True:
-                storyarc = None
-                storyarcid = None
-                issuearcid = None
-                if row['IssueID'] in arcs and all([row['IssueID'] not in bills, row['IssueID'] not in dollars]):
-                    storyarc = arcs[row['IssueID']]['storyarc']
-                    storyarcid = arcs[row['IssueID']]['storyarcid']
-                    issuearcid = arcs[row['IssueID']]['issuearcid']
-                    bills.append(row['IssueID'])
-                    arcs.pop(row['IssueID'])
-                    watcharc = "both"
-                else:
-                    dollars.append(row['IssueID'])
-                    watcharc = None
-
-                try:
-                    filtered.append([row['ComicName'], row['Issue_Number'], row['ReleaseDate'], row['IssueID'], tier, row['ComicID'], row['Status'], storyarc, storyarcid, issuearcid, watcharc, row['Int_IssueNumber']])
-                except Exception as e:
-                    #logger.warn('danger Wil Robinson: %s' % (e,))
-                    filtered.append([row['ComicName'], row['Issue_Number'], row['ReleaseDate'], row['IssueID'], tier, row['ComicID'], row['Status'], None, None, None, watcharc, row['Int_IssueNumber']])
-
+            parts.append('SELECT i.ReleaseComicName AS ComicName, i.Issue_Number, i.Int_IssueNumber, i.ReleaseDate, i.Status, i.ComicID, i.IssueID, i.DateAdded, %s FROM annuals i %s WHERE NOT i.Deleted AND i.%s' % (arcfields, arcjoin, statline))
+            args += arcargs + statuses
         if mylar.CONFIG.UPCOMING_STORYARCS is True:
-            for key, ark in arcs.items():
-                matched = False
-                if ark['status'] == 'Wanted':
-                    try:
-                        if ark['dateadded'] <= mylar.SEARCH_TIER_DATE:
-                            tier = '2nd'
-                            if sSearch.lower() in tier.lower():
-                                matched = True
-                        else:
-                            tier = '1st [%s]' % ark['dateadded']
-                            if sSearch.lower() in tier.lower():
-                                matched = True
-                    except:
-                        tier = '1st [%s]' % ark['dateadded']
-                        if sSearch.lower() in tier.lower():
-                            matched = True
-                else:
-                    tier = ''
-
-                foundfilter = False
-                for filter in filters:
-                    if filter['name'] == 'StoryArc' or filter['name'] == ark['status'] or all(['Tier1' in filter['name'], ark['status'] == 'Wanted', '1st' in tier]) or all(['Tier2' in filter['name'], ark['status'] == 'Wanted', '2nd' in tier]):
-                        if filter['value'] is False:
-                            foundfilter = True
-                            break
-
-                if foundfilter:
-                    continue
-
-                if ark['comicname'] is not None and sSearch.lower() in ark['comicname'].lower():
-                    matched = True
-                elif ark['status'] is not None and sSearch.lower() in ark['status'].lower():
-                    matched = True
-                elif ark['dateadded'] is not None and sSearch in ark['dateadded']:
-                    matched = True
-                elif ark['releasedate'] is not None and sSearch in ark['releasedate']:
-                    matched = True
-                elif tier != '' and sSearch in tier.lower():
-                    matched = True
-                elif ark['storyarc'] is not None and sSearch.lower() in ark['storyarc'].lower():
-                    matched = True
-                else:
-                    if sSearch.lower() in ark['issuenumber']:
-                        matched = True
-
-                if matched is True:
-                    filtered.append([ark['comicname'], ark['issuenumber'], ark['releasedate'], key, tier, ark['comicid'], ark['status'], ark['storyarc'], ark['storyarcid'], ark['issuearcid'], "oneoff", ark['int_issuenumber']])
-
-        #logger.fdebug('[%s] one-off arcs: %s' % (len(arcs), arcs,))
-
-        #logger.fdebug('sort_column: %s: sort_directioN: %s' % (iSortCol_0,sSortDir_0))
-        sortcolumn = 2 #'releasedate'
-        if iSortCol_0 == '1':
-            sortcolumn = 0 #'comicame'
-        elif iSortCol_0 == '2':
-            sortcolumn = 11 #'issuenumber'
-        elif iSortCol_0 == '3':
-            sortcolumn = 2 #'releasedate'
-        elif iSortCol_0 == '4':
-            sortcolumn = 6 #'status'
-        elif iSortCol_0 == '5':
-            sortcolumn = 4 #'tier'
-
-        if sSortDir_0 == 'desc':
-            reverse_order = True
-        else:
-            reverse_order = False
+            oneoffline = 'SELECT ComicName, IssueNumber AS Issue_Number, IFNULL(Int_IssueNumber, 0) AS Int_IssueNumber, ReleaseDate, Status, ComicID, IssueID, DateAdded, StoryArc, StoryArcID, IssueArcID, \'oneoff\' AS WatchArc FROM storyarcs WHERE %s AND IssueID NOT IN (SELECT IssueID FROM issues WHERE %s AND IssueID IS NOT NULL)' % (statline, statline)
+            args += statuses + statuses
+            if mylar.CONFIG.ANNUALS_ON:
+                oneoffline += ' AND IssueID NOT IN (SELECT IssueID FROM annuals WHERE NOT Deleted AND %s AND IssueID IS NOT NULL)' % statline
+                args += statuses
+            parts.append(oneoffline + ' GROUP BY IssueID')
 
-        try:
-            final_filtered = sorted(filtered, key=itemgetter(sortcolumn), reverse=reverse_order)
-        except Exception as e:
-            final_filtered = sorted(filtered, key=itemgetter(0), reverse=reverse_order)
+        tierline = "CASE WHEN u.Status='Wanted' THEN (CASE WHEN u.DateAdded <= ? THEN '2nd' ELSE '1st [' || IFNULL(u.DateAdded, 'None') || ']' END) ELSE '' END"
+        source = 'SELECT u.*, %s AS Tier FROM (%s) u' % (tierline, ' UNION ALL '.join(parts))
+        dt = datatables.DataTable(source, [mylar.SEARCH_TIER_DATE] + args, tables=('issues', 'annuals', 'storyarcs'))
 
-        if iDisplayLength == -1:
-            rows = final_filtered
-        else:
-            rows = final_filtered[iDisplayStart:(iDisplayStart + iDisplayLength)]
+        for filter in filters:
+            if filter['value'] is not False:
+                continue
+            if filter['name'] in statuses:
+                dt.filter('Status != ?', [filter['name']])
+            elif 'Tier1' in filter['name']:
+                dt.filter("NOT (Status='Wanted' AND Tier LIKE '1st%')")
+            elif 'Tier2' in filter['name']:
+                dt.filter("NOT (Status='Wanted' AND Tier='2nd')")
+            elif filter['name'] in ('StoryArc', 'Storyarcs'):
+                #the arc issues that aren't on the watchlist (what the StoryArcs count on the page tallies up).
+                dt.filter("WatchArc IS NOT 'oneoff'")
+
+        dt.search(sSearch, ['ComicName', 'Status', 'DateAdded', 'ReleaseDate', 'Tier', 'StoryArc', 'Issue_Number'])
+        sortcols = {'1': 'ComicName',
+                    '2': 'Int_IssueNumber',
+                    '3': 'ReleaseDate',
+                    '4': 'Status',
+                    '5': 'Tier'}
+        dt.order(sortcols, iSortCol_0, sSortDir_0, default='ReleaseDate')
+        total, display_total, results = dt.fetch(iDisplayStart, iDisplayLength)
+
+        rows = [[row['ComicName'], row['Issue_Number'], row['ReleaseDate'], row['IssueID'], row['Tier'], row['ComicID'], row['Status'], row['StoryArc'], row['StoryArcID'], row['IssueArcID'], row['WatchArc'], row['Int_IssueNumber']] for row in results]
 
         return json.dumps({
-            'iTotalDisplayRecords': len(final_filtered),
-            'iTotalRecords': len(filtered),
+            'iTotalDisplayRecords': display_total,
+            'iTotalRecords': total,
             'aaData': rows
         })
 
@@ -3607,10 +3483,10 @@ class WebInterface(object):
         if missinglist:
             threading.Thread(target=search.searchIssueIDList, args=[missinglist]).start()
             logger.info('[SEARCH-FOR-MISSING] Queued up %s issues to search for' % (len(missinglist)))
-            mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': comicname, 'seriesyear': comicyear, 'comicid': ComicID, 'tables': 'None', 'message': 'Successfully queued up %s issues of %s (%s)to search for' % (len(missinglist), comicname, comicyear)}
+            mylar.events.publish({'status': 'success', 'comicname': comicname, 'seriesyear': comicyear, 'comicid': ComicID, 'tables': 'None', 'message': 'Successfully queued up %s issues of %s (%s)to search for' % (len(missinglist), comicname, comicyear)})
         else:
             logger.info('[SEARCH-FOR-MISSING] Nothing to queue up')
-            mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': None, 'seriesyear': None, 'comicid': ComicID, 'tables': 'None', 'message': 'Nothing to queue up'}
+            mylar.events.publish({'status': 'success', 'comicname': None, 'seriesyear': None, 'comicid': ComicID, 'tables': 'None', 'message': 'Nothing to queue up'})
 
     searchformissing.exposed = True
 
@@ -3882,142 +3758,54 @@ class WebInterface(object):
     queueManage.exposed = True
 
     def queueManageIt(self, iDisplayStart=0, iDisplayLength=100, iSortCol_0=5, sSortDir_0="desc", sSearch="", **kwargs):
-        iDisplayStart = int(iDisplayStart)
-        iDisplayLength = int(iDisplayLength)
-        filtered = []
-
-        myDB = db.DBConnection()
-        resultlist = 'There are currently no items waiting in the Direct Download (DDL) Queue for processing.'
-        s_info = myDB.select("SELECT a.ComicName, a.ComicVersion, a.ComicID, a.ComicYear, b.Issue_Number, b.IssueID, c.series as filename, c.size, c.status, c.id, c.updated_date, c.issues, c.year, c.pack, c.link_type FROM comics as a INNER JOIN issues as b ON a.ComicID = b.ComicID INNER JOIN ddl_info as c ON b.IssueID = c.IssueID") # WHERE c.status != 'Downloading'")
-        o_info = myDB.select("Select a.ComicName, b.Issue_Number, a.IssueID, a.ComicID, c.series as filename, c.size, c.status, c.id, c.updated_date, c.issues, c.year, c.pack, c.link_type from oneoffhistory a join snatched b on a.issueid=b.issueid join ddl_info c on b.issueid=c.issueid where b.provider like 'DDL%'")
-        tmp_list = {}
-        if s_info:
-            resultlist = []
-            for si in s_info:
-                if si['issues'] is None:
-                    issue = si['Issue_Number']
-                    year = si['ComicYear']
-                    if issue is not None:
-                        issue = '#%s' % issue
-                else:
-                    year = si['year']
-                    issue = '#%s' % si['issues']
-
-                if si['status'] == 'Completed':
-                    si_status = '100%'
-                else:
-                    si_status = ''
-
-                if si['pack']:
-                    if si['year'] not in si['filename']:
-                        series = '%s (%s)' % (si['filename'], si['year'])
-                    else:
-                        series = si['filename']
-                else:
-                    if issue is not None:
-                        if si['ComicVersion'] is not None:
-                            series = '%s %s %s (%s)' % (si['ComicName'], si['ComicVersion'], issue, year)
-                        else:
-                            series = '%s %s (%s)' % (si['ComicName'], issue, year)
-                    else:
-                        if si['ComicVersion'] is not None:
-                            series = '%s %s (%s)' % (si['ComicName'], si['ComicVersion'], year)
-                        else:
-                            series = '%s (%s)' % (si['ComicName'], year)
-
-                resultlist.append({'series':       series, #i['ComicName'],
-                                   'issue':        issue,
-                                   'queueid':      si['id'],
-                                   'linktype':     si['link_type'],
-                                   'volume':       si['ComicVersion'],
-                                   'year':         year,
-                                   'size':         si['size'].strip(),
-                                   'comicid':      si['ComicID'],
-                                   'issueid':      si['IssueID'],
-                                   'status':       si['status'],
-                                   'updated_date': si['updated_date'],
-                                   'progress':     si_status})
-                tmp_list[si['id']] = {
-                                     'comicid': si['comicid'],
-                                     'issueid': si['issueid'],
-                                     'updated_date': si['updated_date']
-                                     }
-            #logger.info('s_info: %s' % (resultlist))
-        if o_info:
-            if type(resultlist) is str:
-                resultlist = []
-
-            for oi in o_info:
-                if oi['id'] in tmp_list:
-                    #logger.fdebug('duplicate entry: %s' % (oi,))
-                    continue
+        #watchlist items in the ddl queue, plus one-offs that were sent to it (less anything already listed off the watchlist).
+        s_line = "SELECT a.ComicName, a.ComicVersion, a.ComicID, a.ComicYear, b.Issue_Number, b.IssueID, c.series as filename, c.size, c.status, c.id, c.updated_date, c.issues, c.year, c.pack, c.link_type FROM comics as a INNER JOIN issues as b ON a.ComicID = b.ComicID INNER JOIN ddl_info as c ON b.IssueID = c.IssueID"
+        o_line = "SELECT a.ComicName, NULL as ComicVersion, a.ComicID, NULL as ComicYear, b.Issue_Number, a.IssueID, c.series as filename, c.size, c.status, c.id, c.updated_date, c.issues, c.year, c.pack, c.link_type FROM oneoffhistory a JOIN snatched b ON a.issueid=b.issueid JOIN ddl_info c ON b.issueid=c.issueid WHERE b.provider LIKE 'DDL%' AND c.id NOT IN (SELECT c.id FROM issues b INNER JOIN ddl_info c ON b.IssueID = c.IssueID WHERE c.id IS NOT NULL)"
+        source = "SELECT q.*, CASE WHEN q.pack THEN q.filename ELSE q.ComicName END AS SortName, CASE WHEN q.status='Completed' THEN '100%%' ELSE '' END AS progress FROM (%s UNION ALL %s) q" % (s_line, o_line)
+        dt = datatables.DataTable(source, tables=('ddl_info', 'comics', 'issues', 'oneoffhistory', 'snatched'))
+        #the issue number & year are part of the displayed series line, so they're searchable too.
+        dt.search(sSearch, ['ComicName', 'filename', 'status', 'Issue_Number', 'ComicYear', 'year'])
+        sortcols = {'1': 'SortName',
+                    '2': 'size',
+                    '3': 'progress',
+                    '4': 'status',
+                    '5': 'updated_date'}
+        dt.order(sortcols, iSortCol_0, sSortDir_0, default='SortName')
+        total, display_total, results = dt.fetch(iDisplayStart, iDisplayLength)
 
-                if oi['issues'] is None:
-                    issue = oi['Issue_Number']
-                    year = oi['year']
-                    if issue is not None:
-                        issue = '#%s' % issue
-                else:
-                    year = oi['year']
-                    issue = '#%s' % oi['issues']
+        rows = []
+        for si in results:
+            if si['issues'] is None:
+                issue = si['Issue_Number']
+                year = si['ComicYear'] if si['ComicYear'] is not None else si['year']
+                if issue is not None:
+                    issue = '#%s' % issue
+            else:
+                year = si['year']
+                issue = '#%s' % si['issues']
 
-                if oi['status'] == 'Completed':
-                    oi_status = '100%'
+            if si['pack']:
+                if si['year'] not in si['filename']:
+                    series = '%s (%s)' % (si['filename'], si['year'])
                 else:
-                    oi_status = ''
-
-                if oi['pack']:
-                    if oi['year'] not in oi['filename']:
-                        series = '%s (%s)' % (oi['filename'], oi['year'])
+                    series = si['filename']
+            else:
+                if issue is not None:
+                    if si['ComicVersion'] is not None:
+                        series = '%s %s %s (%s)' % (si['ComicName'], si['ComicVersion'], issue, year)
                     else:
-                        series = oi['filename']
+                        series = '%s %s (%s)' % (si['ComicName'], issue, year)
                 else:
-                    if issue is not None:
-                        series = '%s %s (%s)' % (oi['ComicName'], issue, year)
+                    if si['ComicVersion'] is not None:
+                        series = '%s %s (%s)' % (si['ComicName'], si['ComicVersion'], year)
                     else:
-                        series = '%s (%s)' % (oi['ComicName'], year)
-
-                resultlist.append({'series':       series,
-                                   'issue':        issue,
-                                   'queueid':      oi['id'],
-                                   'volume':       None,
-                                   'linktype':     oi['link_type'],
-                                   'year':         year,
-                                   'size':         oi['size'].strip(),
-                                   'comicid':      oi['ComicID'],
-                                   'issueid':      oi['IssueID'],
-                                   'status':       oi['status'],
-                                   'updated_date': oi['updated_date'],
-                                   'progress':     oi_status})
+                        series = '%s (%s)' % (si['ComicName'], year)
 
-            #logger.info('o_info: %s' % (resultlist))
+            rows.append([series, si['size'].strip(), si['progress'], si['status'], si['updated_date'], si['id'], si['IssueID'], si['ComicID'], si['link_type']])
 
-        if sSearch == "" or sSearch == None:
-            filtered = resultlist[::]
-        else:
-            filtered = [row for row in resultlist if any([sSearch.lower() in row['series'].lower(), sSearch.lower() in row['status'].lower()])]
-        sortcolumn = 'series'
-        if iSortCol_0 == '1':
-            sortcolumn = 'series'
-        elif iSortCol_0 == '2':
-            sortcolumn = 'size'
-        elif iSortCol_0 == '3':
-            sortcolumn = 'progress'
-        elif iSortCol_0 == '4':
-            sortcolumn = 'status'
-        elif iSortCol_0 == '5':
-            sortcolumn = 'updated_date'
-        filtered.sort(key=lambda x: (x[sortcolumn] is None, x[sortcolumn] == '', x[sortcolumn]), reverse=sSortDir_0 == "desc")
-        if iDisplayLength != -1:
-            rows = filtered[iDisplayStart:(iDisplayStart + iDisplayLength)]
-        else:
-            rows = filtered
-        rows = [[row['series'], row['size'], row['progress'], row['status'], row['updated_date'], row['queueid'], row['issueid'], row['comicid'], row['linktype']] for row in rows]
-        #rows = [{'comicid': row['comicid'], 'series': row['series'], 'size': row['size'], 'progress': row['progress'], 'status': row['status'], 'updated_date': row['updated_date']} for row in rows]
-        #logger.info('rows: %s' % rows)
         return json.dumps({
-            'iTotalDisplayRecords': len(filtered),
-            'iTotalRecords': len(resultlist),
+            'iTotalDisplayRecords': display_total,
+            'iTotalRecords': total,
             'aaData': rows,
         })
 
@@ -4206,7 +3994,7 @@ class WebInterface(object):
                             'status': status})
             jobresults = tmp
         queues = helpers.queue_info()
-        return serve_template(templatename="manage.html", title="Manage", mylarRoot=mylarRoot, jobs=jobresults, queues=queues, scan_info=scan_info)
+        return serve_template(templatename="manage.html", title="Manage", mylarRoot=mylarRoot, jobs=jobresults, queues=queues, scan_info=scan_info, perf=metrics.summary(top=5))
     manage.exposed = True
 
     def jobmanage(self, job, mode):
@@ -4534,20 +4322,20 @@ class WebInterface(object):
                         updater.forceRescan(cid)
                     cnt+=1
                 logger.info('[MASS BATCH][RECHECK-FILES] I have completed rechecking files for ' + str(len(ComicID)) + ' series.')
-                mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicid': None, 'tables': None, 'message': 'Finished Rechecking files for %s series' % (len(ComicID))}
+                mylar.events.publish({'status': 'success', 'comicid': None, 'tables': None, 'message': 'Finished Rechecking files for %s series' % (len(ComicID))})
             else:
                 for cid in ComicID:
                     logger.info('[MASS BATCH][METATAGGING-FILES][' + str(cnt) + '/' + str(len(ComicID)) + '] Now Preparing to metatag series for ' + cid['ComicName'] + '(' + str(cid['ComicYear']) + ')')
                     self.group_metatag(ComicID=cid['ComicID'], threaded=True)
                     cnt+=1
                 logger.info('[MASS BATCH][METATAGGING-FILES] I have completed metatagging files for ' + str(len(ComicID)) + ' series.')
-                mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicid': None, 'tables': 'both', 'message': 'Finished complete series (re)tagging of %s of %s (%s)' % (str(len(ComicID)), comicinfo['ComicName'], comicinfo['ComicYear'])}
+                mylar.events.publish({'status': 'success', 'comicid': None, 'tables': 'both', 'message': 'Finished complete series (re)tagging of %s of %s (%s)' % (str(len(ComicID)), comicinfo['ComicName'], comicinfo['ComicYear'])})
         else:
             myDB = db.DBConnection()
             cline = myDB.selectone("SELECT ComicName, ComicYear FROM comics WHERE ComicID=?", [ComicID]).fetchone()
             if cline:
                 updater.forceRescan(ComicID)
-                mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': cline['ComicName'], 'seriesyear': cline['ComicYear'], 'comicid': ComicID, 'tables': 'both', 'message': 'Recheck Files completed for %s (%s)' % (cline['ComicName'], cline['ComicYear'])}
+                mylar.events.publish({'status': 'success', 'comicname': cline['ComicName'], 'seriesyear': cline['ComicYear'], 'comicid': ComicID, 'tables': 'both', 'message': 'Recheck Files completed for %s (%s)' % (cline['ComicName'], cline['ComicYear'])})
 
     forceRescan.exposed = True
 
@@ -4561,81 +4349,29 @@ class WebInterface(object):
     history.exposed = True
 
     def loadhistory(self, iDisplayStart=0, iDisplayLength=100, iSortCol_0=5, sSortDir_0="desc", sSearch="", **kwargs):
-        myDB = db.DBConnection()
-        r_list = myDB.select("select b.StoryArcID, b.StoryArc, b.IssueArcID, a.*, c.weeknumber, c.year from snatched a left join storyarcs b on b.issueid=a.issueid left join oneoffhistory c on a.issueid=c.issueid order by DateAdded DESC")
-        iDisplayStart = int(iDisplayStart)
-        iDisplayLength = int(iDisplayLength)
-        resultlist = []
-        watchlist = helpers.listLibrary()
-        for rt in r_list:
-            tmplist = {'StoryArc': rt['StoryArc'],
-                       'StoryArcID': rt['StoryArcID'],
-                       'IssueArcID': rt['IssueArcID'],
-                       'ComicName': rt['ComicName'],
-                       'Issue_Number': rt['Issue_Number'],
-                       'Status': rt['Status'],
-                       'DateAdded': rt['DateAdded'],
-                       'Provider': rt['Provider'],
-                       'IssueID': rt['IssueID'],
-                       'ComicID': rt['ComicID'],
-                       'weeknumber': rt['weeknumber'],
-                       'weekyear': rt['year'],
-                       'Oneoff':  None}
-
-            if rt['IssueID'] is not None and all(['_' in rt['IssueID'], rt['StoryArc'] is None]):
-                tmp = myDB.selectone("Select StoryArc FROM storyarcs where IssueArcID=?", [re.sub('S', '', rt['IssueID'])]).fetchone()
-                if tmp:
-                    tmplist['StoryArc'] = tmp['StoryArc']
-
-            resultlist.append(tmplist)
-
-        filtered = []
-        if sSearch == "" or sSearch == None:
-            filtered = resultlist[::]
-        else:
-            searchname = sSearch.split()
-            searchname = '*'.join(searchname)
-            searchname = re.sub('[\:\-\%\$\#\@\!\.\,\;\/\(\)\+\=\?]','*', sSearch.lower())
-            searchpattern = '*%s*' % re.sub('\s','*', searchname.lower())
-            for row in resultlist:
-                searchname = fnmatch.fnmatch(row['ComicName'].lower(), searchpattern)
-                if row['StoryArc'] is not None:
-                    if not searchname:
-                        searchname = fnmatch.fnmatch(row['StoryArc'].lower(), searchpattern)
-                    if any([searchname is True, sSearch.lower() in row['Status'].lower(), sSearch.lower() in row['DateAdded'], sSearch.lower() in row['Issue_Number']]):
-                        filtered.append(row)
-                else:
-                    if any([searchname is True, sSearch.lower() in row['Status'].lower(), sSearch.lower() in row['DateAdded'], sSearch.lower() in row['Issue_Number']]):
-                        filtered.append(row)
-
-        sortcolumn = 'DateAdded'
-        if iSortCol_0 == '1':
-            sortcolumn = 'DateAdded'
-        if iSortCol_0 == '2':
-            sortcolumn = 'ComicName'
-        elif iSortCol_0 == '3':
-            sortcolumn = 'Issue_Number'
-        elif iSortCol_0 == '4':
-            sortcolumn = 'Status'
-        #below sort is for multi-sort columns, maybe make them user configurable - not sure how to pass mutli-sort thru otherwise
-        #filtered.sort(key= itemgetter(sortcolumn2, sortcolumn), reverse=sSortDir_0 == "desc")
+        #story-arc only snatches carry the IssueArcID (prefixed with an S) as their IssueID, so the arc name is looked up that way when the join misses.
+        arcline = "CASE WHEN b.StoryArc IS NULL AND a.IssueID LIKE '%!_%' ESCAPE '!' THEN (SELECT StoryArc FROM storyarcs WHERE IssueArcID=REPLACE(a.IssueID, 'S', '') LIMIT 1) ELSE b.StoryArc END"
+        source = "SELECT b.StoryArcID, %s AS StoryArc, b.IssueArcID, a.ComicName, a.Issue_Number, a.Status, a.DateAdded, a.Provider, a.IssueID, a.ComicID, c.weeknumber, c.year FROM snatched a LEFT JOIN storyarcs b ON b.IssueID=a.IssueID LEFT JOIN oneoffhistory c ON a.IssueID=c.IssueID" % arcline
+        dt = datatables.DataTable(source, tables=('snatched', 'storyarcs', 'oneoffhistory'))
+        dt.search(sSearch, ['ComicName', 'StoryArc', 'Status', 'DateAdded', 'Issue_Number'], loose=True)
+        #the history table lists newest first on an ascending sort, so the direction is flipped.
+        sortcols = {'1': 'DateAdded',
+                    '2': 'ComicName',
+                    '3': 'Issue_Number',
+                    '4': 'Status'}
+        dt.order(sortcols, iSortCol_0, 'desc' if sSortDir_0 == 'asc' else 'asc', default='DateAdded')
+        total, display_total, trows = dt.fetch(iDisplayStart, iDisplayLength)
 
-        filtered.sort(key=lambda x: (x[sortcolumn] is None, x[sortcolumn] == '', x[sortcolumn]), reverse=sSortDir_0 == "asc")
-        if iDisplayLength != -1:
-            trows = filtered[iDisplayStart:(iDisplayStart + iDisplayLength)]
-        else:
-            trows = filtered
         rows = []
         for r in trows:
-            tmpr = r
-            if all([r['ComicID'] not in watchlist, r['weeknumber'] is not None, r['StoryArc'] is None]):
-                tmpr['Oneoff'] = '%s-%s' % (r['weeknumber'], r['weekyear'])
-            rows.append(tmpr)
+            oneoff = None
+            if all([library.LIBRARY.status(r['ComicID']) is None, r['weeknumber'] is not None, r['StoryArc'] is None]):
+                oneoff = '%s-%s' % (r['weeknumber'], r['year'])
+            rows.append([r['DateAdded'], r['ComicName'], r['Issue_Number'], r['Status'], r['IssueID'], r['ComicID'], r['Provider'], r['StoryArc'], r['IssueArcID'], r['StoryArcID'], oneoff])
 
-        rows = [[row['DateAdded'], row['ComicName'], row['Issue_Number'], row['Status'], row['IssueID'], row['ComicID'], row['Provider'], row['StoryArc'], row['IssueArcID'], row['StoryArcID'], row['Oneoff']] for row in rows]
         return json.dumps({
-            'iTotalDisplayRecords': len(filtered),
-            'iTotalRecords': len(resultlist),
+            'iTotalDisplayRecords': display_total,
+            'iTotalRecords': total,
             'aaData': rows,
         })
     loadhistory.exposed = True
@@ -5132,18 +4868,13 @@ class WebInterface(object):
                             "yearRANGE":   [str(Arc_MS['SeriesYear'])]}) #Arc_MS['SeriesYear']})
 
             for MSCheck in AMS:
-                thischk = myDB.select('SELECT * FROM storyarcs WHERE ComicName=? AND SeriesYear=?', [MSCheck['ComicName'], MSCheck['SeriesYear']])
+                #ordered on the stored Int_IssueNumber, so the lowest & highest issue numbers are just the ends of the list.
+                thischk = myDB.select('SELECT * FROM storyarcs WHERE ComicName=? AND SeriesYear=? ORDER BY Int_IssueNumber', [MSCheck['ComicName'], MSCheck['SeriesYear']])
+                ranked = [x for x in thischk if x['Int_IssueNumber'] is not None]
+                if ranked:
+                    MSCheck['lowvalue'] = ranked[0]['IssueNumber']
+                    MSCheck['highvalue'] = ranked[-1]['IssueNumber']
                 for tchk in thischk:
-                    if helpers.issuedigits(tchk['IssueNumber']) > helpers.issuedigits(MSCheck['highvalue']):
-                        for key in list(MSCheck.keys()):
-                            if key == "highvalue":
-                                MSCheck[key] = tchk['IssueNumber']
-
-                    if helpers.issuedigits(tchk['IssueNumber']) < helpers.issuedigits(MSCheck['lowvalue']):
-                        for key in list(MSCheck.keys()):
-                            if key == "lowvalue":
-                                MSCheck[key] = tchk['IssueNumber']
-
                     logger.fdebug(str(tchk['IssueYear']))
                     logger.fdebug(MSCheck['yearRANGE'])
                     if str(tchk['IssueYear']) not in str(MSCheck['yearRANGE']):
@@ -5315,7 +5046,12 @@ class WebInterface(object):
                 if mylar.CONFIG.ANNUALS_ON:
                     dyn_name = re.sub('2021annual', '', dyn_name).strip()
                     dyn_name = re.sub('annual', '', dyn_name).strip()
-                comics = myDB.select("SELECT * FROM comics WHERE DynamicComicName IN (?) COLLATE NOCASE",[dyn_name])
+                #only pull the watched series that share the (normalized) name - straight from the library index.
+                arc_ids = library.LIBRARY.ids_for_name(arc['DynamicComicName'], annuals=mylar.CONFIG.ANNUALS_ON)
+                if arc_ids:
+                    comics = myDB.select("SELECT * FROM comics WHERE ComicID IN ({seq})".format(seq=','.join(['?'] * len(arc_ids))), list(arc_ids))
+                else:
+                    comics = []
 
                 for comic in comics:
                     mod_watch = comic['DynamicComicName'] #is from the comics db
@@ -7643,29 +7379,40 @@ class WebInterface(object):
         return data
 
     api.exposed = True
+    api._cp_config = {'response.stream': True}
 
-    def prometheus_metrics(self):
+    def metrics(self):
         logger.debug("Responding to Prometheus metrics request")
-        cherrypy.response.headers['Content-Type'] = "text/plain"
-        q_metrics = {name: {} for name in ["alive", "size", "started"]}
-        for q in helpers.queue_info():
-            normalised_name = q.name.replace("-", "_")
-
-            q_metrics["size"][normalised_name] = q.size
-            q_metrics["started"][normalised_name] = "1" if q.is_alive is not None else "0"
-            q_metrics["alive"][normalised_name] = "1" if q.is_alive else "0"
-
-        response = ""
-        for metric, items in q_metrics.items():
-            full_metric = f"mylar_queue_{metric}"
-            response += f"# TYPE {full_metric} gauge\n"
-            for name, value in items.items():
-                response += '%s{queue="%s"} %s\n' % (full_metric, name, value)
-            response += "\n"
-        return response
+        cherrypy.response.headers['Content-Type'] = "text/plain; version=0.0.4"
+        return metrics.prometheus()
+    metrics.exposed = True
 
+    def prometheus_metrics(self):
+        #original endpoint - kept so existing scrape configs carry on working.
+        return self.metrics()
     prometheus_metrics.exposed = True
 
+    def metrics_summary(self, reset=False):
+        if reset in (True, 'true', '1'):
+            metrics.reset()
+        cherrypy.response.headers['Content-Type'] = "application/json"
+        return json.dumps(metrics.summary())
+    metrics_summary.exposed = True
+
+    def profile_dump(self, seconds=10):
+        #opt-in sampling profiler - blocks this request for the duration and returns collapsed stacks.
+        if mylar.CONFIG.METRICS_PROFILER is False:
+            raise cherrypy.HTTPError(403, 'The sampling profiler is disabled (enable metrics_profiler in the config).')
+        try:
+            seconds = min(max(int(seconds), 1), 120)
+        except ValueError:
+            seconds = 10
+        logger.info('[METRICS] Sampling all threads for %s seconds' % seconds)
+        cherrypy.response.headers['Content-Type'] = "text/plain"
+        cherrypy.response.headers['Content-Disposition'] = 'attachment; filename="mylar-profile-%s.txt"' % int(time.time())
+        return metrics.profile(seconds)
+    profile_dump.exposed = True
+
     def opds(self, *args, **kwargs):
         from mylar.opds import OPDS
 
@@ -7938,7 +7685,7 @@ class WebInterface(object):
             if not issuedata:
                 issuedata = myDB.selectone('SELECT a.ComicVersion, a.ComicLocation, a.ComicYear, a.AgeRating, b.* FROM comics a LEFT JOIN annuals b ON a.ComicID=b.ComicID WHERE b.IssueID=? AND NOT b.Deleted', [issueid]).fetchone()
                 if not issuedata:
-                    mylar.GLOBAL_MESSAGES = {'status': 'failure', 'comicname': None, 'seriesyear': None, 'comicid': comicid, 'tables': 'both', 'message': 'Unable to locate corresponding issueid: %s' % issueid}
+                    mylar.events.publish({'status': 'failure', 'comicname': None, 'seriesyear': None, 'comicid': comicid, 'tables': 'both', 'message': 'Unable to locate corresponding issueid: %s' % issueid})
                     return
 
             comversion = issuedata['ComicVersion']
@@ -7969,7 +7716,7 @@ class WebInterface(object):
 
             if not os.path.exists(filename):
                 logger.warn('%s %s does not exist in the given location. Cannot metatag this filename due to this.' % (module, filename))
-                mylar.GLOBAL_MESSAGES = {'status': 'failure', 'comicname': None, 'seriesyear': None, 'comicid': comicid, 'tables': 'both', 'message': 'Unable to locate corresponding filename: %s' % filename}
+                mylar.events.publish({'status': 'failure', 'comicname': None, 'seriesyear': None, 'comicid': comicid, 'tables': 'both', 'message': 'Unable to locate corresponding filename: %s' % filename})
                 return
 
             comicid = issuedata['ComicID']
@@ -8003,11 +7750,11 @@ class WebInterface(object):
 
         if metaresponse == "fail":
             logger.fdebug(module + ' Unable to write metadata successfully - check mylar.log file.')
-            mylar.GLOBAL_MESSAGES = {'status': 'failure', 'comicname': comicname, 'seriesyear': seriesyear, 'comicid': comicid, 'tables': 'both', 'message': 'Unable to write metadata - there were errors. Check the log files'}
+            mylar.events.publish({'status': 'failure', 'comicname': comicname, 'seriesyear': seriesyear, 'comicid': comicid, 'tables': 'both', 'message': 'Unable to write metadata - there were errors. Check the log files'})
             return
         elif metaresponse == "unrar error":
             logger.error(module + ' This is a corrupt archive - whether CRC errors or it is incomplete. Marking as BAD, and retrying a different copy.')
-            mylar.GLOBAL_MESSAGES = {'status': 'failure', 'comicname': comicname, 'seriesyear': seriesyear, 'comicid': comicid, 'tables': 'both', 'message': '%s is a corrupt archive.' % dst_filename}
+            mylar.events.publish({'status': 'failure', 'comicname': comicname, 'seriesyear': seriesyear, 'comicid': comicid, 'tables': 'both', 'message': '%s is a corrupt archive.' % dst_filename})
             return
             #launch failed download handling here.
         else:
@@ -8063,9 +7810,9 @@ class WebInterface(object):
         if all([group is False, fail is False]):
             updater.forceRescan(comicid)
             if group is False:
-                mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': comicname, 'seriesyear': seriesyear, 'comicid': comicid, 'tables': 'both', 'message': 'Successfully meta-tagged %s' % dst_filename}
+                mylar.events.publish({'status': 'success', 'comicname': comicname, 'seriesyear': seriesyear, 'comicid': comicid, 'tables': 'both', 'message': 'Successfully meta-tagged %s' % dst_filename})
         elif all([group is False, fail is True]):
-            mylar.GLOBAL_MESSAGES = {'status': 'failure', 'comicname': comicname, 'seriesyear': seriesyear, 'comicid': comicid, 'tables': 'both', 'message': 'Metatagging was not successful for %s' % dst_filename}
+            mylar.events.publish({'status': 'failure', 'comicname': comicname, 'seriesyear': seriesyear, 'comicid': comicid, 'tables': 'both', 'message': 'Metatagging was not successful for %s' % dst_filename})
 
     manual_metatag.exposed = True
 
@@ -8092,7 +7839,7 @@ class WebInterface(object):
         if mylar.CONFIG.CV_BATCH_LIMIT_PROTECTION and len(groupinfo) > mylar.CONFIG.CV_BATCH_LIMIT_THRESHOLD:
             warningMessage = f"CV Batch Limit Protection ({mylar.CONFIG.CV_BATCH_LIMIT_THRESHOLD}) has been triggered trying to tag {len(groupinfo)} issues.  This will likely breach ComicVine API Limits."
             logger.warn(f"[SERIES-METATAGGER][{comicinfo['ComicName']} ({comicinfo['ComicYear']})] {warningMessage}")
-            mylar.GLOBAL_MESSAGES = {'status': 'failure', 'comicname': cinfo['ComicName'], 'seriesyear': cinfo['ComicYear'], 'comicid': ComicID, 'tables': 'both', 'message': warningMessage}
+            mylar.events.publish({'status': 'failure', 'comicname': cinfo['ComicName'], 'seriesyear': cinfo['ComicYear'], 'comicid': ComicID, 'tables': 'both', 'message': warningMessage})
             return
         
         issueinfo = []
@@ -8117,7 +7864,7 @@ class WebInterface(object):
         issueline = '%s issues' % len(issueinfo)
         if len(issueinfo) == 1:
             issueline = '1 issue'
-        mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': comicinfo['ComicName'], 'seriesyear': comicinfo['ComicYear'], 'comicid': comicinfo['ComicID'], 'tables': 'both', 'message': 'Finished (re)tagging of %s of %s (%s)' % (issueline, comicinfo['ComicName'], comicinfo['ComicYear'])}
+        mylar.events.publish({'status': 'success', 'comicname': comicinfo['ComicName'], 'seriesyear': comicinfo['ComicYear'], 'comicid': comicinfo['ComicID'], 'tables': 'both', 'message': 'Finished (re)tagging of %s of %s (%s)' % (issueline, comicinfo['ComicName'], comicinfo['ComicYear'])})
     thread_that_bulk_meta.exposed = True
 
     def group_metatag(self, ComicID, threaded=False):
@@ -8142,7 +7889,7 @@ class WebInterface(object):
         if mylar.CONFIG.CV_BATCH_LIMIT_PROTECTION and len(groupinfo) > mylar.CONFIG.CV_BATCH_LIMIT_THRESHOLD:
             warningMessage = f"CV Batch Limit Protection ({mylar.CONFIG.CV_BATCH_LIMIT_THRESHOLD}) has been triggered trying to tag {len(groupinfo)} issues.  This will likely breach ComicVine API Limits."
             logger.warn(f"[SERIES-METATAGGER][{comicinfo['ComicName']} ({comicinfo['ComicYear']})] {warningMessage}")
-            mylar.GLOBAL_MESSAGES = {'status': 'failure', 'comicname': cinfo['ComicName'], 'seriesyear': cinfo['ComicYear'], 'comicid': ComicID, 'tables': 'both', 'message': warningMessage}
+            mylar.events.publish({'status': 'failure', 'comicname': cinfo['ComicName'], 'seriesyear': cinfo['ComicYear'], 'comicid': ComicID, 'tables': 'both', 'message': warningMessage})
             return
 
         issueinfo = []
@@ -8167,7 +7914,7 @@ class WebInterface(object):
         issueline = '%s issues' % len(issueinfo)
         if len(issueinfo) == 1:
             issueline = '1 issue'
-        mylar.GLOBAL_MESSAGES = {'status': 'success', 'comicname': comicinfo['ComicName'], 'seriesyear': comicinfo['ComicYear'], 'comicid': comicinfo['ComicID'], 'tables': 'both', 'message': 'Finished complete series (re)tagging of %s of %s (%s)' % (issueline, comicinfo['ComicName'], comicinfo['ComicYear'])}
+        mylar.events.publish({'status': 'success', 'comicname': comicinfo['ComicName'], 'seriesyear': comicinfo['ComicYear'], 'comicid': comicinfo['ComicID'], 'tables': 'both', 'message': 'Finished complete series (re)tagging of %s of %s (%s)' % (issueline, comicinfo['ComicName'], comicinfo['ComicYear'])})
     thread_that_meta.exposed = True
 
     def CreateFolders(self, createfolders=None):
@@ -8703,15 +8450,14 @@ class WebInterface(object):
         if weeknumber is not None:
             myDB = db.DBConnection()
             w_results = myDB.select("SELECT * from weekly WHERE weeknumber=? AND year=?", [int(weeknumber),int(year)])
-            watchlibrary = helpers.listLibrary()
             issueLibrary = helpers.listIssues(weeknumber, year)
             oneofflist = helpers.listoneoffs(weeknumber, year)
             for weekly in w_results:
                 xfound = False
                 tmp_status = weekly['Status']
                 issdate = None
-                if weekly['ComicID'] in watchlibrary:
-                    haveit = watchlibrary[weekly['ComicID']]
+                if library.LIBRARY.status(weekly['ComicID']) is not None:
+                    haveit = library.LIBRARY.watchlist()[weekly['ComicID']]
 
                     if all([mylar.CONFIG.AUTOWANT_UPCOMING, tmp_status == 'Skipped']):
                         tmp_status = 'Wanted'
@@ -9392,7 +9138,6 @@ class WebInterface(object):
     editDetails.exposed = True
 
     def addMissingSeriesFromArc(self, storyarcid):
-        watchlibrary = helpers.listLibrary()
         watch = []
         storyarcname = None
 
@@ -9403,7 +9148,7 @@ class WebInterface(object):
             if storyarcname is None and ac['StoryArc'] is not None:
                 storyarcname = ac['StoryArc']
 
-            if not ac['ComicID'] in watchlibrary:
+            if library.LIBRARY.status(ac['ComicID']) is None:
                 if not {"comicid": ac['ComicID'], "comicname": ac['ComicName']} in mylar.ADD_LIST.queue:
                     watch.append({"comicid": ac['ComicID'], "comicname": ac['ComicName'], "seriesyear": ac['SeriesYear']})
 
@@ -17,12 +17,13 @@
 
 import os
 import sys
+import threading
 
 import cherrypy
 import portend as portend
 
 import mylar
-from mylar import logger
+from mylar import logger, webserve, events
 from mylar.webserve import WebInterface
 from mylar.helpers import create_https_certificates
 from mylar.api import REST
@@ -52,7 +53,8 @@ def initialize(options):
     options_dict = {
         'server.socket_port': options['http_port'],
         'server.socket_host': options['http_host'],
-        'server.thread_pool': 10,
+        #the usual 10 for page / api requests, plus one for each event stream that can be open.
+        'server.thread_pool': 10 + events.MAX_STREAMS,
         'tools.encode.on': True,
         'tools.encode.encoding': 'utf-8',
         'tools.encode.text_only': False,
@@ -176,6 +178,7 @@ def initialize(options):
     restroot.comics = restroot.Comics()
     restroot.comic = restroot.Comic()
     restroot.watchlist = restroot.Watchlist()
+    restroot.changes = restroot.Changes()
     #restroot.issues = restroot.comic.Issues()
     #restroot.issue = restroot.comic.Issue()
     cherrypy.tree.mount(restroot, '/rest', config = rest_api)
@@ -189,3 +192,6 @@ def initialize(options):
         sys.exit(0)
 
     cherrypy.server.wait()
+
+    #compile the templates in the background so the first page loads don't have to.
+    threading.Thread(target=webserve.warm_templates, name='TEMPLATE-WARMUP', daemon=True).start()
@@ -4,7 +4,6 @@ import cherrypy
 import stat
 import zipfile
 import urllib.parse
-from lib.rarfile import rarfile
 
 import mylar
 
@@ -141,6 +140,7 @@ class ComicScanner(object):
                 os.chmod(os.path.join(root, d), stat.S_IRWXU | stat.S_IRWXG | stat.S_IRWXO)  # 0777
                 os.rmdir(os.path.join(root, d))
         if comic_path.endswith(".cbr"):
+            from lib.rarfile import rarfile
             opened_rar = rarfile.RarFile(comic_path)
             opened_rar.extractall(os.path.join(mylar.CONFIG.CACHE_DIR, "webviewer", ish_id))
         elif comic_path.endswith(".cbz"):
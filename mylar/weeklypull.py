@@ -31,7 +31,7 @@ import traceback
 import json
 
 import mylar
-from mylar import db, updater, helpers, logger, newpull, importer, mb, locg, webserve
+from mylar import db, updater, helpers, library, logger, newpull, importer, mb, locg, webserve
 
 def pullit(forcecheck=None, weeknumber=None, year=None):
     myDB = db.DBConnection()
@@ -895,10 +895,21 @@ def new_pullcheck(weeknumber, pullyear, comic1off_name=None, comic1off_id=None,
     watchlist = []
     weeklylist = []
     pullist = helpers.listPull(weeknumber,pullyear)
+    pull_ids = set([str(pls) for pls in pullist])
     if comic1off_name:
         comiclist = myDB.select("SELECT * FROM comics WHERE Status='Active' AND ComicID=?",[comic1off_id])
+        annualist = myDB.select('SELECT ComicID, ReleaseComicID, ReleaseComicName FROM annuals WHERE ComicID=? AND NOT Deleted', [comic1off_id])
     else:
         comiclist = myDB.select("SELECT * FROM comics WHERE Status='Active'")
+        annualist = myDB.select("SELECT a.ComicID, a.ReleaseComicID, a.ReleaseComicName FROM annuals AS a INNER JOIN comics AS c ON a.ComicID = c.ComicID WHERE c.Status='Active' AND NOT a.Deleted")
+
+    #pull in the annual IDs attached to each series here for pinpoint accuracy (one query rather than one per series).
+    annual_map = {}
+    for an in annualist:
+        annual_ids = annual_map.setdefault(an['ComicID'], [])
+        if not any([x for x in annual_ids if x['ComicID'] == an['ReleaseComicID']]):
+            annual_ids.append({'ComicID':    an['ReleaseComicID'],
+                               'ComicName':  an['ReleaseComicName']})
 
     if comiclist is None:
         pass
@@ -921,9 +932,9 @@ def new_pullcheck(weeknumber, pullyear, comic1off_name=None, comic1off_id=None,
 
     if len(watchlist) > 0:
         for watch in watchlist:
-            listit = [pls for pls in pullist if str(pls) == str(watch['ComicID'])] 
+            listit = str(watch['ComicID']) in pull_ids
             #logger.info('listit: %s' % listit)
-            if 'Present' in watch['ComicPublished'] or (helpers.now()[:4] in watch['ComicPublished']) or watch['ForceContinuing'] == 1 or len(listit) >0:
+            if 'Present' in watch['ComicPublished'] or (helpers.now()[:4] in watch['ComicPublished']) or watch['ForceContinuing'] == 1 or listit:
                 # this gets buggered up when series are named the same, and one ends in the current
                 # year, and the new series starts in the same year - ie. Avengers
                 # lets' grab the latest issue date and see how far it is from current
@@ -955,10 +966,10 @@ def new_pullcheck(weeknumber, pullyear, comic1off_name=None, comic1off_id=None,
                 #logger.fdebug("c_date : " + str(c_date) + " ... n_date : " + str(n_date))
                 recentchk = (n_date - c_date).days
                 #logger.fdebug("recentchk: " + str(recentchk) + " days")
-                chklimit = helpers.checkthepub(watch['ComicID'])
+                chklimit = helpers.checkthepub(watch['ComicID'], publisher=watch['ComicPublisher'])
                 #logger.fdebug("Check date limit set to : " + str(chklimit))
                 #logger.fdebug(" ----- ")
-                if recentchk < int(chklimit) or watch['ForceContinuing'] == 1 or len(listit) > 0:
+                if recentchk < int(chklimit) or watch['ForceContinuing'] == 1 or listit:
                     if watch['ForceContinuing'] == 1:
                         logger.fdebug('Forcing Continuing Series enabled for %s [%s]' % (watch['ComicName'],watch['ComicID']))
                     # let's not even bother with comics that are not in the Present.
@@ -970,17 +981,7 @@ def new_pullcheck(weeknumber, pullyear, comic1off_name=None, comic1off_id=None,
                         for alt in Altload['AlternateName']:
                             altnames.append(alt['AlternateName'])
 
-                    #pull in the annual IDs attached to the given series here for pinpoint accuracy.
-                    annualist = myDB.select('SELECT * FROM annuals WHERE ComicID=? AND NOT Deleted', [watch['ComicID']])
-                    annual_ids = []
-                    if annualist is None:
-                        pass
-                    else:
-                        for an in annualist:
-                            #logger.info('annuals for %s: %s' % (an['ReleaseComicName'], an['ReleaseComicID']))
-                            if not any([x for x in annual_ids if x['ComicID'] == an['ReleaseComicID']]):
-                                annual_ids.append({'ComicID':    an['ReleaseComicID'],
-                                                   'ComicName':  an['ReleaseComicName']})
+                    annual_ids = annual_map.get(watch['ComicID'], [])
 
                     annDyn = re.sub('2021 annual', '', watch['DynamicName'].lower()).strip()
                     annDyn = re.sub('annual', '', annDyn.lower()).strip()
@@ -1007,6 +1008,24 @@ def new_pullcheck(weeknumber, pullyear, comic1off_name=None, comic1off_id=None,
         if not comic1off_id:
             logger.fdebug("[WALKSOFTLY] You are watching for: " + str(len(weeklylist)) + " comics")
 
+        #index the watched series by ComicID / annual ComicID / DynamicName so each pull entry is a dict lookup.
+        watch_ids = {}
+        watch_annual_ids = {}
+        watch_names = {}
+        for wl in weeklylist:
+            try:
+                watch_ids.setdefault(int(wl['ComicID']), []).append(wl)
+            except (TypeError, ValueError):
+                pass
+            for xa in wl['AnnualIDs']:
+                try:
+                    an_list = watch_annual_ids.setdefault(int(xa['ComicID']), [])
+                except (TypeError, ValueError):
+                    continue
+                if wl not in an_list:
+                    an_list.append(wl)
+            watch_names.setdefault(wl['DynamicName'], []).append(wl)
+
         weekly = myDB.select('SELECT * from(SELECT a.comicid,IFNULL(a.Comic, b.ComicName) as ComicName,NULL as SeriesYear,a.rowid,a.issue,a.issueid,NULL as ComicPublisher,a.weeknumber,a.shipdate,a.dynamicname,a.annuallink,a.format FROM weekly as a INNER JOIN annuals as b ON b.releasecomicid = a.comicid WHERE weeknumber = ? AND year = ? UNION SELECT a.comicid,IFNULL(a.Comic, c.ComicName) as ComicName,c.ComicYear as SeriesYear,a.rowid,a.issue,a.issueid,c.ComicPublisher,a.weeknumber,a.shipdate,a.dynamicname,a.annuallink,a.format FROM weekly as a INNER JOIN comics as c ON c.comicid = a.comicid OR c.DynamicComicName = a.dynamicname OR a.annuallink = c.comicid WHERE weeknumber = ? AND year = ?  ) GROUP BY dynamicname', [int(weeknumber),pullyear,int(weeknumber),pullyear])
         if mylar.CONFIG.ANNUALS_ON is True:
             #Need to loop over the weekly section and check the name of the title against the ComicName in the annuals table
@@ -1021,9 +1040,13 @@ def new_pullcheck(weeknumber, pullyear, comic1off_name=None, comic1off_id=None,
                 incomp_cv = False
                 if week is None:
                     break
-                idmatch = [x for x in weeklylist if week['comicid'] is not None and int(x['ComicID']) == int(week['comicid'])]
+                idmatch = []
+                if week['comicid'] is not None:
+                    idmatch = watch_ids.get(int(week['comicid']), [])
                 if mylar.CONFIG.ANNUALS_ON is True:
-                    annualidmatch = [x for x in weeklylist if week['comicid'] is not None and ([xa for xa in x['AnnualIDs'] if int(xa['ComicID']) == int(week['comicid'])])]
+                    annualidmatch = []
+                    if week['comicid'] is not None:
+                        annualidmatch = watch_annual_ids.get(int(week['comicid']), [])
                     if not annualidmatch:
                         annual_link = week['annuallink']
                         if annual_link is not None:
@@ -1032,10 +1055,12 @@ def new_pullcheck(weeknumber, pullyear, comic1off_name=None, comic1off_id=None,
                             except ValueError:
                                 logger.warn("[WEEKLY-PULL] %s #%s has an invalid annuallink value (%s): walksoftly data may be invalid; skipping", week['ComicName'], week['ISSUE'], week['annuallink'])
                                 continue
-                        annualidmatch = [x for x in weeklylist if annual_link is not None and (int(x['ComicID']) == annual_link)]
+                        annualidmatch = []
+                        if annual_link is not None:
+                            annualidmatch = watch_ids.get(annual_link, [])
 
                 #The above will auto-match against ComicID if it's populated on the pullsite, otherwise do name-matching.
-                namematch = [ab for ab in weeklylist if ab['DynamicName'] == week['dynamicname']]
+                namematch = watch_names.get(week['dynamicname'], [])
                 #logger.fdebug('rowid: ' + str(week['rowid']))
                 #logger.fdebug('idmatch: ' + str(idmatch))
                 #logger.fdebug('annualidmatch: ' + str(annualidmatch))
@@ -1367,7 +1392,6 @@ def new_pullcheck(weeknumber, pullyear, comic1off_name=None, comic1off_id=None,
 
 def mass_publishers(publishers, weeknumber, year):
 
-    watchlibrary = helpers.listLibrary()
     watch = []
 
     myDB = db.DBConnection()
@@ -1409,7 +1433,7 @@ def mass_publishers(publishers, weeknumber, year):
 
     if watchlist:
         for wt in watchlist:
-            if wt['ComicID'] not in watchlibrary and wt['ComicID'] is not None:
+            if wt['ComicID'] is not None and library.LIBRARY.status(wt['ComicID']) is None:
                 if not {"comicid": wt['ComicID'], "comicname": wt['COMIC']} in mylar.ADD_LIST.queue:
                     if wt['Publisher'] in mylar.CONFIG.IGNORED_PUBLISHERS:
                         logger.info("[SHIZZLE-WHIZZLE] %s is in your ignored_publishers list skipping %s either it's a configuration issue or a mismatch in the weekly pull-list" % (wt['Publisher'], wt['COMIC']))
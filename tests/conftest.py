@@ -0,0 +1,32 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# regression checks run offline against the same throwaway data dir / db the benchmarks use
+# (benchmarks/fixtures.py) - python -m pytest -q tests
+
+import os
+import sys
+
+import pytest
+
+PROG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(PROG_DIR, 'benchmarks'), os.path.join(PROG_DIR, 'lib'), PROG_DIR]
+
+import fixtures
+
+@pytest.fixture
+def mylar_env(tmp_path):
+    fixtures.setup(str(tmp_path))
+    return tmp_path
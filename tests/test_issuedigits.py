@@ -0,0 +1,68 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import sqlite3
+
+import pytest
+
+import fixtures
+import mylar
+from mylar import helpers
+
+#what the original (pre table-driven) issuedigits returned for each of these - Int_IssueNumber values already
+#stored in people's databases came from it, so the new one has to give back exactly the same.
+LEGACY = [
+    ('1', 1000), ('0', 0), ('001', 1000), ('12', 12000), ('1000', 1000000),
+    ('1.5', 1500), ('1.25', 1250), ('10.1', 10100), ('600.1', 600100), ('1.0', 1000),
+    ('0.5', 500), ('.5', 500), ('½', 500.0), ('1½', 1500.0), ('1/2', 1500),
+    ('∞', 9999999999000), ('-1', -1001), ('-1.5', -500),
+    ('1AU', 1214), ('2AI', 2202), ('3INH', 3319), ('4NOW', 4340), ('5BEY', 5320),
+    ('6MU', 6226), ('1.MU', 1226), ('7LR', 7222), ('8HU', 8221), ('1black', 1509), ('2deaths', 2633),
+    ('12a', 12097), ('12b', 12098), ('X', 120), ('Alpha', 518),
+    ('1-2', 1500), ('3-4', 3500),
+    ('9 1/2', 999999999999999), ('1 1/2', 999999999999999), ('Annual', 999999999999999),
+    ('#5', 999999999999999), ('5.', 999999999999999), ('13.1.1', 999999999999999), ('1:1', 999999999999999),
+    ('  7 ', 9999999999000), (None, 999999999999999), (7, 7000),
+]
+
+@pytest.mark.parametrize('issnum, expected', LEGACY)
+def test_issuedigits_matches_legacy(mylar_env, issnum, expected):
+    assert helpers.issuedigits(issnum) == expected
+    #and again, now that it's coming out of the cache.
+    assert helpers.issuedigits(issnum) == expected
+
+def test_issuedigits_list_matches_single(mylar_env):
+    issnums = [x[0] for x in LEGACY] * 3
+    assert helpers.issuedigits_list(issnums) == [helpers.issuedigits(x) for x in issnums]
+
+def test_stored_issuedigits_only_converts_missing(mylar_env):
+    rows = [{'Issue_Number': '5', 'Int_IssueNumber': 1234},
+            {'Issue_Number': '1AU', 'Int_IssueNumber': None},
+            {'Issue_Number': '2', 'Int_IssueNumber': 2000}]
+    assert helpers.stored_issuedigits(rows) == [1234, 1214, 2000]
+
+def test_pack_range_lookup(mylar_env):
+    series = fixtures.populate_db(1, 20)
+    comicid = series[0]['comicid']
+    conn = sqlite3.connect(mylar.DB_FILE)
+    conn.execute("UPDATE issues SET Status='Wanted' WHERE ComicID=?", [comicid])
+    conn.commit()
+    conn.close()
+
+    found = helpers.issue_find_ids(series[0]['name'], comicid, '#3-6', '4', 'pack1')
+    assert found['issue_range'] == [3, 4, 5, 6]
+    assert [x['int_iss'] for x in found['issues']] == [3000, 4000, 5000, 6000]
+    assert [x['issueid'] for x in found['issues']] == ['%s%04d' % (comicid, n) for n in range(3, 7)]
+    assert found['valid'] is True
@@ -0,0 +1,64 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+import pytest
+
+import fixtures
+import mylar
+from mylar import db, statuschange, updater
+
+def totals(comicid):
+    row = db.DBConnection().selectone('SELECT Have, Total FROM comics WHERE ComicID=?', [comicid]).fetchone()
+    return (row['Have'], row['Total'])
+
+def rescanned(comicid):
+    updater.forceRescan(comicid)
+    return totals(comicid)
+
+@pytest.fixture
+def library(mylar_env):
+    #15 issues of each series on disk, 20 in the db.
+    lib = fixtures.library_tree(os.path.join(str(mylar_env), 'library'), 30, per_series=15)
+    series = fixtures.populate_db(2, 40, dict((s['comicid'], s['location']) for s in lib))
+    for s in series:
+        updater.forceRescan(s['comicid'])
+    return [s['comicid'] for s in series]
+
+@pytest.mark.parametrize('snatched_havetotal', [False, True])
+def test_change_status_totals_match_rescan(library, snatched_havetotal):
+    mylar.CONFIG.SNATCHED_HAVETOTAL = snatched_havetotal
+    myDB = db.DBConnection()
+    missing = [x['IssueID'] for x in myDB.select("SELECT IssueID FROM issues WHERE ComicID=? AND Status NOT IN ('Downloaded', 'Archived') ORDER BY IssueID", [library[0]])]
+    assert len(missing) >= 3
+
+    #every combination that moves an issue into / out of / around the Have tally.
+    steps = [dict(status_to='Wanted', status_from='Skipped'),
+             dict(status_to='Archived', issueids=missing[:1]),
+             dict(status_to='Snatched', issueids=missing[1:2]),
+             dict(status_to='Skipped', comicids=library[1], status_from='Wanted'),
+             dict(status_to='Wanted', issueids=missing[:1])]
+    for step in steps:
+        result = statuschange.change_status(notify=False, **step)
+        assert result['changed']
+        for comicid in result['series']:
+            assert totals(comicid) == rescanned(comicid)
+
+def test_change_status_noop_leaves_totals(library):
+    before = [totals(x) for x in library]
+    result = statuschange.change_status('Downloaded', status_from='Downloaded', notify=False)
+    assert result['changed'] == []
+    assert [totals(x) for x in library] == before
@@ -0,0 +1,73 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import zipfile
+import collections
+
+import pytest
+
+from mylar.downloaders import transfer
+
+MEMBERS = [('Foo 001.cbz', b'1' * 5000), ('a/Foo 002.cbz', b'2' * 5000), ('b/Foo 002.cbz', b'3' * 5000),
+           ('notes.nfo', b'nfo'), ('Foo 003.cbz', b'4' * 5000)]
+
+def make_pack(path):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in MEMBERS:
+            zf.writestr(name, data)
+
+def extracted(dst):
+    found = {}
+    for dirname, subs, files in os.walk(dst):
+        for f in files:
+            with open(os.path.join(dirname, f), 'rb') as fh:
+                found[f] = fh.read()
+    return found
+
+def test_extract_pack_recovers_after_failing_part_way(tmp_path, monkeypatch):
+    pack = str(tmp_path / 'pack.zip')
+    dst = str(tmp_path / 'pack')
+    make_pack(pack)
+    monkeypatch.setattr(transfer, 'FREE_SPACE_MIN', 0)
+
+    #plenty of room for the first two members, none for the third.
+    real = shutil.disk_usage
+    calls = []
+    def disk_usage(path):
+        calls.append(path)
+        if len(calls) == 3:
+            return collections.namedtuple('usage', 'total used free')(0, 0, 0)
+        return real(path)
+    monkeypatch.setattr(transfer.shutil, 'disk_usage', disk_usage)
+
+    done = []
+    with pytest.raises(OSError):
+        for member_dir in transfer.extract_pack(pack, dst):
+            done.append(os.path.basename(member_dir))
+    assert done == ['Foo 003', 'Foo 002']
+
+    #what's left is still a readable zip holding exactly the members that weren't extracted.
+    with zipfile.ZipFile(pack) as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == ['Foo 001.cbz', 'a/Foo 002.cbz']
+
+    #running it again carries on from there and clears the zip away once it's empty of issues.
+    for member_dir in transfer.extract_pack(pack, dst):
+        done.append(os.path.basename(member_dir))
+    assert sorted(done) == ['Foo 001', 'Foo 002', 'Foo 002 (2)', 'Foo 003']
+    assert not os.path.exists(pack)
+    assert sorted(extracted(dst).values()) == sorted([x[1] for x in MEMBERS if x[0].endswith('.cbz')])
@@ -0,0 +1,54 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+import types
+
+from mylar import verdicts
+
+ENTRY = {'title': 'Foo 001 (2021) (digital) (Zone-Empire).cbz', 'link': 'https://indexer.example/getnzb/1.nzb'}
+
+def matcher(**kwargs):
+    m = dict((k, None) for k in verdicts.ISSUE_KEYS)
+    m.update({'ComicName': 'Foo', 'IssueNumber': '1', 'IssueID': '2000', 'manual': False, 'tmpprov': 'Bench',
+              'nzbprov': 'newznab', 'RSS': 'no', 'cmloopit': 1, 'chktpb': 0})
+    m.update(kwargs)
+    return types.SimpleNamespace(**m)
+
+def reject(m):
+    cache = verdicts.VerdictCache(m, 1)
+    cache.record(ENTRY, False)
+    cache.flush()
+
+def test_rejection_does_not_carry_across_search_passes(mylar_env):
+    #search.py steps cmloopit 3 -> 2 -> 1 (and bumps chktpb on the last pass) within one search.
+    reject(matcher(cmloopit=3))
+    assert verdicts.VerdictCache(matcher(cmloopit=3), 1).rejected(ENTRY) is True
+    assert verdicts.VerdictCache(matcher(cmloopit=1), 1).rejected(ENTRY) is False
+
+    reject(matcher(cmloopit=1, chktpb=0))
+    assert verdicts.VerdictCache(matcher(cmloopit=1, chktpb=2), 1).rejected(ENTRY) is False
+
+def test_rejection_does_not_carry_between_rss_and_api(mylar_env):
+    reject(matcher(RSS='yes'))
+    assert verdicts.VerdictCache(matcher(RSS='yes'), 1).rejected(ENTRY) is True
+    assert verdicts.VerdictCache(matcher(RSS='no'), 1).rejected(ENTRY) is False
+    assert verdicts.VerdictCache(matcher(RSS='yes', nzbprov='torznab'), 1).rejected(ENTRY) is False
+
+def test_accepted_is_never_downgraded(mylar_env):
+    cache = verdicts.VerdictCache(matcher(), 1)
+    cache.record(ENTRY, True)
+    cache.record(ENTRY, False)
+    cache.flush()
+    assert verdicts.VerdictCache(matcher(), 1).rejected(ENTRY) is False